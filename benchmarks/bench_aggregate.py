@@ -0,0 +1,37 @@
+"""Benchmark streaming aggregation cost against the window length.
+
+Usage: python benchmarks/bench_aggregate.py [snapshots]
+"""
+import sys
+from time import perf_counter
+
+from smbmc.aggregate import StreamAggregator
+from smbmc.ipmi_pmbus import process_pmbus_response
+from smbmc.ipmi_sensor import process_sensor_response
+from smbmc.util import extract_xml_attr
+
+
+def main(snapshots=5000):
+    """Time updates with windows holding 10 to 100,000 readings.
+
+    Args:
+        snapshots: Snapshots added per window length.
+    """
+    sensor_xml = open("tests/unit/ipmi_response_sensors.xml").read()
+    pmbus_xml = open("tests/unit/ipmi_response_pmbus.xml").read()
+    metrics = {
+        "sensor": process_sensor_response(extract_xml_attr(sensor_xml, ".//SENSOR")),
+        "pmbus": process_pmbus_response(extract_xml_attr(pmbus_xml, ".//PSItem")),
+    }
+
+    for window in (10, 1000, 100_000):
+        aggregator = StreamAggregator(window=window, groups={"host": "rack"})
+        start = perf_counter()
+        for timestamp in range(snapshots):
+            aggregator.update("host", metrics, timestamp)
+        elapsed = perf_counter() - start
+        print(f"window {window:>7} s  {elapsed * 1e6 / snapshots:8.1f} us/snapshot")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
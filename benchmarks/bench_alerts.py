@@ -0,0 +1,47 @@
+"""Benchmark the alert engine across a simulated fleet.
+
+Usage: python benchmarks/bench_alerts.py [sensors]
+"""
+import random
+import sys
+from timeit import repeat
+
+from smbmc.alerts import AlertEngine
+
+
+def main(sensors=300_000):
+    """Time evaluate_arrays() with and without NumPy.
+
+    Args:
+        sensors: Number of sensors evaluated per cycle.
+    """
+    rng = random.Random(0)
+    readings = [rng.uniform(20, 95) for _ in range(sensors)]
+    thresholds = tuple([value] * sensors for value in (5, 10, 15, 80, 85, 90))
+
+    for use_numpy in (True, False):
+        engine = AlertEngine(hysteresis=1, use_numpy=use_numpy)
+        indexes = [
+            engine.index(f"host{i // 60}", f"sensor{i % 60}") for i in range(sensors)
+        ]
+        if use_numpy:
+            import numpy
+
+            indexes = numpy.asarray(indexes)
+            columns = (numpy.asarray(readings), tuple(map(numpy.asarray, thresholds)))
+        else:
+            columns = (readings, thresholds)
+
+        best = min(
+            repeat(
+                lambda: engine.evaluate_arrays(indexes, *columns, timestamp=0),
+                number=1,
+                repeat=5,
+            )
+        )
+        backend = "numpy" if use_numpy else "python"
+        print(f"{backend:>6}: {sensors} sensors in {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,49 @@
+"""Benchmark collector throughput against the number of worker processes.
+
+Polls replayed cassette responses continuously, so that decoding is the
+only cost.
+
+Usage: python benchmarks/bench_collector.py [hosts] [seconds]
+"""
+import os
+import sys
+from time import perf_counter
+
+from smbmc.collector import Collector
+from smbmc.replay import CassetteSessionFactory
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+
+
+def main(hosts=256, seconds=5):
+    """Measure polls per second for 1, 2, 4... workers.
+
+    Args:
+        hosts: Number of simulated hosts.
+        seconds: Duration of each measurement.
+    """
+    servers = [f"http://bmc-{i}" for i in range(hosts)]
+    factory = CassetteSessionFactory({server: CASSETTE for server in servers})
+
+    workers = 1
+    while workers <= os.cpu_count():
+        with Collector(
+            servers, workers=workers, interval=0, session_factory=factory
+        ) as collector:
+            polls = 0
+            batches = collector.collect(timeout=60)
+            # skip each worker's first cycle, which includes start-up
+            for _ in range(workers):
+                next(batches)
+            start = perf_counter()
+            for batch in batches:
+                polls += len(batch) // (28 + 40)
+                if perf_counter() - start >= seconds:
+                    break
+            elapsed = perf_counter() - start
+        print(f"{workers:3d} workers {polls / elapsed:10.1f} polls/s")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,221 @@
+"""Benchmark columnar export against the per-row exporters.
+
+Writes sweeps of a simulated fleet in every format, then scans each file for
+the mean "System Temp" reading. Every host reports the same readings, which
+flatters the compressed sizes of the columnar formats; scan times are
+representative.
+
+Usage: python benchmarks/bench_columnar.py [hosts] [sweeps]
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+from smbmc.columnar import ColumnarWriter
+from smbmc.columnar import read_npz
+from smbmc.export import CsvExporter
+from smbmc.export import NdjsonExporter
+from smbmc.ipmi_pmbus import process_pmbus_response
+from smbmc.ipmi_sensor import process_sensor_response
+from smbmc.util import extract_xml_attr
+
+NAME = "System Temp"
+
+
+def scan_ndjson(path):
+    """Mean reading of NAME, parsing every line.
+
+    Args:
+        path: NDJSON file.
+
+    Returns:
+        float: Mean reading.
+    """
+    total = count = 0
+    with open(path) as f:
+        for line in f:
+            row = json.loads(line)
+            if row["name"] == NAME:
+                total += row["reading"]
+                count += 1
+    return total / count
+
+
+def scan_csv(path):
+    """Mean reading of NAME, parsing every row.
+
+    Args:
+        path: CSV file.
+
+    Returns:
+        float: Mean reading.
+    """
+    total = count = 0
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if row["name"] == NAME:
+                total += float(row["reading"])
+                count += 1
+    return total / count
+
+
+def scan_arrow(path, file_format):
+    """Mean reading of NAME, reading two columns.
+
+    Args:
+        path: Parquet or Arrow IPC stream file.
+        file_format: "parquet" or "arrow".
+
+    Returns:
+        float: Mean reading.
+    """
+    import pyarrow
+    import pyarrow.compute as pc
+
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=["name", "reading"])
+    else:
+        with pyarrow.ipc.open_stream(path) as reader:
+            table = reader.read_all().select(["name", "reading"])
+    names = table.column("name").cast(pyarrow.string())
+    return pc.mean(table.column("reading").filter(pc.equal(names, NAME))).as_py()
+
+
+def scan_npz(path):
+    """Mean reading of NAME, reading two columns.
+
+    Args:
+        path: npz table.
+
+    Returns:
+        float: Mean reading.
+    """
+    table = read_npz(path, ["name", "reading"], decode=False)
+    code = table["name.dictionary"].tolist().index(NAME)
+    return float(table["reading"][table["name"] == code].mean())
+
+
+def write_rows(base, file_format, names, metrics, sweeps):
+    """Write sweeps with a per-row exporter.
+
+    Args:
+        base: Path of the file, without extension.
+        file_format: "ndjson" or "csv".
+        names: Hosts per sweep.
+        metrics: Metrics of every host.
+        sweeps: Number of sweeps.
+
+    Returns:
+        str: Path of the file written.
+    """
+    path = f"{base}.{file_format}"
+    exporter = {"ndjson": NdjsonExporter, "csv": CsvExporter}[file_format]
+    with open(path, "w") as f, exporter(f) as writer:
+        for sweep in range(sweeps):
+            for host in names:
+                writer.write(host, metrics, 1.7e9 + sweep * 10)
+    return path
+
+
+def write_columns(base, file_format, names, metrics, sweeps):
+    """Write sweeps with ColumnarWriter.
+
+    Args:
+        base: Path of the files, without extension.
+        file_format: "parquet", "arrow" or "npz".
+        names: Hosts per sweep.
+        metrics: Metrics of every host.
+        sweeps: Number of sweeps.
+
+    Returns:
+        str: Path of the sensor file written.
+    """
+    with ColumnarWriter(base, file_format) as writer:
+        for sweep in range(sweeps):
+            writer.write_sweep(dict.fromkeys(names, metrics), 1.7e9 + sweep * 10)
+    return writer.paths["sensor"]
+
+
+def scan(path, file_format):
+    """Mean reading of NAME, in any format.
+
+    Args:
+        path: File written by write_rows() or write_columns().
+        file_format: Format of the file.
+
+    Returns:
+        float: Mean reading.
+    """
+    if file_format == "ndjson":
+        return scan_ndjson(path)
+    if file_format == "csv":
+        return scan_csv(path)
+    if file_format == "npz":
+        return scan_npz(path)
+    return scan_arrow(path, file_format)
+
+
+def available_formats():
+    """Formats that can be written, given the installed packages.
+
+    Returns:
+        list: Format names.
+    """
+    formats = ["ndjson", "csv", "npz"]
+    try:
+        import pyarrow  # noqa: F401
+
+        formats[2:2] = ["parquet", "arrow"]
+    except ImportError:
+        print("pyarrow is not installed; skipping parquet and arrow")
+    return formats
+
+
+def main(hosts=500, sweeps=20):
+    """Write and scan every format.
+
+    Args:
+        hosts: Hosts per sweep.
+        sweeps: Number of sweeps.
+    """
+    hosts, sweeps = int(hosts), int(sweeps)
+    sensor_xml = open("tests/unit/ipmi_response_sensors.xml").read()
+    pmbus_xml = open("tests/unit/ipmi_response_pmbus.xml").read()
+    metrics = {
+        "sensor": process_sensor_response(extract_xml_attr(sensor_xml, ".//SENSOR")),
+        "pmbus": process_pmbus_response(extract_xml_attr(pmbus_xml, ".//PSItem")),
+    }
+    names = [f"http://10.0.{i // 250}.{i % 250}" for i in range(hosts)]
+
+    directory = tempfile.mkdtemp()
+    base = os.path.join(directory, "fleet")
+    for file_format in available_formats():
+        write_format = write_rows if file_format in ("ndjson", "csv") else write_columns
+        start = perf_counter()
+        path = write_format(base, file_format, names, metrics, sweeps)
+        write = perf_counter() - start
+        size = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory)
+        )
+
+        start = perf_counter()
+        mean = scan(path, file_format)
+        duration = perf_counter() - start
+
+        print(
+            f"{file_format:<8} write {write:6.2f} s  size {size / 2 ** 20:7.2f} MiB  "
+            f"scan {duration * 1e3:8.1f} ms  (mean {mean:.1f})"
+        )
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,102 @@
+"""Benchmark decoding of sensor and power supply hexadecimal fields.
+
+Compares decoding each field with int(value, 16) against the batched
+sensor decode and the compiled power supply decode, with the variant looked
+up per item or cached per host.
+
+Usage: python benchmarks/bench_decode.py [iterations]
+"""
+import sys
+from operator import itemgetter
+from timeit import repeat
+
+from smbmc.ipmi_pmbus import PSItemDecoder
+from smbmc.ipmi_pmbus import process_pmbus_psu
+from smbmc.ipmi_sensor import _process_threshold_sensor_fields
+from smbmc.ipmi_sensor import is_threshold_sensor
+from smbmc.ipmi_sensor import process_threshold_sensor
+from smbmc.models import PowerSupply
+from smbmc.util import extract_xml_attr
+
+_READINGS = itemgetter(
+    "acInVoltage",
+    "acInCurrent",
+    "acInPower",
+    "dc12OutVoltage",
+    "dc12OutCurrent",
+    "dcOutPower",
+    "temp1",
+    "temp2",
+    "fan1",
+    "fan2",
+)
+
+
+def per_field_psu(item):
+    """Decode a power supply the way process_pmbus_psu() did before.
+
+    Args:
+        item: A single power supply obtained from an XML response.
+
+    Returns:
+        PowerSupply: Fully populated power supply, minus the ID.
+    """
+    psu = PowerSupply()
+    psu.name = item["name"]
+    psu.status = item["a_b_PS_Status_I2C"]
+    psu.type = item["psType"]
+    (
+        psu.input_voltage,
+        input_current,
+        psu.input_power,
+        output_voltage,
+        output_current,
+        psu.output_power,
+        psu.temp_1,
+        psu.temp_2,
+        psu.fan_1,
+        psu.fan_2,
+    ) = [int(value, 16) for value in _READINGS(item)]
+    psu.input_current = input_current / 1000
+    psu.output_voltage = output_voltage / 10
+    psu.output_current = output_current / 1000
+    return psu
+
+
+def main(iterations=2000):
+    """Time decoding every sensor and power supply of a response.
+
+    Args:
+        iterations: Number of responses decoded per measurement.
+    """
+    sensor_xml = open("tests/unit/ipmi_response_sensors.xml").read()
+    pmbus_xml = open("tests/unit/ipmi_response_pmbus.xml").read()
+    sensors = [
+        item
+        for item in extract_xml_attr(sensor_xml, ".//SENSOR")
+        if is_threshold_sensor(item["ERTYPE"])
+    ]
+    power_supplies = extract_xml_attr(pmbus_xml, ".//PSItem")
+
+    cases = [
+        ("sensors, per field", _process_threshold_sensor_fields, sensors),
+        ("sensors, batched", process_threshold_sensor, sensors),
+        ("power supplies, per field", per_field_psu, power_supplies),
+        ("power supplies, compiled", process_pmbus_psu, power_supplies),
+        ("power supplies, per host", PSItemDecoder().decode, power_supplies),
+    ]
+    for label, decode, items in cases:
+
+        def run():
+            for item in items:
+                decode(item)
+
+        best = min(repeat(run, number=iterations, repeat=5))
+        print(
+            f"{label:<28} {best * 1e6 / iterations:8.1f} us per response "
+            f"({len(items)} items)"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
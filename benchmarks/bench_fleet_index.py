@@ -0,0 +1,75 @@
+"""Benchmark FleetIndex updates and queries against rescanning every host.
+
+Usage: python benchmarks/bench_fleet_index.py [hosts]
+"""
+import copy
+import random
+import sys
+from timeit import repeat
+
+from smbmc.aggregate import iter_series
+from smbmc.fleet_index import FleetIndex
+from smbmc.ipmi_pmbus import process_pmbus_response
+from smbmc.ipmi_sensor import process_sensor_response
+from smbmc.util import extract_xml_attr
+
+
+def main(hosts=10000):
+    """Index a fleet, then time updates and queries.
+
+    Args:
+        hosts: Number of hosts.
+    """
+    hosts = int(hosts)
+    sensor_xml = open("tests/unit/ipmi_response_sensors.xml").read()
+    pmbus_xml = open("tests/unit/ipmi_response_pmbus.xml").read()
+    base = {
+        "sensor": process_sensor_response(extract_xml_attr(sensor_xml, ".//SENSOR")),
+        "pmbus": process_pmbus_response(extract_xml_attr(pmbus_xml, ".//PSItem")),
+    }
+
+    rng = random.Random(0)
+    snapshots = {}
+    for i in range(hosts):
+        metrics = copy.deepcopy(base)
+        for sensor in metrics["sensor"]:
+            sensor.reading += rng.randrange(-5, 6)
+        snapshots[f"host-{i}"] = metrics
+    labels = {host: {"rack": f"r{i // 40}"} for i, host in enumerate(snapshots)}
+    index = FleetIndex(labels)
+    index.update_many(snapshots, 0)
+    latest = {host: dict(iter_series(metrics)) for host, metrics in snapshots.items()}
+
+    def update():
+        host = f"host-{rng.randrange(hosts)}"
+        metrics = snapshots[host]
+        metrics["sensor"][0].reading = rng.randrange(20, 90)
+        index.update(host, metrics)
+
+    def scan_top():
+        values = [(v.get("System Temp"), h) for h, v in latest.items()]
+        return sorted(values, reverse=True)[:20]
+
+    def scan_group_sums():
+        sums = {}
+        for host, values in latest.items():
+            rack = labels[host]["rack"]
+            sums[rack] = sums.get(rack, 0) + values["power.input"]
+        return sums
+
+    cases = [
+        ("update one host", update),
+        ("top 20, indexed", lambda: index.top("System Temp", 20)),
+        ("top 20, rescan", scan_top),
+        ("p99, indexed", lambda: index.percentile("System Temp", 99)),
+        ("rack sums, indexed", lambda: index.group_sums("power.input", "rack")),
+        ("rack sums, rescan", scan_group_sums),
+    ]
+    for label, case in cases:
+        number = 1000 if "rescan" not in label else 10
+        best = min(repeat(case, number=number, repeat=5)) / number
+        print(f"{label:<22} {best * 1e6:10.1f} us  ({hosts} hosts)")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,106 @@
+"""Benchmark fleet startup, with and without a login pre-warm.
+
+Serves the responses of a cassette from a local HTTP server whose logins
+take a while, as a BMC's do, reached through a distinct loopback address
+per host. Compares polling a fresh fleet, logging in on the first poll of
+each host, against pre-warming it first.
+
+Usage: python benchmarks/bench_prewarm.py [hosts] [login_seconds] [rate]
+"""
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from time import perf_counter
+from time import sleep
+from urllib.parse import parse_qsl
+
+from smbmc.fleet import Fleet
+from smbmc.transport import load_cassette
+from smbmc.transport import request_key
+from smbmc.transport import Urllib3Transport
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+
+
+def serve(responses, login_seconds):
+    """Start a local HTTP server answering with recorded responses.
+
+    Args:
+        responses: Responses, as returned by load_cassette().
+        login_seconds: Time taken by each login.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+        wbufsize = 65536
+
+        def do_POST(self):  # noqa: N802
+            length = int(self.headers["Content-Length"])
+            data = parse_qsl(self.rfile.read(length).decode())
+            self.send_response(200)
+            if self.path == "/cgi/login.cgi":
+                sleep(login_seconds)
+                body = b""
+                self.send_header("Set-Cookie", "SID=bench; path=/")
+            else:
+                body = responses[request_key(self.path, data)].encode()
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.request_queue_size = 1024
+    httpd = ThreadingHTTPServer(("0.0.0.0", 0), Handler)  # nosec
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def main(hosts=200, login_seconds=0.2, rate=100.0):
+    """Time the first poll of every host of a fresh fleet.
+
+    Args:
+        hosts: Number of hosts, spread over /24 subnets of 50 hosts.
+        login_seconds: Time taken by each login.
+        rate: Login rate of the pre-warm, per second.
+    """
+    hosts = int(hosts)
+    responses = load_cassette(CASSETTE)
+    httpd = serve(responses, float(login_seconds))
+
+    def fleet():
+        fleet = Fleet(
+            "user", "pass", session=Urllib3Transport(num_pools=64, keep_cookies=False)
+        )
+        for i in range(hosts):
+            fleet.add(f"http://127.0.{i // 50}.{i % 50 + 1}:{httpd.server_port}")
+        return fleet
+
+    cold = fleet()
+    start = perf_counter()
+    for client in cold:
+        client.get_metrics(["pmbus"])
+    duration = perf_counter() - start
+    print(f"login on first poll    {duration:6.2f} s")
+
+    warm = fleet()
+    start = perf_counter()
+    report = warm.prewarm(rate=float(rate), per_subnet=8, concurrency=64)
+    warmed = perf_counter() - start
+    for client in warm:
+        client.get_metrics(["pmbus"])
+    duration = perf_counter() - start
+    print(f"pre-warm, then poll    {duration:6.2f} s ({report})")
+    print(f"  pre-warm alone       {warmed:6.2f} s")
+
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
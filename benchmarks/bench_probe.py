@@ -0,0 +1,118 @@
+"""Benchmark sweeping a fleet with Fleet.probe().
+
+Serves a GENERIC_INFO response, and the sensor response of a cassette, from
+a local HTTP server reached through a distinct loopback address per host,
+so that every host has its own connection. Compares a probe sweep against
+fetching sensors from every host.
+
+Usage: python benchmarks/bench_probe.py [hosts] [concurrency]
+"""
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from time import perf_counter
+from urllib.parse import parse_qsl
+
+from smbmc.fleet import Fleet
+from smbmc.transport import load_cassette
+from smbmc.transport import request_key
+from smbmc.transport import Urllib3Transport
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+GENERIC_XML = (
+    '<?xml version="1.0"?><IPMI><GENERIC_INFO>'
+    '<GENERIC IPMIFW_TAG="BL_SUPERMICRO" IPMIFW_VERSION="0325"/>'
+    "</GENERIC_INFO></IPMI>"
+)
+
+
+def serve(responses):
+    """Start a local HTTP server answering with recorded responses.
+
+    Args:
+        responses: Responses, keyed as by smbmc.transport.request_key().
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+        wbufsize = 65536
+
+        def do_POST(self):  # noqa: N802
+            length = int(self.headers["Content-Length"])
+            data = parse_qsl(self.rfile.read(length).decode())
+            self.send_response(200)
+            if self.path == "/cgi/login.cgi":
+                body = b""
+                self.send_header("Set-Cookie", "SID=bench; path=/")
+            else:
+                body = responses[request_key(self.path, data)].encode()
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.request_queue_size = 1024
+    httpd = ThreadingHTTPServer(("0.0.0.0", 0), Handler)  # nosec
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def main(hosts=2000, concurrency=256):
+    """Time a probe sweep and a sensor sweep of the fleet.
+
+    Args:
+        hosts: Number of hosts.
+        concurrency: Hosts queried in parallel.
+    """
+    hosts = int(hosts)
+    concurrency = int(concurrency)
+    responses = load_cassette(CASSETTE)
+    responses[request_key("/cgi/ipmi.cgi", {"GENERIC_INFO.XML": "(0,0)"})] = GENERIC_XML
+    httpd = serve(responses)
+
+    sessions = [
+        ("requests", None),
+        ("urllib3", Urllib3Transport(num_pools=concurrency, keep_cookies=False)),
+    ]
+    for label, session in sessions:
+        fleet = Fleet(
+            "user", "pass", max_pools=concurrency, timeout=10, session=session
+        )
+        for i in range(hosts):
+            fleet.add(f"http://127.0.{i // 250}.{i % 250 + 1}:{httpd.server_port}")
+
+        start = perf_counter()
+        results = fleet.probe(timeout=10, concurrency=concurrency)
+        duration = perf_counter() - start
+        reachable = sum(result.reachable for result in results.values())
+        rtts = sorted(result.rtt for result in results.values() if result.rtt)
+        print(
+            f"probe, {label:<8} {hosts} hosts in {duration:6.2f} s "
+            f"({hosts / duration:6.0f} hosts/s), {reachable} reachable, "
+            f"median rtt {rtts[len(rtts) // 2] * 1e3:.2f} ms"
+        )
+        fleet.close()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        start = perf_counter()
+        list(executor.map(lambda client: client.get_sensor_metrics(), fleet))
+        duration = perf_counter() - start
+    print(
+        f"sensors, urllib3 {hosts} hosts in {duration:6.2f} s ({hosts / duration:6.0f} "
+        "hosts/s), including login"
+    )
+
+    fleet.close()
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,66 @@
+"""Benchmark snapshot serialization against json.dumps(vars(...)).
+
+Usage: python benchmarks/bench_serialize.py [snapshots]
+"""
+import json
+import sys
+from timeit import repeat
+
+from smbmc import serialize
+from smbmc.ipmi_pmbus import process_pmbus_response
+from smbmc.ipmi_sensor import process_sensor_response
+from smbmc.util import extract_xml_attr
+
+
+def naive_dumps(metrics):
+    """Serialize a snapshot the way consumers did before.
+
+    Args:
+        metrics: Snapshot.
+
+    Returns:
+        str: JSON document.
+    """
+    return json.dumps(
+        {key: [vars(v) for v in values] for key, values in metrics.items()}
+    )
+
+
+def main(snapshots=1000):
+    """Time serializing and deserializing a batch of snapshots.
+
+    Args:
+        snapshots: Number of snapshots per batch.
+    """
+    sensor_xml = open("tests/unit/ipmi_response_sensors.xml").read()
+    pmbus_xml = open("tests/unit/ipmi_response_pmbus.xml").read()
+    metrics = {
+        "sensor": process_sensor_response(extract_xml_attr(sensor_xml, ".//SENSOR")),
+        "pmbus": process_pmbus_response(extract_xml_attr(pmbus_xml, ".//PSItem")),
+    }
+
+    cases = [
+        ("json.dumps(vars())", naive_dumps, None),
+        ("serialize.dumps", serialize.dumps, serialize.loads),
+        ("serialize.snapshot_to_dict", serialize.snapshot_to_dict, None),
+    ]
+    try:
+        import msgpack  # noqa: F401
+
+        cases.append(("serialize.packb", serialize.packb, serialize.unpackb))
+    except ImportError:
+        print("msgpack is not installed; skipping")
+
+    for label, encode, decode in cases:
+        data = encode(metrics)
+        best = min(repeat(lambda: encode(metrics), number=snapshots, repeat=5))
+        size = len(data) if isinstance(data, (str, bytes)) else "-"
+        line = f"{label:<28} encode {best * 1e6 / snapshots:8.1f} us  size {size}"
+        if decode is not None:
+            best = min(repeat(lambda: decode(data), number=snapshots, repeat=5))
+            line += f"  decode {best * 1e6 / snapshots:8.1f} us"
+        print(line)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,78 @@
+"""Benchmark tiered polling against full polls.
+
+Answers requests from memory, with a BMC honouring the SENSOR_INFO range
+argument, and compares the bytes received and the client-side cost of a
+poll fetching every sensor against a poll fetching a fast tier of two
+temperatures.
+
+Usage: python benchmarks/bench_tiers.py [polls]
+"""
+import re
+import sys
+from timeit import repeat
+
+from smbmc import Client
+from smbmc.tiers import TieredPoller
+from smbmc.transport import FakeTransport
+
+SENSOR_XML = open("tests/unit/ipmi_response_sensors.xml").read()
+FAST = ["System Temp", "SAS2 FTemp1"]
+
+
+class BytesTransport(FakeTransport):
+    """Fake transport counting the bytes of the responses."""
+
+    received = 0
+
+    def post(self, url, data=None, cookies=None, timeout=None):
+        """Answer a request, counting its bytes.
+
+        Args:
+            url: Request URL.
+            data: Form data.
+            cookies: Cookies sent in addition to those held.
+            timeout: Ignored.
+
+        Returns:
+            Response: Response body and cookies.
+        """
+        response = super().post(url, data, cookies, timeout)
+        self.received += len(response.text)
+        return response
+
+
+def main(polls=2000):
+    """Time full and fast polls.
+
+    Args:
+        polls: Number of polls per measurement.
+    """
+    transport = BytesTransport()
+    transport.add({"SENSOR_INFO.XML": "(1,ff)"}, SENSOR_XML)
+    for item in re.findall("<SENSOR [^>]*/>", SENSOR_XML):
+        number = re.search('NUMBER="([^"]*)"', item).group(1)
+        transport.add(
+            {"SENSOR_INFO.XML": f"(1,{number})"},
+            f"<?xml version='1.0'?><IPMI><SENSOR_INFO>{item}</SENSOR_INFO></IPMI>",
+        )
+    client = Client("http://bmc", "user", "pass", transport=transport)
+    poller = TieredPoller(client, FAST, slow_interval=1e9)
+    poller.get_metrics(["sensor"])
+
+    cases = [
+        ("full poll", lambda: client.get_metrics(["sensor"])),
+        (f"fast tier, {len(FAST)} sensors", lambda: poller.get_metrics(["sensor"])),
+    ]
+    for label, poll in cases:
+        transport.received = 0
+        poll()
+        received = transport.received
+        best = min(repeat(poll, number=polls, repeat=5))
+        print(
+            f"{label:<24} {best * 1e6 / polls:8.1f} us per poll, "
+            f"{received:6d} bytes received"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,94 @@
+"""Benchmark Client.get_metrics() over each transport.
+
+Serves the responses of a cassette from a local HTTP server with
+keep-alive, and polls it through every transport.
+
+Usage: python benchmarks/bench_transport.py [polls] [cassette]
+"""
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from time import perf_counter
+from urllib.parse import parse_qsl
+
+from smbmc import Client
+from smbmc.transport import FakeTransport
+from smbmc.transport import load_cassette
+from smbmc.transport import request_key
+from smbmc.transport import RequestsTransport
+from smbmc.transport import Urllib3Transport
+
+
+def serve(responses):
+    """Start a local HTTP server answering with recorded responses.
+
+    Args:
+        responses: Responses, as returned by load_cassette().
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # avoid Nagle / delayed ACK stalls between headers and body
+        disable_nagle_algorithm = True
+        wbufsize = 65536
+
+        def do_POST(self):  # noqa: N802
+            length = int(self.headers["Content-Length"])
+            data = parse_qsl(self.rfile.read(length).decode())
+            self.send_response(200)
+            if self.path == "/cgi/login.cgi":
+                body = b""
+                self.send_header("Set-Cookie", "SID=bench; path=/")
+            else:
+                body = responses[request_key(self.path, data)].encode()
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def main(polls=500, cassette="tests/integration/cassettes/Client_get_metrics.json"):
+    """Time polling through each transport.
+
+    Args:
+        polls: Number of polls per transport.
+        cassette: Path to a betamax cassette.
+    """
+    polls = int(polls)
+    responses = load_cassette(cassette)
+    httpd = serve(responses)
+    server = f"http://127.0.0.1:{httpd.server_port}"
+
+    cases = [
+        ("requests", server, RequestsTransport()),
+        ("urllib3", server, Urllib3Transport()),
+        ("fake (decode only)", "http://bmc", FakeTransport(responses)),
+    ]
+    for label, host, transport in cases:
+        client = Client(host, "user", "pass", transport=transport)
+        client.get_metrics()
+        start = perf_counter()
+        for _ in range(polls):
+            client.get_metrics()
+        duration = perf_counter() - start
+        transport.close()
+        print(
+            f"{label:<20} {duration * 1e3 / polls:8.2f} ms per poll "
+            f"({polls / duration:.0f} polls/s)"
+        )
+
+    httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
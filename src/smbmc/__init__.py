@@ -1,4 +1,6 @@
 """The smbmc package."""
+import os
+
 try:
     from importlib.metadata import version, PackageNotFoundError
 except ImportError:  # pragma: no cover
@@ -10,11 +12,21 @@ except PackageNotFoundError:  # pragma: no cover
     __version__ = "unknown"
 
 from .models import (
+    AuthenticationError,
+    DecodeError,
+    MissingMetric,
     PowerSupply,
     PowerSupplyFlag,
+    ProbeResult,
     Sensor,
+    SensorSet,
     SensorStateEnum,
     SensorTypeEnum,
     SensorUnitEnum,
 )
 from .client import Client
+
+if os.environ.get("SMBMC_PROFILE"):  # pragma: no cover
+    from .profiling import install_from_env
+
+    install_from_env()
@@ -0,0 +1,6 @@
+"""Runs the smbmc command-line interface."""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,350 @@
+"""Provides streaming aggregations over successive snapshots.
+
+StreamAggregator consumes snapshots, as returned by ``Client.get_metrics``,
+and keeps incremental state for every present threshold sensor and power
+supply reading:
+
+- an exponentially weighted moving average, with a half-life in seconds,
+  so that irregular polling intervals are weighted correctly
+- the rate of change per second since the previous reading
+- the minimum, maximum and mean over a rolling time window
+
+Each update costs O(1), amortised, regardless of the window length: the
+window keeps a running sum, and its minimum and maximum are tracked with
+monotonic deques, each reading being pushed and popped at most once.
+
+Power supply readings are named ``psu<id>.<attribute>``. Derived series are
+added for each power supply's efficiency, ``psu<id>.efficiency``
+(output_power / input_power, skipped while input_power is 0), and for each
+host's total ``power.input`` and ``power.output``. Hosts can be assigned to
+groups (e.g. racks), for which the sum of every series over the group's
+hosts is maintained, updated by the change in each host's contribution.
+"""
+from collections import deque
+from math import exp
+from math import log
+from time import time
+
+from .models import POWER_SUPPLY_READINGS
+from .models import SensorStateEnum
+
+_LN2 = log(2)
+
+
+def iter_series(metrics: dict):
+    """Readings of a snapshot, as named series.
+
+    Args:
+        metrics: Dict containing "sensor" and/or "pmbus" results.
+
+    Yields:
+        tuple: (name, value) of every present threshold sensor, power
+        supply reading and derived series. Power supply readings missing
+        from the firmware's response are skipped.
+    """
+    for sensor in metrics.get("sensor") or ():
+        if sensor.flags is None and sensor.state == SensorStateEnum.PRESENT:
+            yield sensor.name, sensor.reading
+
+    power_supplies = metrics.get("pmbus")
+    if power_supplies is not None:
+        input_power = output_power = 0
+        for psu in power_supplies:
+            prefix = f"psu{psu.id}."
+            for attr in POWER_SUPPLY_READINGS:
+                value = getattr(psu, attr)
+                if value is not None:
+                    yield prefix + attr, value
+            psu_input, psu_output = psu.input_power, psu.output_power
+            if psu_input is None or psu_output is None:
+                continue
+            if psu_input > 0:
+                yield prefix + "efficiency", psu_output / psu_input
+            input_power += psu_input
+            output_power += psu_output
+        yield "power.input", input_power
+        yield "power.output", output_power
+
+
+class Ewma:
+    """Exponentially weighted moving average with a half-life."""
+
+    __slots__ = ("halflife", "value", "timestamp")
+
+    def __init__(self, halflife: float):
+        """Creates an instance of Ewma.
+
+        Args:
+            halflife: Seconds after which a reading's weight has halved.
+        """
+        self.halflife = halflife
+        self.value = None
+        self.timestamp = None
+
+    def update(self, value: float, timestamp: float) -> float:
+        """Add a reading.
+
+        Args:
+            value: Reading.
+            timestamp: Time of the reading, in seconds.
+
+        Returns:
+            float: The updated average.
+        """
+        if self.value is None:
+            self.value = value
+        else:
+            dt = max(timestamp - self.timestamp, 0.0)
+            alpha = 1.0 - exp(-dt * _LN2 / self.halflife)
+            self.value += alpha * (value - self.value)
+        self.timestamp = timestamp
+        return self.value
+
+
+class Rate:
+    """Rate of change between successive readings."""
+
+    __slots__ = ("value", "timestamp", "rate")
+
+    def __init__(self):
+        """Creates an instance of Rate."""
+        self.value = None
+        self.timestamp = None
+        self.rate = None
+
+    def update(self, value: float, timestamp: float):
+        """Add a reading.
+
+        Args:
+            value: Reading.
+            timestamp: Time of the reading, in seconds.
+
+        Returns:
+            float: Change per second since the previous reading, or None
+            for the first reading or if no time has passed.
+        """
+        if self.value is not None and timestamp > self.timestamp:
+            self.rate = (value - self.value) / (timestamp - self.timestamp)
+        self.value = value
+        self.timestamp = timestamp
+        return self.rate
+
+
+class RollingWindow:
+    """Minimum, maximum and mean of the readings within a time window."""
+
+    __slots__ = ("length", "_values", "_min", "_max", "_sum")
+
+    def __init__(self, length: float):
+        """Creates an instance of RollingWindow.
+
+        Args:
+            length: Window length, in seconds.
+        """
+        self.length = length
+        self._values = deque()
+        # (timestamp, value), with values increasing / decreasing
+        self._min = deque()
+        self._max = deque()
+        self._sum = 0.0
+
+    def update(self, value: float, timestamp: float):
+        """Add a reading, and drop readings older than the window.
+
+        Args:
+            value: Reading.
+            timestamp: Time of the reading, in seconds.
+        """
+        self._values.append((timestamp, value))
+        self._sum += value
+
+        minimum = self._min
+        while minimum and minimum[-1][1] >= value:
+            minimum.pop()
+        minimum.append((timestamp, value))
+        maximum = self._max
+        while maximum and maximum[-1][1] <= value:
+            maximum.pop()
+        maximum.append((timestamp, value))
+
+        expired = timestamp - self.length
+        values = self._values
+        while values[0][0] <= expired:
+            self._sum -= values.popleft()[1]
+        while minimum[0][0] <= expired:
+            minimum.popleft()
+        while maximum[0][0] <= expired:
+            maximum.popleft()
+
+    def __len__(self):
+        """Number of readings within the window.
+
+        Returns:
+            int: Number of readings.
+        """
+        return len(self._values)
+
+    @property
+    def min(self):
+        """Smallest reading within the window, or None."""
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        """Largest reading within the window, or None."""
+        return self._max[0][1] if self._max else None
+
+    @property
+    def mean(self):
+        """Mean of the readings within the window, or None."""
+        return self._sum / len(self._values) if self._values else None
+
+
+class SeriesStats:
+    """Incremental statistics of one series.
+
+    Attributes:
+        last: Latest reading.
+        ewma: Ewma of the readings.
+        rate: Rate of change of the readings.
+        window: RollingWindow of the readings.
+    """
+
+    __slots__ = ("last", "ewma", "rate", "window")
+
+    def __init__(self, halflife: float, window: float):
+        """Creates an instance of SeriesStats.
+
+        Args:
+            halflife: EWMA half-life, in seconds.
+            window: Rolling window length, in seconds.
+        """
+        self.last = None
+        self.ewma = Ewma(halflife)
+        self.rate = Rate()
+        self.window = RollingWindow(window)
+
+    def update(self, value: float, timestamp: float):
+        """Add a reading.
+
+        Args:
+            value: Reading.
+            timestamp: Time of the reading, in seconds.
+        """
+        self.last = value
+        self.ewma.update(value, timestamp)
+        self.rate.update(value, timestamp)
+        self.window.update(value, timestamp)
+
+
+class StreamAggregator:
+    """StreamAggregator keeps incremental statistics of every host's series.
+
+    Can be used as a callback taking (host, metrics, timestamp).
+    """
+
+    def __init__(self, halflife=300.0, window=600.0, groups=None):
+        """Creates an instance of StreamAggregator.
+
+        Args:
+            halflife: EWMA half-life, in seconds. default: 300.
+            window: Rolling window length, in seconds. default: 600.
+            groups: Dict mapping hosts to group names. Hosts not in it
+                belong to no group. default: None.
+        """
+        self.halflife = halflife
+        self.window = window
+        self.groups = dict(groups or {})
+        self._series = {}
+        self._group_sums = {}
+        self._reported = {}
+
+    def update(self, host: str, metrics: dict, timestamp=None):
+        """Add a snapshot of one host.
+
+        Series the host no longer reports stop counting towards its group's
+        sums; their statistics are kept.
+
+        Args:
+            host: Host identifier.
+            metrics: Dict containing "sensor" and/or "pmbus" results.
+            timestamp: Seconds since the epoch. default: now.
+        """
+        timestamp = time() if timestamp is None else timestamp
+        series = self._series.get(host)
+        if series is None:
+            series = self._series[host] = {}
+        group = self.groups.get(host)
+        sums = None
+        if group is not None:
+            sums = self._group_sums.get(group)
+            if sums is None:
+                sums = self._group_sums[group] = {}
+
+        reported = self._reported.get(host, frozenset())
+        names = self._reported[host] = set()
+        for name, value in iter_series(metrics):
+            names.add(name)
+            stats = series.get(name)
+            if stats is None:
+                stats = series[name] = SeriesStats(self.halflife, self.window)
+            previous = stats.last if name in reported else 0
+            stats.update(value, timestamp)
+            if sums is not None:
+                sums[name] = sums.get(name, 0) + value - previous
+        if sums is not None:
+            for name in reported - names:
+                sums[name] -= series[name].last
+
+    __call__ = update
+
+    def update_many(self, snapshots: dict, timestamp=None):
+        """Add a snapshot of several hosts.
+
+        Hosts whose snapshot is None, e.g. having failed to respond to
+        Fleet.get_metrics(), keep their previous readings.
+
+        Args:
+            snapshots: Dict mapping hosts to their metrics.
+            timestamp: Seconds since the epoch. default: now.
+        """
+        timestamp = time() if timestamp is None else timestamp
+        for host, metrics in snapshots.items():
+            if metrics is not None:
+                self.update(host, metrics, timestamp)
+
+    def series(self, host: str, name: str) -> SeriesStats:
+        """Look up the statistics of a series.
+
+        Args:
+            host: Host identifier.
+            name: Sensor name, e.g. "CPU Temp", or derived series name,
+                e.g. "psu1.efficiency" or "power.input".
+
+        Returns:
+            SeriesStats: Statistics, or None if the series is unknown.
+        """
+        return self._series.get(host, {}).get(name)
+
+    def names(self, host: str) -> list:
+        """All series of a host.
+
+        Args:
+            host: Host identifier.
+
+        Returns:
+            list: Series names, in order of first appearance.
+        """
+        return list(self._series.get(host, ()))
+
+    def group_sum(self, group: str, name: str) -> float:
+        """Sum of the latest readings of a series over a group's hosts.
+
+        Args:
+            group: Group name.
+            name: Series name, e.g. "power.input" for total power.
+
+        Returns:
+            float: Sum, or 0 if no host of the group reported the series.
+        """
+        return self._group_sums.get(group, {}).get(name, 0)
@@ -0,0 +1,409 @@
+"""Provides batched threshold evaluation and alerting.
+
+The AlertEngine evaluates every reading against its thresholds in a single
+batched operation, using NumPy when it is installed and plain Python
+otherwise. It keeps a small state machine per (host, sensor) to apply
+hysteresis and debouncing, and only reports transitions.
+
+A threshold of 0 is not set, as decoded from the BMC's response, and is
+never crossed: a fan with lower thresholds only is not graded against its
+upper ones.
+"""
+from enum import IntEnum
+from math import inf
+from time import time
+
+from .models import PowerSupplyFlag
+from .models import SensorStateEnum
+
+
+class SeverityEnum(IntEnum):
+    """Enumeration of alert severities, ordered from least to most severe.
+
+    Possible Values:
+
+    - OK
+    - Non-Critical
+    - Critical
+    - Non-Recoverable
+    """
+
+    OK = 0
+    NON_CRITICAL = 1
+    CRITICAL = 2
+    NON_RECOVERABLE = 3
+
+
+#: Severity of each power supply failure bit.
+POWER_SUPPLY_SEVERITIES = {
+    PowerSupplyFlag.FAILURE: SeverityEnum.CRITICAL,
+    PowerSupplyFlag.PREDICTIVE_FAILURE: SeverityEnum.NON_CRITICAL,
+    PowerSupplyFlag.SOURCE_INPUT_LOST: SeverityEnum.CRITICAL,
+    PowerSupplyFlag.SOURCE_INPUT_OUT_OF_RANGE: SeverityEnum.CRITICAL,
+    PowerSupplyFlag.SOURCE_INPUT_DETECTED_OUT_OF_RANGE: SeverityEnum.NON_CRITICAL,
+    PowerSupplyFlag.CONFIGURATION_ERROR: SeverityEnum.NON_CRITICAL,
+}
+
+# power supply flags byte -> most severe matching severity
+_POWER_SUPPLY_LEVELS = tuple(
+    max(
+        [int(level) for bit, level in POWER_SUPPLY_SEVERITIES.items() if flags & bit],
+        default=0,
+    )
+    for flags in range(0x100)
+)
+
+
+class Alert:
+    """Alert describes a change of severity of a single sensor.
+
+    Attributes:
+        host: Host identifier.
+        name: Sensor name.
+        previous: Severity before the transition.
+        severity: Severity after the transition.
+        reading: Reading (or discrete flags) that caused the transition.
+        timestamp: Evaluation time (seconds since the epoch).
+    """
+
+    def __init__(self, host, name, previous, severity, reading, timestamp):
+        """Creates an instance of the Alert class.
+
+        Args:
+            host: Host identifier.
+            name: Sensor name.
+            previous: Severity before the transition.
+            severity: Severity after the transition.
+            reading: Reading that caused the transition.
+            timestamp: Evaluation time.
+        """
+        self.host = host
+        self.name = name
+        self.previous = previous
+        self.severity = severity
+        self.reading = reading
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        """Represent the alert.
+
+        Returns:
+            str: Representation of the alert.
+        """
+        return (
+            f"<Alert {self.host} {self.name!r}: {self.previous.name} -> "
+            f"{self.severity.name} ({self.reading})>"
+        )
+
+
+def _import_numpy():
+    """Import NumPy if installed.
+
+    Returns:
+        module: numpy, or None if it is not installed.
+    """
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        return None
+    return numpy
+
+
+def _levels_python(readings, thresholds, hysteresis):
+    """Compute raw and hysteresis-adjusted severities in pure Python.
+
+    Args:
+        readings: Readings.
+        thresholds: Six sequences: lnr, lc, lnc, unc, uc, unr.
+        hysteresis: Margin a reading must clear a threshold by to recover.
+
+    Returns:
+        tuple: Raw severities and severities with the hysteresis band
+        applied, as lists.
+    """
+    raw = []
+    held = []
+    h = hysteresis
+    for r, lnr, lc, lnc, unc, uc, unr in zip(readings, *thresholds):
+        # unset thresholds are never crossed
+        lnr, lc, lnc = lnr or -inf, lc or -inf, lnc or -inf
+        unc, uc, unr = unc or inf, uc or inf, unr or inf
+        raw.append((r < lnc or r > unc) + (r < lc or r > uc) + (r < lnr or r > unr))
+        held.append(
+            (r < lnc + h or r > unc - h)
+            + (r < lc + h or r > uc - h)
+            + (r < lnr + h or r > unr - h)
+        )
+    return raw, held
+
+
+def _levels_numpy(numpy, readings, thresholds, hysteresis):
+    """Compute raw and hysteresis-adjusted severities with NumPy.
+
+    Args:
+        numpy: The numpy module.
+        readings: Readings.
+        thresholds: Six sequences: lnr, lc, lnc, unc, uc, unr.
+        hysteresis: Margin a reading must clear a threshold by to recover.
+
+    Returns:
+        tuple: Raw severities and severities with the hysteresis band
+        applied, as int8 arrays.
+    """
+    r = numpy.asarray(readings, dtype=numpy.float64)
+    # unset thresholds are never crossed
+    lnr, lc, lnc, unc, uc, unr = (
+        numpy.where(t == 0, unset, t)
+        for t, unset in zip(
+            (numpy.asarray(t, dtype=numpy.float64) for t in thresholds),
+            (-inf, -inf, -inf, inf, inf, inf),
+        )
+    )
+    h = hysteresis
+
+    raw = ((r < lnc) | (r > unc)).astype(numpy.int8)
+    raw += (r < lc) | (r > uc)
+    raw += (r < lnr) | (r > unr)
+
+    held = ((r < lnc + h) | (r > unc - h)).astype(numpy.int8)
+    held += (r < lc + h) | (r > uc - h)
+    held += (r < lnr + h) | (r > unr - h)
+    return raw, held
+
+
+class AlertEngine:
+    """Evaluates readings against thresholds and reports transitions.
+
+    A sensor only changes severity once the new severity has been observed
+    for ``debounce`` consecutive evaluations. A sensor only recovers to a
+    lower severity once its reading clears the relevant thresholds by
+    ``hysteresis``.
+    """
+
+    def __init__(self, hysteresis=0.0, debounce=1, use_numpy=None):
+        """Initialises an instance of smbmc.alerts.AlertEngine.
+
+        Args:
+            hysteresis: Margin, in the sensor's unit, by which a reading must
+                clear a threshold before the severity is lowered. default: 0.
+            debounce: Consecutive evaluations a new severity must persist for
+                before it is reported. default: 1 (report immediately).
+            use_numpy: Whether to use NumPy. default: use it if installed.
+
+        Raises:
+            ImportError: NumPy was requested, but is not installed.
+        """
+        self.hysteresis = hysteresis
+        self.debounce = debounce
+        self._numpy = _import_numpy() if use_numpy in (None, True) else None
+        if use_numpy and self._numpy is None:  # pragma: no cover
+            raise ImportError("numpy is not installed")
+
+        self._keys = []
+        self._index = {}
+        # per-sensor state, indexed as self._keys
+        self._severity = self._new_state(0)
+        self._pending = self._new_state(0)
+        self._count = self._new_state(0)
+
+    def _new_state(self, size):
+        if self._numpy is not None:
+            return self._numpy.zeros(size, dtype=self._numpy.int32)
+        return [0] * size
+
+    def _grow(self):
+        missing = len(self._keys) - len(self._severity)
+        if missing <= 0:
+            return
+        if self._numpy is not None:
+            size = max(len(self._keys), 2 * len(self._severity))
+            for attr in ("_severity", "_pending", "_count"):
+                state = self._numpy.zeros(size, dtype=self._numpy.int32)
+                state[: len(getattr(self, attr))] = getattr(self, attr)
+                setattr(self, attr, state)
+        else:
+            for state in (self._severity, self._pending, self._count):
+                state.extend([0] * missing)
+
+    def index(self, host: str, name: str) -> int:
+        """Look up, or assign, the state index of a sensor.
+
+        Args:
+            host: Host identifier.
+            name: Sensor name.
+
+        Returns:
+            int: Index to pass to evaluate_arrays().
+        """
+        key = (host, name)
+        i = self._index.get(key)
+        if i is None:
+            i = self._index[key] = len(self._keys)
+            self._keys.append(key)
+        return i
+
+    def severity(self, host: str, name: str) -> SeverityEnum:
+        """Current (debounced) severity of a sensor.
+
+        Args:
+            host: Host identifier.
+            name: Sensor name.
+
+        Returns:
+            SeverityEnum: Severity; OK if the sensor has never been seen.
+        """
+        i = self._index.get((host, name))
+        if i is None or i >= len(self._severity):
+            return SeverityEnum.OK
+        return SeverityEnum(int(self._severity[i]))
+
+    def evaluate(self, snapshots: dict, timestamp=None) -> list:
+        """Evaluate snapshots from any number of hosts.
+
+        Threshold sensors are checked against their thresholds; discrete
+        power supply sensors with sensor-specific states (PowerSupplyFlag)
+        are checked for failure bits. Sensors that are not present are
+        skipped.
+
+        Args:
+            snapshots: Dict mapping each host to its sensors, either as
+                returned by ``Client.get_sensor_metrics`` or by
+                ``Client.get_metrics``.
+            timestamp: Seconds since the epoch. Default: now.
+
+        Returns:
+            list[Alert]: Transitions caused by this evaluation.
+        """
+        timestamp = time() if timestamp is None else timestamp
+        index = self.index
+        indexes, readings = [], []
+        thresholds = ([], [], [], [], [], [])
+        lnr, lc, lnc, unc, uc, unr = thresholds
+        psu_indexes, psu_levels, psu_flags = [], [], []
+
+        for host, sensors in snapshots.items():
+            if isinstance(sensors, dict):
+                sensors = sensors.get("sensor") or ()
+            for s in sensors:
+                if s.state != SensorStateEnum.PRESENT:
+                    continue
+                if s.flags is None:
+                    if not (s.lnr or s.lc or s.lnc or s.unc or s.uc or s.unr):
+                        continue
+                    indexes.append(index(host, s.name))
+                    readings.append(s.reading)
+                    lnr.append(s.lnr)
+                    lc.append(s.lc)
+                    lnc.append(s.lnc)
+                    unc.append(s.unc)
+                    uc.append(s.uc)
+                    unr.append(s.unr)
+                elif isinstance(s.flags, PowerSupplyFlag):
+                    # sensor-specific power supply states; generic states,
+                    # e.g. presence, carry no failure bits
+                    psu_indexes.append(index(host, s.name))
+                    psu_levels.append(_POWER_SUPPLY_LEVELS[int(s.flags) & 0xFF])
+                    psu_flags.append(s.flags)
+
+        alerts = self.evaluate_arrays(indexes, readings, thresholds, timestamp)
+        alerts.extend(
+            self._transition(psu_indexes, psu_levels, psu_levels, psu_flags, timestamp)
+        )
+        return alerts
+
+    def evaluate_arrays(self, indexes, readings, thresholds, timestamp=None):
+        """Evaluate columnar readings, skipping per-object overhead.
+
+        Args:
+            indexes: State index of each reading, from index().
+            readings: Readings.
+            thresholds: Six sequences: lnr, lc, lnc, unc, uc, unr. 0 denotes
+                a threshold that is not set.
+            timestamp: Seconds since the epoch. Default: now.
+
+        Returns:
+            list[Alert]: Transitions caused by this evaluation.
+        """
+        timestamp = time() if timestamp is None else timestamp
+        if len(indexes) == 0:
+            return []
+        if self._numpy is not None:
+            raw, held = _levels_numpy(
+                self._numpy, readings, thresholds, self.hysteresis
+            )
+        else:
+            raw, held = _levels_python(readings, thresholds, self.hysteresis)
+        return self._transition(indexes, raw, held, readings, timestamp)
+
+    def _transition(self, indexes, raw, held, readings, timestamp):
+        """Apply hysteresis and debouncing, returning transitions."""
+        if len(indexes) == 0:
+            return []
+        self._grow()
+        if self._numpy is not None:
+            changed = self._transition_numpy(indexes, raw, held)
+        else:
+            changed = self._transition_python(indexes, raw, held)
+
+        alerts = []
+        for position, previous in changed:
+            host, name = self._keys[indexes[position]]
+            alerts.append(
+                Alert(
+                    host,
+                    name,
+                    SeverityEnum(previous),
+                    SeverityEnum(int(self._severity[indexes[position]])),
+                    readings[position],
+                    timestamp,
+                )
+            )
+        return alerts
+
+    def _transition_python(self, indexes, raw, held):
+        severity, pending, count = self._severity, self._pending, self._count
+        debounce = self.debounce
+        changed = []
+        for position, i in enumerate(indexes):
+            current = severity[i]
+            level = raw[position]
+            if level < current:
+                level = held[position] if held[position] < current else current
+            if level == current:
+                count[i] = 0
+                continue
+            if pending[i] == level and count[i]:
+                count[i] += 1
+            else:
+                pending[i] = level
+                count[i] = 1
+            if count[i] >= debounce:
+                severity[i] = level
+                count[i] = 0
+                changed.append((position, current))
+        return changed
+
+    def _transition_numpy(self, indexes, raw, held):
+        numpy = self._numpy
+        indexes = numpy.asarray(indexes, dtype=numpy.intp)
+        raw = numpy.asarray(raw, dtype=numpy.int8)
+        held = numpy.asarray(held, dtype=numpy.int8)
+
+        current = self._severity[indexes]
+        level = numpy.where(raw < current, numpy.minimum(held, current), raw)
+
+        differs = level != current
+        continuing = differs & (self._pending[indexes] == level)
+        continuing &= self._count[indexes] > 0
+        count = numpy.where(
+            differs, numpy.where(continuing, self._count[indexes] + 1, 1), 0
+        )
+        commit = differs & (count >= self.debounce)
+        count[commit] = 0
+
+        self._pending[indexes] = numpy.where(differs, level, self._pending[indexes])
+        self._count[indexes] = count
+        self._severity[indexes] = numpy.where(commit, level, current)
+
+        positions = numpy.nonzero(commit)[0]
+        return [(int(p), int(current[p])) for p in positions]
@@ -0,0 +1,407 @@
+"""Provides an append-only binary log of sensor and power supply snapshots.
+
+A log consists of three files:
+
+- ``<path>``: a 16 byte header followed by fixed-width records.
+- ``<path>.names``: the name dictionary, one UTF-8 name per line. The line
+  number is the id referenced by records.
+- ``<path>.idx``: a sparse time index, one (timestamp, record number) entry
+  every ``index_interval`` records.
+
+Every record is 64 bytes, laid out as ``RECORD``:
+
+=========  ===========================  ===============================
+Field      Sensor                       PowerSupply
+=========  ===========================  ===============================
+timestamp  poll time (float seconds)    poll time (float seconds)
+host       name id of the host          name id of the host
+name       name id of the sensor name   name id of the serial number
+kind       ``KIND_SENSOR``              ``KIND_POWER_SUPPLY``
+type       SensorTypeEnum               PowerSupply.type
+unit       SensorUnitEnum               PowerSupply.id (slot)
+state      SensorStateEnum              PowerSupply.status
+flags      discrete sensor flags        0
+values     reading, lnr, lc, lnc, unc,  POWER_SUPPLY_READINGS, in order
+           uc, unr, 0, 0, 0
+=========  ===========================  ===============================
+
+A sensor serialised with ``json.dumps(vars(sensor))`` takes roughly 175
+bytes; the same sensor takes 64 bytes here, with names stored once.
+
+Records must be written in non-decreasing timestamp order, which allows the
+reader to range-scan using the sparse index.
+"""
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_right
+from time import time
+
+from .models import POWER_SUPPLY_READINGS
+from .util import byte_value
+
+MAGIC = b"SMBMCLOG"
+VERSION = 2
+
+HEADER = struct.Struct("<8sHH4x")
+RECORD = struct.Struct("<dIIBBBBI10f")
+INDEX = struct.Struct("<dQ")
+TIMESTAMP = struct.Struct("<d")
+
+#: Records decoded per chunk copied out of the memory map.
+CHUNK_RECORDS = 1024
+
+KIND_SENSOR = 0
+KIND_POWER_SUPPLY = 1
+
+_SENSOR_PADDING = (0.0, 0.0, 0.0)
+
+
+class SensorLogWriter:
+    """Appends snapshots to a binary sensor log in batches."""
+
+    def __init__(self, path, batch_size=256, fsync=False, index_interval=1024):
+        """Initialises an instance of smbmc.archive.SensorLogWriter.
+
+        Opens an existing log for appending, or creates a new one. A partial
+        trailing record, left behind by a crash, is discarded.
+
+        Args:
+            path: Path of the log file.
+            batch_size: Records buffered in memory before being written.
+                default: 256.
+            fsync: Whether each batch is fsync'd to disk. default: False.
+            index_interval: Records between sparse index entries.
+                default: 1024.
+
+        Raises:
+            ValueError: File exists but is not a compatible sensor log.
+        """
+        self.path = os.fspath(path)
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.index_interval = index_interval
+
+        self._file = open(self.path, "a+b")
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        if size == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            size = HEADER.size
+        else:
+            self._file.seek(0)
+            _check_header(self._file.read(HEADER.size))
+            usable = size - (size - HEADER.size) % RECORD.size
+            if usable != size:
+                self._file.truncate(usable)
+            size = usable
+        self._count = (size - HEADER.size) // RECORD.size
+        self._last_timestamp = 0.0
+        if self._count:
+            # keep rejecting records older than those already written
+            self._file.seek(size - RECORD.size)
+            (self._last_timestamp,) = TIMESTAMP.unpack(self._file.read(TIMESTAMP.size))
+
+        self._names_file = open(f"{self.path}.names", "a+", encoding="utf-8")
+        self._names_file.seek(0)
+        self._names = {
+            name: i for i, name in enumerate(self._names_file.read().splitlines())
+        }
+        self._index_file = open(f"{self.path}.idx", "ab")
+
+        self._records = bytearray()
+        self._pending = 0
+        self._pending_names = []
+        self._pending_index = bytearray()
+
+    def __enter__(self):
+        """Enter the runtime context.
+
+        Returns:
+            SensorLogWriter: This writer.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """Flush and close on leaving the runtime context.
+
+        Args:
+            *exc_info: Exception details, if any.
+        """
+        self.close()
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._names.get(name)
+        if name_id is None:
+            name_id = self._names[name] = len(self._names)
+            self._pending_names.append(name)
+        return name_id
+
+    def _append(
+        self, timestamp, host_id, name_id, kind, type, unit, state, flags, values
+    ):
+        if timestamp < self._last_timestamp:
+            raise ValueError("record is older than the newest written record")
+        self._last_timestamp = timestamp
+
+        record_no = self._count + self._pending
+        if record_no % self.index_interval == 0:
+            self._pending_index += INDEX.pack(timestamp, record_no)
+
+        self._records += RECORD.pack(
+            timestamp, host_id, name_id, kind, type, unit, state, flags, *values
+        )
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def write_sensors(self, host: str, sensors: list, timestamp=None):
+        """Append one record per sensor.
+
+        Args:
+            host: Host identifier.
+            sensors: Sensors, as returned by ``Client.get_sensor_metrics``.
+            timestamp: Seconds since the epoch. Default: now.
+        """
+        timestamp = time() if timestamp is None else float(timestamp)
+        host_id = self._name_id(host)
+        for sensor in sensors:
+            values = (
+                sensor.reading,
+                sensor.lnr,
+                sensor.lc,
+                sensor.lnc,
+                sensor.unc,
+                sensor.uc,
+                sensor.unr,
+            ) + _SENSOR_PADDING
+            self._append(
+                timestamp,
+                host_id,
+                self._name_id(sensor.name),
+                KIND_SENSOR,
+                int(sensor.type),
+                int(sensor.unit),
+                int(sensor.state),
+                int(sensor.flags or 0),
+                values,
+            )
+
+    def write_power_supplies(self, host: str, power_supplies: list, timestamp=None):
+        """Append one record per power supply.
+
+        Args:
+            host: Host identifier.
+            power_supplies: Power supplies, as returned by
+                ``Client.get_pmbus_metrics``.
+            timestamp: Seconds since the epoch. Default: now.
+        """
+        timestamp = time() if timestamp is None else float(timestamp)
+        host_id = self._name_id(host)
+        for psu in power_supplies:
+            values = tuple(
+                float("nan") if value is None else value
+                for value in (getattr(psu, attr) for attr in POWER_SUPPLY_READINGS)
+            )
+            self._append(
+                timestamp,
+                host_id,
+                self._name_id(psu.name),
+                KIND_POWER_SUPPLY,
+                byte_value(psu.type),
+                byte_value(psu.id),
+                byte_value(psu.status),
+                0,
+                values,
+            )
+
+    def write_metrics(self, host: str, metrics: dict, timestamp=None):
+        """Append a snapshot returned by ``Client.get_metrics``.
+
+        Args:
+            host: Host identifier.
+            metrics: Dict containing "sensor" and/or "pmbus" results.
+            timestamp: Seconds since the epoch. Default: now.
+        """
+        timestamp = time() if timestamp is None else float(timestamp)
+        if metrics.get("sensor"):
+            self.write_sensors(host, metrics["sensor"], timestamp)
+        if metrics.get("pmbus"):
+            self.write_power_supplies(host, metrics["pmbus"], timestamp)
+
+    def flush(self):
+        """Write buffered names, records and index entries to disk.
+
+        Names are written first, so a record never references a name that
+        is missing from the dictionary.
+        """
+        if self._pending_names:
+            self._names_file.write("".join(f"{n}\n" for n in self._pending_names))
+            self._names_file.flush()
+            self._pending_names = []
+
+        if self._records:
+            self._file.write(self._records)
+            self._file.flush()
+            self._count += self._pending
+            self._records = bytearray()
+            self._pending = 0
+
+        if self._pending_index:
+            self._index_file.write(self._pending_index)
+            self._index_file.flush()
+            self._pending_index = bytearray()
+
+        if self.fsync:
+            for f in (self._names_file, self._file, self._index_file):
+                os.fsync(f.fileno())
+
+    def close(self):
+        """Flush pending records and close the log."""
+        if self._file.closed:
+            return
+        self.flush()
+        for f in (self._names_file, self._file, self._index_file):
+            f.close()
+
+
+def _check_header(header: bytes):
+    """Validate a log header.
+
+    Args:
+        header: The first HEADER.size bytes of a log file.
+
+    Raises:
+        ValueError: Header is missing, or describes another format.
+    """
+    if len(header) != HEADER.size:
+        raise ValueError("not a sensor log: truncated header")
+
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("not a sensor log: bad magic")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"unsupported sensor log version {version}")
+
+
+class SensorLogReader:
+    """Reads a binary sensor log via a memory map.
+
+    Records are returned as plain tuples laid out as ``RECORD``:
+    ``(timestamp, host, name, kind, type, unit, state, flags, *values)``.
+    Use :meth:`name` to resolve host and name ids.
+    """
+
+    def __init__(self, path):
+        """Initialises an instance of smbmc.archive.SensorLogReader.
+
+        Only records fully written when the reader was opened are visible.
+
+        Args:
+            path: Path of the log file.
+        """
+        self.path = os.fspath(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _check_header(self._mmap[: HEADER.size])
+        self._count = (len(self._mmap) - HEADER.size) // RECORD.size
+
+        with open(f"{self.path}.names", encoding="utf-8") as f:
+            self._names = f.read().splitlines()
+
+        self._index_times = array("d")
+        self._index_records = array("Q")
+        with open(f"{self.path}.idx", "rb") as f:
+            data = f.read()
+        for timestamp, record_no in INDEX.iter_unpack(
+            data[: len(data) - len(data) % INDEX.size]
+        ):
+            if record_no < self._count:
+                self._index_times.append(timestamp)
+                self._index_records.append(record_no)
+
+    def __enter__(self):
+        """Enter the runtime context.
+
+        Returns:
+            SensorLogReader: This reader.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close on leaving the runtime context.
+
+        Args:
+            *exc_info: Exception details, if any.
+        """
+        self.close()
+
+    def __len__(self):
+        """Number of records in the log.
+
+        Returns:
+            int: Record count.
+        """
+        return self._count
+
+    def __iter__(self):
+        """Iterate over every record.
+
+        Returns:
+            iterator: Record tuples, oldest first.
+        """
+        return self._records_from(0)
+
+    def _records_from(self, record_no: int):
+        # decode copies of the map, so no buffer outlives a yield and
+        # close() can unmap while iterators are suspended
+        chunk = CHUNK_RECORDS * RECORD.size
+        end = HEADER.size + self._count * RECORD.size
+        for start in range(HEADER.size + record_no * RECORD.size, end, chunk):
+            yield from RECORD.iter_unpack(self._mmap[start : min(start + chunk, end)])
+
+    def name(self, name_id: int) -> str:
+        """Resolve a host or name id.
+
+        Args:
+            name_id: Id stored in a record.
+
+        Returns:
+            str: The name.
+        """
+        return self._names[name_id]
+
+    def range(self, start: float, end=None):
+        """Iterate over records with start <= timestamp <= end.
+
+        The sparse index is used to seek near ``start``, so only records
+        from the preceding index entry onwards are decoded.
+
+        Args:
+            start: Earliest timestamp (inclusive).
+            end: Latest timestamp (inclusive). Default: no limit.
+
+        Yields:
+            tuple: Record tuples within the range, oldest first.
+        """
+        position = bisect_right(self._index_times, start) - 1
+        # equal timestamps may continue into earlier index blocks
+        while position > 0 and self._index_times[position] >= start:
+            position -= 1
+        record_no = self._index_records[position] if position >= 0 else 0
+
+        for record in self._records_from(record_no):
+            timestamp = record[0]
+            if end is not None and timestamp > end:
+                return
+            if timestamp >= start:
+                yield record
+
+    def close(self):
+        """Unmap the log.
+
+        Iterators still open stop with ValueError once they need records
+        beyond the chunk they hold.
+        """
+        self._mmap.close()
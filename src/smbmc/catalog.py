@@ -0,0 +1,471 @@
+"""Provides a catalog of sensor metadata shared between identical boards.
+
+Hosts with the same motherboard and BMC firmware report the same static
+attributes for every sensor: NAME, ERTYPE, STYPE, UNIT1, UNIT, L, M, B, RB
+and the threshold bytes. Only READING and OPTION change between hosts and
+polls.
+
+A Catalog interns a SensorSpec for each distinct set of static attributes.
+The spec holds the decoded name, type, unit and thresholds, and a compiled
+converter: a table of the converted value of every possible reading byte.
+A Board interns the sequence of specs reported by one board type.
+
+Decoding a response through the catalog then costs a lookup of its board
+and one table lookup per sensor. The result, HostSensors, holds only a
+reference to the board and the live values. Memory and first-poll CPU
+scale with the number of board types rather than the number of hosts.
+
+The catalog can be saved to disk and loaded by a new collector, so that it
+starts warm.
+"""
+import json
+from operator import itemgetter
+
+from .ipmi_discrete import decode_discrete_state
+from .ipmi_sensor import _conversion
+from .ipmi_sensor import process_sensor
+from .ipmi_sensor import SENSOR_READING_SCALE
+from .models import DecodeError
+from .models import Sensor
+from .models import SensorSet
+from .models import SensorStateEnum
+from .util import hex_fields
+
+#: Static attributes identifying a sensor.
+STATIC_FIELDS = (
+    "NAME",
+    "ERTYPE",
+    "STYPE",
+    "UNIT1",
+    "UNIT",
+    "L",
+    "M",
+    "B",
+    "RB",
+    "UNR",
+    "UC",
+    "UNC",
+    "LNC",
+    "LC",
+    "LNR",
+)
+_static_key = itemgetter(*STATIC_FIELDS)
+_THRESHOLDS = ("lnr", "lc", "lnc", "unc", "uc", "unr")
+
+
+def static_key(item: dict) -> tuple:
+    """Key identifying a sensor by its static attributes.
+
+    Args:
+        item: Dict representing a sensor, obtained from the IPMI response.
+
+    Returns:
+        tuple: Values of STATIC_FIELDS, None for missing attributes.
+    """
+    try:
+        return _static_key(item)
+    except KeyError:
+        return tuple(item.get(field) for field in STATIC_FIELDS)
+
+
+def _compile_table(item: dict) -> tuple:
+    """Convert every possible reading byte of a threshold sensor.
+
+    Args:
+        item: Dict representing a threshold sensor.
+
+    Returns:
+        tuple: Converted value of each reading byte.
+    """
+    try:
+        raw = hex_fields((item["M"], item["B"], item["RB"]))
+    except ValueError:
+        raw = b""
+    if len(raw) != 5:
+        # unusual field widths; convert through the reference decoder
+        return tuple(
+            process_sensor(dict(item, READING=f"{value:02x}0000")).reading
+            for value in range(0x100)
+        )
+
+    m, b, scale = _conversion(raw)
+    analog = (int(item["UNIT1"], 16) >> 6) == 2
+    return tuple(
+        int(
+            (m * (value - 0x100 if analog and value & 0x80 else value) + b)
+            * scale
+            * SENSOR_READING_SCALE
+        )
+        / SENSOR_READING_SCALE
+        for value in range(0x100)
+    )
+
+
+class SensorSpec:
+    """Static metadata and compiled converter of a sensor.
+
+    Attributes:
+        key: Static attributes, see static_key().
+        name: Sensor name.
+        type: Sensor type.
+        unit: Reading unit, for threshold sensors.
+        threshold: True for threshold sensors, False for discrete sensors.
+        er_type: Event/Reading Type code, for discrete sensors.
+        sensor_type: Sensor type code, for discrete sensors.
+        table: Converted value of each reading byte, for threshold sensors.
+        lnr: Lower non-recoverable threshold.
+        lc: Lower critical threshold.
+        lnc: Lower non-critical threshold.
+        unc: Upper non-critical threshold.
+        uc: Upper critical threshold.
+        unr: Upper non-recoverable threshold.
+    """
+
+    __slots__ = (
+        "key",
+        "name",
+        "type",
+        "unit",
+        "threshold",
+        "er_type",
+        "sensor_type",
+        "table",
+        "lnr",
+        "lc",
+        "lnc",
+        "unc",
+        "uc",
+        "unr",
+    )
+
+    def __init__(self, item: dict):
+        """Compile the spec of a sensor.
+
+        Args:
+            item: Dict representing a sensor, obtained from the IPMI response.
+
+        Raises:
+            NotImplementedError: Non-linear sensors are not supported.
+        """
+        self.key = static_key(item)
+        # decode the static attributes exactly as process_sensor() does
+        sensor = process_sensor(dict(item, READING="000000", OPTION="c0"))
+        self.name = sensor.name
+        self.type = sensor.type
+        self.unit = sensor.unit
+        self.er_type = int(item["ERTYPE"], 16)
+        self.sensor_type = int(item["STYPE"], 16)
+        self.threshold = self.er_type == 1
+        for attr in _THRESHOLDS:
+            setattr(self, attr, getattr(sensor, attr))
+
+        self.table = None
+        if self.threshold:
+            self.table = _compile_table(item)
+
+    def value(self, reading: str):
+        """Decode a live reading.
+
+        Args:
+            reading: Raw READING attribute.
+
+        Returns:
+            float or IntFlag: Converted reading of a threshold sensor, or
+            the flags of a discrete sensor.
+        """
+        if self.threshold:
+            return self.table[int(reading[:2], 16)]
+        return decode_discrete_state(self.er_type, self.sensor_type, reading)
+
+    def sensor(self, sensor_id: int, value, present: bool) -> Sensor:
+        """Build a Sensor from a live value.
+
+        Args:
+            sensor_id: Position of the sensor within the response.
+            value: Value returned by value(). Flags are ignored if not
+                present.
+            present: Whether the sensor is present.
+
+        Returns:
+            Sensor: Fully populated sensor.
+        """
+        sensor = Sensor()
+        sensor.id = sensor_id
+        sensor.name = self.name
+        sensor.type = self.type
+        if present:
+            sensor.state = SensorStateEnum.PRESENT
+        else:
+            sensor.state = SensorStateEnum.NOT_PRESENT
+        if self.threshold:
+            sensor.unit = self.unit
+            sensor.reading = value
+            for attr in _THRESHOLDS:
+                setattr(sensor, attr, getattr(self, attr))
+        elif present:
+            sensor.flags = value
+        return sensor
+
+
+class Board:
+    """Sequence of sensor specs reported by one board type.
+
+    Attributes:
+        specs: SensorSpec of each sensor, in response order, or None for
+            sensors that failed to compile.
+        failures: Exception raised compiling each sensor that failed,
+            keyed by position.
+        index: Position of each sensor, keyed by name.
+    """
+
+    __slots__ = ("specs", "failures", "index")
+
+    def __init__(self, specs, failures):
+        """Creates an instance of Board.
+
+        Args:
+            specs: SensorSpec of each sensor, or None.
+            failures: Exception of each failed sensor, keyed by position.
+        """
+        self.specs = tuple(specs)
+        self.failures = failures
+        self.index = {}
+        for i, spec in enumerate(self.specs):
+            if spec is not None:
+                self.index.setdefault(spec.name, i)
+
+    def __len__(self):
+        """Number of sensors.
+
+        Returns:
+            int: Number of sensors, including failed ones.
+        """
+        return len(self.specs)
+
+
+class HostSensors:
+    """Live sensor values of one host, sharing its board's metadata.
+
+    Attributes:
+        board: Board of the host.
+        values: Live value of each sensor, see SensorSpec.value(), or None
+            for sensors that are not present or failed to decode.
+        present: Whether each sensor is present, or None for sensors that
+            failed to decode.
+    """
+
+    __slots__ = ("board", "values", "present")
+
+    def __init__(self, board, values, present):
+        """Creates an instance of HostSensors.
+
+        Args:
+            board: Board of the host.
+            values: Live value of each sensor.
+            present: Whether each sensor is present.
+        """
+        self.board = board
+        self.values = values
+        self.present = present
+
+    def get(self, name, default=None):
+        """Look up the live value of a sensor by name.
+
+        Args:
+            name: Sensor name, e.g. "CPU Temp".
+            default: Returned if no sensor has that name or it has no value.
+
+        Returns:
+            Converted reading, flags, or default.
+        """
+        i = self.board.index.get(name)
+        if i is None or self.values[i] is None:
+            return default
+        return self.values[i]
+
+    def sensors(self) -> SensorSet:
+        """Build the Sensors, as returned by process_sensor_response().
+
+        Returns:
+            SensorSet: Fully populated sensors, skipping failed ones.
+        """
+        return SensorSet(
+            spec.sensor(i, value, present)
+            for i, (spec, value, present) in enumerate(
+                zip(self.board.specs, self.values, self.present)
+            )
+            if present is not None
+        )
+
+
+class Catalog:
+    """Catalog interns sensor specs and boards.
+
+    Thread safe: concurrent decodes may compile the same spec twice, but
+    only one is kept.
+    """
+
+    def __init__(self):
+        """Creates an instance of Catalog."""
+        self._specs = {}
+        self._boards = {}
+
+    def __len__(self):
+        """Number of specs.
+
+        Returns:
+            int: Number of distinct sensors.
+        """
+        return len(self._specs)
+
+    @property
+    def boards(self) -> int:
+        """Number of distinct boards."""
+        return len(self._boards)
+
+    def spec(self, item: dict) -> SensorSpec:
+        """Look up, or compile, the spec of a sensor.
+
+        Args:
+            item: Dict representing a sensor, obtained from the IPMI response.
+
+        Returns:
+            SensorSpec: The interned spec.
+        """
+        key = static_key(item)
+        spec = self._specs.get(key)
+        if spec is None:
+            spec = self._specs.setdefault(key, SensorSpec(item))
+        return spec
+
+    def board(self, sensor_list: list) -> Board:
+        """Look up, or compile, the board reporting a response.
+
+        Args:
+            sensor_list: List of sensors obtained from an XML response.
+
+        Returns:
+            Board: The interned board.
+        """
+        key = tuple(map(static_key, sensor_list))
+        board = self._boards.get(key)
+        if board is None:
+            specs = []
+            failures = {}
+            for i, item in enumerate(sensor_list):
+                try:
+                    specs.append(self.spec(item))
+                except Exception as e:
+                    specs.append(None)
+                    failures[i] = e
+            board = self._boards.setdefault(key, Board(specs, failures))
+        return board
+
+    def decode(self, sensor_list: list, errors: list = None) -> HostSensors:
+        """Decode a response into live values.
+
+        Decoding is strict or tolerant, as with process_sensor_response().
+
+        Args:
+            sensor_list: List of sensors obtained from an XML response.
+            errors: Optional list collecting DecodeError instances.
+
+        Returns:
+            HostSensors: Live values, referencing the board.
+
+        Raises:
+            Exception: A sensor failed to decode, and no errors list was
+                supplied.
+        """
+        board = self.board(sensor_list)
+        values = []
+        present = []
+        for i, (spec, item) in enumerate(zip(board.specs, sensor_list)):
+            value = None
+            is_present = None
+            if spec is None:
+                cause = board.failures[i]
+                if errors is None:
+                    raise cause
+                errors.append(DecodeError(i, item.get("NAME", ""), item, cause))
+            else:
+                try:
+                    is_present = bool(int(item["OPTION"], 16) & 0x40)
+                    if is_present or spec.threshold:
+                        value = spec.value(item["READING"])
+                except Exception as e:
+                    if errors is None:
+                        raise
+                    errors.append(DecodeError(i, spec.name, item, e))
+                    value = is_present = None
+            values.append(value)
+            present.append(is_present)
+
+        return HostSensors(board, values, present)
+
+    def process_sensor_response(self, sensor_list: list, errors: list = None):
+        """Decode a response, as smbmc.ipmi_sensor does, into a SensorSet.
+
+        Args:
+            sensor_list: List of sensors obtained from an XML response.
+            errors: Optional list collecting DecodeError instances.
+
+        Returns:
+            SensorSet: Fully populated sensors, indexed by name, type and unit.
+        """
+        return self.decode(sensor_list, errors).sensors()
+
+    def save(self, path: str):
+        """Save the catalog, so that a new process can start warm.
+
+        Args:
+            path: Path to the JSON file written.
+        """
+        # specs first, followed by the keys of sensors that failed to compile
+        keys = {key: i for i, key in enumerate(self._specs)}
+        boards = []
+        for board_key in self._boards:
+            boards.append([keys.setdefault(key, len(keys)) for key in board_key])
+
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "fields": STATIC_FIELDS,
+                    "specs": len(self._specs),
+                    "keys": list(keys),
+                    "boards": boards,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a catalog saved by save(), compiling every spec and board.
+
+        Args:
+            path: Path to the JSON file.
+
+        Returns:
+            Catalog: The catalog.
+        """
+        with open(path) as f:
+            saved = json.load(f)
+
+        catalog = cls()
+        items = [
+            {
+                field: value
+                for field, value in zip(saved["fields"], key)
+                if value is not None
+            }
+            for key in saved["keys"]
+        ]
+        for item in items[: saved["specs"]]:
+            catalog.spec(item)
+        for board in saved["boards"]:
+            catalog.board([items[i] for i in board])
+        return catalog
+
+
+#: Process-wide catalog.
+CATALOG = Catalog()
@@ -0,0 +1,410 @@
+"""Provides the smbmc command-line interface.
+
+Imports beyond the standard library's argparse are deferred until a command
+runs, so ``smbmc --help`` starts quickly.
+"""
+import argparse
+import os
+import sys
+
+FORMATS = ("json", "ndjson", "csv", "influx")
+
+
+def parse_inventory(lines, username=None, password=None) -> list:
+    """Parse an inventory of hosts.
+
+    Each line holds a server address, optionally followed by a username and
+    password, separated by whitespace. Blank lines and lines starting with
+    '#' are ignored.
+
+    Args:
+        lines: Iterable of inventory lines.
+        username: Default username.
+        password: Default password.
+
+    Returns:
+        list: (server, username, password) tuples.
+
+    Raises:
+        ValueError: A line has too many fields.
+    """
+    hosts = []
+    for number, line in enumerate(lines, 1):
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        if len(fields) > 3:
+            raise ValueError(f"inventory line {number}: too many fields")
+
+        server = fields[0]
+        if "://" not in server:
+            server = f"http://{server}"
+        hosts.append(
+            (
+                server,
+                fields[1] if len(fields) > 1 else username,
+                fields[2] if len(fields) > 2 else password,
+            )
+        )
+    return hosts
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser.
+
+    Returns:
+        argparse.ArgumentParser: Parser for the smbmc command.
+    """
+    parser = argparse.ArgumentParser(
+        prog="smbmc", description="Fetch metrics from Supermicro BMCs."
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("hosts", nargs="*", help="BMC addresses")
+    common.add_argument(
+        "-i", "--inventory", help="file listing one 'host [user [pass]]' per line"
+    )
+    common.add_argument(
+        "-u",
+        "--username",
+        default=os.environ.get("SMBMC_USER"),
+        help="username (default: $SMBMC_USER)",
+    )
+    common.add_argument(
+        "-p",
+        "--password",
+        default=os.environ.get("SMBMC_PASS"),
+        help="password (default: $SMBMC_PASS)",
+    )
+    polling = argparse.ArgumentParser(add_help=False)
+    polling.add_argument(
+        "-m",
+        "--metrics",
+        default="pmbus,sensor",
+        help="comma-separated metrics to fetch (default: pmbus,sensor)",
+    )
+    polling.add_argument(
+        "-j",
+        "--concurrency",
+        type=int,
+        default=8,
+        help="hosts polled in parallel (default: 8)",
+    )
+    polling.add_argument(
+        "-b",
+        "--budget",
+        type=float,
+        help="seconds allowed per poll; metrics not fetched in time are "
+        "written as null (default: no limit)",
+    )
+    polling.add_argument(
+        "-f",
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="json: one document per host and poll; ndjson, csv, influx: one "
+        "record per sensor (default: json)",
+    )
+
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    commands.add_parser("dump", parents=[common, polling], help="fetch metrics once")
+    watch = commands.add_parser(
+        "watch", parents=[common, polling], help="fetch metrics at a fixed rate"
+    )
+    watch.add_argument(
+        "-n",
+        "--interval",
+        type=float,
+        default=10.0,
+        help="seconds between polls (default: 10)",
+    )
+    watch.add_argument(
+        "-c", "--count", type=int, help="stop after this many polls (default: never)"
+    )
+
+    probe = commands.add_parser(
+        "probe",
+        parents=[common],
+        help="check which hosts are reachable, without fetching metrics",
+    )
+    probe.add_argument(
+        "-j",
+        "--concurrency",
+        type=int,
+        default=256,
+        help="hosts probed in parallel (default: 256)",
+    )
+    probe.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=2.0,
+        help="seconds allowed per host (default: 2)",
+    )
+    probe.add_argument(
+        "--login",
+        action="store_true",
+        help="log in to validate credentials (default: probe without a session)",
+    )
+
+    replay = commands.add_parser(
+        "replay", help="poll responses recorded in betamax cassettes, offline"
+    )
+    replay.add_argument("cassettes", nargs="+", help="cassettes, one per host")
+    replay.add_argument(
+        "-n", "--polls", type=int, default=1000, help="total polls (default: 1000)"
+    )
+    replay.add_argument(
+        "-r", "--rate", type=float, help="target polls/s (default: unlimited)"
+    )
+    replay.add_argument(
+        "-j",
+        "--concurrency",
+        type=int,
+        default=1,
+        help="threads polling in parallel (default: 1)",
+    )
+    replay.add_argument(
+        "-m",
+        "--metrics",
+        default="pmbus,sensor",
+        help="comma-separated metrics to poll (default: pmbus,sensor)",
+    )
+    replay.add_argument(
+        "--no-trace-memory",
+        dest="trace_memory",
+        action="store_false",
+        help="skip tracemalloc, which slows polling down",
+    )
+    return parser
+
+
+class _JsonWriter:
+    """Writes one JSON document per host snapshot.
+
+    Snapshots are converted by smbmc.serialize; metrics not fetched in time
+    are null.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, host, metrics, timestamp):
+        from json import dumps
+
+        from .serialize import snapshot_to_dict
+
+        fetched = {
+            name: values for name, values in metrics.items() if values is not None
+        }
+        data = snapshot_to_dict(fetched)
+        document = {
+            "host": host,
+            "timestamp": timestamp,
+            "metrics": {name: data.get(name, metrics[name]) for name in metrics},
+        }
+        self.stream.write(dumps(document, separators=(",", ":")))
+        self.stream.write("\n")
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _make_writer(output_format: str, stream):
+    """Create the writer for an output format.
+
+    Args:
+        output_format: One of FORMATS.
+        stream: Writable text stream.
+
+    Returns:
+        object: Writer with write(host, metrics, timestamp) and flush().
+    """
+    if output_format == "json":
+        return _JsonWriter(stream)
+
+    from . import export
+
+    exporter = {
+        "ndjson": export.NdjsonExporter,
+        "csv": export.CsvExporter,
+        "influx": export.InfluxExporter,
+    }[output_format]
+    return exporter(stream)
+
+
+def _poll(clients, metrics, executor, writer, budget=None) -> int:
+    """Poll every client once, writing each snapshot as it completes.
+
+    Args:
+        clients: Clients to poll.
+        metrics: Metrics to fetch.
+        executor: Executor running the polls.
+        writer: Writer receiving the snapshots.
+        budget: Seconds allowed for the poll of every client, or None.
+
+    Returns:
+        int: Number of hosts that failed, or fetched no metric in time.
+    """
+    from concurrent.futures import as_completed
+    from time import monotonic
+    from time import time
+
+    deadline = None if budget is None else monotonic() + budget
+
+    def fetch(client):
+        return time(), client.get_metrics(metrics, deadline=deadline)
+
+    futures = {executor.submit(fetch, client): client for client in clients}
+    failures = 0
+    for future in as_completed(futures):
+        server = futures[future].server
+        try:
+            timestamp, result = future.result()
+        except Exception as e:
+            failures += 1
+            print(f"smbmc: {server}: {e}", file=sys.stderr)
+            continue
+        if all(values is None for values in result.values()):
+            failures += 1
+            print(f"smbmc: {server}: no metrics within budget", file=sys.stderr)
+        writer.write(server, result, timestamp)
+    writer.flush()
+    return failures
+
+
+def _probe(fleet, args, stream) -> int:
+    """Run the probe command, writing one JSON document per host.
+
+    Args:
+        fleet: Fleet of the hosts to probe.
+        args: Parsed arguments.
+        stream: Writable text stream.
+
+    Returns:
+        int: Exit status, 1 if any host is unreachable.
+    """
+    from json import dumps
+
+    results = fleet.probe(args.timeout, max(1, args.concurrency), args.login)
+    unreachable = 0
+    for server, result in results.items():
+        document = {
+            "host": server,
+            "reachable": result.reachable,
+            "session_valid": result.session_valid,
+            "rtt": result.rtt,
+            "info": result.info,
+            "error": None if result.error is None else str(result.error),
+        }
+        stream.write(dumps(document, separators=(",", ":")))
+        stream.write("\n")
+        unreachable += not result.reachable
+    stream.flush()
+    return 1 if unreachable else 0
+
+
+def _replay(args, stream) -> int:
+    """Run the replay command.
+
+    Args:
+        args: Parsed arguments.
+        stream: Writable text stream receiving the report.
+
+    Returns:
+        int: Exit status.
+    """
+    from .replay import replay
+
+    report = replay(
+        args.cassettes,
+        polls=args.polls,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        metrics=[metric.strip() for metric in args.metrics.split(",")],
+        trace_memory=args.trace_memory,
+    )
+    stream.write(f"{report}\n")
+    return 1 if report.errors else 0
+
+
+def run(args, stream=None) -> int:
+    """Run a parsed command.
+
+    Args:
+        args: Parsed arguments.
+        stream: Writable text stream receiving the output. Default: sys.stdout.
+
+    Returns:
+        int: Exit status.
+    """
+    if args.command == "replay":
+        return _replay(args, stream or sys.stdout)
+
+    hosts = parse_inventory(args.hosts)
+    if args.inventory:
+        with open(args.inventory) as f:
+            hosts.extend(parse_inventory(f))
+    if not hosts:
+        print("smbmc: no hosts given", file=sys.stderr)
+        return 2
+
+    from concurrent.futures import ThreadPoolExecutor
+    from time import sleep
+
+    from .fleet import Fleet
+    from .watch import Schedule
+
+    concurrency = max(1, args.concurrency)
+    if args.command == "probe":
+        from .transport import Urllib3Transport
+
+        # skips the per-request overhead of requests, which dominates probes
+        session = Urllib3Transport(num_pools=concurrency, keep_cookies=False)
+        with Fleet(args.username, args.password, session=session) as fleet:
+            for host in hosts:
+                fleet.add(*host)
+            return _probe(fleet, args, stream or sys.stdout)
+
+    fleet = Fleet(args.username, args.password, max_pools=concurrency)
+    clients = [fleet.add(*host) for host in hosts]
+
+    metrics = [metric.strip() for metric in args.metrics.split(",")]
+    writer = _make_writer(args.format, stream or sys.stdout)
+
+    with fleet, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if args.command == "dump":
+            return 1 if _poll(clients, metrics, executor, writer, args.budget) else 0
+
+        # fixed-rate schedule; ticks missed by a slow poll are skipped
+        schedule = Schedule(args.interval)
+        polls = failures = 0
+        while args.count is None or polls < args.count:
+            sleep(schedule.delay())
+            schedule.tick += 1
+            failures += _poll(clients, metrics, executor, writer, args.budget)
+            polls += 1
+        return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    """Entry point of the smbmc command.
+
+    Args:
+        argv: Arguments, excluding the program name. Default: sys.argv.
+
+    Returns:
+        int: Exit status.
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        return run(args)
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as e:
+        print(f"smbmc: {e}", file=sys.stderr)
+        return 2
+    except Exception as e:
+        # e.g. Authentication Error
+        print(f"smbmc: {e}", file=sys.stderr)
+        return 1
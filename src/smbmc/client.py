@@ -1,22 +1,112 @@
 """Provides the Client class."""
 from datetime import datetime
 from datetime import timedelta
+from time import monotonic
+from time import perf_counter
 
-from requests import Session
-
-from .ipmi_pmbus import process_pmbus_response
+from .ipmi_pmbus import PSItemDecoder
 from .ipmi_sensor import process_sensor_response
+from .models import AuthenticationError
+from .models import MissingMetric
+from .models import ProbeResult
+from .transport import timeout_errors
 from .util import contains_duplicates
 from .util import contains_valid_items
 from .util import extract_xml_attr
 
 KNOWN_SENSORS = ["pmbus", "sensor"]
 
+# smallest response of the web interface: a few hundred bytes
+PROBE_QUERY = {"GENERIC_INFO.XML": "(0,0)"}
 
-class Client:
-    """Client used to access Supermicro BMCs."""
 
-    def __init__(self, server, username, password, session_timeout=30):
+def _remaining(deadline):
+    """Seconds left until a deadline.
+
+    Args:
+        deadline: time.monotonic() value, or None.
+
+    Returns:
+        float: Seconds left, or None if there is no deadline.
+
+    Raises:
+        TimeoutError: The deadline has passed.
+    """
+    if deadline is None:
+        return None
+    left = deadline - monotonic()
+    if left <= 0:
+        raise TimeoutError("deadline exceeded")
+    return left
+
+
+def _is_late(error: Exception, deadline) -> bool:
+    """Whether a request failed because it ran out of time.
+
+    Only the timeout exceptions of the built-in transports count, see
+    smbmc.transport.timeout_errors(); any other failure, e.g. a rejected
+    login, is not late even once the deadline has passed.
+
+    Args:
+        error: Exception raised by the request.
+        deadline: time.monotonic() value, or None.
+
+    Returns:
+        bool: True if the request timed out.
+    """
+    if deadline is None:
+        return False
+    return isinstance(error, timeout_errors())
+
+
+def _probe_info(text: str):
+    """Attributes of a probe response, if the session was accepted.
+
+    BMCs answer queries without a valid session with the login page rather
+    than an IPMI document.
+
+    Args:
+        text: Response body.
+
+    Returns:
+        dict: Attributes of the first element holding any, or None if the
+        response is not an IPMI document.
+    """
+    from defusedxml import ElementTree
+
+    try:
+        root = ElementTree.fromstring(text.strip())
+    except Exception:
+        return None
+    if root.tag != "IPMI":
+        return None
+    for element in root.iter():
+        if element.attrib:
+            return dict(element.attrib)
+    return {}
+
+
+class Client:
+    """Client used to access Supermicro BMCs.
+
+    Attributes:
+        firmware: Firmware version of the BMC, as reported by the last
+            successful probe(), or None.
+    """
+
+    catalog = None
+    firmware = None
+    pmbus_decoder = None
+
+    def __init__(
+        self,
+        server,
+        username,
+        password,
+        session_timeout=30,
+        transport=None,
+        catalog=None,
+    ):
         """Initialises an instance of smbmc.Client.
 
         Args:
@@ -25,39 +115,98 @@ class Client:
             password: Password.
             session_timeout: Session timeout of the BMC (in minutes).
                 default: 30 minutes.
+            transport: HTTP transport, see smbmc.transport.
+                default: a new smbmc.transport.RequestsTransport.
+            catalog: smbmc.catalog.Catalog sharing sensor metadata between
+                clients, e.g. smbmc.catalog.CATALOG. default: None.
         """
+        if transport is None:
+            from .transport import RequestsTransport
+
+            transport = RequestsTransport()
+
         self.server = server
         self.username = username
         self.password = password
-        self._session = Session()
+        self.transport = transport
+        self.catalog = catalog
         self.initial_call = datetime(1970, 1, 1)
         self.session_timeout = session_timeout
         self.sid_expiry = timedelta(minutes=self.session_timeout)
 
-    def login(self):
+    def login(self, timeout=None):
         """Login to Supermicro web interface.
 
         Fetches a session ID (SID) cookie, which allows access to the rest
         of the web interface. SID length is approximately 30 minutes,
         according to the default timeout configuration.
 
+        Args:
+            timeout: Request timeout, in seconds. default: the transport's.
+
         Raises:
-            Exception: Authentication Error.
+            AuthenticationError: The credentials were rejected.
         """
-        self._session.post(
+        r = self.transport.post(
             f"{self.server}/cgi/login.cgi",
             data={
                 "name": self.username,
                 "pwd": self.password,
             },
+            timeout=self._timeout(timeout),
         )
 
-        if "SID" in self._session.cookies.get_dict().keys():
-            self.initial_call = datetime.now()
-        else:
-            raise Exception("Authentication Error")
+        if not self._start_session(r):
+            raise AuthenticationError("Authentication Error")
 
-    def _query(self, data, path="/cgi/ipmi.cgi"):
+    def _start_session(self, response) -> bool:
+        """Keep the session granted by a login response.
+
+        The transport holds the SID cookie; only the login time is kept.
+
+        Args:
+            response: Response of the login request.
+
+        Returns:
+            bool: Whether the BMC granted a session.
+        """
+        if not self.transport.cookies.get("SID"):
+            return False
+        self.initial_call = datetime.now()
+        return True
+
+    def _session_cookies(self):
+        """Cookies sent with each query, in addition to the transport's.
+
+        Returns:
+            dict: Cookies, or None.
+        """
+        return None
+
+    def _session_expired(self) -> bool:
+        """Whether the session is likely to have expired.
+
+        Returns:
+            bool: True if the next query should log in first.
+        """
+        return datetime.now() > (self.initial_call + self.sid_expiry)
+
+    def _timeout(self, timeout):
+        """Timeout of a request.
+
+        Args:
+            timeout: Seconds, or None for the transport's.
+
+        Returns:
+            float: Seconds, or None.
+        """
+        return timeout
+
+    def logout(self):
+        """Drop the session, so that the next query logs in again."""
+        self.initial_call = datetime(1970, 1, 1)
+
+    def _query(self, data, path="/cgi/ipmi.cgi", deadline=None, refresh=True):
         """Query Supermicro BMC.
 
         Performs session login & token refresh.
@@ -65,25 +214,152 @@ class Client:
         Args:
             path: Path to query. Defaults to '/cgi/ipmi.cgi'.
             data: Requested data.
+            deadline: time.monotonic() value bounding each request.
+            refresh: Log in first if the session is likely to have expired.
+                default: True.
 
         Returns:
             request.Response: Response object.
         """
-        self._refresh_token()
+        if refresh:
+            self._refresh_token(deadline)
 
-        return self._session.post(
+        return self.transport.post(
             f"{self.server}{path}",
             data=data,
+            cookies=self._session_cookies(),
+            timeout=self._timeout(_remaining(deadline)),
         )
 
-    def _refresh_token(self):
-        """Refresh SID token if timeout likely."""
-        if datetime.now() > (self.initial_call + self.sid_expiry):
-            self.login()
+    def _refresh_token(self, deadline=None):
+        """Refresh SID token if timeout likely.
+
+        Args:
+            deadline: time.monotonic() value bounding the login.
+        """
+        if self._session_expired():
+            self.login(_remaining(deadline))
+
+    def probe(self, timeout=None, login=False) -> ProbeResult:
+        """Check that the BMC is reachable, and whether the session is valid.
+
+        Sends GENERIC_INFO.XML, the lightest query of the web interface,
+        with the current session and without logging in first: nothing but
+        a few hundred bytes is downloaded, and no SDR is decoded. A session
+        the BMC rejects is dropped, so that the next query logs in again.
+        The firmware version in an accepted response is kept in firmware.
 
-    def get_pmbus_metrics(self):
+        Args:
+            timeout: Seconds allowed for the probe, including any login.
+                default: None, the transport's timeout.
+            login: Log in and probe again if the session is not valid,
+                validating the credentials. default: False.
+
+        Returns:
+            ProbeResult: Reachability, session validity and round-trip time.
+            Failures are reported in the result rather than raised.
+        """
+        result = ProbeResult(self.server)
+        deadline = None if timeout is None else monotonic() + timeout
+        try:
+            result.rtt, result.info = self._probe(deadline)
+            result.reachable = True
+            if result.info is None and login:
+                self.login(_remaining(deadline))
+                result.rtt, result.info = self._probe(deadline)
+        except Exception as e:
+            result.error = e
+        result.session_valid = result.info is not None
+        if result.session_valid:
+            self.firmware = result.info.get("IPMIFW_VERSION", self.firmware)
+        elif result.reachable:
+            self.logout()
+        return result
+
+    def _probe(self, deadline) -> tuple:
+        """Send the probe query, and time it.
+
+        Args:
+            deadline: time.monotonic() value bounding the request.
+
+        Returns:
+            tuple: (round-trip time (s), attributes or None, see _probe_info).
+        """
+        start = perf_counter()
+        r = self._query(PROBE_QUERY, deadline=deadline, refresh=False)
+        rtt = perf_counter() - start
+        return rtt, _probe_info(r.text)
+
+    def watch(
+        self,
+        interval: float,
+        metrics=("pmbus", "sensor"),
+        count=None,
+        budget=None,
+        errors=None,
+    ):
+        """Poll metrics at a fixed rate.
+
+        Ticks are scheduled on a monotonic clock, so that slow polls do not
+        accumulate lag, and ticks overrun by a poll are skipped rather than
+        queued. See smbmc.watch.
+
+        Args:
+            interval: Seconds between polls.
+            metrics: List of metric(s) to query.
+            count: Stop after this many polls. default: None, never.
+            budget: Seconds allowed for each poll. default: None.
+            errors: Optional list collecting failed polls, which are then
+                skipped instead of raising. See smbmc.watch.Watch. It grows
+                for as long as the watch runs; pass a
+                collections.deque(maxlen=n) to keep the latest n only.
+
+        Returns:
+            smbmc.watch.Watch: Iterator of (timestamp, metrics) tuples.
+        """
+        from .watch import Watch
+
+        return Watch(self, interval, metrics, count, budget, errors)
+
+    def awatch(
+        self,
+        interval: float,
+        metrics=("pmbus", "sensor"),
+        count=None,
+        budget=None,
+        errors=None,
+        executor=None,
+    ):
+        """Poll metrics at a fixed rate, asynchronously.
+
+        Polls run in an executor. See watch().
+
+        Args:
+            interval: Seconds between polls.
+            metrics: List of metric(s) to query.
+            count: Stop after this many polls. default: None, never.
+            budget: Seconds allowed for each poll. default: None.
+            errors: Optional list collecting failed polls, see watch().
+            executor: concurrent.futures.Executor running the polls.
+                default: the event loop's default executor.
+
+        Returns:
+            smbmc.watch.AsyncWatch: Asynchronous iterator of
+            (timestamp, metrics) tuples.
+        """
+        from .watch import AsyncWatch
+
+        watch = AsyncWatch(self, interval, metrics, count, budget, errors)
+        watch.executor = executor
+        return watch
+
+    def get_pmbus_metrics(self, deadline=None):
         """Acquire metrics for all power supplies.
 
+        Args:
+            deadline: time.monotonic() value after which requests time out.
+                default: None.
+
         Returns:
             list[PowerSupply]: All power supplies available on the PMBus
             interface.
@@ -91,36 +367,107 @@ class Client:
         r = self._query(
             data={
                 "Get_PSInfoReadings.XML": "(0,0)",
-            }
+            },
+            deadline=deadline,
         )
 
         psu_list = extract_xml_attr(r.text, ".//PSItem")
-        power_supplies = process_pmbus_response(psu_list)
+        decoder = self.pmbus_decoder
+        if decoder is None:
+            # remembers the PSItem variant of this BMC
+            decoder = self.pmbus_decoder = PSItemDecoder()
+        power_supplies = decoder.process_response(psu_list)
 
         return power_supplies
 
-    def get_sensor_metrics(self):
-        """Acquire metrics for all sensors.
+    def get_sensor_items(self, numbers=None, deadline=None) -> list:
+        """Acquire the SENSOR items of the BMC, undecoded.
+
+        SENSOR_INFO.XML takes a range argument, "(1,ff)" as sent by the web
+        interface. Its second value selects a sensor by number, the NUMBER
+        attribute of its item, ff selecting every sensor.
+
+        Firmware that ignores the selection answers with every sensor; the
+        items are filtered, and numbers already answered are not requested
+        again, so this costs a single request.
+
+        Args:
+            numbers: Numbers of the sensors to acquire, each with its own
+                request. default: None, every sensor with a single request.
+            deadline: time.monotonic() value after which requests time out.
+                default: None.
 
         Returns:
-            list[Sensor]: A list of all sensors available to the BMC.
+            list: SENSOR items, as dicts of attributes. Items of numbers the
+            BMC does not know are left out.
         """
-        r = self._query(
-            data={
-                "SENSOR_INFO.XML": "(1,ff)",
-            }
-        )
+        if numbers is None:
+            r = self._query(data={"SENSOR_INFO.XML": "(1,ff)"}, deadline=deadline)
+            return extract_xml_attr(r.text, ".//SENSOR")
+
+        wanted = dict.fromkeys(numbers)
+        found = {}
+        for number in wanted:
+            if number in found:
+                continue
+            r = self._query(
+                data={"SENSOR_INFO.XML": f"(1,{number})"}, deadline=deadline
+            )
+            for item in extract_xml_attr(r.text, ".//SENSOR"):
+                if item.get("NUMBER") in wanted:
+                    found.setdefault(item["NUMBER"], item)
+        return [found[number] for number in wanted if number in found]
+
+    def decode_sensors(self, sensor_list: list, errors=None):
+        """Decode SENSOR items, with the catalog if the client has one.
 
-        sensor_list = extract_xml_attr(r.text, ".//SENSOR")
-        sensors = process_sensor_response(sensor_list)
+        Args:
+            sensor_list: SENSOR items, see get_sensor_items().
+            errors: Optional list collecting DecodeError instances.
+
+        Returns:
+            SensorSet: Decoded sensors, indexed by name, type and unit.
+        """
+        if self.catalog is None:
+            return process_sensor_response(sensor_list, errors)
+        return self.catalog.process_sensor_response(sensor_list, errors)
+
+    def get_sensor_metrics(self, errors=None, deadline=None):
+        """Acquire metrics for all sensors.
 
-        return sensors
+        Args:
+            errors: Optional list. When supplied, sensors that fail to decode
+                are appended to it as DecodeError instances instead of
+                aborting the whole response.
+            deadline: time.monotonic() value after which requests time out.
+                default: None.
+
+        Returns:
+            SensorSet: A list of all sensors available to the BMC, with
+            lookups by name, type and unit.
+        """
+        sensor_list = self.get_sensor_items(deadline=deadline)
+        return self.decode_sensors(sensor_list, errors)
 
-    def get_metrics(self, metrics=["pmbus", "sensor"]):  # noqa: C901
+    def get_metrics(  # noqa: C901
+        self, metrics=("pmbus", "sensor"), errors=None, budget=None, deadline=None
+    ):
         """Fetch all metrics available.
 
+        With a budget or deadline, each request times out once it is reached,
+        and metrics not fetched by then are set to None rather than raising.
+        Metrics are fetched in the given order, so list the most important
+        first.
+
         Args:
             metrics: List of metric(s) to query.
+            errors: Optional list collecting sensors that fail to decode.
+                See get_sensor_metrics(). With a budget or deadline, metrics
+                not fetched in time are also appended, as MissingMetric
+                instances.
+            budget: Seconds allowed for fetching. default: None, no limit.
+            deadline: time.monotonic() value by which to finish, overriding
+                budget. default: None.
 
         Raises:
             Exception: Argument contains duplicate metrics.
@@ -135,15 +482,24 @@ class Client:
         if not contains_valid_items(KNOWN_SENSORS, metrics):
             raise Exception("metrics array contains invalid metrics")
 
+        if deadline is None and budget is not None:
+            deadline = monotonic() + budget
+
         # self.login()
         result = {}
 
         for metric in metrics:
             values = None
-            if metric == "pmbus":
-                values = self.get_pmbus_metrics()
-            elif metric == "sensor":  # pragma: no cover
-                values = self.get_sensor_metrics()
+            try:
+                if metric == "pmbus":
+                    values = self.get_pmbus_metrics(deadline=deadline)
+                elif metric == "sensor":  # pragma: no cover
+                    values = self.get_sensor_metrics(errors, deadline=deadline)
+            except Exception as e:
+                if not _is_late(e, deadline):
+                    raise
+                if errors is not None:
+                    errors.append(MissingMetric(metric, e))
 
             result.update({metric: values})
 
@@ -0,0 +1,699 @@
+"""Provides a multi-process fleet collector.
+
+A single process cannot decode a large fleet's responses fast enough, as
+decoding holds the GIL. Collector shards the hosts across worker processes,
+each polling its shard on a pool of threads through a Fleet.
+
+Decoded readings are not pickled back to the coordinator. Each worker owns
+a ``multiprocessing.shared_memory`` segment, split in two halves, into which
+it writes one row per reading, one column per field:
+
+=========  ======  ==========================================================
+column     type    contents
+=========  ======  ==========================================================
+value      double  sensor reading, or power supply attribute
+lnr ... unr float  sensor thresholds (0 for power supplies)
+host       uint32  index into Collector.hosts
+name       uint32  index into the worker's name table
+flags      uint32  discrete sensor flags (0 for threshold sensors)
+kind       uint8   ``KIND_SENSOR`` or ``KIND_POWER_SUPPLY``
+state      uint8   sensor state (0 for power supplies)
+=========  ======  ==========================================================
+
+Power supply attributes are named ``psu<id>.<attribute>``; attributes
+missing from the firmware's response, None, have no row. Only the row
+count, names seen for the first time and per-host poll times travel through
+the result queue. A worker fills one half while the coordinator reads the
+other; a semaphore stops it from overwriting a half that has not been read.
+
+The coordinator tracks an exponentially weighted poll time per host, with
+failed polls costed at the request timeout. Every ``rebalance_every``
+cycles, if the busiest worker carries more than 20% over the average load,
+hosts are reassigned across the live workers, longest first, to the least
+loaded worker. The hosts of a worker that has died are reassigned the same
+way.
+
+Shared memory requires Python 3.8 or later; Collector.start() raises
+ImportError on older versions.
+"""
+import os
+from array import array
+from time import monotonic
+
+from .archive import KIND_POWER_SUPPLY
+from .archive import KIND_SENSOR
+from .models import POWER_SUPPLY_READINGS
+
+#: Columns of a shared memory buffer, with their array type codes, in order.
+COLUMNS = (
+    ("value", "d"),
+    ("lnr", "f"),
+    ("lc", "f"),
+    ("lnc", "f"),
+    ("unc", "f"),
+    ("uc", "f"),
+    ("unr", "f"),
+    ("host", "I"),
+    ("name", "I"),
+    ("flags", "I"),
+    ("kind", "B"),
+    ("state", "B"),
+)
+
+_THRESHOLDS = ("lnr", "lc", "lnc", "unc", "uc", "unr")
+# imbalance tolerated before hosts are moved between workers
+_IMBALANCE = 1.2
+# weight of the latest poll time in each host's average
+_ALPHA = 0.3
+
+
+def _layout(capacity: int) -> dict:
+    """Compute the byte offset of every column within one half.
+
+    Args:
+        capacity: Rows per half. Must be a multiple of 8.
+
+    Returns:
+        dict: (offset, type code, item size) keyed by column name, and the
+        size of one half under the key None.
+    """
+    layout = {}
+    offset = 0
+    for name, code in COLUMNS:
+        size = array(code).itemsize
+        layout[name] = (offset, code, size)
+        offset += size * capacity
+    layout[None] = offset
+    return layout
+
+
+class _Writer:
+    """Writes rows into one half of a worker's buffer."""
+
+    def __init__(self, buf, capacity, half):
+        layout = _layout(capacity)
+        base = layout[None] * half
+        self.capacity = capacity
+        self.count = 0
+        self.overflow = 0
+        self._views = []
+        for name, code in COLUMNS:
+            offset, code, size = layout[name]
+            start = base + offset
+            view = buf[start : start + size * capacity]
+            column = view.cast(code)
+            self._views += (column, view)
+            setattr(self, name, column)
+
+    def release(self):
+        for view in self._views:
+            view.release()
+
+    def write(self, host, metrics, names, new_names):
+        """Write the readings of a snapshot.
+
+        Args:
+            host: Host index.
+            metrics: Snapshot.
+            names: Name table of the worker, updated in place.
+            new_names: Receives names added to the table.
+        """
+
+        def name_id(name):
+            i = names.get(name)
+            if i is None:
+                i = names[name] = len(names)
+                new_names.append(name)
+            return i
+
+        for sensor in metrics.get("sensor") or ():
+            i = self._row()
+            if i is None:
+                continue
+            self.value[i] = sensor.reading
+            for threshold in _THRESHOLDS:
+                getattr(self, threshold)[i] = getattr(sensor, threshold)
+            self.host[i] = host
+            self.name[i] = name_id(sensor.name)
+            self.flags[i] = int(sensor.flags or 0)
+            self.kind[i] = KIND_SENSOR
+            self.state[i] = int(sensor.state)
+
+        for psu in metrics.get("pmbus") or ():
+            for attr in POWER_SUPPLY_READINGS:
+                value = getattr(psu, attr)
+                # None: missing from the firmware's response
+                if value is not None:
+                    self._power_supply_row(host, value, name_id(f"psu{psu.id}.{attr}"))
+
+    def _power_supply_row(self, host, value, name):
+        i = self._row()
+        if i is None:
+            return
+        self.value[i] = value
+        for threshold in _THRESHOLDS:
+            getattr(self, threshold)[i] = 0
+        self.host[i] = host
+        self.name[i] = name
+        self.flags[i] = 0
+        self.kind[i] = KIND_POWER_SUPPLY
+        self.state[i] = 0
+
+    def _row(self):
+        if self.count >= self.capacity:
+            self.overflow += 1
+            return None
+        self.count += 1
+        return self.count - 1
+
+
+def _shared_memory():
+    """Import SharedMemory, which requires Python 3.8 or later.
+
+    Returns:
+        type: multiprocessing.shared_memory.SharedMemory.
+
+    Raises:
+        ImportError: Python is older than 3.8.
+    """
+    try:
+        from multiprocessing.shared_memory import SharedMemory
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "smbmc.collector requires Python 3.8 or later, "
+            "for multiprocessing.shared_memory"
+        ) from None
+    return SharedMemory
+
+
+def _describe(error: Exception) -> str:
+    """Describe an exception in one line, for the coordinator.
+
+    Args:
+        error: Exception raised by a poll.
+
+    Returns:
+        str: Exception type and message.
+    """
+    message = str(error)
+    name = type(error).__name__
+    return f"{name}: {message}" if message else name
+
+
+def _worker_clients(config) -> tuple:
+    """Create the Fleet of a worker, logging its shard in if configured.
+
+    Args:
+        config: Dict of settings, see Collector._config().
+
+    Returns:
+        tuple: (Fleet, dict of its clients keyed by host index).
+    """
+    from .fleet import Fleet
+
+    factory = config["session_factory"]
+    fleet = Fleet(
+        config["username"],
+        config["password"],
+        timeout=config["timeout"],
+        max_pools=config["concurrency"],
+        session=factory() if factory else None,
+    )
+    hosts = config["hosts"]
+    clients = {i: fleet.add(*hosts[i]) for i in config["shard"]}
+    if config["login_rate"]:
+        from .prewarm import prewarm
+
+        # the limits are shared evenly between the workers
+        prewarm(
+            list(clients.values()),
+            rate=config["login_rate"] / config["workers"],
+            per_subnet=max(1, config["logins_per_subnet"] // config["workers"]),
+            timeout=config["timeout"],
+            concurrency=config["concurrency"],
+        )
+    return fleet, clients
+
+
+def _next_shard(commands, shard):
+    """Apply the commands queued for a worker.
+
+    Args:
+        commands: Queue of commands, see _worker().
+        shard: Current host indexes.
+
+    Returns:
+        list: Host indexes to poll, or None to stop.
+    """
+    from queue import Empty
+
+    try:
+        while True:
+            command = commands.get_nowait()
+            if command[0] == "stop":
+                return None
+            shard = command[1]
+    except Empty:
+        return shard
+
+
+def _poll(client, metrics) -> tuple:
+    """Poll one host of a worker.
+
+    Args:
+        client: Client of the host.
+        metrics: List of metric(s) to query.
+
+    Returns:
+        tuple: (metrics or None, seconds taken, error description or None).
+    """
+    from time import perf_counter
+
+    begin = perf_counter()
+    try:
+        return client.get_metrics(metrics), perf_counter() - begin, None
+    except Exception as e:
+        return None, perf_counter() - begin, _describe(e)
+
+
+def _cycle(executor, clients, shard, metrics, writer, names) -> tuple:
+    """Poll a shard once, writing the readings.
+
+    Args:
+        executor: Thread pool polling the hosts.
+        clients: Dict of clients, keyed by host index.
+        shard: Host indexes to poll.
+        metrics: List of metric(s) to query.
+        writer: _Writer of the half being filled.
+        names: Name table of the worker, updated in place.
+
+    Returns:
+        tuple: (names added to the table, (host index, seconds, error
+        description or None) of each host).
+    """
+    from concurrent.futures import as_completed
+
+    new_names = []
+    timings = []
+    futures = {executor.submit(_poll, clients[i], metrics): i for i in shard}
+    for future in as_completed(futures):
+        index = futures[future]
+        result, seconds, error = future.result()
+        timings.append((index, seconds, error))
+        if result is not None:
+            writer.write(index, result, names, new_names)
+    return new_names, timings
+
+
+def _worker(worker_id, config, commands, results, slots):
+    """Run a worker process.
+
+    Args:
+        worker_id: Index of the worker.
+        config: Dict of settings, see Collector._config().
+        commands: Queue receiving ("shard", host indexes), replacing the
+            initial shard, and ("stop",).
+        results: Queue receiving cycle summaries.
+        slots: Semaphore counting the halves free for writing.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from time import sleep
+    from time import time
+
+    # spawned workers share the coordinator's resource tracker, so the
+    # segment is only unlinked by the coordinator
+    shm = _shared_memory()(name=config["shm"])
+    fleet, clients = _worker_clients(config)
+    hosts = config["hosts"]
+    metrics = list(config["metrics"])
+    interval = config["interval"]
+    names = {}
+    shard = config["shard"]
+
+    executor = ThreadPoolExecutor(max_workers=config["concurrency"])
+    start = monotonic()
+    cycle = 0
+    try:
+        while True:
+            shard = _next_shard(commands, shard)
+            if shard is None:
+                return
+            clients = {i: clients.get(i) or fleet.add(*hosts[i]) for i in shard}
+
+            timestamp = time()
+            slots.acquire()
+            writer = _Writer(shm.buf, config["capacity"], cycle % 2)
+            try:
+                new_names, timings = _cycle(
+                    executor, clients, shard, metrics, writer, names
+                )
+            finally:
+                writer.release()
+            results.put(
+                (
+                    worker_id,
+                    cycle % 2,
+                    timestamp,
+                    writer.count,
+                    writer.overflow,
+                    new_names,
+                    timings,
+                )
+            )
+            cycle += 1
+
+            # fixed-rate schedule; ticks missed by a slow cycle are skipped
+            if interval > 0:
+                elapsed = monotonic() - start
+                sleep(interval - elapsed % interval)
+    finally:
+        executor.shutdown(wait=False)
+        shm.close()
+
+
+class Batch:
+    """Readings of one worker cycle, copied out of shared memory.
+
+    Columns are arrays of equal length, named as in COLUMNS.
+
+    Attributes:
+        worker: Index of the worker.
+        timestamp: Start of the cycle, in seconds since the epoch.
+        names: Name table of the worker; the name column indexes it.
+        hosts: Host list of the collector; the host column indexes it.
+        overflow: Readings dropped as the buffer was full.
+        failed: Indexes of hosts whose poll failed.
+        errors: Description of the exception that failed each host's poll,
+            keyed by host index.
+    """
+
+    def __init__(
+        self, worker, timestamp, columns, names, hosts, overflow, failed, errors=None
+    ):
+        """Creates an instance of Batch.
+
+        Args:
+            worker: Index of the worker.
+            timestamp: Start of the cycle.
+            columns: Dict of arrays, keyed by column name.
+            names: Name table of the worker.
+            hosts: Host list of the collector.
+            overflow: Readings dropped as the buffer was full.
+            failed: Indexes of hosts whose poll failed.
+            errors: Dict of error descriptions, keyed by host index.
+                default: None, no descriptions.
+        """
+        self.worker = worker
+        self.timestamp = timestamp
+        self.names = names
+        self.hosts = hosts
+        self.overflow = overflow
+        self.failed = failed
+        self.errors = {} if errors is None else errors
+        for name, column in columns.items():
+            setattr(self, name, column)
+
+    def __len__(self):
+        """Number of readings.
+
+        Returns:
+            int: Number of readings.
+        """
+        return len(self.value)
+
+    def rows(self):
+        """Iterate over the readings.
+
+        Yields:
+            tuple: (server, name, value) of each reading.
+        """
+        hosts = self.hosts
+        names = self.names
+        for host, name, value in zip(self.host, self.name, self.value):
+            yield hosts[host][0], names[name], value
+
+
+class Collector:
+    """Collector polls a fleet across several worker processes."""
+
+    def __init__(
+        self,
+        hosts,
+        workers=None,
+        concurrency=16,
+        metrics=("pmbus", "sensor"),
+        interval=10.0,
+        capacity=65536,
+        timeout=10.0,
+        rebalance_every=10,
+        username=None,
+        password=None,
+        session_factory=None,
+        login_rate=None,
+        logins_per_subnet=4,
+    ):
+        """Initialises an instance of smbmc.collector.Collector.
+
+        Args:
+            hosts: Servers, or (server, username, password) tuples.
+            workers: Worker processes. default: os.cpu_count().
+            concurrency: Threads polling per worker. default: 16.
+            metrics: Metrics polled. default: ("pmbus", "sensor").
+            interval: Seconds between cycles of a worker; 0 to poll
+                continuously. default: 10.
+            capacity: Readings per cycle and worker; rounded up to a multiple
+                of 8. default: 65536.
+            timeout: Request timeout, in seconds, also the cost of a failed
+                poll when balancing. default: 10.
+            rebalance_every: Cycles between rebalancing. default: 10.
+            username: Default username.
+            password: Default password.
+            session_factory: Picklable callable creating the session of each
+                worker's Fleet. default: a requests.Session.
+            login_rate: Logins per second across all workers. When given,
+                workers log their hosts in before the first cycle, see
+                smbmc.prewarm. default: None, log in on the first poll.
+            logins_per_subnet: Logins in flight per subnet, across all
+                workers, when login_rate is given. default: 4.
+        """
+        self.hosts = [
+            (host, None, None) if isinstance(host, str) else tuple(host)
+            for host in hosts
+        ]
+        self.workers = max(1, min(workers or os.cpu_count(), len(self.hosts)))
+        self.concurrency = concurrency
+        self.metrics = tuple(metrics)
+        self.interval = interval
+        self.capacity = -(-capacity // 8) * 8
+        self.timeout = timeout
+        self.rebalance_every = rebalance_every
+        self.username = username
+        self.password = password
+        self.session_factory = session_factory
+        self.login_rate = login_rate
+        self.logins_per_subnet = logins_per_subnet
+
+        # estimated seconds per poll of each host
+        self.costs = [0.0] * len(self.hosts)
+        self.shards = [
+            list(range(i, len(self.hosts), self.workers)) for i in range(self.workers)
+        ]
+        self._names = [[] for _ in range(self.workers)]
+        self._processes = []
+        self._cycles = 0
+
+    def _config(self, worker_id, shm_name) -> dict:
+        """Settings of a worker, as passed to its process.
+
+        Args:
+            worker_id: Index of the worker.
+            shm_name: Name of the worker's shared memory segment.
+
+        Returns:
+            dict: Settings of the worker.
+        """
+        return {
+            "shm": shm_name,
+            "hosts": self.hosts,
+            "username": self.username,
+            "password": self.password,
+            "metrics": self.metrics,
+            "interval": self.interval,
+            "capacity": self.capacity,
+            "concurrency": self.concurrency,
+            "timeout": self.timeout,
+            "session_factory": self.session_factory,
+            "workers": self.workers,
+            "login_rate": self.login_rate,
+            "logins_per_subnet": self.logins_per_subnet,
+            "shard": self.shards[worker_id],
+        }
+
+    def start(self):
+        """Create the shared memory segments and start the workers.
+
+        Raises:
+            ImportError: Python is older than 3.8.
+        """
+        from multiprocessing import get_context
+
+        SharedMemory = _shared_memory()  # noqa: N806
+        context = get_context("spawn")
+        self._results = context.Queue()
+        self._layout = _layout(self.capacity)
+        for worker_id in range(self.workers):
+            shm = SharedMemory(create=True, size=2 * self._layout[None])
+            commands = context.Queue()
+            slots = context.Semaphore(2)
+            process = context.Process(
+                target=_worker,
+                args=(
+                    worker_id,
+                    self._config(worker_id, shm.name),
+                    commands,
+                    self._results,
+                    slots,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append((process, shm, commands, slots))
+
+    def stop(self):
+        """Stop the workers and release the shared memory segments."""
+        for _, _, commands, _ in self._processes:
+            commands.put(("stop",))
+        for process, shm, _, slots in self._processes:
+            # unblock a worker waiting for a free half
+            slots.release()
+            process.join(timeout=self.interval + self.timeout)
+            if process.is_alive():  # pragma: no cover
+                process.terminate()
+            shm.close()
+            shm.unlink()
+        self._processes = []
+
+    def __enter__(self):
+        """Start the collector.
+
+        Returns:
+            Collector: This collector.
+        """
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop the collector.
+
+        Args:
+            *exc_info: Exception details, if any.
+        """
+        self.stop()
+
+    def collect(self, timeout=None):
+        """Receive the batches published by the workers.
+
+        Args:
+            timeout: Seconds to wait for each batch. default: forever.
+
+        Yields:
+            Batch: Readings of one worker cycle, in the order published.
+
+        Raises:
+            queue.Empty: No batch arrived within the timeout.
+        """
+        while True:
+            message = self._results.get(timeout=timeout)
+            yield self._receive(*message)
+
+    def _receive(self, worker_id, half, timestamp, count, overflow, new_names, timings):
+        """Copy a batch out of shared memory and update the host costs.
+
+        Args:
+            worker_id: Index of the worker.
+            half: Half of the buffer written.
+            timestamp: Start of the cycle.
+            count: Readings written.
+            overflow: Readings dropped.
+            new_names: Names added to the worker's table.
+            timings: (host index, seconds, error description or None)
+                tuples.
+
+        Returns:
+            Batch: The batch.
+        """
+        _, shm, _, slots = self._processes[worker_id]
+        base = self._layout[None] * half
+        columns = {}
+        for name, _ in COLUMNS:
+            offset, code, size = self._layout[name]
+            start = base + offset
+            column = columns[name] = array(code)
+            with shm.buf[start : start + size * count] as view:
+                column.frombytes(view)
+        slots.release()
+
+        names = self._names[worker_id]
+        names.extend(new_names)
+
+        failed = []
+        errors = {}
+        for index, seconds, error in timings:
+            if error is not None:
+                failed.append(index)
+                errors[index] = error
+                seconds = self.timeout
+            cost = self.costs[index]
+            self.costs[index] = (
+                seconds if not cost else cost + _ALPHA * (seconds - cost)
+            )
+
+        self._cycles += 1
+        if self.rebalance_every and self._cycles % self.rebalance_every == 0:
+            self.rebalance()
+
+        return Batch(
+            worker_id, timestamp, columns, names, self.hosts, overflow, failed, errors
+        )
+
+    def rebalance(self) -> bool:
+        """Reassign hosts if the workers' loads are unbalanced.
+
+        Hosts of dead workers are always reassigned.
+
+        Returns:
+            bool: Whether any host was moved.
+        """
+        from heapq import heapify
+        from heapq import heappop
+        from heapq import heappush
+
+        alive = [
+            worker_id
+            for worker_id, (process, *_) in enumerate(self._processes)
+            if process.is_alive()
+        ]
+        if not alive:
+            return False
+
+        loads = [sum(self.costs[i] for i in shard) for shard in self.shards]
+        dead = any(self.shards[w] for w in range(self.workers) if w not in alive)
+        mean = sum(loads) / len(alive)
+        if not dead and (not mean or max(loads[w] for w in alive) <= mean * _IMBALANCE):
+            return False
+
+        shards = {worker_id: [] for worker_id in alive}
+        heap = [(0.0, worker_id) for worker_id in alive]
+        heapify(heap)
+        for index in sorted(range(len(self.hosts)), key=lambda i: -self.costs[i]):
+            load, worker_id = heappop(heap)
+            shards[worker_id].append(index)
+            heappush(heap, (load + self.costs[index], worker_id))
+
+        for worker_id in range(self.workers):
+            shard = sorted(shards.get(worker_id, []))
+            if shard != self.shards[worker_id]:
+                self.shards[worker_id] = shard
+                if worker_id in shards:
+                    self._processes[worker_id][2].put(("shard", shard))
+        return True
@@ -0,0 +1,524 @@
+"""Provides columnar export of fleet snapshots for analytics.
+
+ColumnarWriter appends snapshots, as returned by ``Client.get_metrics``, to
+two tables: ``<path>.sensor.<ext>``, one row per sensor reading, and
+``<path>.pmbus.<ext>``, one row per power supply. Rows are buffered, and
+each flush(), typically one per sweep of the fleet, appends one row group:
+
+- ``parquet``: Apache Parquet, a row group per flush. Requires pyarrow.
+  The file is readable once the writer is closed.
+- ``arrow``: Arrow IPC stream (``.arrows``), a record batch per flush,
+  readable while being written. Requires pyarrow.
+- ``npz``: NumPy zip archive, a group of ``.npy`` members per flush,
+  readable while being written with read_npz(). Requires numpy.
+
+Sensor table:
+
+=========  ==========================  ====================================
+column     Arrow type                  npz dtype
+=========  ==========================  ====================================
+host       dictionary<int32, string>   int32 codes
+timestamp  timestamp[us, UTC]          datetime64[us]
+name       dictionary<int32, string>   int32 codes
+type       dictionary<int32, string>   int32 codes, e.g. "temperature"
+unit       dictionary<int32, string>   int32 codes, e.g. "degrees_celsius"
+state      uint8                       uint8
+flags      uint32, null for threshold  int64, -1 for threshold sensors
+           sensors
+reading    float64                     float64
+lnr ... unr float64                    float64
+=========  ==========================  ====================================
+
+Power supply table: ``host`` and ``timestamp`` as above, ``slot`` (uint8,
+PowerSupply.id), ``serial`` (dictionary, PowerSupply.name), ``status`` and
+``type`` (uint8, parsed from hex, 255 if unknown, as in smbmc.archive), and
+the float64 POWER_SUPPLY_READINGS.
+
+Host and sensor names repeat on every row, and are dictionary-encoded:
+each distinct string is stored once per row group (Parquet) or once per
+file (Arrow deltas, npz). Combined with compression, a reading takes a few
+bytes, rather than the hundred or more of a CSV or NDJSON row, and scans
+read only the columns they need.
+"""
+import os
+from time import time
+
+from .export import THRESHOLDS
+from .models import POWER_SUPPLY_READINGS
+from .util import byte_value
+
+FORMATS = ("parquet", "arrow", "npz")
+
+_EXTENSIONS = {"parquet": "parquet", "arrow": "arrows", "npz": "npz"}
+
+#: (column, kind) of the sensor table.
+SENSOR_SCHEMA = (
+    ("host", "dictionary"),
+    ("timestamp", "timestamp"),
+    ("name", "dictionary"),
+    ("type", "dictionary"),
+    ("unit", "dictionary"),
+    ("state", "uint8"),
+    ("flags", "uint32"),
+    ("reading", "float64"),
+) + tuple((attr, "float64") for attr in THRESHOLDS)
+
+#: (column, kind) of the power supply table.
+POWER_SUPPLY_SCHEMA = (
+    ("host", "dictionary"),
+    ("timestamp", "timestamp"),
+    ("slot", "uint8"),
+    ("serial", "dictionary"),
+    ("status", "uint8"),
+    ("type", "uint8"),
+) + tuple((attr, "float64") for attr in POWER_SUPPLY_READINGS)
+
+# npz dtypes; flags are widened so that -1 can stand for null
+_NPZ_DTYPES = {
+    "dictionary": "int32",
+    "timestamp": "datetime64[us]",
+    "uint8": "uint8",
+    "uint32": "int64",
+    "float64": "float64",
+}
+
+
+def _import_pyarrow():
+    """Import pyarrow if installed.
+
+    Returns:
+        module: pyarrow, or None if it is not installed.
+    """
+    try:
+        import pyarrow
+    except ImportError:  # pragma: no cover
+        return None
+    return pyarrow
+
+
+class _Table:
+    """Rows of one table buffered in columns, with dictionary encoding."""
+
+    def __init__(self, schema):
+        """Creates an instance of _Table.
+
+        Args:
+            schema: (column, kind) tuples.
+        """
+        self.schema = schema
+        self.columns = {column: [] for column, _ in schema}
+        # per dictionary column: (code of each value, values in code order)
+        self.dictionaries = {
+            column: ({}, []) for column, kind in schema if kind == "dictionary"
+        }
+
+    def __len__(self):
+        """Number of buffered rows.
+
+        Returns:
+            int: Number of rows.
+        """
+        return len(self.columns["host"])
+
+    def code(self, column: str, value: str) -> int:
+        """Code of a value of a dictionary column, adding it if new.
+
+        Args:
+            column: Dictionary column.
+            value: String value.
+
+        Returns:
+            int: Code of the value.
+        """
+        codes, values = self.dictionaries[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def clear(self):
+        """Drop the buffered rows, keeping the dictionaries."""
+        for values in self.columns.values():
+            values.clear()
+
+
+class _ArrowSink:
+    """Writes tables to Parquet or an Arrow IPC stream."""
+
+    def __init__(self, pyarrow, path, schema, file_format, compression):
+        """Creates an instance of _ArrowSink, creating the file.
+
+        Args:
+            pyarrow: The pyarrow module.
+            path: Path of the file.
+            schema: (column, kind) tuples.
+            file_format: "parquet" or "arrow".
+            compression: Codec name, or None.
+        """
+        pa = pyarrow
+        self.pa = pa
+        self.schema = pa.schema([(column, self._type(kind)) for column, kind in schema])
+        if file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(
+                path, self.schema, compression=compression or "none"
+            )
+            self._sink = None
+        else:
+            options = pa.ipc.IpcWriteOptions(
+                compression=compression, emit_dictionary_deltas=True
+            )
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa.ipc.new_stream(self._sink, self.schema, options=options)
+        self._parquet = file_format == "parquet"
+
+    def _type(self, kind: str):
+        """Arrow type of a column kind.
+
+        Args:
+            kind: Column kind.
+
+        Returns:
+            pyarrow.DataType: The type.
+        """
+        pa = self.pa
+        if kind == "dictionary":
+            return pa.dictionary(pa.int32(), pa.string())
+        if kind == "timestamp":
+            return pa.timestamp("us", tz="UTC")
+        return getattr(pa, kind)()
+
+    def write(self, table: _Table):
+        """Append the buffered rows of a table as a row group.
+
+        Args:
+            table: Table to write.
+        """
+        pa = self.pa
+        arrays = []
+        for column, kind in table.schema:
+            values = table.columns[column]
+            if kind == "dictionary":
+                arrays.append(
+                    pa.DictionaryArray.from_arrays(
+                        pa.array(values, pa.int32()),
+                        pa.array(table.dictionaries[column][1], pa.string()),
+                    )
+                )
+            else:
+                arrays.append(pa.array(values, self._type(kind)))
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+        if self._parquet:
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        """Finish and close the file."""
+        self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+
+class _NpzSink:
+    """Appends tables to a NumPy zip archive, a group of arrays per flush.
+
+    Group ``n`` holds a ``<n>/<column>.npy`` member per column, and a
+    ``<n>/<column>.dictionary.npy`` member holding the values added to each
+    dictionary column since the previous group.
+    """
+
+    def __init__(self, numpy, path, schema, compression):
+        """Creates an instance of _NpzSink, creating the file.
+
+        Args:
+            numpy: The numpy module.
+            path: Path of the file.
+            schema: (column, kind) tuples.
+            compression: Whether to deflate the members.
+        """
+        import zipfile
+
+        self.numpy = numpy
+        self.path = path
+        self.compression = zipfile.ZIP_DEFLATED if compression else zipfile.ZIP_STORED
+        self.groups = 0
+        self._sent = {column: 0 for column, kind in schema if kind == "dictionary"}
+        with zipfile.ZipFile(path, "x"):
+            pass
+
+    def _array(self, values: list, kind: str):
+        """Convert a buffered column.
+
+        Args:
+            values: Column values.
+            kind: Column kind.
+
+        Returns:
+            numpy.ndarray: The column.
+        """
+        np = self.numpy
+        if kind == "uint32":
+            values = [-1 if value is None else value for value in values]
+        return np.array(values, dtype=_NPZ_DTYPES[kind])
+
+    def write(self, table: _Table):
+        """Append the buffered rows of a table as a group.
+
+        Reopening the archive for each group rewrites its central directory,
+        so that it remains readable if the process dies.
+
+        Args:
+            table: Table to write.
+        """
+        import zipfile
+
+        from numpy.lib.format import write_array
+
+        members = {}
+        for column, kind in table.schema:
+            members[column] = self._array(table.columns[column], kind)
+        for column, (_, values) in table.dictionaries.items():
+            sent = self._sent[column]
+            if len(values) > sent:
+                members[f"{column}.dictionary"] = self.numpy.array(values[sent:])
+                self._sent[column] = len(values)
+
+        with zipfile.ZipFile(self.path, "a", self.compression) as archive:
+            for name, array in members.items():
+                with archive.open(f"{self.groups:06d}/{name}.npy", "w") as f:
+                    write_array(f, array, allow_pickle=False)
+        self.groups += 1
+
+    def close(self):
+        """Do nothing; the archive is closed after each group."""
+
+
+class ColumnarWriter:
+    """Appends snapshots to columnar sensor and power supply tables.
+
+    Can be used as a callback taking (host, metrics, timestamp).
+
+    Attributes:
+        format: "parquet", "arrow" or "npz".
+        paths: Path of each table, keyed by "sensor" and "pmbus".
+    """
+
+    def __init__(self, path, format=None, compression="zstd", max_rows=1 << 20):
+        """Initialises an instance of smbmc.columnar.ColumnarWriter.
+
+        Files are created on the first flush of a table.
+
+        Args:
+            path: Base path; tables are written to ``<path>.sensor.<ext>``
+                and ``<path>.pmbus.<ext>``.
+            format: One of FORMATS. default: "parquet" if pyarrow is
+                installed, else "npz".
+            compression: Codec of Parquet and Arrow files, e.g. "zstd",
+                "lz4" or None; npz members are deflated unless None.
+                default: "zstd".
+            max_rows: Buffered rows of a table that trigger a flush, bounding
+                memory if flush() is never called. default: 1048576.
+
+        Raises:
+            ValueError: The format is unknown.
+            ImportError: The format requires a module that is not installed.
+            FileExistsError: A table already exists; row groups cannot be
+                appended to files written by another writer.
+        """
+        pyarrow = _import_pyarrow() if format in (None, "parquet", "arrow") else None
+        if format is None:
+            format = "parquet" if pyarrow is not None else "npz"
+        if format not in FORMATS:
+            raise ValueError(f"unknown format {format!r}")
+        if format == "npz":
+            import numpy
+
+            self._module = numpy
+        elif pyarrow is None:
+            raise ImportError("pyarrow is not installed")
+        else:
+            self._module = pyarrow
+
+        self.format = format
+        self.compression = compression
+        self.max_rows = max_rows
+        extension = _EXTENSIONS[format]
+        self.paths = {
+            "sensor": f"{path}.sensor.{extension}",
+            "pmbus": f"{path}.pmbus.{extension}",
+        }
+        for table_path in self.paths.values():
+            if os.path.exists(table_path):
+                raise FileExistsError(table_path)
+        self._tables = {
+            "sensor": _Table(SENSOR_SCHEMA),
+            "pmbus": _Table(POWER_SUPPLY_SCHEMA),
+        }
+        self._sinks = {}
+
+    def __enter__(self):
+        """Enter the runtime context.
+
+        Returns:
+            ColumnarWriter: This writer.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close on leaving the runtime context.
+
+        Args:
+            *exc_info: Exception details, if any.
+        """
+        self.close()
+
+    def write(self, host: str, metrics: dict, timestamp=None):
+        """Buffer a snapshot.
+
+        Args:
+            host: Host identifier.
+            metrics: Dict containing "sensor" and/or "pmbus" results.
+            timestamp: Seconds since the epoch. default: now.
+        """
+        timestamp = time() if timestamp is None else timestamp
+        # microseconds since the epoch
+        stamp = round(timestamp * 1e6)
+
+        sensors = metrics.get("sensor")
+        if sensors:
+            table = self._tables["sensor"]
+            columns = table.columns
+            host_code = table.code("host", host)
+            for sensor in sensors:
+                columns["host"].append(host_code)
+                columns["timestamp"].append(stamp)
+                columns["name"].append(table.code("name", sensor.name))
+                columns["type"].append(table.code("type", sensor.type.name.lower()))
+                columns["unit"].append(table.code("unit", sensor.unit.name.lower()))
+                columns["state"].append(int(sensor.state))
+                if sensor.flags is None:
+                    columns["flags"].append(None)
+                    for attr in ("reading",) + THRESHOLDS:
+                        columns[attr].append(getattr(sensor, attr))
+                else:
+                    columns["flags"].append(int(sensor.flags))
+                    for attr in ("reading",) + THRESHOLDS:
+                        columns[attr].append(None)
+
+        power_supplies = metrics.get("pmbus")
+        if power_supplies:
+            table = self._tables["pmbus"]
+            columns = table.columns
+            host_code = table.code("host", host)
+            for psu in power_supplies:
+                columns["host"].append(host_code)
+                columns["timestamp"].append(stamp)
+                columns["slot"].append(psu.id)
+                columns["serial"].append(table.code("serial", psu.name))
+                columns["status"].append(byte_value(psu.status))
+                columns["type"].append(byte_value(psu.type))
+                for attr in POWER_SUPPLY_READINGS:
+                    columns[attr].append(getattr(psu, attr))
+
+        if any(len(table) >= self.max_rows for table in self._tables.values()):
+            self.flush()
+
+    __call__ = write
+
+    def write_sweep(self, snapshots: dict, timestamp=None):
+        """Write a sweep of the fleet as one row group per table.
+
+        Hosts whose snapshot is None, e.g. having failed to respond to
+        Fleet.get_metrics(), are skipped.
+
+        Args:
+            snapshots: Dict mapping hosts to their metrics.
+            timestamp: Seconds since the epoch. default: now.
+        """
+        timestamp = time() if timestamp is None else timestamp
+        for host, metrics in snapshots.items():
+            if metrics is not None:
+                self.write(host, metrics, timestamp)
+        self.flush()
+
+    def _sink(self, name: str):
+        """Sink of a table, creating its file if needed.
+
+        Args:
+            name: "sensor" or "pmbus".
+
+        Returns:
+            object: Sink with write(table) and close().
+        """
+        sink = self._sinks.get(name)
+        if sink is None:
+            path = self.paths[name]
+            schema = self._tables[name].schema
+            if self.format == "npz":
+                sink = _NpzSink(self._module, path, schema, self.compression)
+            else:
+                sink = _ArrowSink(
+                    self._module, path, schema, self.format, self.compression
+                )
+            self._sinks[name] = sink
+        return sink
+
+    def flush(self):
+        """Append the buffered rows of each table as a row group."""
+        for name, table in self._tables.items():
+            if len(table):
+                self._sink(name).write(table)
+                table.clear()
+
+    def close(self):
+        """Flush, and finish the files."""
+        self.flush()
+        for sink in self._sinks.values():
+            sink.close()
+        self._sinks = {}
+
+
+def read_npz(path, columns=None, decode=True) -> dict:
+    """Read a table written in the npz format.
+
+    Args:
+        path: Path of the table, e.g. ``<path>.sensor.npz``.
+        columns: Columns to read. default: all.
+        decode: Whether to decode dictionary columns into arrays of strings;
+            otherwise codes are returned, and each dictionary as
+            ``<column>.dictionary``. default: True.
+
+    Returns:
+        dict: Column arrays, all row groups concatenated.
+    """
+    import zipfile
+
+    import numpy
+    from numpy.lib.format import read_array
+
+    parts = {}
+    dictionaries = {}
+    with zipfile.ZipFile(path) as archive:
+        for member in sorted(archive.namelist(), key=lambda m: m.split("/", 1)):
+            name = member.split("/", 1)[1][: -len(".npy")]
+            if name.endswith(".dictionary"):
+                column = name[: -len(".dictionary")]
+                if columns is not None and column not in columns:
+                    continue
+                with archive.open(member) as f:
+                    dictionaries.setdefault(column, []).append(read_array(f))
+            elif columns is None or name in columns:
+                with archive.open(member) as f:
+                    parts.setdefault(name, []).append(read_array(f))
+
+    result = {name: numpy.concatenate(arrays) for name, arrays in parts.items()}
+    for column, arrays in dictionaries.items():
+        dictionary = numpy.concatenate(arrays)
+        if decode:
+            result[column] = dictionary[result[column]]
+        else:
+            result[f"{column}.dictionary"] = dictionary
+    return result
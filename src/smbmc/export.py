@@ -0,0 +1,400 @@
+"""Provides streaming exporters for sensor and power supply snapshots.
+
+Each exporter writes snapshots, as returned by ``Client.get_metrics``,
+straight to a file-like object. The constant part of every line (host,
+sensor name, type and unit) is formatted once per (host, sensor) and
+cached, and lines are buffered and written in batches.
+
+Power supply readings are exported per attribute, named
+``psu<id>.<attribute>`` (e.g. ``psu1.input_power``), except for Influx line
+protocol, which writes one ``pmbus`` point per power supply.
+"""
+from abc import ABC
+from abc import abstractmethod
+from math import isfinite
+from time import time
+
+from .models import POWER_SUPPLY_READINGS
+from .models import SensorUnitEnum
+
+#: Units of each PowerSupply attribute.
+POWER_SUPPLY_UNITS = {
+    "input_voltage": SensorUnitEnum.VOLTS,
+    "input_current": SensorUnitEnum.AMPS,
+    "input_power": SensorUnitEnum.WATTS,
+    "output_voltage": SensorUnitEnum.VOLTS,
+    "output_current": SensorUnitEnum.AMPS,
+    "output_power": SensorUnitEnum.WATTS,
+    "temp_1": SensorUnitEnum.DEGREES_CELSIUS,
+    "temp_2": SensorUnitEnum.DEGREES_CELSIUS,
+    "fan_1": SensorUnitEnum.RPM,
+    "fan_2": SensorUnitEnum.RPM,
+}
+
+THRESHOLDS = ("lnr", "lc", "lnc", "unc", "uc", "unr")
+
+
+def _number(value) -> str:
+    """Format a number, mapping None, NaN and infinities to an empty string.
+
+    Args:
+        value: int, float or None.
+
+    Returns:
+        str: Formatted number.
+    """
+    if value is None or not isfinite(value):
+        return ""
+    return repr(value)
+
+
+class StreamExporter(ABC):
+    """Base class of the streaming exporters.
+
+    Subclasses implement ``_sensor_prefix``, ``_sensor_line`` and
+    ``_power_supply_lines``.
+    """
+
+    def __init__(self, stream, batch_size=1024):
+        """Initialises a streaming exporter.
+
+        Args:
+            stream: Writable text file-like object.
+            batch_size: Lines buffered before being written. default: 1024.
+        """
+        self.stream = stream
+        self.batch_size = batch_size
+        self._buffer = []
+        self._prefixes = {}
+
+    def __enter__(self):
+        """Enter the runtime context.
+
+        Returns:
+            StreamExporter: This exporter.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """Flush on leaving the runtime context.
+
+        Args:
+            *exc_info: Exception details, if any.
+        """
+        self.flush()
+
+    @abstractmethod
+    def _sensor_prefix(self, host, sensor):
+        """Format the constant start of a sensor's lines.
+
+        Args:
+            host: Host identifier.
+            sensor: Sensor.
+
+        Returns:
+            str: Prefix, cached per (host, sensor).
+        """
+
+    @abstractmethod
+    def _sensor_line(self, prefix, sensor, timestamp):
+        """Format a sensor reading.
+
+        Args:
+            prefix: Prefix returned by _sensor_prefix().
+            sensor: Sensor.
+            timestamp: Seconds since the epoch.
+
+        Returns:
+            str: Line, including its newline.
+        """
+
+    @abstractmethod
+    def _power_supply_lines(self, host, power_supplies, timestamp):
+        """Format power supply readings.
+
+        Args:
+            host: Host identifier.
+            power_supplies: Power supplies.
+            timestamp: Seconds since the epoch.
+
+        Returns:
+            iterable: Lines, including their newlines.
+        """
+
+    def _host_prefixes(self, host: str) -> dict:
+        prefixes = self._prefixes.get(host)
+        if prefixes is None:
+            prefixes = self._prefixes[host] = {}
+        return prefixes
+
+    def write(self, host: str, metrics: dict, timestamp=None):
+        """Export a single snapshot.
+
+        Args:
+            host: Host identifier.
+            metrics: Dict containing "sensor" and/or "pmbus" results.
+            timestamp: Seconds since the epoch. Default: now.
+        """
+        timestamp = time() if timestamp is None else timestamp
+        buffer = self._buffer
+
+        sensors = metrics.get("sensor")
+        if sensors:
+            prefixes = self._host_prefixes(host)
+            for sensor in sensors:
+                key = (sensor.name, sensor.type, sensor.unit)
+                prefix = prefixes.get(key)
+                if prefix is None:
+                    prefix = prefixes[key] = self._sensor_prefix(host, sensor)
+                buffer.append(self._sensor_line(prefix, sensor, timestamp))
+
+        power_supplies = metrics.get("pmbus")
+        if power_supplies:
+            buffer.extend(self._power_supply_lines(host, power_supplies, timestamp))
+
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, snapshots):
+        """Export a stream of snapshots.
+
+        Args:
+            snapshots: Iterable of (host, metrics, timestamp) tuples.
+        """
+        for host, metrics, timestamp in snapshots:
+            self.write(host, metrics, timestamp)
+        self.flush()
+
+    def flush(self):
+        """Write buffered lines to the stream."""
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self._buffer = []
+
+
+def _escape_tag(value: str) -> str:
+    """Escape an Influx line protocol tag key or value.
+
+    Args:
+        value: Raw tag.
+
+    Returns:
+        str: Escaped tag.
+    """
+    return value.replace(",", r"\,").replace("=", r"\=").replace(" ", r"\ ")
+
+
+def _influx_field(value) -> str:
+    """Format an Influx line protocol field value.
+
+    Line protocol cannot represent missing, NaN or infinite values; such
+    fields are left out.
+
+    Args:
+        value: int, float or None.
+
+    Returns:
+        str: Formatted value, ints carrying the "i" suffix, or None if the
+        value cannot be written.
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return f"{value}i"
+    value = float(value)
+    return repr(value) if isfinite(value) else None
+
+
+class InfluxExporter(StreamExporter):
+    """Writes snapshots in Influx line protocol.
+
+    Sensors are written to the ``sensor`` measurement, power supplies to
+    the ``pmbus`` measurement. Timestamps have nanosecond precision.
+    """
+
+    def _sensor_prefix(self, host, sensor):
+        return (
+            f"sensor,host={_escape_tag(host)},name={_escape_tag(sensor.name)},"
+            f"type={sensor.type.name.lower()},unit={sensor.unit.name.lower()} "
+        )
+
+    def _sensor_line(self, prefix, sensor, timestamp):
+        fields = [f"state={int(sensor.state)}i"]
+        if sensor.flags is None:
+            # floats throughout, so that a field keeps one type
+            for attr in ("reading",) + THRESHOLDS:
+                value = float(getattr(sensor, attr))
+                if isfinite(value):
+                    fields.append(f"{attr}={value!r}")
+        else:
+            fields.append(f"flags={int(sensor.flags)}i")
+        return f"{prefix}{','.join(fields)} {int(timestamp * 1e9)}\n"
+
+    def _power_supply_lines(self, host, power_supplies, timestamp):
+        prefixes = self._host_prefixes(host)
+        nanoseconds = int(timestamp * 1e9)
+        for psu in power_supplies:
+            key = ("pmbus", psu.id, psu.name)
+            prefix = prefixes.get(key)
+            if prefix is None:
+                serial = f",serial={_escape_tag(psu.name)}" if psu.name else ""
+                prefix = f"pmbus,host={_escape_tag(host)},slot={psu.id}{serial} "
+                prefixes[key] = prefix
+            fields = ",".join(
+                f"{attr}={value}"
+                for attr, value in (
+                    (attr, _influx_field(getattr(psu, attr)))
+                    for attr in POWER_SUPPLY_READINGS
+                )
+                if value is not None
+            )
+            # a point needs at least one field
+            if fields:
+                yield f"{prefix}{fields} {nanoseconds}\n"
+
+
+def _csv_text(value: str) -> str:
+    """Quote a CSV text cell when required.
+
+    Args:
+        value: Raw cell.
+
+    Returns:
+        str: Cell, quoted if it contains a delimiter, quote or newline.
+    """
+    if any(c in value for c in ',"\n\r'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+class CsvExporter(StreamExporter):
+    """Writes snapshots as CSV, one row per sensor or power supply reading.
+
+    Columns are listed in ``CsvExporter.COLUMNS``; empty cells denote values
+    that do not apply, such as thresholds of discrete sensors.
+    """
+
+    COLUMNS = (
+        "timestamp",
+        "host",
+        "name",
+        "type",
+        "unit",
+        "state",
+        "flags",
+        "reading",
+    ) + THRESHOLDS
+
+    def __init__(self, stream, batch_size=1024, header=True):
+        """Initialises an instance of smbmc.export.CsvExporter.
+
+        Args:
+            stream: Writable text file-like object.
+            batch_size: Lines buffered before being written. default: 1024.
+            header: Whether to write the header row first. default: True.
+        """
+        super().__init__(stream, batch_size)
+        if header:
+            self._buffer.append(",".join(self.COLUMNS) + "\n")
+
+    def _sensor_prefix(self, host, sensor):
+        return (
+            f",{_csv_text(host)},{_csv_text(sensor.name)},"
+            f"{sensor.type.name.lower()},{sensor.unit.name.lower()},"
+        )
+
+    def _sensor_line(self, prefix, sensor, timestamp):
+        if sensor.flags is None:
+            values = ",," + ",".join(
+                _number(getattr(sensor, attr)) for attr in ("reading",) + THRESHOLDS
+            )
+        else:
+            values = f",{int(sensor.flags)}" + "," * (len(THRESHOLDS) + 1)
+        return f"{timestamp!r}{prefix}{int(sensor.state)}{values}\n"
+
+    def _power_supply_lines(self, host, power_supplies, timestamp):
+        prefixes = self._host_prefixes(host)
+        suffix = "," * len(THRESHOLDS) + "\n"
+        for psu in power_supplies:
+            for attr in POWER_SUPPLY_READINGS:
+                key = ("pmbus", psu.id, attr)
+                prefix = prefixes.get(key)
+                if prefix is None:
+                    prefix = prefixes[key] = (
+                        f",{_csv_text(host)},psu{psu.id}.{attr},power_supply,"
+                        f"{POWER_SUPPLY_UNITS[attr].name.lower()},,,"
+                    )
+                value = _number(getattr(psu, attr))
+                yield f"{timestamp!r}{prefix}{value}{suffix}"
+
+
+def _json_text(value: str) -> str:
+    """Encode a JSON string.
+
+    Args:
+        value: Raw string.
+
+    Returns:
+        str: JSON string literal.
+    """
+    from json import dumps
+
+    return dumps(value)
+
+
+def _json_number(value) -> str:
+    """Encode a JSON number, mapping None, NaN and infinities to null.
+
+    Args:
+        value: int, float or None.
+
+    Returns:
+        str: JSON number or null.
+    """
+    return _number(value) or "null"
+
+
+class NdjsonExporter(StreamExporter):
+    """Writes snapshots as newline-delimited JSON, one object per line.
+
+    Sensor objects carry ``host``, ``name``, ``type``, ``unit``, ``state``,
+    ``timestamp`` and either ``flags`` (discrete sensors) or ``reading`` and
+    thresholds. Power supply objects carry ``host``, ``name``
+    (``psu<id>.<attribute>``), ``type``, ``unit``, ``timestamp`` and
+    ``reading``.
+    """
+
+    def _sensor_prefix(self, host, sensor):
+        return (
+            f'{{"host":{_json_text(host)},"name":{_json_text(sensor.name)},'
+            f'"type":"{sensor.type.name.lower()}",'
+            f'"unit":"{sensor.unit.name.lower()}",'
+        )
+
+    def _sensor_line(self, prefix, sensor, timestamp):
+        if sensor.flags is None:
+            values = ",".join(
+                f'"{attr}":{_json_number(getattr(sensor, attr))}'
+                for attr in ("reading",) + THRESHOLDS
+            )
+        else:
+            values = f'"flags":{int(sensor.flags)}'
+        return (
+            f'{prefix}"state":{int(sensor.state)},'
+            f'"timestamp":{timestamp!r},{values}}}\n'
+        )
+
+    def _power_supply_lines(self, host, power_supplies, timestamp):
+        prefixes = self._host_prefixes(host)
+        for psu in power_supplies:
+            for attr in POWER_SUPPLY_READINGS:
+                key = ("pmbus", psu.id, attr)
+                prefix = prefixes.get(key)
+                if prefix is None:
+                    prefix = prefixes[key] = (
+                        f'{{"host":{_json_text(host)},'
+                        f'"name":"psu{psu.id}.{attr}","type":"power_supply",'
+                        f'"unit":"{POWER_SUPPLY_UNITS[attr].name.lower()}",'
+                    )
+                value = _json_number(getattr(psu, attr))
+                yield f'{prefix}"timestamp":{timestamp!r},"reading":{value}}}\n'
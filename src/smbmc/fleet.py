@@ -0,0 +1,468 @@
+"""Provides lightweight clients for polling large fleets of BMCs.
+
+Every Client owns a requests.Session, with its own adapters, connection
+pools and cookie jar. Held for 10,000 hosts, that is a lot of memory and, as
+each pool keeps its connection open, a lot of file descriptors.
+
+A Fleet owns a single Session shared by all of its LightClients. Each
+LightClient stores only its server, a reference to its credentials (hosts
+added with the fleet's default credentials share one tuple) and its SID and
+expiry. The SID is sent explicitly with each request rather than kept in a
+cookie jar.
+
+The shared Session keeps connection pools for at most ``max_pools`` hosts,
+evicting and closing the least recently used. With ``max_pools`` set to the
+polling concurrency, connections to hosts that are idle between polls are
+closed rather than held open until the next poll.
+"""
+from time import monotonic
+
+from .client import _is_late
+from .client import Client
+
+
+class LightClient(Client):
+    """Client storing minimal per-host state, created by Fleet.add().
+
+    Logs in and queries as Client does, through the fleet's shared session
+    as transport; only the SID is kept by the client instead of a cookie jar.
+
+    Attributes:
+        server: Address of server in form: 'http://192.168.1.1'.
+        credentials: (username, password) tuple.
+        sid: Session ID, or None before the first login.
+        sid_expires: time.monotonic() value after which the SID is renewed.
+        pmbus_decoder: PSItemDecoder of this BMC, or None before the first
+            power supply metrics.
+    """
+
+    def __init__(self, fleet, server, credentials):
+        """Initialises an instance of smbmc.fleet.LightClient.
+
+        Args:
+            fleet: Fleet owning this client.
+            server: Address of server in form: 'http://192.168.1.1'.
+            credentials: (username, password) tuple.
+        """
+        self.fleet = fleet
+        self.server = server
+        self.credentials = credentials
+        self.sid = None
+        self.sid_expires = 0.0
+
+    @property
+    def username(self):
+        """Username, from the credentials tuple."""
+        return self.credentials[0]
+
+    @property
+    def password(self):
+        """Password, from the credentials tuple."""
+        return self.credentials[1]
+
+    @property
+    def transport(self):
+        """Session of the fleet, shared by its clients."""
+        return self.fleet.session
+
+    @property
+    def catalog(self):
+        """Catalog of the fleet, or None."""
+        return self.fleet.catalog
+
+    def _timeout(self, timeout):
+        """Request timeout, bounded by the fleet's.
+
+        Args:
+            timeout: Seconds, or None.
+
+        Returns:
+            float: The shorter of timeout and the fleet's timeout, or None.
+        """
+        if timeout is None or self.fleet.timeout is None:
+            return self.fleet.timeout if timeout is None else timeout
+        return min(timeout, self.fleet.timeout)
+
+    def _start_session(self, response) -> bool:
+        """Keep the SID of a login response.
+
+        The shared session holds no cookies, so the SID is kept per client.
+
+        Args:
+            response: Response of the login request.
+
+        Returns:
+            bool: Whether the BMC granted a session.
+        """
+        sid = response.cookies.get("SID")
+        if not sid:
+            return False
+        self.sid = sid
+        self.sid_expires = monotonic() + self.fleet.sid_lifetime
+        return True
+
+    def _session_cookies(self):
+        """Cookies sent with each query: the SID, once logged in.
+
+        Returns:
+            dict: Cookies, or None.
+        """
+        return None if self.sid is None else {"SID": self.sid}
+
+    def _session_expired(self) -> bool:
+        """Whether the SID has expired.
+
+        Returns:
+            bool: True if the next query should log in first.
+        """
+        return monotonic() >= self.sid_expires
+
+    def logout(self):
+        """Forget the SID, so that the next query logs in again."""
+        self.sid = None
+        self.sid_expires = 0.0
+
+
+def _shared_session(max_pools: int):
+    """Create a session suitable for sharing between LightClients.
+
+    Args:
+        max_pools: Hosts for which connections are kept open.
+
+    Returns:
+        requests.Session: Session with an empty cookie jar.
+    """
+    from http.cookiejar import DefaultCookiePolicy
+
+    from requests import Session
+    from requests.adapters import HTTPAdapter
+
+    session = Session()
+    # SIDs are held by the clients; keep the shared jar empty
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=()))
+    adapter = HTTPAdapter(pool_connections=max_pools, pool_maxsize=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _poll(client, metrics, deadline, host_errors) -> tuple:
+    """Poll one host, catching any failure.
+
+    Args:
+        client: Client of the host.
+        metrics: List of metric(s) to query.
+        deadline: time.monotonic() value by which to finish, or None.
+        host_errors: List collecting the errors of the poll, or None.
+
+    Returns:
+        tuple: (metrics, None), or (None, exception) if the poll failed.
+    """
+    try:
+        return client.get_metrics(metrics, host_errors, deadline=deadline), None
+    except Exception as e:
+        return None, e
+
+
+def _poll_serially(clients, metrics, deadline, host_errors) -> dict:
+    """Poll hosts one after another.
+
+    Args:
+        clients: Clients of the hosts.
+        metrics: List of metric(s) to query.
+        deadline: time.monotonic() value by which to finish, or None.
+        host_errors: Dict of the error list of each host, or None.
+
+    Returns:
+        dict: (metrics, exception) of each host, keyed by server.
+    """
+    return {
+        client.server: _poll(
+            client,
+            metrics,
+            deadline,
+            None if host_errors is None else host_errors[client.server],
+        )
+        for client in clients
+    }
+
+
+def _poll_concurrently(executor, clients, metrics, deadline, host_errors) -> dict:
+    """Poll hosts through an executor, abandoning those late at the deadline.
+
+    The error list of an abandoned host is replaced with a copy, so that its
+    poll, which may still be running, no longer appends to it.
+
+    Args:
+        executor: concurrent.futures.Executor polling the hosts.
+        clients: Clients of the hosts.
+        metrics: List of metric(s) to query.
+        deadline: time.monotonic() value by which to finish, or None.
+        host_errors: Dict of the error list of each host, or None.
+
+    Returns:
+        dict: (metrics, exception) of each host, keyed by server.
+    """
+    from concurrent.futures import wait
+
+    futures = {
+        executor.submit(
+            _poll,
+            client,
+            metrics,
+            deadline,
+            None if host_errors is None else host_errors[client.server],
+        ): client.server
+        for client in clients
+    }
+    timeout = None if deadline is None else max(deadline - monotonic(), 0)
+    done, _ = wait(futures, timeout=timeout)
+
+    outcomes = {}
+    for future, server in futures.items():
+        if future in done:
+            outcomes[server] = future.result()
+            continue
+        future.cancel()
+        if host_errors is not None:
+            host_errors[server] = list(host_errors[server])
+        outcomes[server] = (None, TimeoutError("abandoned at the deadline"))
+    return outcomes
+
+
+class Fleet:
+    """Fleet manages LightClients sharing one HTTP session."""
+
+    def __init__(
+        self,
+        username=None,
+        password=None,
+        session_timeout=30,
+        max_pools=64,
+        timeout=None,
+        session=None,
+        catalog=None,
+    ):
+        """Initialises an instance of smbmc.fleet.Fleet.
+
+        Args:
+            username: Default username.
+            password: Default password.
+            session_timeout: Session timeout of the BMCs (in minutes).
+                default: 30 minutes.
+            max_pools: Hosts for which connections are kept open. Set this
+                to the number of hosts polled concurrently. default: 64.
+            timeout: Request timeout, in seconds. default: None.
+            session: Session shared by the clients, used as-is, e.g. a
+                smbmc.transport.Urllib3Transport with keep_cookies=False.
+                default: a new requests.Session.
+            catalog: smbmc.catalog.Catalog sharing sensor metadata between
+                the fleet's hosts. default: None.
+        """
+        self.credentials = (username, password)
+        self.sid_lifetime = session_timeout * 60
+        self.timeout = timeout
+        self.clients = {}
+        self.catalog = catalog
+        self.session = _shared_session(max_pools) if session is None else session
+
+    def add(self, server, username=None, password=None) -> LightClient:
+        """Add a host to the fleet.
+
+        Args:
+            server: Address of server in form: 'http://192.168.1.1'.
+            username: Username. default: the fleet's username.
+            password: Password. default: the fleet's password.
+
+        Returns:
+            LightClient: Client for the host. Adding a host twice replaces
+            its client.
+        """
+        if username is None and password is None:
+            credentials = self.credentials
+        else:
+            credentials = (
+                self.credentials[0] if username is None else username,
+                self.credentials[1] if password is None else password,
+            )
+        client = self.clients[server] = LightClient(self, server, credentials)
+        return client
+
+    def remove(self, server):
+        """Remove a host from the fleet.
+
+        Args:
+            server: Address of the server.
+
+        Raises:
+            KeyError: The host is not in the fleet.
+        """
+        del self.clients[server]
+
+    def __getitem__(self, server) -> LightClient:
+        """Look up the client of a host.
+
+        Args:
+            server: Address of the server.
+
+        Returns:
+            LightClient: Client for the host.
+        """
+        return self.clients[server]
+
+    def __iter__(self):
+        """Iterate over the clients, in the order they were added.
+
+        Returns:
+            iterator: LightClients.
+        """
+        return iter(self.clients.values())
+
+    def __len__(self):
+        """Number of hosts in the fleet.
+
+        Returns:
+            int: Number of hosts.
+        """
+        return len(self.clients)
+
+    def get_metrics(
+        self,
+        metrics=("pmbus", "sensor"),
+        budget=None,
+        deadline=None,
+        executor=None,
+        errors=None,
+        raise_errors=False,
+    ) -> dict:
+        """Fetch metrics from every host, within a shared budget.
+
+        Hosts are polled through the executor, or one after another without
+        one. Every host shares the same deadline: hosts still queued when it
+        passes are not polled, and hosts still polling are abandoned.
+
+        Args:
+            metrics: List of metric(s) to query.
+            budget: Seconds allowed for fetching. default: None, no limit.
+            deadline: time.monotonic() value by which to finish, overriding
+                budget. default: None.
+            executor: concurrent.futures.Executor polling the hosts.
+                default: None, poll one after another.
+            errors: Optional dict. When supplied, it maps each host to the
+                list of errors of its poll: DecodeErrors, MissingMetrics
+                and any exception that failed the poll as a whole. The list
+                of an abandoned host is a copy, which its poll no longer
+                appends to.
+            raise_errors: Raise the first exception that failed a host,
+                other than a timeout, once every host has been polled.
+                default: False.
+
+        Raises:
+            Exception: A host failed, if raise_errors is set.
+
+        Returns:
+            dict: Metrics of each host, keyed by server, as returned by
+            Client.get_metrics(). Metrics not fetched in time are None, as
+            is the whole entry of a host that failed or was abandoned.
+        """
+        if deadline is None and budget is not None:
+            deadline = monotonic() + budget
+        metrics = list(metrics)
+        clients = list(self)
+        host_errors = None
+        if errors is not None:
+            host_errors = {client.server: [] for client in clients}
+
+        if executor is None:
+            outcomes = _poll_serially(clients, metrics, deadline, host_errors)
+        else:
+            outcomes = _poll_concurrently(
+                executor, clients, metrics, deadline, host_errors
+            )
+
+        results = {}
+        failure = None
+        for server, (result, error) in outcomes.items():
+            results[server] = result
+            if errors is not None:
+                errors[server] = host_errors[server]
+                if error is not None:
+                    errors[server].append(error)
+            if failure is None and error is not None:
+                if not _is_late(error, deadline):
+                    failure = error
+        if raise_errors and failure is not None:
+            raise failure
+        return results
+
+    def probe(self, timeout=2.0, concurrency=256, login=False, executor=None):
+        """Probe every host, many at a time.
+
+        See Client.probe(). Probes mostly wait on the network, so far more
+        of them run in parallel than polls would: 10,000 hosts answering in
+        10 ms each are swept in under a second, and each unreachable host
+        costs at most timeout, spread over concurrency threads.
+
+        Args:
+            timeout: Seconds allowed for each probe. default: 2.
+            concurrency: Hosts probed in parallel, when no executor is
+                given. default: 256.
+            login: Log in to hosts whose session is not valid, validating
+                their credentials. default: False.
+            executor: concurrent.futures.Executor running the probes.
+                default: None, a new thread pool.
+
+        Returns:
+            dict: ProbeResult of each host, keyed by server.
+        """
+        clients = list(self)
+        if executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            workers = max(1, min(concurrency, len(clients)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return self.probe(timeout, login=login, executor=executor)
+
+        futures = [
+            (client.server, executor.submit(client.probe, timeout, login))
+            for client in clients
+        ]
+        return {server: future.result() for server, future in futures}
+
+    def prewarm(self, **kwargs):
+        """Log every host in, under a rate limit and per-subnet cap.
+
+        See smbmc.prewarm.prewarm().
+
+        Args:
+            **kwargs: Passed to smbmc.prewarm.prewarm().
+
+        Returns:
+            smbmc.prewarm.PrewarmReport: Results.
+        """
+        from .prewarm import prewarm
+
+        return prewarm(list(self), **kwargs)
+
+    def close(self):
+        """Close every open connection.
+
+        Clients remain usable; connections are reopened as needed.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        """Enter the runtime context.
+
+        Returns:
+            Fleet: This fleet.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close connections on leaving the runtime context.
+
+        Args:
+            *exc_info: Exception details, if any.
+        """
+        self.close()
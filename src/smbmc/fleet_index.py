@@ -0,0 +1,234 @@
+"""Provides an index of the latest readings of every host in a fleet.
+
+FleetIndex consumes snapshots, as returned by ``Client.get_metrics``, and
+keeps the latest value of each series of each host. Series are named as by
+smbmc.aggregate: sensor names, ``psu<id>.<attribute>``, and the derived
+``psu<id>.efficiency``, ``power.input`` and ``power.output``.
+
+For every series, the values of all hosts are kept in a sorted list, so
+that top-N and percentile queries are answered by slicing and indexing
+rather than by rescanning every host. Updates bisect the list, and only
+series whose value changed are touched.
+
+Hosts can be given labels, e.g. ``{"rack": "r12", "row": "b"}``. For every
+label, the sum of each series over the hosts sharing a value is maintained,
+updated by the change in each host's contribution.
+"""
+from bisect import bisect_left
+from bisect import insort
+from time import time
+
+from .aggregate import iter_series
+
+
+class FleetIndex:
+    """FleetIndex answers fleet-wide queries over the latest readings.
+
+    Can be used as a callback taking (host, metrics, timestamp).
+    """
+
+    def __init__(self, labels=None):
+        """Creates an instance of FleetIndex.
+
+        Args:
+            labels: Dict mapping hosts to dicts of labels, e.g.
+                ``{"http://10.0.0.1": {"rack": "r12"}}``. default: None.
+        """
+        self._values = {}
+        self._timestamps = {}
+        self._sorted = {}
+        self._labels = {}
+        self._sums = {}
+        for host, host_labels in (labels or {}).items():
+            self.set_labels(host, host_labels)
+
+    def _add_sums(self, host: str, values: dict, sign: int):
+        """Add or subtract a host's values from the sums of its labels.
+
+        Args:
+            host: Host identifier.
+            values: Values of the host, keyed by series name.
+            sign: 1 to add, -1 to subtract.
+        """
+        for label, label_value in self._labels.get(host, {}).items():
+            sums = self._sums.setdefault(label, {}).setdefault(label_value, {})
+            for name, value in values.items():
+                sums[name] = sums.get(name, 0) + sign * value
+
+    def set_labels(self, host: str, labels: dict):
+        """Set the labels of a host, moving its contribution to group sums.
+
+        Args:
+            host: Host identifier.
+            labels: Dict of labels, e.g. ``{"rack": "r12"}``.
+        """
+        values = self._values.get(host, {})
+        self._add_sums(host, values, -1)
+        self._labels[host] = dict(labels)
+        self._add_sums(host, values, 1)
+
+    def update(self, host: str, metrics: dict, timestamp=None):
+        """Replace the readings of one host.
+
+        Series the host no longer reports are removed.
+
+        Args:
+            host: Host identifier.
+            metrics: Dict containing "sensor" and/or "pmbus" results.
+            timestamp: Seconds since the epoch. default: now.
+        """
+        self._timestamps[host] = time() if timestamp is None else timestamp
+        old = self._values.get(host, {})
+        new = dict(iter_series(metrics))
+        self._values[host] = new
+
+        changes = {}
+        for name, value in new.items():
+            previous = old.get(name)
+            if previous == value:
+                continue
+            entries = self._sorted.get(name)
+            if entries is None:
+                entries = self._sorted[name] = []
+            if previous is not None:
+                del entries[bisect_left(entries, (previous, host))]
+            insort(entries, (value, host))
+            changes[name] = value - (previous or 0)
+        for name in old.keys() - new.keys():
+            previous = old[name]
+            entries = self._sorted[name]
+            del entries[bisect_left(entries, (previous, host))]
+            changes[name] = -previous
+
+        if changes:
+            self._add_sums(host, changes, 1)
+
+    __call__ = update
+
+    def update_many(self, snapshots: dict, timestamp=None):
+        """Replace the readings of several hosts.
+
+        Hosts whose snapshot is None, e.g. having failed to respond to
+        Fleet.get_metrics(), keep their previous readings.
+
+        Args:
+            snapshots: Dict mapping hosts to their metrics.
+            timestamp: Seconds since the epoch. default: now.
+        """
+        timestamp = time() if timestamp is None else timestamp
+        for host, metrics in snapshots.items():
+            if metrics is not None:
+                self.update(host, metrics, timestamp)
+
+    def remove(self, host: str):
+        """Remove a host and its readings.
+
+        Args:
+            host: Host identifier.
+        """
+        self.update(host, {})
+        del self._values[host]
+        del self._timestamps[host]
+        self._labels.pop(host, None)
+
+    def expire(self, before: float) -> list:
+        """Remove hosts that have not reported since a time.
+
+        Args:
+            before: Seconds since the epoch.
+
+        Returns:
+            list: Removed hosts.
+        """
+        stale = [host for host, t in self._timestamps.items() if t < before]
+        for host in stale:
+            self.remove(host)
+        return stale
+
+    def __len__(self):
+        """Number of hosts.
+
+        Returns:
+            int: Number of hosts.
+        """
+        return len(self._values)
+
+    def names(self) -> list:
+        """Series reported by at least one host.
+
+        Returns:
+            list: Series names.
+        """
+        return [name for name, entries in self._sorted.items() if entries]
+
+    def value(self, host: str, name: str):
+        """Latest value of a host's series.
+
+        Args:
+            host: Host identifier.
+            name: Series name.
+
+        Returns:
+            float: The value, or None.
+        """
+        return self._values.get(host, {}).get(name)
+
+    def count(self, name: str) -> int:
+        """Number of hosts reporting a series.
+
+        Args:
+            name: Series name.
+
+        Returns:
+            int: Number of hosts.
+        """
+        return len(self._sorted.get(name, ()))
+
+    def top(self, name: str, n=10, largest=True) -> list:
+        """Hosts with the largest (or smallest) values of a series.
+
+        Args:
+            name: Series name, e.g. "CPU Temp".
+            n: Number of hosts. default: 10.
+            largest: False for the smallest values. default: True.
+
+        Returns:
+            list: (host, value) tuples, in order.
+        """
+        entries = self._sorted.get(name, ())
+        if largest:
+            selected = entries[: -n - 1 : -1] if n else []
+        else:
+            selected = entries[:n]
+        return [(host, value) for value, host in selected]
+
+    def percentile(self, name: str, p: float):
+        """Percentile of a series over all hosts, by the nearest-rank method.
+
+        Args:
+            name: Series name.
+            p: Percentile, between 0 and 100.
+
+        Returns:
+            float: The value, or None if no host reports the series.
+        """
+        entries = self._sorted.get(name)
+        if not entries:
+            return None
+        rank = max(1, -(-p * len(entries) // 100))
+        return entries[min(int(rank), len(entries)) - 1][0]
+
+    def group_sums(self, name: str, label: str) -> dict:
+        """Sum of a series over the hosts sharing each value of a label.
+
+        Args:
+            name: Series name, e.g. "power.input".
+            label: Label name, e.g. "rack".
+
+        Returns:
+            dict: Sum, keyed by label value.
+        """
+        return {
+            label_value: sums.get(name, 0)
+            for label_value, sums in self._sums.get(label, {}).items()
+        }
@@ -0,0 +1,367 @@
+"""Provides an in-memory, fixed-size sensor history store.
+
+Every (host, sensor) pair owns one raw ring buffer plus one ring buffer per
+downsampling tier. All buffers are preallocated :mod:`array` instances, so
+memory use is fixed the moment a series is first seen and never grows.
+
+Memory footprint
+----------------
+
+Raw samples are stored as a 32-bit timestamp (``I``) and a 32-bit float
+reading (``f``): 8 bytes per sample. Tier buckets store a 32-bit timestamp
+and 32-bit min/max/mean floats: 16 bytes per bucket. With the defaults
+(360 raw samples, 180 one-minute buckets, 144 ten-minute buckets)::
+
+    raw        360 x  8 B = 2,880 B
+    1 min      180 x 16 B = 2,880 B
+    10 min     144 x 16 B = 2,304 B
+    overhead   ~1,100 B (array headers, slot objects, index entries)
+    ----------------------------------
+    per series ~9.2 KB
+
+For a fleet of 5,000 hosts x 60 sensors (300,000 series) that is roughly
+2.8 GB. Halving ``capacity`` or dropping a tier scales the figure linearly.
+"""
+from array import array
+from time import time
+
+from .models import POWER_SUPPLY_READINGS
+from .models import SensorStateEnum
+
+#: Raw samples kept per series (one hour at a 10 second poll interval).
+DEFAULT_CAPACITY = 360
+
+#: Downsampling tiers as (resolution in seconds, buckets kept).
+DEFAULT_TIERS = ((60, 180), (600, 144))
+
+
+class RingBuffer:
+    """Fixed-size ring buffer of timestamped rows backed by arrays.
+
+    Attributes:
+        capacity: Maximum number of rows retained.
+        size: Number of rows currently retained.
+        timestamps: Row timestamps (seconds since the epoch).
+        columns: One float array per value column.
+    """
+
+    __slots__ = ("capacity", "size", "_start", "timestamps", "columns")
+
+    def __init__(self, capacity: int, width: int = 1):
+        """Creates an instance of the RingBuffer class.
+
+        Args:
+            capacity: Maximum number of rows retained.
+            width: Number of value columns per row.
+        """
+        self.capacity = capacity
+        self.size = 0
+        self._start = 0
+        self.timestamps = array("I", [0]) * capacity
+        self.columns = tuple(array("f", [0.0]) * capacity for _ in range(width))
+
+    def append(self, timestamp: int, *values):
+        """Append a row, overwriting the oldest row when full.
+
+        Args:
+            timestamp: Row timestamp.
+            *values: One value per column.
+        """
+        if self.size < self.capacity:
+            index = (self._start + self.size) % self.capacity
+            self.size += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        self.timestamps[index] = timestamp
+        for column, value in zip(self.columns, values):
+            column[index] = value
+
+    def last_timestamp(self) -> int:
+        """Timestamp of the newest row.
+
+        Returns:
+            int: Newest timestamp, or 0 if the buffer is empty.
+        """
+        if not self.size:
+            return 0
+        return self.timestamps[(self._start + self.size - 1) % self.capacity]
+
+    def _physical(self, position: int) -> int:
+        return (self._start + position) % self.capacity
+
+    def _bisect(self, timestamp: int) -> int:
+        """Find the first logical position with a timestamp >= timestamp."""
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamps[self._physical(mid)] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(self, start: int = 0, end: int = None) -> list:
+        """Return all rows within [start, end].
+
+        Locating the window is O(log capacity); copying it is O(window).
+
+        Args:
+            start: Earliest timestamp (inclusive).
+            end: Latest timestamp (inclusive). Default: no limit.
+
+        Returns:
+            list: Tuples of (timestamp, value, ...) in chronological order.
+        """
+        rows = []
+        timestamps = self.timestamps
+        columns = self.columns
+        for position in range(self._bisect(start), self.size):
+            index = self._physical(position)
+            timestamp = timestamps[index]
+            if end is not None and timestamp > end:
+                break
+            rows.append((timestamp,) + tuple(column[index] for column in columns))
+        return rows
+
+
+class DownsampledTier:
+    """Min/max/mean downsampling tier fed one sample at a time.
+
+    Attributes:
+        resolution: Bucket width in seconds.
+        buffer: Completed buckets as (timestamp, min, max, mean) rows.
+    """
+
+    __slots__ = ("resolution", "buffer", "_bucket", "_min", "_max", "_sum", "_count")
+
+    def __init__(self, resolution: int, capacity: int):
+        """Creates an instance of the DownsampledTier class.
+
+        Args:
+            resolution: Bucket width in seconds.
+            capacity: Number of completed buckets retained.
+        """
+        self.resolution = resolution
+        self.buffer = RingBuffer(capacity, 3)
+        self._bucket = -1
+        self._min = 0.0
+        self._max = 0.0
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, timestamp: int, value: float):
+        """Fold a sample into the current bucket.
+
+        Args:
+            timestamp: Sample timestamp.
+            value: Sample value.
+        """
+        bucket = timestamp - timestamp % self.resolution
+        if bucket != self._bucket:
+            self._flush()
+            self._bucket = bucket
+            self._min = self._max = self._sum = value
+            self._count = 1
+            return
+
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+        self._sum += value
+        self._count += 1
+
+    def _flush(self):
+        if self._count:
+            self.buffer.append(
+                self._bucket, self._min, self._max, self._sum / self._count
+            )
+
+    def range(self, start: int = 0, end: int = None) -> list:
+        """Return buckets within [start, end], including the open bucket.
+
+        Args:
+            start: Earliest bucket timestamp (inclusive).
+            end: Latest bucket timestamp (inclusive). Default: no limit.
+
+        Returns:
+            list: Tuples of (timestamp, min, max, mean).
+        """
+        rows = self.buffer.range(start, end)
+        if (
+            self._count
+            and self._bucket >= start
+            and (end is None or self._bucket <= end)
+        ):
+            rows.append((self._bucket, self._min, self._max, self._sum / self._count))
+        return rows
+
+
+class SensorSeries:
+    """History of a single sensor on a single host.
+
+    Attributes:
+        raw: Raw samples as (timestamp, value) rows.
+        tiers: Downsampled tiers keyed by resolution (seconds).
+    """
+
+    __slots__ = ("raw", "tiers")
+
+    def __init__(self, capacity: int, tiers: tuple):
+        """Creates an instance of the SensorSeries class.
+
+        Args:
+            capacity: Raw samples retained.
+            tiers: Tuple of (resolution, buckets retained) pairs.
+        """
+        self.raw = RingBuffer(capacity)
+        self.tiers = {
+            resolution: DownsampledTier(resolution, buckets)
+            for resolution, buckets in tiers
+        }
+
+    def add(self, timestamp: int, value: float):
+        """Record a sample in the raw buffer and every tier.
+
+        Args:
+            timestamp: Sample timestamp.
+            value: Sample value.
+
+        Raises:
+            ValueError: Sample is older than the newest recorded sample.
+        """
+        if timestamp < self.raw.last_timestamp():
+            raise ValueError("sample is older than the newest recorded sample")
+
+        self.raw.append(timestamp, value)
+        for tier in self.tiers.values():
+            tier.add(timestamp, value)
+
+
+class SensorHistory:
+    """In-memory history store for any number of hosts and sensors.
+
+    Feed it from a ``Client`` or poller via :meth:`add_metrics`, then query
+    per-sensor windows at raw or downsampled resolution.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, tiers=DEFAULT_TIERS):
+        """Initialises an instance of smbmc.history.SensorHistory.
+
+        Args:
+            capacity: Raw samples retained per series.
+                default: 360 (one hour at a 10 second interval).
+            tiers: Tuple of (resolution in seconds, buckets retained) pairs.
+                default: 1 minute x 180 and 10 minutes x 144.
+        """
+        self.capacity = capacity
+        self.tiers = tuple(tiers)
+        self._series = {}
+
+    def __len__(self):
+        """Number of series held.
+
+        Returns:
+            int: Number of (host, sensor) series.
+        """
+        return len(self._series)
+
+    def keys(self) -> list:
+        """All (host, sensor) keys held.
+
+        Returns:
+            list: (host, sensor name) tuples.
+        """
+        return list(self._series)
+
+    def add(self, host: str, name: str, value: float, timestamp=None):
+        """Record a single sample.
+
+        Args:
+            host: Host identifier.
+            name: Sensor name.
+            value: Reading.
+            timestamp: Seconds since the epoch. Default: now.
+        """
+        key = (host, name)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = SensorSeries(self.capacity, self.tiers)
+        series.add(int(time() if timestamp is None else timestamp), value)
+
+    def add_sensors(self, host: str, sensors: list, timestamp=None):
+        """Record the readings of present threshold sensors.
+
+        Discrete sensors carry flags rather than readings and are skipped.
+
+        Args:
+            host: Host identifier.
+            sensors: Sensors, as returned by ``Client.get_sensor_metrics``.
+            timestamp: Seconds since the epoch. Default: now.
+        """
+        timestamp = int(time() if timestamp is None else timestamp)
+        for sensor in sensors:
+            if sensor.flags is None and sensor.state == SensorStateEnum.PRESENT:
+                self.add(host, sensor.name, sensor.reading, timestamp)
+
+    def add_power_supplies(self, host: str, power_supplies: list, timestamp=None):
+        """Record every numeric reading of each power supply.
+
+        Series are named ``psu<id>.<attribute>``, e.g. ``psu1.input_power``.
+        Readings missing from the firmware's response, None, are skipped.
+
+        Args:
+            host: Host identifier.
+            power_supplies: Power supplies, as returned by
+                ``Client.get_pmbus_metrics``.
+            timestamp: Seconds since the epoch. Default: now.
+        """
+        timestamp = int(time() if timestamp is None else timestamp)
+        for psu in power_supplies:
+            for attr in POWER_SUPPLY_READINGS:
+                value = getattr(psu, attr)
+                if value is not None:
+                    self.add(host, f"psu{psu.id}.{attr}", value, timestamp)
+
+    def add_metrics(self, host: str, metrics: dict, timestamp=None):
+        """Record a snapshot returned by ``Client.get_metrics``.
+
+        Args:
+            host: Host identifier.
+            metrics: Dict containing "sensor" and/or "pmbus" results.
+            timestamp: Seconds since the epoch. Default: now.
+        """
+        timestamp = int(time() if timestamp is None else timestamp)
+        if metrics.get("sensor"):
+            self.add_sensors(host, metrics["sensor"], timestamp)
+        if metrics.get("pmbus"):
+            self.add_power_supplies(host, metrics["pmbus"], timestamp)
+
+    def query(self, host: str, name: str, start=0, end=None, resolution=None):
+        """Fetch a window of history for one sensor.
+
+        Args:
+            host: Host identifier.
+            name: Sensor name.
+            start: Earliest timestamp (inclusive). Default: everything held.
+            end: Latest timestamp (inclusive). Default: no limit.
+            resolution: Tier resolution in seconds, or None for raw samples.
+
+        Returns:
+            list: (timestamp, value) rows for raw samples, or
+            (timestamp, min, max, mean) rows for a tier. Empty if unknown.
+
+        Raises:
+            KeyError: No tier exists with the requested resolution.
+        """
+        series = self._series.get((host, name))
+        if series is None:
+            return []
+
+        start = int(start)
+        end = None if end is None else int(end)
+        if resolution is None:
+            return series.raw.range(start, end)
+        return series.tiers[resolution].range(start, end)
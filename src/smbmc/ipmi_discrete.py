@@ -0,0 +1,500 @@
+"""Provides table-driven decoding of discrete sensor states.
+
+Discrete sensors report up to 15 state bits. Their meaning depends on the
+Event/Reading Type code (ERTYPE):
+
+- 0x02 - 0x0C: generic states, shared by all sensor types (table 42-2).
+- 0x6F: sensor-specific states, defined per sensor type (table 42-3).
+- 0x70 - 0x7F: OEM states, which are returned undecoded.
+
+Each set of states is exposed as an IntFlag class, e.g. ``ProcessorFlag``.
+The first time a class is used, the flags for every possible low state
+byte are precomputed, so decoding a sensor costs a couple of lookups.
+
+Mirrors ``ShowDiscStateAPI`` in the BMC web interface's ``utils.js``.
+"""
+from enum import IntFlag
+
+from .models import PowerSupplyFlag
+from .models import SensorTypeEnum
+
+SENSOR_SPECIFIC = 0x6F
+
+# State names by offset, extracted from the IPMI 2.0 specification.
+# None marks a reserved offset.
+
+GENERIC_STATES = {
+    0x02: ("UsageStateFlag", ("IDLE", "ACTIVE", "BUSY")),
+    0x03: ("DigitalStateFlag", ("DEASSERTED", "ASSERTED")),
+    0x04: (
+        "PredictiveFailureFlag",
+        ("PREDICTIVE_FAILURE_DEASSERTED", "PREDICTIVE_FAILURE_ASSERTED"),
+    ),
+    0x05: ("LimitFlag", ("LIMIT_NOT_EXCEEDED", "LIMIT_EXCEEDED")),
+    0x06: ("PerformanceFlag", ("PERFORMANCE_MET", "PERFORMANCE_LAGS")),
+    0x07: (
+        "SeverityFlag",
+        (
+            "OK",
+            "NON_CRITICAL_FROM_OK",
+            "CRITICAL_FROM_LESS_SEVERE",
+            "NON_RECOVERABLE_FROM_LESS_SEVERE",
+            "NON_CRITICAL_FROM_MORE_SEVERE",
+            "CRITICAL_FROM_NON_RECOVERABLE",
+            "NON_RECOVERABLE",
+            "MONITOR",
+            "INFORMATIONAL",
+        ),
+    ),
+    0x08: ("DevicePresenceFlag", ("DEVICE_ABSENT", "DEVICE_PRESENT")),
+    0x09: ("DeviceEnabledFlag", ("DEVICE_DISABLED", "DEVICE_ENABLED")),
+    0x0A: (
+        "AvailabilityFlag",
+        (
+            "RUNNING",
+            "IN_TEST",
+            "POWER_OFF",
+            "ON_LINE",
+            "OFF_LINE",
+            "OFF_DUTY",
+            "DEGRADED",
+            "POWER_SAVE",
+            "INSTALL_ERROR",
+        ),
+    ),
+    0x0B: (
+        "RedundancyFlag",
+        (
+            "FULLY_REDUNDANT",
+            "REDUNDANCY_LOST",
+            "REDUNDANCY_DEGRADED",
+            "NON_REDUNDANT_FROM_REDUNDANT",
+            "NON_REDUNDANT_FROM_INSUFFICIENT",
+            "NON_REDUNDANT_INSUFFICIENT",
+            "DEGRADED_FROM_FULLY_REDUNDANT",
+            "DEGRADED_FROM_NON_REDUNDANT",
+        ),
+    ),
+    0x0C: ("DevicePowerStateFlag", ("D0", "D1", "D2", "D3")),
+}
+
+SENSOR_SPECIFIC_STATES = {
+    SensorTypeEnum.PHYSICAL_SECURITY: (
+        "PhysicalSecurityFlag",
+        (
+            "GENERAL_CHASSIS_INTRUSION",
+            "DRIVE_BAY_INTRUSION",
+            "IO_CARD_AREA_INTRUSION",
+            "PROCESSOR_AREA_INTRUSION",
+            "LAN_LEASH_LOST",
+            "UNAUTHORIZED_DOCK",
+            "FAN_AREA_INTRUSION",
+        ),
+    ),
+    SensorTypeEnum.PLATFORM_SECURITY: (
+        "PlatformSecurityFlag",
+        (
+            "FRONT_PANEL_LOCKOUT_VIOLATION",
+            "USER_PASSWORD_VIOLATION",
+            "SETUP_PASSWORD_VIOLATION",
+            "NETWORK_BOOT_PASSWORD_VIOLATION",
+            "OTHER_PRE_BOOT_PASSWORD_VIOLATION",
+            "OUT_OF_BAND_PASSWORD_VIOLATION",
+        ),
+    ),
+    SensorTypeEnum.PROCESSOR: (
+        "ProcessorFlag",
+        (
+            "IERR",
+            "THERMAL_TRIP",
+            "FRB1_BIST_FAILURE",
+            "FRB2_HANG_IN_POST",
+            "FRB3_STARTUP_FAILURE",
+            "CONFIGURATION_ERROR",
+            "UNCORRECTABLE_CPU_COMPLEX_ERROR",
+            "PRESENCE_DETECTED",
+            "DISABLED",
+            "TERMINATOR_PRESENCE_DETECTED",
+            "THROTTLED",
+            "UNCORRECTABLE_MACHINE_CHECK",
+            "CORRECTABLE_MACHINE_CHECK",
+        ),
+    ),
+    SensorTypeEnum.POWER_UNIT: (
+        "PowerUnitFlag",
+        (
+            "POWER_OFF",
+            "POWER_CYCLE",
+            "POWER_DOWN_240VA",
+            "INTERLOCK_POWER_DOWN",
+            "INPUT_LOST",
+            "SOFT_POWER_CONTROL_FAILURE",
+            "FAILURE",
+            "PREDICTIVE_FAILURE",
+        ),
+    ),
+    SensorTypeEnum.MEMORY: (
+        "MemoryFlag",
+        (
+            "CORRECTABLE_ECC",
+            "UNCORRECTABLE_ECC",
+            "PARITY",
+            "SCRUB_FAILED",
+            "DEVICE_DISABLED",
+            "CORRECTABLE_ECC_LOGGING_LIMIT",
+            "PRESENCE_DETECTED",
+            "CONFIGURATION_ERROR",
+            "SPARE",
+            "THROTTLED",
+            "CRITICAL_OVERTEMPERATURE",
+        ),
+    ),
+    SensorTypeEnum.DRIVE_SLOT: (
+        "DriveSlotFlag",
+        (
+            "DRIVE_PRESENT",
+            "DRIVE_FAULT",
+            "PREDICTIVE_FAILURE",
+            "HOT_SPARE",
+            "CONSISTENCY_CHECK_IN_PROGRESS",
+            "IN_CRITICAL_ARRAY",
+            "IN_FAILED_ARRAY",
+            "REBUILD_IN_PROGRESS",
+            "REBUILD_ABORTED",
+        ),
+    ),
+    SensorTypeEnum.SYSTEM_FIRMWARE_PROGRESS: (
+        "SystemFirmwareProgressFlag",
+        ("ERROR", "HANG", "PROGRESS"),
+    ),
+    SensorTypeEnum.EVENT_LOGGING_DISABLED: (
+        "EventLoggingDisabledFlag",
+        (
+            "CORRECTABLE_MEMORY_ERROR_LOGGING_DISABLED",
+            "EVENT_TYPE_LOGGING_DISABLED",
+            "LOG_AREA_CLEARED",
+            "ALL_EVENT_LOGGING_DISABLED",
+            "SEL_FULL",
+            "SEL_ALMOST_FULL",
+            "CORRECTABLE_MACHINE_CHECK_LOGGING_DISABLED",
+        ),
+    ),
+    SensorTypeEnum.WATCHDOG_1: (
+        "Watchdog1Flag",
+        (
+            "BIOS_RESET",
+            "OS_RESET",
+            "OS_SHUT_DOWN",
+            "OS_POWER_DOWN",
+            "OS_POWER_CYCLE",
+            "OS_NMI",
+            "OS_EXPIRED",
+            "OS_PRE_TIMEOUT_INTERRUPT",
+        ),
+    ),
+    SensorTypeEnum.SYSTEM_EVENT: (
+        "SystemEventFlag",
+        (
+            "RECONFIGURED",
+            "OEM_BOOT_EVENT",
+            "UNDETERMINED_HARDWARE_FAILURE",
+            "AUXILIARY_LOG_ENTRY",
+            "PEF_ACTION",
+            "TIMESTAMP_CLOCK_SYNC",
+        ),
+    ),
+    SensorTypeEnum.CRITICAL_INTERRUPT: (
+        "CriticalInterruptFlag",
+        (
+            "FRONT_PANEL_NMI",
+            "BUS_TIMEOUT",
+            "IO_CHANNEL_CHECK_NMI",
+            "SOFTWARE_NMI",
+            "PCI_PERR",
+            "PCI_SERR",
+            "EISA_FAIL_SAFE_TIMEOUT",
+            "BUS_CORRECTABLE_ERROR",
+            "BUS_UNCORRECTABLE_ERROR",
+            "FATAL_NMI",
+            "BUS_FATAL_ERROR",
+            "BUS_DEGRADED",
+        ),
+    ),
+    SensorTypeEnum.BUTTON_SWITCH: (
+        "ButtonSwitchFlag",
+        (
+            "POWER_BUTTON",
+            "SLEEP_BUTTON",
+            "RESET_BUTTON",
+            "FRU_LATCH_OPEN",
+            "FRU_SERVICE_REQUEST",
+        ),
+    ),
+    SensorTypeEnum.CHIP_SET: (
+        "ChipSetFlag",
+        ("SOFT_POWER_CONTROL_FAILURE", "THERMAL_TRIP"),
+    ),
+    SensorTypeEnum.CABLE_INTERCONNECT: (
+        "CableInterconnectFlag",
+        ("CONNECTED", "CONFIGURATION_ERROR"),
+    ),
+    SensorTypeEnum.SYSTEM_BOOT_INITIATED: (
+        "SystemBootFlag",
+        (
+            "POWER_UP",
+            "HARD_RESET",
+            "WARM_RESET",
+            "PXE_BOOT_REQUESTED",
+            "DIAGNOSTIC_BOOT",
+            "SOFTWARE_HARD_RESET",
+            "SOFTWARE_WARM_RESET",
+            "SYSTEM_RESTART",
+        ),
+    ),
+    SensorTypeEnum.BOOT_ERROR: (
+        "BootErrorFlag",
+        (
+            "NO_BOOTABLE_MEDIA",
+            "NON_BOOTABLE_DISKETTE",
+            "PXE_SERVER_NOT_FOUND",
+            "INVALID_BOOT_SECTOR",
+            "BOOT_SELECTION_TIMEOUT",
+        ),
+    ),
+    SensorTypeEnum.OS_BOOT: (
+        "OsBootFlag",
+        (
+            "A_BOOT_COMPLETED",
+            "C_BOOT_COMPLETED",
+            "PXE_BOOT_COMPLETED",
+            "DIAGNOSTIC_BOOT_COMPLETED",
+            "CD_ROM_BOOT_COMPLETED",
+            "ROM_BOOT_COMPLETED",
+            "BOOT_COMPLETED",
+            "INSTALLATION_STARTED",
+            "INSTALLATION_COMPLETED",
+            "INSTALLATION_ABORTED",
+            "INSTALLATION_FAILED",
+        ),
+    ),
+    SensorTypeEnum.OS_STOP: (
+        "OsStopFlag",
+        (
+            "CRITICAL_STOP_DURING_LOAD",
+            "RUN_TIME_CRITICAL_STOP",
+            "GRACEFUL_STOP",
+            "GRACEFUL_SHUTDOWN",
+            "PEF_SOFT_SHUTDOWN",
+            "AGENT_NOT_RESPONDING",
+        ),
+    ),
+    SensorTypeEnum.SLOT_CONNECTOR: (
+        "SlotConnectorFlag",
+        (
+            "FAULT",
+            "IDENTIFY",
+            "DEVICE_INSTALLED",
+            "READY_FOR_INSTALLATION",
+            "READY_FOR_REMOVAL",
+            "POWER_OFF",
+            "REMOVAL_REQUESTED",
+            "INTERLOCK",
+            "DISABLED",
+            "SPARE",
+        ),
+    ),
+    SensorTypeEnum.SYSTEM_ACPI_POWER_STATE: (
+        "AcpiPowerStateFlag",
+        (
+            "S0_G0_WORKING",
+            "S1_SLEEPING",
+            "S2_SLEEPING",
+            "S3_SLEEPING",
+            "S4_SUSPEND_TO_DISK",
+            "S5_G2_SOFT_OFF",
+            "S4_S5_SOFT_OFF",
+            "G3_MECHANICAL_OFF",
+            "SLEEPING",
+            "G1_SLEEPING",
+            "S5_OVERRIDE",
+            "LEGACY_ON",
+            "LEGACY_OFF",
+            None,
+            "UNKNOWN",
+        ),
+    ),
+    SensorTypeEnum.WATCHDOG_2: (
+        "Watchdog2Flag",
+        (
+            "TIMER_EXPIRED",
+            "HARD_RESET",
+            "POWER_DOWN",
+            "POWER_CYCLE",
+            None,
+            None,
+            None,
+            None,
+            "TIMER_INTERRUPT",
+        ),
+    ),
+    SensorTypeEnum.PLATFORM_ALERT: (
+        "PlatformAlertFlag",
+        ("PAGE", "LAN_ALERT", "EVENT_TRAP", "SNMP_TRAP"),
+    ),
+    SensorTypeEnum.ENTITY_PRESENCE: (
+        "EntityPresenceFlag",
+        ("PRESENT", "ABSENT", "DISABLED"),
+    ),
+    SensorTypeEnum.LAN: ("LanFlag", ("HEARTBEAT_LOST", "HEARTBEAT")),
+    SensorTypeEnum.MANAGEMENT_SUBSYSTEM_HEALTH: (
+        "ManagementSubsystemHealthFlag",
+        (
+            "SENSOR_ACCESS_DEGRADED",
+            "CONTROLLER_ACCESS_DEGRADED",
+            "CONTROLLER_OFF_LINE",
+            "CONTROLLER_UNAVAILABLE",
+            "SENSOR_FAILURE",
+            "FRU_FAILURE",
+        ),
+    ),
+    SensorTypeEnum.BATTERY: (
+        "BatteryFlag",
+        ("LOW", "FAILED", "PRESENCE_DETECTED"),
+    ),
+    SensorTypeEnum.SESSION_AUDIT: (
+        "SessionAuditFlag",
+        (
+            "ACTIVATED",
+            "DEACTIVATED",
+            "INVALID_CREDENTIALS",
+            "INVALID_PASSWORD_DISABLE",
+        ),
+    ),
+    SensorTypeEnum.VERSION_CHANGE: (
+        "VersionChangeFlag",
+        (
+            "HARDWARE_CHANGE",
+            "FIRMWARE_CHANGE",
+            "HARDWARE_INCOMPATIBILITY",
+            "FIRMWARE_INCOMPATIBILITY",
+            "INVALID_HARDWARE_VERSION",
+            "INVALID_FIRMWARE_VERSION",
+            "HARDWARE_CHANGE_SUCCESSFUL",
+            "FIRMWARE_CHANGE_SUCCESSFUL",
+        ),
+    ),
+    SensorTypeEnum.FRU_STATE: (
+        "FruStateFlag",
+        (
+            "NOT_INSTALLED",
+            "INACTIVE",
+            "ACTIVATION_REQUESTED",
+            "ACTIVATION_IN_PROGRESS",
+            "ACTIVE",
+            "DEACTIVATION_REQUESTED",
+            "DEACTIVATION_IN_PROGRESS",
+            "COMMUNICATION_LOST",
+        ),
+    ),
+}
+
+
+def _build_flag(name: str, states: tuple) -> IntFlag:
+    """Build an IntFlag class from state names ordered by offset.
+
+    Args:
+        name: Class name.
+        states: State names, indexed by offset. None marks reserved offsets.
+
+    Returns:
+        IntFlag: Flag class, with an UNSPECIFIED (0) member.
+    """
+    members = [("UNSPECIFIED", 0)]
+    members.extend((state, 1 << offset) for offset, state in enumerate(states) if state)
+    return IntFlag(name, members, module=__name__)
+
+
+#: Flag classes for generic states, keyed by ERTYPE.
+GENERIC_FLAGS = {
+    er_type: _build_flag(name, states)
+    for er_type, (name, states) in GENERIC_STATES.items()
+}
+
+#: Flag classes for sensor-specific states, keyed by SensorTypeEnum.
+SENSOR_SPECIFIC_FLAGS = {
+    sensor_type: _build_flag(name, states)
+    for sensor_type, (name, states) in SENSOR_SPECIFIC_STATES.items()
+}
+SENSOR_SPECIFIC_FLAGS[SensorTypeEnum.POWER_SUPPLY] = PowerSupplyFlag
+
+# expose each class by name, e.g. smbmc.ipmi_discrete.ProcessorFlag, which
+# also allows decoded flags to be pickled.
+for _flag in list(GENERIC_FLAGS.values()) + list(SENSOR_SPECIFIC_FLAGS.values()):
+    globals().setdefault(_flag.__name__, _flag)
+
+# flag class -> flags for every value of the low state byte
+_LOW_BYTE_TABLES = {}
+
+
+def get_sensor_type(s_type: str) -> SensorTypeEnum:
+    """Convert a raw sensor type, folding the OEM range into one member.
+
+    Args:
+        s_type: Raw STYPE value.
+
+    Returns:
+        SensorTypeEnum: Sensor type.
+    """
+    value = int(s_type, 16)
+    if value >= SensorTypeEnum.OEM:
+        return SensorTypeEnum.OEM
+    return SensorTypeEnum(value)
+
+
+def get_flag_class(er_type: int, sensor_type: int):
+    """Look up the flag class describing a discrete sensor's states.
+
+    Args:
+        er_type: Event/Reading Type code.
+        sensor_type: Sensor type code.
+
+    Returns:
+        IntFlag: The flag class, or None for OEM and undefined states.
+    """
+    if er_type == SENSOR_SPECIFIC:
+        return SENSOR_SPECIFIC_FLAGS.get(sensor_type)
+    return GENERIC_FLAGS.get(er_type)
+
+
+def decode_discrete_state(er_type: int, sensor_type: int, reading: str):
+    """Decode the state bits of a discrete sensor reading.
+
+    The READING attribute holds the raw reading byte, followed by state
+    bits 0-7 and state bits 8-14.
+
+    Args:
+        er_type: Event/Reading Type code.
+        sensor_type: Sensor type code.
+        reading: Raw READING attribute.
+
+    Returns:
+        IntFlag or int: Decoded flags. States without a known meaning
+        (OEM, or sensor types without sensor-specific states) are returned
+        as a plain int.
+    """
+    low = int(reading[2:4], 16)
+    high = int(reading[4:6] or "0", 16) & 0x7F
+
+    flag_class = get_flag_class(er_type, sensor_type)
+    if flag_class is None:
+        return low | (high << 8)
+
+    table = _LOW_BYTE_TABLES.get(flag_class)
+    if table is None:
+        table = _LOW_BYTE_TABLES[flag_class] = tuple(
+            flag_class(value) for value in range(0x100)
+        )
+
+    if high:
+        return flag_class(low | (high << 8))
+    return table[low]
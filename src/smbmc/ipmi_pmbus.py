@@ -1,5 +1,168 @@
-"""Provides IPMI PMBus related functions."""
+"""Provides IPMI PMBus related functions.
+
+Power supplies are decoded according to PSITEM_FIELDS, a table of the
+PowerSupply attributes, the PSItem attributes that may hold them and their
+scale. Firmware that names a field differently needs another candidate name
+in the table, not code.
+
+The fields present in a PSItem, its variant, are resolved once per distinct
+set of attribute names and compiled into a single decode function, building
+the PowerSupply from one dict display. Fields a variant lacks are set to None.
+"""
 from .models import PowerSupply
+from .util import HexCache
+
+#: Fields of a PSItem: (PowerSupply attribute, candidate PSItem attributes,
+#: scale). A scale of None keeps the value as text; otherwise the value is
+#: hexadecimal, and divided by the scale unless it is 1.
+PSITEM_FIELDS = (
+    ("name", ("name",), None),
+    ("status", ("a_b_PS_Status_I2C",), None),
+    ("type", ("psType",), None),
+    ("input_voltage", ("acInVoltage",), 1),
+    ("input_current", ("acInCurrent",), 1000),
+    ("input_power", ("acInPower",), 1),
+    ("output_voltage", ("dc12OutVoltage",), 10),
+    ("output_current", ("dc12OutCurrent",), 1000),
+    ("output_power", ("dcOutPower",), 1),
+    ("temp_1", ("temp1",), 1),
+    ("temp_2", ("temp2",), 1),
+    ("fan_1", ("fan1",), 1),
+    ("fan_2", ("fan2",), 1),
+)
+
+_hex_int = HexCache().__getitem__
+
+
+class PSItemVariant:
+    """Decoder of the PSItems having one set of attribute names.
+
+    Attributes:
+        names: PSItem attribute names of the variant.
+        missing: PowerSupply attributes not found, set to None.
+        source: Source of the decode function.
+    """
+
+    def __init__(self, names, fields=PSITEM_FIELDS):
+        """Resolves the fields of a variant, and compiles its decoder.
+
+        Args:
+            names: PSItem attribute names.
+            fields: Field table, see PSITEM_FIELDS.
+        """
+        self.names = frozenset(names)
+        # attributes outside the table keep their defaults
+        values = {attr: repr(value) for attr, value in vars(PowerSupply()).items()}
+        missing = []
+        for attr, candidates, scale in fields:
+            name = next((n for n in candidates if n in self.names), None)
+            if name is None:
+                missing.append(attr)
+                values[attr] = "None"
+            elif scale is None:
+                values[attr] = f"item[{name!r}]"
+            elif scale == 1:
+                values[attr] = f"hex_int(item[{name!r}])"
+            else:
+                values[attr] = f"hex_int(item[{name!r}]) / {scale!r}"
+        self.missing = tuple(missing)
+
+        # a single dict display builds the PowerSupply, in attribute order
+        body = "".join(
+            f"\n        {attr!r}: {value}," for attr, value in values.items()
+        )
+        self.source = (
+            "def decode(item):\n"
+            "    psu = new(PowerSupply)\n"
+            f"    psu.__dict__ = {{{body}\n    }}\n"
+            "    return psu\n"
+        )
+        namespace = {"new": object.__new__, "PowerSupply": PowerSupply}
+        namespace["hex_int"] = _hex_int
+        exec(compile(self.source, "<PSItemVariant>", "exec"), namespace)  # nosec
+        self.decode = namespace["decode"]
+
+
+# variants, keyed by attribute names, shared by every host
+_VARIANTS = {}
+# variants kept; firmware rarely has more than a couple
+_MAX_VARIANTS = 64
+
+
+def psitem_variant(item: dict, fields=PSITEM_FIELDS) -> PSItemVariant:
+    """Variant of a PSItem, compiled on first sight.
+
+    The most recent variants are cached, up to 64.
+
+    Args:
+        item: A single power supply obtained from an XML response.
+        fields: Field table, see PSITEM_FIELDS.
+
+    Returns:
+        PSItemVariant: Variant matching the attribute names of the item.
+    """
+    key = (frozenset(item), fields)
+    variant = _VARIANTS.get(key)
+    if variant is None:
+        if len(_VARIANTS) >= _MAX_VARIANTS:
+            # evict the oldest variant
+            _VARIANTS.pop(next(iter(_VARIANTS), None), None)
+        variant = _VARIANTS[key] = PSItemVariant(item, fields)
+    return variant
+
+
+class PSItemDecoder:
+    """Decodes the PSItems of one host, remembering its variant.
+
+    The variant is selected from the first PSItem decoded, and kept while
+    the host's PSItems have the same attribute names.
+
+    Attributes:
+        variant: PSItemVariant of the host, or None before the first PSItem.
+    """
+
+    __slots__ = ("fields", "variant")
+
+    def __init__(self, fields=PSITEM_FIELDS):
+        """Creates an instance of PSItemDecoder.
+
+        Args:
+            fields: Field table, see PSITEM_FIELDS.
+        """
+        self.fields = fields
+        self.variant = None
+
+    def decode(self, item: dict) -> PowerSupply:
+        """Decode a single power supply.
+
+        Args:
+            item: A single power supply obtained from an XML response.
+
+        Returns:
+            PowerSupply: Fully populated power supply, minus the ID.
+        """
+        variant = self.variant
+        if variant is None or item.keys() != variant.names:
+            # first PSItem, or the firmware changed
+            variant = self.variant = psitem_variant(item, self.fields)
+        return variant.decode(item)
+
+    def process_response(self, psu_list: list) -> list:
+        """Obtain all power supplies.
+
+        Args:
+            psu_list: List of power supplies obtained from an XML response.
+
+        Returns:
+            list: Fully populated power supplies, complete with ID.
+        """
+        decode = self.decode
+        power_supplies = []
+        for psu_id, item in enumerate(psu_list):
+            psu = decode(item)
+            psu.id = psu_id
+            power_supplies.append(psu)
+        return power_supplies
 
 
 def process_pmbus_response(psu_list: list) -> list:
@@ -11,15 +174,7 @@ def process_pmbus_response(psu_list: list) -> list:
     Returns:
         list: Fully populated power supplies, complete with ID.
     """
-    power_supplies = []
-    psu_id = 0
-    for item in psu_list:
-        psu = process_pmbus_psu(item)
-        psu.id = psu_id
-        psu_id += 1
-        power_supplies.append(psu)
-
-    return power_supplies
+    return PSItemDecoder().process_response(psu_list)
 
 
 def process_pmbus_psu(item: dict) -> PowerSupply:
@@ -29,37 +184,7 @@ def process_pmbus_psu(item: dict) -> PowerSupply:
         item: A single power supply obtained from an XML response.
 
     Returns:
-        PowerSupply: Fully populated power supply, minus the ID.
+        PowerSupply: Fully populated power supply, minus the ID. Fields
+        missing from the item are None.
     """
-    psu = PowerSupply()
-    psu.name = item["name"]
-    psu.status = item["a_b_PS_Status_I2C"]
-    psu.type = item["psType"]
-    psu.input_voltage = int(item["acInVoltage"], 16)
-    psu.input_current = int(item["acInCurrent"], 16) / 1000
-    psu.input_power = int(item["acInPower"], 16)
-    psu.output_voltage = int(item["dc12OutVoltage"], 16) / 10
-    psu.output_current = int(item["dc12OutCurrent"], 16) / 1000
-    psu.output_power = int(item["dcOutPower"], 16)
-    psu.temp_1 = int(item["temp1"], 16)
-    psu.temp_2 = int(item["temp2"], 16)
-    psu.fan_1 = int(item["fan1"], 16)
-    psu.fan_2 = int(item["fan2"], 16)
-
-    # for key, value in item.items():
-    #     if "temp" in key:
-    #         sensor = Sensor()
-    #         sensor.name = key
-    #         sensor.reading = int(value, 16)
-    #         sensor.type = SensorTypeEnum.TEMPERATURE
-    #         sensor.unit = SensorUnitEnum.DEGREES_CELSIUS
-    #         psu.sensors.append(sensor)
-    #     elif "fan" in key:
-    #         sensor = Sensor()
-    #         sensor.name = key
-    #         sensor.reading = int(value, 16)
-    #         sensor.type = SensorTypeEnum.FAN
-    #         sensor.unit = SensorUnitEnum.RPM
-    #         psu.sensors.append(sensor)
-
-    return psu
+    return psitem_variant(item).decode(item)
@@ -1,18 +1,48 @@
 """Provides IPMI sensor related functions."""
 from enum import auto
 from enum import IntEnum
+from math import pow
+from operator import itemgetter
 
-from .models import PowerSupplyFlag
+from .ipmi_discrete import decode_discrete_state
+from .ipmi_discrete import get_sensor_type
+from .models import DecodeError
 from .models import Sensor
+from .models import SensorSet
 from .models import SensorStateEnum
-from .models import SensorTypeEnum
 from .models import SensorUnitEnum
+from .util import hex_fields
 from .util import hex_signed_int
 from .util import signed_int
 from .util import ten_bit_str
 
 SENSOR_READING_SCALE = 1000
 
+# fixed-width fields of a threshold sensor, decoded in one pass after the
+# reading byte; the offsets of each field within the decoded bytes follow
+_THRESHOLD_FIELDS = itemgetter(
+    "UNR",
+    "UC",
+    "UNC",
+    "LNC",
+    "LC",
+    "LNR",
+    "M",
+    "B",
+    "RB",
+    "UNIT1",
+    "UNIT",
+    "L",
+    "OPTION",
+)
+_VALUES = slice(0, 7)  # reading, unr, uc, unc, lnc, lc, lnr
+_CONVERSION = slice(7, 12)  # M (2 bytes), B (2 bytes), RB
+_UNIT1, _UNIT, _L, _OPTION = 12, 13, 14, 15
+
+# conversion factors, keyed by the raw M, B and RB bytes
+_CONVERSIONS = {}
+_UNITS = {unit.value: unit for unit in SensorUnitEnum}
+
 
 class LinearisationEnum(IntEnum):
     """Enumeration of linearisation formulas."""
@@ -47,8 +77,6 @@ def reading_conversion(data: str, m: str, b: str, rb: str) -> float:
     Returns:
         float: Pre-linearisation reading.
     """
-    from math import pow
-
     # Extracted from 43.1 - SDR Type 01h, bytes 25, 27, 30.
     m_raw = ten_bit_str(m)
     b_raw = ten_bit_str(b)
@@ -136,9 +164,86 @@ def perform_linearisation(method: str, reading: str) -> int:
         raise NotImplementedError
 
 
+def _conversion(raw: bytes) -> tuple:
+    """Compute the conversion factors of a sensor, once per M, B and RB.
+
+    See reading_conversion().
+
+    Args:
+        raw: Raw M, B and RB bytes.
+
+    Returns:
+        tuple: (m, b * 10^kb, 10^km).
+    """
+    factors = _CONVERSIONS.get(raw)
+    if factors is None:
+        m = signed_int(((raw[1] & 0xC0) << 2) + raw[0], 10)
+        b = signed_int(((raw[3] & 0xC0) << 2) + raw[2], 10)
+        km = signed_int(raw[4] >> 4, 4)
+        kb = signed_int(raw[4] & 0x0F, 4)
+        factors = _CONVERSIONS[raw] = (m, b * pow(10, kb), pow(10, km))
+    return factors
+
+
 def process_threshold_sensor(item: dict) -> Sensor:
     """Process a threshold sensor.
 
+    The fixed-width fields are decoded in one pass, and the conversion
+    factors are shared by sensors with the same M, B and RB values. Fields
+    that cannot be decoded that way (e.g. of an odd length) are decoded one
+    by one instead.
+
+    Args:
+        item: Dict representing a sensor, obtained from the IPMI response.
+
+    Returns:
+        Sensor: Fully populated sensor.
+
+    Raises:
+        NotImplementedError: Non-linear sensors are not supported.
+    """
+    try:
+        raw = hex_fields((item["READING"][:2],) + _THRESHOLD_FIELDS(item))
+    except ValueError:
+        return _process_threshold_sensor_fields(item)
+    if len(raw) != 16:
+        return _process_threshold_sensor_fields(item)
+    if raw[_L] != LinearisationEnum.LINEAR:
+        raise NotImplementedError
+
+    m, b, scale = _conversion(raw[_CONVERSION])
+    values = raw[_VALUES]
+    if (raw[_UNIT1] >> 6) == 2:
+        # analog data format: two's complement
+        values = [value - 0x100 if value & 0x80 else value for value in values]
+    (reading, unr, uc, unc, lnc, lc, lnr,) = [
+        int((m * value + b) * scale * SENSOR_READING_SCALE) / SENSOR_READING_SCALE
+        for value in values
+    ]
+
+    unit = _UNITS.get(raw[_UNIT])
+    sensor = Sensor()
+    sensor.name = item["NAME"]
+    sensor.type = get_sensor_type(item["STYPE"])
+    sensor.unit = SensorUnitEnum(raw[_UNIT]) if unit is None else unit
+    if raw[_OPTION] & 0x40:
+        sensor.state = SensorStateEnum.PRESENT
+    else:
+        sensor.state = SensorStateEnum.NOT_PRESENT
+    sensor.reading = reading
+    sensor.unc = unc
+    sensor.uc = uc
+    sensor.unr = unr
+    sensor.lc = lc
+    sensor.lnc = lnc
+    sensor.lnr = lnr
+
+    return sensor
+
+
+def _process_threshold_sensor_fields(item: dict) -> Sensor:
+    """Process a threshold sensor, decoding each field separately.
+
     Args:
         item: Dict representing a sensor, obtained from the IPMI response.
 
@@ -175,7 +280,7 @@ def process_threshold_sensor(item: dict) -> Sensor:
     # add a sensor and we've got a stew goin'!
     sensor = Sensor()
     sensor.name = item["NAME"]
-    sensor.type = SensorTypeEnum(int(item["STYPE"], 16))
+    sensor.type = get_sensor_type(item["STYPE"])
     sensor.unit = SensorUnitEnum(int(item["UNIT"], 16))
     sensor.state = get_sensor_state(item["OPTION"])
     sensor.reading = values["reading"]
@@ -192,62 +297,62 @@ def process_threshold_sensor(item: dict) -> Sensor:
 def process_discrete_sensor(item: dict) -> Sensor:
     """Process a discrete sensor.
 
-    TODO: finish this function.
+    State bits are decoded via the tables in smbmc.ipmi_discrete.
 
     Args:
         item: Dict representing a sensor, obtained from the IPMI response.
 
     Returns:
         Sensor: Fully populated sensor.
-
-    Raises:
-        NotImplementedError: Raised when sensor type has not been implemented.
     """
-    type = int(item["STYPE"], 16)
-    reading = item["READING"]
-    # raw_reading = reading[:2]
-    # option = int(item["OPTION"], 16)
-    sensor_d = int(reading[2:4], 16)
-    # sensor_dmsb = int(reading[4:6], 16)
-    # print(f"R:{reading} RR:{raw_reading} OPT:{option}")
-    # print(f"SD:{sensor_d} S_DMSB:{sensor_dmsb}")
-    sensor_state = get_sensor_state(item["OPTION"])
-
-    # TODO: add edge-cases from utils.js
-    if sensor_state is not SensorStateEnum.NOT_PRESENT:
-        if type == SensorTypeEnum.POWER_SUPPLY:
-            psu = Sensor()
-            psu.name = item["NAME"]
-            psu.type = SensorTypeEnum(type)
-            psu.flags = PowerSupplyFlag(sensor_d)
-            psu.state = sensor_state
-            return psu
-        else:
-            raise NotImplementedError
+    sensor = Sensor()
+    sensor.name = item["NAME"]
+    sensor.type = get_sensor_type(item["STYPE"])
+    sensor.state = get_sensor_state(item["OPTION"])
+
+    if sensor.state is not SensorStateEnum.NOT_PRESENT:
+        sensor.flags = decode_discrete_state(
+            int(item["ERTYPE"], 16), int(item["STYPE"], 16), item["READING"]
+        )
 
-    # utils.js: ShowDiscStateAPI( Sensor_Type, sensor_d )
-    # servh_sensor: ProcDiscreteSensor(node,Idx)
+    return sensor
 
 
-def process_sensor_response(sensor_list: list) -> list:
+def process_sensor_response(sensor_list: list, errors: list = None) -> list:
     """Obtain all sensors.
 
+    By default, the first sensor that fails to decode aborts the whole
+    response. When an ``errors`` list is supplied, decoding is tolerant:
+    each failure is appended to ``errors`` as a DecodeError and every other
+    sensor is still returned. Sensor IDs always reflect the position within
+    the response, so they are stable regardless of failures.
+
     Args:
         sensor_list: List of sensors obtained from an XML response.
+        errors: Optional list collecting DecodeError instances.
 
     Returns:
-        list: Fully populated sensors.
+        SensorSet: Fully populated sensors, indexed by name, type and unit.
     """
     sensors = []
     sensor_id = 0
     for item in sensor_list:
-        sensor = process_sensor(item)
+        if errors is None:
+            sensor = process_sensor(item)
+        else:
+            try:
+                sensor = process_sensor(item)
+            except Exception as e:
+                errors.append(DecodeError(sensor_id, item.get("NAME", ""), item, e))
+                sensor_id += 1
+                continue
+
         sensor.id = sensor_id
         sensors.append(sensor)
 
         sensor_id += 1
 
-    return sensors
+    return SensorSet(sensors)
 
 
 def process_sensor(item: dict) -> Sensor:
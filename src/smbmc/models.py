@@ -42,20 +42,104 @@ class SensorUnitEnum(IntEnum):
 class SensorTypeEnum(IntEnum):
     """Enumeration of sensor types.
 
+    Extracted from IPMI 2.0 specification, table 42-3.
+
     Possible Values:
 
     - Unspecified
     - Temperature
     - Voltage
+    - Current
     - Fan
+    - Physical Security (Chassis Intrusion)
+    - Platform Security Violation Attempt
+    - Processor
     - Power Supply
+    - Power Unit
+    - Cooling Device
+    - Other Units-based Sensor
+    - Memory
+    - Drive Slot (Bay)
+    - POST Memory Resize
+    - System Firmware Progress
+    - Event Logging Disabled
+    - Watchdog 1
+    - System Event
+    - Critical Interrupt
+    - Button / Switch
+    - Module / Board
+    - Microcontroller / Coprocessor
+    - Add-in Card
+    - Chassis
+    - Chip Set
+    - Other FRU
+    - Cable / Interconnect
+    - Terminator
+    - System Boot / Restart Initiated
+    - Boot Error
+    - Base OS Boot / Installation Status
+    - OS Stop / Shutdown
+    - Slot / Connector
+    - System ACPI Power State
+    - Watchdog 2
+    - Platform Alert
+    - Entity Presence
+    - Monitor ASIC / IC
+    - LAN
+    - Management Subsystem Health
+    - Battery
+    - Session Audit
+    - Version Change
+    - FRU State
+    - OEM reserved (0xC0 - 0xFF)
     """
 
     UNSPECIFIED = 0
     TEMPERATURE = 1
     VOLTAGE = 2
+    CURRENT = 3
     FAN = 4
+    PHYSICAL_SECURITY = 5
+    PLATFORM_SECURITY = 6
+    PROCESSOR = 7
     POWER_SUPPLY = 8
+    POWER_UNIT = 9
+    COOLING_DEVICE = 0x0A
+    OTHER_UNITS = 0x0B
+    MEMORY = 0x0C
+    DRIVE_SLOT = 0x0D
+    POST_MEMORY_RESIZE = 0x0E
+    SYSTEM_FIRMWARE_PROGRESS = 0x0F
+    EVENT_LOGGING_DISABLED = 0x10
+    WATCHDOG_1 = 0x11
+    SYSTEM_EVENT = 0x12
+    CRITICAL_INTERRUPT = 0x13
+    BUTTON_SWITCH = 0x14
+    MODULE_BOARD = 0x15
+    MICROCONTROLLER = 0x16
+    ADD_IN_CARD = 0x17
+    CHASSIS = 0x18
+    CHIP_SET = 0x19
+    OTHER_FRU = 0x1A
+    CABLE_INTERCONNECT = 0x1B
+    TERMINATOR = 0x1C
+    SYSTEM_BOOT_INITIATED = 0x1D
+    BOOT_ERROR = 0x1E
+    OS_BOOT = 0x1F
+    OS_STOP = 0x20
+    SLOT_CONNECTOR = 0x21
+    SYSTEM_ACPI_POWER_STATE = 0x22
+    WATCHDOG_2 = 0x23
+    PLATFORM_ALERT = 0x24
+    ENTITY_PRESENCE = 0x25
+    MONITOR_ASIC = 0x26
+    LAN = 0x27
+    MANAGEMENT_SUBSYSTEM_HEALTH = 0x28
+    BATTERY = 0x29
+    SESSION_AUDIT = 0x2A
+    VERSION_CHANGE = 0x2B
+    FRU_STATE = 0x2C
+    OEM = 0xC0
 
 
 class PowerSupplyFlag(IntFlag):
@@ -122,9 +206,129 @@ class Sensor:
         self.unr = 0
 
 
+class SensorSet(list):
+    """SensorSet is a list of sensors with precomputed indexes.
+
+    Behaves exactly like the list of sensors it was built from, and adds
+    constant-time lookups by name, type and unit. Indexes are built once,
+    on creation, and are not updated if the list is modified afterwards.
+    """
+
+    def __init__(self, sensors=()):
+        """Creates an instance of the SensorSet class.
+
+        Args:
+            sensors: Iterable of sensors, in response order.
+        """
+        super().__init__(sensors)
+        self._by_name = {}
+        self._by_type = {}
+        self._by_unit = {}
+        self._breaches = []
+
+        for sensor in self:
+            self._by_name.setdefault(sensor.name, sensor)
+            self._by_type.setdefault(sensor.type, []).append(sensor)
+            self._by_unit.setdefault(sensor.unit, []).append(sensor)
+            if is_breaching(sensor):
+                self._breaches.append(sensor)
+
+    def get(self, name, default=None):
+        """Look up a sensor by name.
+
+        Args:
+            name: Sensor name, e.g. "CPU Temp".
+            default: Returned if no sensor has that name.
+
+        Returns:
+            Sensor: The first sensor with that name, or default.
+        """
+        return self._by_name.get(name, default)
+
+    def names(self) -> list:
+        """All sensor names, in response order.
+
+        Returns:
+            list: Sensor names.
+        """
+        return list(self._by_name)
+
+    def by_type(self, sensor_type) -> list:
+        """All sensors of a given type.
+
+        Args:
+            sensor_type: SensorTypeEnum member, e.g. SensorTypeEnum.FAN.
+
+        Returns:
+            list: Sensors of that type, in response order. The list is a
+            copy, and may be modified.
+        """
+        return list(self._by_type.get(sensor_type, ()))
+
+    def by_unit(self, unit) -> list:
+        """All sensors reporting in a given unit.
+
+        Args:
+            unit: SensorUnitEnum member, e.g. SensorUnitEnum.RPM.
+
+        Returns:
+            list: Sensors with that unit, in response order. The list is a
+            copy, and may be modified.
+        """
+        return list(self._by_unit.get(unit, ()))
+
+    def breaches(self) -> list:
+        """All sensors with a reading outside their non-critical thresholds.
+
+        Returns:
+            list: Breaching sensors, in response order.
+        """
+        return self._breaches
+
+
+def is_breaching(sensor: Sensor) -> bool:
+    """Check if a threshold sensor reads outside its non-critical thresholds.
+
+    Discrete sensors, sensors that are not present and sensors without any
+    thresholds are never breaching. Thresholds of 0 are not set; each side
+    is checked against its least severe threshold that is set, so a fan
+    with lower thresholds only is never breaching high.
+
+    Args:
+        sensor: Sensor to check.
+
+    Returns:
+        bool: True if reading < lnc or reading > unc.
+    """
+    if sensor.flags is not None or sensor.state != SensorStateEnum.PRESENT:
+        return False
+    lower = sensor.lnc or sensor.lc or sensor.lnr
+    upper = sensor.unc or sensor.uc or sensor.unr
+    return bool(
+        (lower and sensor.reading < lower) or (upper and sensor.reading > upper)
+    )
+
+
+#: Numeric PowerSupply attributes, in a stable order.
+POWER_SUPPLY_READINGS = (
+    "input_voltage",
+    "input_current",
+    "input_power",
+    "output_voltage",
+    "output_current",
+    "output_power",
+    "temp_1",
+    "temp_2",
+    "fan_1",
+    "fan_2",
+)
+
+
 class PowerSupply:
     """PowerSupply provides an interface to power supplies.
 
+    Attributes missing from the firmware's response are None.
+
     Attributes:
         id: Psuedo-unique id.
         name: Serial number.
@@ -168,3 +372,87 @@ class PowerSupply:
         self.temp_2 = 0
         self.fan_1 = 0
         self.fan_2 = 0
+
+
+class AuthenticationError(Exception):
+    """AuthenticationError describes credentials rejected by the BMC.
+
+    Retrying the login with the same credentials would not help.
+    """
+
+
+class DecodeError(Exception):
+    """DecodeError describes a sensor that could not be decoded.
+
+    Collected, rather than raised, when decoding in tolerant mode.
+
+    Attributes:
+        id: Position of the sensor within the response.
+        name: Sensor name, if known.
+        item: Raw attributes of the sensor, as obtained from the response.
+        cause: The exception raised while decoding.
+    """
+
+    def __init__(self, id, name, item, cause):
+        """Creates an instance of the DecodeError class.
+
+        Args:
+            id: Position of the sensor within the response.
+            name: Sensor name, if known.
+            item: Raw attributes of the sensor.
+            cause: The exception raised while decoding.
+        """
+        super().__init__(f"failed to decode sensor {id} ({name!r}): {cause!r}")
+        self.id = id
+        self.name = name
+        self.item = item
+        self.cause = cause
+
+
+class MissingMetric(Exception):
+    """MissingMetric describes a metric that was not fetched in time.
+
+    Collected, rather than raised, when fetching metrics within a budget.
+
+    Attributes:
+        metric: Name of the metric, e.g. "sensor".
+        cause: The exception raised by the late request.
+    """
+
+    def __init__(self, metric, cause):
+        """Creates an instance of the MissingMetric class.
+
+        Args:
+            metric: Name of the metric.
+            cause: The exception raised by the late request.
+        """
+        super().__init__(f"metric {metric!r} not fetched in time: {cause!r}")
+        self.metric = metric
+        self.cause = cause
+
+
+class ProbeResult:
+    """ProbeResult describes the outcome of probing a BMC.
+
+    Attributes:
+        server: Address of the server.
+        reachable: Whether the BMC answered.
+        session_valid: Whether the BMC accepted the session.
+        rtt: Round-trip time of the probe request (s), or None.
+        info: Attributes reported by the BMC, e.g. its firmware version, or
+            None if the session was not accepted.
+        error: The exception raised while probing, or None.
+    """
+
+    def __init__(self, server):
+        """Creates an instance of the ProbeResult class.
+
+        Args:
+            server: Address of the server.
+        """
+        self.server = server
+        self.reachable = False
+        self.session_valid = False
+        self.rtt = None
+        self.info = None
+        self.error = None
@@ -0,0 +1,281 @@
+"""Provides a rate-limited, concurrent login of many clients.
+
+When a collector starts, every client logs in on its first query. One after
+another, logging in to thousands of hosts takes minutes; all at once, it
+floods the management network and the small session tables of the BMCs.
+
+prewarm() logs clients in ahead of their first poll, on a pool of threads:
+
+- login attempts across all hosts are limited to a rate, by a token bucket;
+- logins in flight are capped per subnet, as the BMCs of a rack share a
+  switch and uplink. Clients are queued round-robin across subnets, so that
+  threads are not all held waiting on the cap of one subnet;
+- failed logins are retried with exponential backoff, except for rejected
+  credentials, which are not retried so as not to lock accounts out.
+
+Progress is reported through a callback as each client completes. Errors
+raised by the callback are collected in the report rather than aborting the
+run.
+"""
+import threading
+from time import monotonic
+from time import sleep
+
+from .models import AuthenticationError
+
+
+def subnet_of(server: str, prefix=24, prefix6=64) -> str:
+    """Subnet of a server, used to cap logins in flight.
+
+    Args:
+        server: Address of server in form: 'http://192.168.1.1'.
+        prefix: Prefix length of IPv4 subnets. default: 24.
+        prefix6: Prefix length of IPv6 subnets. default: 64.
+
+    Returns:
+        str: The subnet, e.g. '192.168.1.0/24', or the host name if the
+        server is not addressed by IP.
+    """
+    from ipaddress import ip_address
+    from ipaddress import ip_network
+    from urllib.parse import urlsplit
+
+    host = urlsplit(server).hostname or server
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return host
+    length = prefix if address.version == 4 else prefix6
+    return str(ip_network(f"{address}/{length}", strict=False))
+
+
+def _is_rejected(error: Exception) -> bool:
+    """Whether a login failed because the credentials were rejected.
+
+    Args:
+        error: Exception raised by Client.login().
+
+    Returns:
+        bool: True if retrying would not help.
+    """
+    return isinstance(error, AuthenticationError)
+
+
+class _RateLimiter:
+    """Token bucket shared between threads."""
+
+    def __init__(self, rate: float, burst=1):
+        """Creates an instance of _RateLimiter.
+
+        Args:
+            rate: Tokens per second.
+            burst: Tokens that accumulate while idle. default: 1.
+
+        Raises:
+            ValueError: The rate is not positive.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = 1.0 / rate
+        self.burst = max(1, burst)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait for a token.
+
+        Each caller reserves the next free slot, then sleeps until it
+        without holding the lock.
+        """
+        with self._lock:
+            now = monotonic()
+            slot = max(self._next, now - (self.burst - 1) * self.interval)
+            self._next = slot + self.interval
+        if slot > now:
+            sleep(slot - now)
+
+
+class PrewarmReport:
+    """Results of a prewarm() run.
+
+    Attributes:
+        total: Clients to log in.
+        succeeded: Clients logged in.
+        failed: Exception of the last attempt, keyed by server.
+        attempts: Login attempts made, including retries.
+        duration: Wall-clock duration, in seconds.
+        progress_errors: Exceptions raised by the progress callback.
+    """
+
+    def __init__(self, total: int):
+        """Creates an instance of PrewarmReport.
+
+        Args:
+            total: Clients to log in.
+        """
+        self.total = total
+        self.succeeded = 0
+        self.failed = {}
+        self.attempts = 0
+        self.duration = 0.0
+        self.progress_errors = []
+
+    @property
+    def done(self) -> int:
+        """Clients completed, logged in or not."""
+        return self.succeeded + len(self.failed)
+
+    def __str__(self):
+        """Summarise the run.
+
+        Returns:
+            str: Human-readable summary.
+        """
+        return (
+            f"{self.succeeded}/{self.total} logged in, {len(self.failed)} failed, "
+            f"{self.attempts} attempts in {self.duration:.2f} s"
+        )
+
+
+def _round_robin(clients, subnet) -> list:
+    """Order clients taking one from each subnet in turn.
+
+    Args:
+        clients: Clients to order.
+        subnet: Callable mapping a server to its subnet.
+
+    Returns:
+        list: (client, subnet) tuples.
+    """
+    from itertools import zip_longest
+
+    groups = {}
+    for client in clients:
+        key = subnet(client.server)
+        groups.setdefault(key, []).append((client, key))
+    return [
+        entry for batch in zip_longest(*groups.values()) for entry in batch if entry
+    ]
+
+
+class _Run:
+    """State of a prewarm() run, shared by its threads."""
+
+    def __init__(self, report, limiter, slots, retries, backoff, timeout, progress):
+        """Creates an instance of _Run.
+
+        Args:
+            report: PrewarmReport updated as clients complete.
+            limiter: _RateLimiter of login attempts.
+            slots: Semaphore capping logins in flight, keyed by subnet.
+            retries: Retries of a failed login.
+            backoff: Seconds before the first retry.
+            timeout: Request timeout of each attempt, in seconds.
+            progress: Optional callable, see prewarm().
+        """
+        self.report = report
+        self.limiter = limiter
+        self.slots = slots
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.progress = progress
+        self.lock = threading.Lock()
+
+    def login(self, entry):
+        """Log a client in, and record the outcome.
+
+        Args:
+            entry: (client, subnet) tuple.
+        """
+        client, key = entry
+        error = self._attempts(client, key)
+        report = self.report
+        with self.lock:
+            if error is None:
+                report.succeeded += 1
+            else:
+                report.failed[client.server] = error
+            if self.progress is not None:
+                try:
+                    self.progress(report, client.server, error)
+                except Exception as e:
+                    report.progress_errors.append(e)
+
+    def _attempts(self, client, key):
+        """Log a client in, retrying failures other than rejections.
+
+        Args:
+            client: Client to log in.
+            key: Subnet of the client.
+
+        Returns:
+            Exception: Error of the last attempt, or None if logged in.
+        """
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                sleep(self.backoff * 2 ** (attempt - 1))
+            with self.slots[key]:
+                self.limiter.acquire()
+                with self.lock:
+                    self.report.attempts += 1
+                try:
+                    client.login(self.timeout)
+                except Exception as e:
+                    error = e
+                else:
+                    return None
+            if _is_rejected(error):
+                break
+        return error
+
+
+def prewarm(
+    clients,
+    rate=20.0,
+    per_subnet=4,
+    retries=2,
+    backoff=0.5,
+    timeout=10.0,
+    concurrency=32,
+    progress=None,
+    subnet=subnet_of,
+) -> PrewarmReport:
+    """Log clients in concurrently, under a rate limit and per-subnet cap.
+
+    Args:
+        clients: Clients to log in, e.g. a Fleet.
+        rate: Login attempts per second, across all hosts. default: 20.
+        per_subnet: Logins in flight per subnet. default: 4.
+        retries: Retries of a failed login. default: 2.
+        backoff: Seconds before the first retry, doubling for each further
+            retry. default: 0.5.
+        timeout: Request timeout of each attempt, in seconds. default: 10.
+        concurrency: Threads logging in. default: 32.
+        progress: Optional callable taking (report, server, error), called
+            after each client completes, one call at a time. error is None
+            if the client logged in. Exceptions it raises are collected in
+            the report's progress_errors.
+        subnet: Callable mapping a server to its subnet. default: subnet_of,
+            /24 for IPv4 and /64 for IPv6.
+
+    Returns:
+        PrewarmReport: Results. Failures are collected, not raised.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    queue = _round_robin(clients, subnet)
+    report = PrewarmReport(len(queue))
+    limiter = _RateLimiter(rate)
+    slots = {key: threading.BoundedSemaphore(max(1, per_subnet)) for _, key in queue}
+    run = _Run(report, limiter, slots, retries, backoff, timeout, progress)
+
+    start = monotonic()
+    if queue:
+        workers = max(1, min(concurrency, len(queue)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(run.login, entry) for entry in queue]:
+                future.result()
+    report.duration = monotonic() - start
+    return report
@@ -0,0 +1,293 @@
+"""Provides an opt-in profiler for the scrape path.
+
+While installed, the profiler wraps Client.get_metrics and the response
+decoders with cProfile. Statistics are accumulated per host and BMC
+firmware, and every ``every`` polls of a host they are written to
+``<directory>/<host>_<firmware>_<n>.prof``, together with the top
+allocation sites reported by tracemalloc in ``<n>.alloc.txt``. Profiles can
+be inspected with ``python -m pstats`` or snakeviz.
+
+The firmware tag is read from the client's ``firmware`` attribute, set by
+Client.probe(), and is "unknown" until the BMC has been probed; pass
+``firmware`` to tag polls otherwise. tracemalloc traces the whole process, so
+allocation sites cover every thread, not only the host being written.
+
+The profiler is installed either explicitly::
+
+    with Profiler("profiles", every=50):
+        client.get_metrics()
+
+or by setting ``SMBMC_PROFILE`` to a directory before importing smbmc
+(``SMBMC_PROFILE_EVERY`` overrides the number of polls per file). When it
+is not installed, nothing is wrapped and there is no overhead.
+"""
+import os
+import re
+import threading
+from functools import wraps
+
+from . import catalog
+from . import client as _client_module
+from . import ipmi_pmbus
+from . import ipmi_sensor
+from .client import Client
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9.-]+")
+
+# (owner, attribute) pairs wrapped while a profiler is installed
+_TARGETS = (
+    (Client, "get_metrics"),
+    (_client_module, "process_sensor_response"),
+    (catalog.Catalog, "process_sensor_response"),
+    (ipmi_pmbus.PSItemDecoder, "process_response"),
+    (ipmi_sensor, "process_sensor_response"),
+    (ipmi_pmbus, "process_pmbus_response"),
+)
+
+
+def _tag(value) -> str:
+    """Make a value safe for use in a file name.
+
+    Args:
+        value: Host, firmware version, etc.
+
+    Returns:
+        str: Sanitised value.
+    """
+    value = str(value).split("://", 1)[-1]
+    return _UNSAFE.sub("_", value).strip("_") or "unknown"
+
+
+class _Accumulator:
+    """Statistics accumulated for one host and firmware."""
+
+    def __init__(self):
+        self.stats = None
+        self.polls = 0
+        self.files = 0
+
+
+class Profiler:
+    """Profiler wraps the scrape path with cProfile and tracemalloc."""
+
+    def __init__(self, directory, every=100, top=25, frames=1, firmware=None):
+        """Initialises an instance of smbmc.profiling.Profiler.
+
+        Args:
+            directory: Directory receiving the profiles. Created if missing.
+            every: Polls of a host accumulated per profile. default: 100.
+            top: Allocation sites written per profile. default: 25.
+            frames: Stack frames stored per allocation by tracemalloc.
+                default: 1.
+            firmware: Callable returning the firmware tag of a client.
+                default: None, the client's firmware attribute.
+        """
+        self.directory = directory
+        self.every = every
+        self.top = top
+        self.frames = frames
+        self.firmware = firmware or _firmware
+        self._accumulators = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._originals = None
+        self._started_tracemalloc = False
+
+    def install(self):
+        """Wrap the scrape path and start tracemalloc.
+
+        Raises:
+            Exception: A profiler is already installed.
+        """
+        import tracemalloc
+
+        if self._originals is not None or _is_wrapped(Client.get_metrics):
+            raise Exception("a profiler is already installed")
+
+        os.makedirs(self.directory, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracemalloc = True
+
+        self._originals = []
+        for owner, name in _TARGETS:
+            original = owner.__dict__[name]
+            self._originals.append((owner, name, original))
+            if name == "get_metrics":
+                wrapper = self._wrap_poll(original)
+            else:
+                wrapper = self._wrap_decode(original)
+            setattr(owner, name, wrapper)
+
+    def uninstall(self):
+        """Restore the scrape path, writing any pending profiles."""
+        import tracemalloc
+
+        if self._originals is None:
+            return
+        for owner, name, original in self._originals:
+            setattr(owner, name, original)
+        self._originals = None
+
+        self.flush()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        """Install the profiler.
+
+        Returns:
+            Profiler: This profiler.
+        """
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Uninstall the profiler.
+
+        Args:
+            *exc_info: Exception details, if any.
+        """
+        self.uninstall()
+
+    def flush(self):
+        """Write profiles for every host with pending polls."""
+        with self._lock:
+            pending = [
+                (key, accumulator)
+                for key, accumulator in self._accumulators.items()
+                if accumulator.polls
+            ]
+            for key, accumulator in pending:
+                self._write(key, accumulator)
+
+    def _wrap_poll(self, get_metrics):
+        @wraps(get_metrics)
+        def wrapper(client, *args, **kwargs):
+            key = (_tag(client.server), _tag(self.firmware(client)))
+            return self._run(key, get_metrics, (client,) + args, kwargs)
+
+        wrapper.__smbmc_profiled__ = True
+        return wrapper
+
+    def _wrap_decode(self, decode):
+        key = ("decode", _tag(decode.__qualname__))
+
+        @wraps(decode)
+        def wrapper(*args, **kwargs):
+            # decoding within a profiled poll is already being profiled
+            if getattr(self._local, "active", False):
+                return decode(*args, **kwargs)
+            return self._run(key, decode, args, kwargs)
+
+        return wrapper
+
+    def _run(self, key, function, args, kwargs):
+        """Call a function under cProfile, accumulating its statistics.
+
+        Args:
+            key: (host, firmware) tags.
+            function: Function to profile.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            object: The function's result.
+        """
+        from cProfile import Profile
+
+        profile = Profile()
+        self._local.active = True
+        profile.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._local.active = False
+            self._add(key, profile)
+
+    def _add(self, key, profile):
+        """Accumulate statistics, writing a profile every N polls.
+
+        Args:
+            key: (host, firmware) tags.
+            profile: Disabled cProfile.Profile.
+        """
+        from pstats import Stats
+
+        with self._lock:
+            accumulator = self._accumulators.get(key)
+            if accumulator is None:
+                accumulator = self._accumulators[key] = _Accumulator()
+
+            if accumulator.stats is None:
+                accumulator.stats = Stats(profile)
+            else:
+                accumulator.stats.add(profile)
+            accumulator.polls += 1
+
+            if accumulator.polls >= self.every:
+                self._write(key, accumulator)
+
+    def _write(self, key, accumulator):
+        """Write and reset the statistics of one host.
+
+        Args:
+            key: (host, firmware) tags.
+            accumulator: Accumulated statistics.
+        """
+        import tracemalloc
+
+        accumulator.files += 1
+        path = os.path.join(self.directory, "_".join(key))
+        path = f"{path}_{accumulator.files:04d}"
+        accumulator.stats.dump_stats(f"{path}.prof")
+
+        if tracemalloc.is_tracing():
+            statistics = tracemalloc.take_snapshot().statistics("lineno")
+            with open(f"{path}.alloc.txt", "w") as f:
+                f.write(f"# {accumulator.polls} polls of {key[0]} ({key[1]})\n")
+                for statistic in statistics[: self.top]:
+                    f.write(f"{statistic}\n")
+
+        accumulator.stats = None
+        accumulator.polls = 0
+
+
+def _firmware(client):
+    """Firmware version of a client, set by Client.probe().
+
+    Args:
+        client: Client polled.
+
+    Returns:
+        str: Firmware version, or None if unknown.
+    """
+    return getattr(client, "firmware", None)
+
+
+def _is_wrapped(function) -> bool:
+    return getattr(function, "__smbmc_profiled__", False)
+
+
+def install_from_env(environ=None):
+    """Install a profiler if SMBMC_PROFILE is set.
+
+    Args:
+        environ: Environment mapping. default: os.environ.
+
+    Returns:
+        Profiler: The installed profiler, or None.
+    """
+    environ = os.environ if environ is None else environ
+    directory = environ.get("SMBMC_PROFILE")
+    if not directory:
+        return None
+
+    import atexit
+
+    profiler = Profiler(directory, every=int(environ.get("SMBMC_PROFILE_EVERY", 100)))
+    profiler.install()
+    atexit.register(profiler.uninstall)
+    return profiler
@@ -0,0 +1,238 @@
+"""Provides a load generator replaying recorded BMC responses.
+
+Responses are loaded from betamax cassettes, such as those recorded by the
+integration tests, and served by a smbmc.transport.FakeTransport in place of
+the network.
+replay() then polls them through the full Client decode path, at a fixed
+rate or as fast as possible, and reports sustained throughput, latency
+percentiles and memory growth.
+
+Each cassette acts as one host, so cassettes recorded from different board
+models are polled side by side. Logins always succeed, and any other
+request without a recorded response fails the poll.
+
+When a rate is given, latency is measured from the time a poll was
+scheduled rather than the time it started, so that polls queued behind
+slow ones are accounted for. Decoding is CPU bound, so concurrency above 1
+measures contention for the GIL rather than additional throughput.
+"""
+from array import array
+
+from .transport import FakeTransport
+from .transport import load_cassette
+
+#: Percentiles reported by replay().
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class CassetteSessionFactory:
+    """Picklable factory of sessions serving cassettes, e.g. for Collector."""
+
+    def __init__(self, cassettes: dict):
+        """Creates an instance of CassetteSessionFactory.
+
+        Args:
+            cassettes: Cassette path, keyed by server address.
+        """
+        self.cassettes = cassettes
+
+    def __call__(self) -> FakeTransport:
+        """Create a session serving the cassettes.
+
+        Requests are not recorded, and hosts without a cassette fail.
+
+        Returns:
+            FakeTransport: Session serving each server its cassette.
+        """
+        session = FakeTransport(sid="replay", record=False)
+        loaded = {}
+        for server, path in self.cassettes.items():
+            if path not in loaded:
+                loaded[path] = load_cassette(path)
+            session.add_host(server, loaded[path])
+        return session
+
+
+class ReplayReport:
+    """Results of a replay() run.
+
+    Attributes:
+        polls: Polls completed, including failed polls.
+        errors: Polls that raised an exception.
+        duration: Wall-clock duration, in seconds.
+        latencies: Latency of every poll, in seconds, sorted.
+        memory_growth: Growth of traced memory over the run, in bytes, or
+            None if memory was not traced.
+        memory_peak: Peak traced memory, in bytes, or None.
+    """
+
+    def __init__(self, polls, errors, duration, latencies, memory_growth, peak):
+        """Creates an instance of ReplayReport.
+
+        Args:
+            polls: Polls completed.
+            errors: Polls that raised an exception.
+            duration: Wall-clock duration, in seconds.
+            latencies: Latency of every poll, in seconds.
+            memory_growth: Growth of traced memory, in bytes, or None.
+            peak: Peak traced memory, in bytes, or None.
+        """
+        self.polls = polls
+        self.errors = errors
+        self.duration = duration
+        self.latencies = sorted(latencies)
+        self.memory_growth = memory_growth
+        self.memory_peak = peak
+
+    @property
+    def polls_per_second(self) -> float:
+        """Sustained throughput."""
+        return self.polls / self.duration if self.duration else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Latency percentile, using the nearest-rank method.
+
+        Args:
+            p: Percentile, between 0 and 100.
+
+        Returns:
+            float: Latency, in seconds, or 0.0 if there were no polls.
+        """
+        if not self.latencies:
+            return 0.0
+        rank = max(1, -(-p * len(self.latencies) // 100))
+        return self.latencies[min(int(rank), len(self.latencies)) - 1]
+
+    def __str__(self):
+        """Summarise the run.
+
+        Returns:
+            str: Human-readable summary.
+        """
+        lines = [
+            f"polls      {self.polls} ({self.errors} errors) in {self.duration:.2f} s",
+            f"throughput {self.polls_per_second:.1f} polls/s",
+            "latency    "
+            + ", ".join(
+                f"p{p:g} {self.percentile(p) * 1000:.2f} ms" for p in PERCENTILES
+            ),
+        ]
+        if self.memory_growth is not None:
+            lines.append(
+                f"memory     {self.memory_growth / 1024:+.1f} KiB growth, "
+                f"{self.memory_peak / 1024:.1f} KiB peak"
+            )
+        return "\n".join(lines)
+
+
+def _poll_all(clients, metrics, polls, rate, concurrency) -> tuple:
+    """Poll the clients in turn, from several threads.
+
+    Args:
+        clients: Clients polled round-robin.
+        metrics: List of metric(s) to query.
+        polls: Total number of polls.
+        rate: Target polls per second, or None for as fast as possible.
+        concurrency: Threads polling in parallel.
+
+    Returns:
+        tuple: (latencies, number of failed polls, duration in seconds).
+    """
+    import threading
+    from itertools import count
+    from time import perf_counter
+    from time import sleep
+
+    # allocated up front, so that only polling counts towards memory growth
+    latencies = array("d", bytes(8 * polls))
+    errors = []
+    schedule = count()
+    start = perf_counter()
+
+    def worker():
+        while True:
+            i = next(schedule)
+            if i >= polls:
+                return
+            if rate:
+                begin = start + i / rate
+                delay = begin - perf_counter()
+                if delay > 0:
+                    sleep(delay)
+            else:
+                begin = perf_counter()
+            try:
+                clients[i % len(clients)].get_metrics(metrics)
+            except Exception as e:
+                errors.append(e)
+            latencies[i] = perf_counter() - begin
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, len(errors), perf_counter() - start
+
+
+def replay(
+    cassettes,
+    polls=1000,
+    rate=None,
+    concurrency=1,
+    metrics=("pmbus", "sensor"),
+    trace_memory=True,
+) -> ReplayReport:
+    """Poll recorded responses through the Client decode path.
+
+    When memory is traced and tracemalloc is already tracing, e.g. for
+    another component, tracing is left running afterwards.
+
+    Args:
+        cassettes: Paths to betamax cassettes, one per simulated host.
+        polls: Total number of polls. default: 1000.
+        rate: Target polls per second across all hosts. default: None,
+            as fast as possible.
+        concurrency: Threads polling in parallel. default: 1.
+        metrics: Metrics polled. default: ("pmbus", "sensor").
+        trace_memory: Whether to trace memory with tracemalloc, which slows
+            polling down considerably. default: True.
+
+    Returns:
+        ReplayReport: Results.
+
+    Raises:
+        ValueError: No cassettes were given.
+    """
+    import tracemalloc
+
+    from .fleet import Fleet
+
+    if not cassettes:
+        raise ValueError("no cassettes given")
+
+    servers = {f"http://replay-{i}": path for i, path in enumerate(cassettes)}
+    fleet = Fleet(session=CassetteSessionFactory(servers)())
+    clients = [fleet.add(server) for server in servers]
+
+    metrics = list(metrics)
+    # warm up, and fail early on cassettes lacking a metric
+    for client in clients:
+        client.get_metrics(metrics)
+
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    if trace_memory:
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    latencies, errors, duration = _poll_all(clients, metrics, polls, rate, concurrency)
+
+    growth = peak = None
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        growth = current - baseline
+    if started:
+        tracemalloc.stop()
+
+    return ReplayReport(polls, errors, duration, latencies, growth, peak)
@@ -0,0 +1,366 @@
+"""Provides serializers for sensors, power supplies and snapshots.
+
+Sensors and power supplies are flattened to rows of values, in the order of
+SENSOR_FIELDS and POWER_SUPPLY_FIELDS, using precompiled attribute getters.
+Rows are the basis of every format:
+
+- dicts, via sensor_to_dict(), power_supply_to_dict() and snapshot_to_dict()
+- compact JSON, via dumps() and loads()
+- msgpack, via packb() and unpackb(), if msgpack is installed
+
+Enumerations are emitted either as ints (``enums="int"``, the default) or
+as member names (``enums="name"``). Deserializers accept both. Discrete
+sensor flags are always emitted as ints and are deserialized as ints, as the
+flag class cannot be recovered from the sensor alone; bitwise tests against
+the flag members behave the same.
+
+A serialized snapshot is far cheaper to pickle than the objects it was
+built from, so prefer dumps() or packb() when sending snapshots over
+multiprocessing queues or sockets.
+"""
+from operator import attrgetter
+
+from .models import POWER_SUPPLY_READINGS
+from .models import PowerSupply
+from .models import Sensor
+from .models import SensorSet
+from .models import SensorStateEnum
+from .models import SensorTypeEnum
+from .models import SensorUnitEnum
+
+#: Sensor attributes, in row order.
+SENSOR_FIELDS = (
+    "id",
+    "name",
+    "type",
+    "unit",
+    "state",
+    "flags",
+    "reading",
+    "lnr",
+    "lc",
+    "lnc",
+    "unc",
+    "uc",
+    "unr",
+)
+
+#: PowerSupply attributes, in row order.
+POWER_SUPPLY_FIELDS = ("id", "name", "status", "type") + POWER_SUPPLY_READINGS
+
+#: Version of the dumps() and packb() document layout.
+FORMAT_VERSION = 1
+
+_sensor_values = attrgetter(*SENSOR_FIELDS)
+_power_supply_values = attrgetter(*POWER_SUPPLY_FIELDS)
+_enum_name = attrgetter("name")
+
+# value or name -> member, for every enumeration in a sensor row
+_TYPES = {}
+_UNITS = {}
+_STATES = {}
+for _lookup, _enum in (
+    (_TYPES, SensorTypeEnum),
+    (_UNITS, SensorUnitEnum),
+    (_STATES, SensorStateEnum),
+):
+    for _member in _enum:
+        _lookup[_member.value] = _member
+        _lookup[_member.name] = _member
+
+
+def _enum_converter(enums: str):
+    """Look up the function converting enumeration members.
+
+    Args:
+        enums: "int" or "name".
+
+    Returns:
+        function: Converter.
+
+    Raises:
+        ValueError: Unknown enums option.
+    """
+    if enums == "int":
+        return int
+    if enums == "name":
+        return _enum_name
+    raise ValueError(f"enums must be 'int' or 'name', not {enums!r}")
+
+
+def sensor_to_row(sensor: Sensor, enums: str = "int") -> list:
+    """Flatten a sensor to a row.
+
+    Args:
+        sensor: Sensor to flatten.
+        enums: Emit enumerations as "int" or "name". default: "int".
+
+    Returns:
+        list: Values, in the order of SENSOR_FIELDS.
+    """
+    return _sensor_rows((sensor,), _enum_converter(enums))[0]
+
+
+def _sensor_rows(sensors, convert) -> list:
+    rows = []
+    append = rows.append
+    for sensor in sensors:
+        row = list(_sensor_values(sensor))
+        row[2] = convert(row[2])
+        row[3] = convert(row[3])
+        row[4] = convert(row[4])
+        if row[5] is not None:
+            row[5] = int(row[5])
+        append(row)
+    return rows
+
+
+def sensor_from_row(row) -> Sensor:
+    """Rebuild a sensor from a row.
+
+    Args:
+        row: Values, in the order of SENSOR_FIELDS.
+
+    Returns:
+        Sensor: The sensor.
+    """
+    sensor = Sensor.__new__(Sensor)
+    sensor.__dict__ = values = dict(zip(SENSOR_FIELDS, row))
+    values["type"] = _TYPES[values["type"]]
+    values["unit"] = _UNITS[values["unit"]]
+    values["state"] = _STATES[values["state"]]
+    return sensor
+
+
+def power_supply_to_row(power_supply: PowerSupply) -> list:
+    """Flatten a power supply to a row.
+
+    Args:
+        power_supply: PowerSupply to flatten.
+
+    Returns:
+        list: Values, in the order of POWER_SUPPLY_FIELDS.
+    """
+    return list(_power_supply_values(power_supply))
+
+
+def power_supply_from_row(row) -> PowerSupply:
+    """Rebuild a power supply from a row.
+
+    Args:
+        row: Values, in the order of POWER_SUPPLY_FIELDS.
+
+    Returns:
+        PowerSupply: The power supply.
+    """
+    power_supply = PowerSupply.__new__(PowerSupply)
+    power_supply.__dict__ = dict(zip(POWER_SUPPLY_FIELDS, row))
+    return power_supply
+
+
+def sensor_to_dict(sensor: Sensor, enums: str = "int") -> dict:
+    """Convert a sensor to a dict.
+
+    Args:
+        sensor: Sensor to convert.
+        enums: Emit enumerations as "int" or "name". default: "int".
+
+    Returns:
+        dict: Attributes of the sensor.
+    """
+    return dict(zip(SENSOR_FIELDS, sensor_to_row(sensor, enums)))
+
+
+def sensor_from_dict(data: dict) -> Sensor:
+    """Rebuild a sensor from a dict.
+
+    Args:
+        data: Attributes of the sensor, as returned by sensor_to_dict().
+
+    Returns:
+        Sensor: The sensor.
+
+    Raises:
+        KeyError: An attribute is missing.
+    """
+    return sensor_from_row([data[field] for field in SENSOR_FIELDS])
+
+
+def power_supply_to_dict(power_supply: PowerSupply) -> dict:
+    """Convert a power supply to a dict.
+
+    Args:
+        power_supply: PowerSupply to convert.
+
+    Returns:
+        dict: Attributes of the power supply.
+    """
+    return dict(zip(POWER_SUPPLY_FIELDS, _power_supply_values(power_supply)))
+
+
+def power_supply_from_dict(data: dict) -> PowerSupply:
+    """Rebuild a power supply from a dict.
+
+    Args:
+        data: Attributes of the power supply, as returned by
+            power_supply_to_dict().
+
+    Returns:
+        PowerSupply: The power supply.
+
+    Raises:
+        KeyError: An attribute is missing.
+    """
+    return power_supply_from_row([data[field] for field in POWER_SUPPLY_FIELDS])
+
+
+def snapshot_to_dict(metrics: dict, enums: str = "int") -> dict:
+    """Convert a snapshot to a dict of plain values.
+
+    Args:
+        metrics: Dict containing "sensor" and/or "pmbus" results.
+        enums: Emit enumerations as "int" or "name". default: "int".
+
+    Returns:
+        dict: Lists of sensor and power supply dicts, keyed as in metrics.
+    """
+    data = {}
+    if "sensor" in metrics:
+        data["sensor"] = [
+            dict(zip(SENSOR_FIELDS, row))
+            for row in _sensor_rows(metrics["sensor"], _enum_converter(enums))
+        ]
+    if "pmbus" in metrics:
+        data["pmbus"] = [power_supply_to_dict(p) for p in metrics["pmbus"]]
+    return data
+
+
+def snapshot_from_dict(data: dict) -> dict:
+    """Rebuild a snapshot from a dict.
+
+    Args:
+        data: Dict, as returned by snapshot_to_dict().
+
+    Returns:
+        dict: Snapshot, as returned by Client.get_metrics().
+    """
+    metrics = {}
+    if "sensor" in data:
+        metrics["sensor"] = SensorSet(sensor_from_dict(s) for s in data["sensor"])
+    if "pmbus" in data:
+        metrics["pmbus"] = [power_supply_from_dict(p) for p in data["pmbus"]]
+    return metrics
+
+
+def snapshot_to_rows(metrics: dict, enums: str = "int") -> dict:
+    """Convert a snapshot to a versioned document of rows.
+
+    This is the layout written by dumps() and packb().
+
+    Args:
+        metrics: Dict containing "sensor" and/or "pmbus" results.
+        enums: Emit enumerations as "int" or "name". default: "int".
+
+    Returns:
+        dict: {"v": FORMAT_VERSION, "sensor": rows, "pmbus": rows}, with
+        "sensor" and "pmbus" present only if they are present in metrics.
+        With enums="int", rows hold the enumeration members themselves,
+        which JSON and msgpack encode as ints.
+    """
+    document = {"v": FORMAT_VERSION}
+    if "sensor" in metrics:
+        if enums == "int":
+            # enumeration members are ints, and are encoded as such as-is
+            document["sensor"] = list(map(_sensor_values, metrics["sensor"]))
+        else:
+            convert = _enum_converter(enums)
+            document["sensor"] = _sensor_rows(metrics["sensor"], convert)
+    if "pmbus" in metrics:
+        document["pmbus"] = [_power_supply_values(p) for p in metrics["pmbus"]]
+    return document
+
+
+def snapshot_from_rows(document: dict) -> dict:
+    """Rebuild a snapshot from a document of rows.
+
+    Args:
+        document: Dict, as returned by snapshot_to_rows().
+
+    Returns:
+        dict: Snapshot, as returned by Client.get_metrics().
+
+    Raises:
+        ValueError: Unsupported document version.
+    """
+    version = document.get("v")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported snapshot version: {version!r}")
+
+    metrics = {}
+    if "sensor" in document:
+        metrics["sensor"] = SensorSet(map(sensor_from_row, document["sensor"]))
+    if "pmbus" in document:
+        metrics["pmbus"] = list(map(power_supply_from_row, document["pmbus"]))
+    return metrics
+
+
+def dumps(metrics: dict, enums: str = "int") -> str:
+    """Serialize a snapshot to compact JSON.
+
+    Args:
+        metrics: Dict containing "sensor" and/or "pmbus" results.
+        enums: Emit enumerations as "int" or "name". default: "int".
+
+    Returns:
+        str: JSON document.
+    """
+    from json import dumps as json_dumps
+
+    return json_dumps(snapshot_to_rows(metrics, enums), separators=(",", ":"))
+
+
+def loads(data) -> dict:
+    """Deserialize a snapshot from JSON.
+
+    Args:
+        data: str or bytes, as returned by dumps().
+
+    Returns:
+        dict: Snapshot, as returned by Client.get_metrics().
+    """
+    from json import loads as json_loads
+
+    return snapshot_from_rows(json_loads(data))
+
+
+def packb(metrics: dict, enums: str = "int") -> bytes:
+    """Serialize a snapshot to msgpack.
+
+    Requires the msgpack package.
+
+    Args:
+        metrics: Dict containing "sensor" and/or "pmbus" results.
+        enums: Emit enumerations as "int" or "name". default: "int".
+
+    Returns:
+        bytes: msgpack document.
+    """
+    import msgpack
+
+    return msgpack.packb(snapshot_to_rows(metrics, enums), use_bin_type=True)
+
+
+def unpackb(data: bytes) -> dict:
+    """Deserialize a snapshot from msgpack.
+
+    Requires the msgpack package.
+
+    Args:
+        data: bytes, as returned by packb().
+
+    Returns:
+        dict: Snapshot, as returned by Client.get_metrics().
+    """
+    import msgpack
+
+    return snapshot_from_rows(msgpack.unpackb(data, raw=False))
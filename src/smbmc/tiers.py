@@ -0,0 +1,201 @@
+"""Provides tiered polling of sensors.
+
+A fan controller wants a few temperatures every second, and the rest of the
+sensors far less often. A TieredPoller fetches the fast tier every poll,
+selecting its sensors with the range argument of SENSOR_INFO.XML, and every
+sensor, along with other metrics, once per slow interval. Each poll returns
+one snapshot: the latest readings of the fast tier merged into the latest
+full poll, with sensor IDs and order of the full poll.
+
+Sensors are selected by number, learned from the full polls. Firmware that
+ignores the selection answers the fast tier with every sensor; the fast
+tier then costs a full request per poll, but still returns correct values.
+"""
+from time import monotonic
+
+from .client import KNOWN_SENSORS
+from .client import _is_late
+from .models import MissingMetric
+from .models import SensorSet
+from .util import contains_duplicates
+from .util import contains_valid_items
+
+
+class TieredPoller:
+    """Polls a fast tier of sensors every poll, and everything else less often.
+
+    A TieredPoller has the get_metrics() of a client, and can be polled by
+    smbmc.watch.Watch at the rate of the fast tier, see watch().
+
+    Attributes:
+        client: Client polled.
+        fast: Names of the sensors of the fast tier.
+        slow_interval: Seconds between full polls.
+        missing: Names of the fast tier unknown to the BMC, as of the last
+            full poll.
+        full_polls: Polls fetching every metric.
+        fast_polls: Polls fetching the fast tier only.
+    """
+
+    def __init__(self, client, fast, slow_interval=60.0):
+        """Creates an instance of TieredPoller.
+
+        Args:
+            client: Client to poll, e.g. smbmc.Client.
+            fast: Names of the sensors of the fast tier.
+            slow_interval: Seconds between full polls. default: 60 seconds.
+
+        Raises:
+            ValueError: The slow interval is not positive.
+        """
+        if slow_interval <= 0:
+            raise ValueError("slow_interval must be positive")
+        self.client = client
+        self.fast = list(fast)
+        self.slow_interval = slow_interval
+        self.missing = []
+        self.full_polls = 0
+        self.fast_polls = 0
+        self._numbers = []
+        self._sensors = None
+        self._metrics = {}
+        self._full_due = 0.0
+
+    def get_metrics(
+        self, metrics=("pmbus", "sensor"), errors=None, budget=None, deadline=None
+    ) -> dict:
+        """Fetch the fast tier, or every metric once the slow interval is due.
+
+        Metrics other than sensors are fetched on full polls only, and
+        repeated in between. Budgets and deadlines behave as in
+        Client.get_metrics().
+
+        Args:
+            metrics: List of metric(s) to query.
+            errors: Optional list collecting sensors that fail to decode and
+                metrics not fetched in time. See Client.get_metrics().
+            budget: Seconds allowed for fetching. default: None, no limit.
+            deadline: time.monotonic() value by which to finish, overriding
+                budget. default: None.
+
+        Raises:
+            Exception: Argument contains duplicate metrics.
+            Exception: Argument contains invalid metrics.
+
+        Returns:
+            dict: A dict containing all metrics.
+        """
+        if contains_duplicates(metrics):
+            raise Exception("metrics array contains duplicates")
+
+        if not contains_valid_items(KNOWN_SENSORS, metrics):
+            raise Exception("metrics array contains invalid metrics")
+
+        if deadline is None and budget is not None:
+            deadline = monotonic() + budget
+
+        full = self._sensors is None or monotonic() >= self._full_due
+        if full:
+            self.full_polls += 1
+        else:
+            self.fast_polls += 1
+
+        result = {}
+        for metric in metrics:
+            if metric == "sensor":
+                result[metric] = self._get_sensors_in_time(full, errors, deadline)
+            else:
+                result[metric] = self._get_slow(metric, full, errors, deadline)
+
+        return result
+
+    def _get_sensors_in_time(self, full: bool, errors, deadline):
+        """Fetch sensors, reporting a late request rather than raising it.
+
+        Args:
+            full: Whether to fetch every sensor.
+            errors: Optional list, see Client.get_metrics().
+            deadline: time.monotonic() value by which to finish.
+
+        Returns:
+            SensorSet: Latest reading of every sensor, or None if not
+            fetched in time.
+        """
+        try:
+            return self._get_sensors(full, errors, deadline)
+        except Exception as e:
+            if not _is_late(e, deadline):
+                raise
+            if errors is not None:
+                errors.append(MissingMetric("sensor", e))
+            return None
+
+    def _get_slow(self, metric: str, full: bool, errors, deadline):
+        """Fetch a metric other than sensors, or repeat its last value.
+
+        Args:
+            metric: Name of the metric.
+            full: Whether this is a full poll.
+            errors: Optional list, see Client.get_metrics().
+            deadline: time.monotonic() value by which to finish.
+
+        Returns:
+            object: Value of the metric, or None if not fetched in time.
+        """
+        if full or self._metrics.get(metric) is None:
+            values = self.client.get_metrics([metric], errors, deadline=deadline)
+            self._metrics[metric] = values[metric]
+        return self._metrics[metric]
+
+    def _get_sensors(self, full: bool, errors, deadline) -> SensorSet:
+        """Fetch every sensor, or the fast tier merged into the last full poll.
+
+        Args:
+            full: Whether to fetch every sensor.
+            errors: Optional list collecting DecodeError instances.
+            deadline: time.monotonic() value after which requests time out.
+
+        Returns:
+            SensorSet: Latest reading of every sensor.
+        """
+        if full or self._sensors is None:
+            start = monotonic()
+            sensor_list = self.client.get_sensor_items(deadline=deadline)
+            numbers = {item.get("NAME"): item.get("NUMBER") for item in sensor_list}
+            self._numbers = [numbers[name] for name in self.fast if name in numbers]
+            self.missing = [name for name in self.fast if name not in numbers]
+            self._sensors = self.client.decode_sensors(sensor_list, errors)
+            self._full_due = start + self.slow_interval
+            return self._sensors
+
+        if not self._numbers:
+            return self._sensors
+        sensor_list = self.client.get_sensor_items(self._numbers, deadline)
+        fresh = {
+            sensor.name: sensor
+            for sensor in self.client.decode_sensors(sensor_list, errors)
+        }
+        sensors = []
+        for sensor in self._sensors:
+            latest = fresh.pop(sensor.name, None)
+            if latest is None:
+                sensors.append(sensor)
+            else:
+                latest.id = sensor.id
+                sensors.append(latest)
+        return SensorSet(sensors)
+
+    def watch(self, interval=1.0, metrics=("pmbus", "sensor"), **kwargs):
+        """Poll at the rate of the fast tier.
+
+        Args:
+            interval: Seconds between polls. default: 1 second.
+            metrics: List of metric(s) to query. default: all.
+            **kwargs: Passed to smbmc.watch.Watch().
+
+        Returns:
+            smbmc.watch.Watch: Iterator of (timestamp, metrics) snapshots.
+        """
+        from .watch import Watch
+
+        return Watch(self, interval, metrics, **kwargs)
@@ -0,0 +1,377 @@
+"""Provides the HTTP transports used by Client.
+
+A transport sends form-encoded POST requests and holds the cookies set by
+the BMC. Anything providing the same interface can be passed to Client:
+
+- ``post(url, data=None, cookies=None, timeout=None)``, returning a response
+  with ``text`` and ``cookies`` attributes
+- ``cookies``, a mapping of the cookies held by the transport
+- ``close()``, closing any open connections
+
+requests.Session provides this interface too, as do the sessions used by
+smbmc.fleet.Fleet.
+
+Three transports are built in:
+
+- RequestsTransport, the default, wraps a requests.Session
+- Urllib3Transport sends requests straight through a urllib3 pool, without
+  the overhead of requests. Any urllib3 PoolManager can be supplied, e.g. a
+  ProxyManager, or a custom manager connecting through a unix socket.
+- FakeTransport answers requests from memory, so that tests can drive
+  Client without a network. load_cassette() loads its responses from a
+  betamax cassette.
+"""
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+
+_TIMEOUT_ERRORS = None
+
+
+def timeout_errors() -> tuple:
+    """Exception types raised by the built-in transports on timeouts.
+
+    Returns:
+        tuple: TimeoutError, socket.timeout, and the timeout exceptions of
+        requests and urllib3, if installed.
+    """
+    global _TIMEOUT_ERRORS
+    if _TIMEOUT_ERRORS is None:
+        import socket
+
+        errors = [TimeoutError, socket.timeout]
+        try:
+            from requests.exceptions import Timeout
+
+            errors.append(Timeout)
+        except ImportError:  # pragma: no cover
+            pass
+        try:
+            from urllib3.exceptions import TimeoutError as Urllib3TimeoutError
+
+            errors.append(Urllib3TimeoutError)
+        except ImportError:  # pragma: no cover
+            pass
+        _TIMEOUT_ERRORS = tuple(errors)
+    return _TIMEOUT_ERRORS
+
+
+class Response:
+    """Response returned by Urllib3Transport and FakeTransport.
+
+    Attributes:
+        text: Response body.
+        cookies: Cookies set by the response.
+    """
+
+    def __init__(self, text, cookies=None):
+        """Creates an instance of Response.
+
+        Args:
+            text: Response body.
+            cookies: Cookies set by the response.
+        """
+        self.text = text
+        self.cookies = cookies or {}
+
+
+class RequestsTransport:
+    """Transport using a requests.Session.
+
+    Attributes:
+        session: The wrapped session.
+    """
+
+    def __init__(self, session=None, timeout=None):
+        """Creates an instance of RequestsTransport.
+
+        Args:
+            session: Session used as-is. default: a new requests.Session.
+            timeout: Default request timeout, in seconds. default: None.
+        """
+        if session is None:
+            from requests import Session
+
+            session = Session()
+        self.session = session
+        self.timeout = timeout
+
+    @property
+    def cookies(self):
+        """Cookies held by the session."""
+        return self.session.cookies
+
+    def post(self, url, data=None, cookies=None, timeout=None):
+        """Send a form-encoded POST request.
+
+        Args:
+            url: Request URL.
+            data: Form data.
+            cookies: Cookies sent in addition to those held.
+            timeout: Request timeout, in seconds. default: the transport's.
+
+        Returns:
+            requests.Response: Response object.
+        """
+        return self.session.post(
+            url,
+            data=data,
+            cookies=cookies,
+            timeout=self.timeout if timeout is None else timeout,
+        )
+
+    def close(self):
+        """Close every open connection."""
+        self.session.close()
+
+
+def _parse_cookies(headers: list) -> dict:
+    """Extract the cookies set by Set-Cookie headers.
+
+    Args:
+        headers: Values of the Set-Cookie headers.
+
+    Returns:
+        dict: Cookie values, keyed by name.
+    """
+    cookies = {}
+    for header in headers:
+        jar = SimpleCookie()
+        jar.load(header)
+        for name, morsel in jar.items():
+            cookies[name] = morsel.value
+    return cookies
+
+
+class Urllib3Transport:
+    """Transport sending requests through a urllib3 pool.
+
+    Attributes:
+        pool_manager: urllib3 PoolManager sending the requests.
+        cookies: Dict of cookies held, sent with each request.
+    """
+
+    def __init__(
+        self,
+        pool_manager=None,
+        num_pools=10,
+        maxsize=1,
+        timeout=None,
+        keep_cookies=True,
+    ):
+        """Creates an instance of Urllib3Transport.
+
+        Args:
+            pool_manager: PoolManager used as-is. default: a new
+                urllib3.PoolManager, without retries.
+            num_pools: Hosts for which connections are kept open, if no
+                pool_manager is given. default: 10.
+            maxsize: Connections kept open per host, if no pool_manager is
+                given. default: 1.
+            timeout: Default request timeout, in seconds. default: None.
+            keep_cookies: Whether to hold cookies set by responses. Disable
+                this when sharing the transport between hosts, e.g. as the
+                session of a Fleet. default: True.
+        """
+        if pool_manager is None:
+            from urllib3 import PoolManager
+
+            pool_manager = PoolManager(
+                num_pools=num_pools, maxsize=maxsize, retries=False
+            )
+        self.pool_manager = pool_manager
+        self.timeout = timeout
+        self.keep_cookies = keep_cookies
+        self.cookies = {}
+
+    def post(self, url, data=None, cookies=None, timeout=None):
+        """Send a form-encoded POST request.
+
+        Args:
+            url: Request URL.
+            data: Form data.
+            cookies: Cookies sent in addition to those held.
+            timeout: Request timeout, in seconds. default: the transport's.
+
+        Returns:
+            Response: Response body and cookies.
+        """
+        headers = {}
+        sent = dict(self.cookies, **cookies) if cookies else self.cookies
+        if sent:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in sent.items())
+
+        r = self.pool_manager.request(
+            "POST",
+            url,
+            fields=data or {},
+            encode_multipart=False,
+            headers=headers,
+            timeout=self.timeout if timeout is None else timeout,
+        )
+
+        set_cookies = _parse_cookies(r.headers.getlist("Set-Cookie"))
+        if self.keep_cookies:
+            self.cookies.update(set_cookies)
+        charset = "utf-8"
+        content_type = r.headers.get("Content-Type", "")
+        if "charset=" in content_type:
+            charset = content_type.split("charset=", 1)[1].split(";")[0].strip()
+        return Response(r.data.decode(charset, "replace"), set_cookies)
+
+    def close(self):
+        """Close every open connection."""
+        self.pool_manager.clear()
+
+
+def request_key(path: str, data) -> tuple:
+    """Key identifying a request by path and form data.
+
+    Args:
+        path: URL path.
+        data: Form data, as a dict or list of pairs.
+
+    Returns:
+        tuple: (path, sorted form data pairs).
+    """
+    items = data.items() if isinstance(data, dict) else data
+    return (path, tuple(sorted(items)))
+
+
+def load_cassette(path: str) -> dict:
+    """Load the recorded responses of a betamax cassette.
+
+    Args:
+        path: Path to the cassette JSON file.
+
+    Returns:
+        dict: Response body, keyed by request_key() of the request.
+    """
+    import json
+    from base64 import b64decode
+    from urllib.parse import parse_qsl
+
+    with open(path) as f:
+        cassette = json.load(f)
+
+    responses = {}
+    for interaction in cassette["http_interactions"]:
+        request = interaction["request"]
+        body = interaction["response"]["body"]
+        if "base64_string" in body:
+            text = b64decode(body["base64_string"]).decode(
+                body.get("encoding") or "utf-8"
+            )
+        else:
+            text = body["string"]
+        # the server may be a placeholder, e.g. "<SERVER>/cgi/ipmi.cgi"
+        path = "/" + request["uri"].split("://", 1)[-1].split("/", 1)[-1]
+        key = request_key(urlsplit(path).path, parse_qsl(request["body"]["string"]))
+        responses[key] = text
+    return responses
+
+
+class FakeTransport:
+    """Transport answering requests from memory.
+
+    Logins set a SID cookie if the credentials match. Other requests are
+    answered with the response added for their host, if any, or else for
+    their path and form data.
+
+    Attributes:
+        cookies: Dict of cookies held.
+        requests: (url, data, cookies) of every request, in order, if
+            recorded.
+        hosts: Responses of specific hosts, keyed by network location.
+    """
+
+    def __init__(
+        self, responses=None, username=None, password=None, sid="fake", record=True
+    ):
+        """Creates an instance of FakeTransport.
+
+        Args:
+            responses: Responses, as returned by load_cassette().
+                default: None.
+            username: Username accepted by logins. default: any.
+            password: Password accepted by logins. default: any.
+            sid: SID set by successful logins. default: "fake".
+            record: Whether to record requests. Disable this for long runs,
+                e.g. load generation. default: True.
+        """
+        self.responses = dict(responses or {})
+        self.username = username
+        self.password = password
+        self.sid = sid
+        self.record = record
+        self.cookies = {}
+        self.requests = []
+        self.hosts = {}
+
+    @classmethod
+    def from_cassette(cls, path: str, **kwargs):
+        """Create a transport answering with the responses of a cassette.
+
+        Args:
+            path: Path to a betamax cassette.
+            **kwargs: Passed to FakeTransport().
+
+        Returns:
+            FakeTransport: The transport.
+        """
+        return cls(load_cassette(path), **kwargs)
+
+    def add(self, data: dict, text: str, path="/cgi/ipmi.cgi"):
+        """Answer a request with a response.
+
+        Args:
+            data: Form data of the request.
+            text: Response body.
+            path: Path of the request. Defaults to '/cgi/ipmi.cgi'.
+        """
+        self.responses[request_key(path, data)] = text
+
+    def add_host(self, server: str, responses: dict):
+        """Answer the requests to a host with its own responses.
+
+        Args:
+            server: Address of server in form: 'http://replay-0'.
+            responses: Responses, as returned by load_cassette().
+        """
+        self.hosts[urlsplit(server).netloc] = responses
+
+    def post(self, url, data=None, cookies=None, timeout=None):
+        """Answer a request.
+
+        Args:
+            url: Request URL.
+            data: Form data.
+            cookies: Cookies sent in addition to those held.
+            timeout: Ignored.
+
+        Returns:
+            Response: Response body and cookies.
+
+        Raises:
+            Exception: No response was added for the request.
+        """
+        data = data or {}
+        if self.record:
+            self.requests.append((url, data, dict(self.cookies, **(cookies or {}))))
+        url = urlsplit(url)
+        if url.path == "/cgi/login.cgi":
+            if (self.username is not None and data.get("name") != self.username) or (
+                self.password is not None and data.get("pwd") != self.password
+            ):
+                return Response("")
+            self.cookies["SID"] = self.sid
+            return Response("", {"SID": self.sid})
+
+        responses = self.hosts.get(url.netloc, self.responses)
+        text = responses.get(request_key(url.path, data))
+        if text is None:
+            raise Exception(f"no response for {url.path} {data}")
+        return Response(text)
+
+    def close(self):
+        """Do nothing; there are no connections to close."""
@@ -83,7 +83,78 @@ def ten_bit_str(value: str) -> int:
     Returns:
         int: 10-bit int.
     """
-    return ((int(value, 16) & 0xC0) << 2) + (int(value, 16) >> 8)
+    raw = int(value, 16)
+    return ((raw & 0xC0) << 2) + (raw >> 8)
+
+
+def byte_value(value) -> int:
+    """Squeeze a hex string or int attribute into a single byte.
+
+    Args:
+        value: Hex string (as found in IPMI responses), int or None.
+
+    Returns:
+        int: Value in the range 0-255; 255 if unknown.
+    """
+    if value is None or value == "":
+        return 0xFF
+    if isinstance(value, str):
+        value = int(value, 16)
+    return int(value) & 0xFF
+
+
+def hex_fields(values) -> bytes:
+    """Decode several fixed-width hexadecimal fields in one pass.
+
+    Fields are separated by whitespace, so that a field of an odd length
+    cannot be misread as the start of the next field.
+
+    Args:
+        values: Sequence of hexadecimal strings, each of an even length.
+
+    Returns:
+        bytes: The bytes of every field, concatenated.
+
+    Raises:
+        ValueError: A field has an odd length or is not hexadecimal.
+    """
+    return bytes.fromhex(" ".join(values))
+
+
+class HexCache(dict):
+    """Memoises int(value, 16) for short hexadecimal strings.
+
+    Readings repeat heavily from one poll to the next, so a dict lookup
+    replaces most parses. The cache is cleared once it holds maxsize
+    values.
+    """
+
+    def __init__(self, maxsize=65536):
+        """Creates an instance of HexCache.
+
+        Args:
+            maxsize: Values held before the cache is cleared. default: 65536.
+        """
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __missing__(self, key: str) -> int:
+        """Parse and remember a value.
+
+        Args:
+            key: Hexadecimal string.
+
+        Returns:
+            int: Parsed value.
+
+        Raises:
+            ValueError: The string is not hexadecimal.
+        """
+        value = int(key, 16)
+        if len(self) >= self.maxsize:
+            self.clear()
+        self[key] = value
+        return value
 
 
 def extract_xml_attr(xml: str, match: str) -> list:
@@ -0,0 +1,221 @@
+"""Provides iterators polling a client at a fixed rate.
+
+Ticks are scheduled at ``start + n * interval`` on a monotonic clock, so
+that neither slow polls nor time spent by the consumer between snapshots
+accumulate lag. A poll that overruns its tick does not queue the ticks it
+overlapped: they are skipped and counted, and polling resumes with the
+latest tick that is due.
+
+The client, and with it its connections and session, is reused for the
+whole iteration.
+"""
+from time import monotonic
+from time import sleep
+from time import time
+
+
+class Schedule:
+    """Fixed-rate schedule of ticks on a monotonic clock.
+
+    The caller waits delay() seconds, polls, then advances tick by one.
+
+    Attributes:
+        interval: Seconds between ticks.
+        tick: Index of the next tick.
+        skipped: Number of ticks skipped, as they had passed.
+    """
+
+    def __init__(self, interval: float):
+        """Creates an instance of Schedule.
+
+        Args:
+            interval: Seconds between ticks.
+
+        Raises:
+            ValueError: The interval is not positive.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.interval = interval
+        self.start = None
+        self.tick = 0
+        self.skipped = 0
+
+    def delay(self) -> float:
+        """Seconds until the next tick, skipping ticks that have passed.
+
+        Returns:
+            float: Seconds to wait, 0 if the tick is due.
+        """
+        now = monotonic()
+        if self.start is None:
+            self.start = now
+            return 0.0
+        due = self.start + self.tick * self.interval
+        if now < due:
+            return due - now
+        latest = int((now - self.start) // self.interval)
+        if latest > self.tick:
+            self.skipped += latest - self.tick
+            self.tick = latest
+        return 0.0
+
+
+class _Watch:
+    """State shared by Watch and AsyncWatch.
+
+    Attributes:
+        polls: Polls made, including failed ones.
+        failures: Polls that failed, if errors are collected.
+    """
+
+    def __init__(
+        self,
+        client,
+        interval: float,
+        metrics=("pmbus", "sensor"),
+        count=None,
+        budget=None,
+        errors=None,
+    ):
+        """Creates an instance of the iterator.
+
+        Args:
+            client: Client to poll.
+            interval: Seconds between polls.
+            metrics: List of metric(s) to query. default: all.
+            count: Stop after this many polls. default: None, never.
+            budget: Seconds allowed for each poll, see Client.get_metrics().
+                Set it to the interval so that polls never overrun a tick.
+                default: None.
+            errors: Optional list. When supplied, failed polls are appended
+                to it and skipped, along with decoding errors and missing
+                metrics, instead of raising. Entries accumulate for the life
+                of the iterator; a collections.deque(maxlen=n) keeps only
+                the latest n.
+        """
+        self.client = client
+        self.metrics = list(metrics)
+        self.count = count
+        self.budget = budget
+        self.errors = errors
+        self.polls = 0
+        self.failures = 0
+        self._schedule = Schedule(interval)
+
+    @property
+    def skipped(self) -> int:
+        """Ticks skipped because a poll overran them."""
+        return self._schedule.skipped
+
+    def _done(self) -> bool:
+        """Whether count polls have been made.
+
+        Returns:
+            bool: True if iteration is over.
+        """
+        return self.count is not None and self.polls >= self.count
+
+    def _failed(self, error: Exception):
+        """Record a failed poll.
+
+        Args:
+            error: Exception raised by the poll.
+
+        Raises:
+            Exception: The error, if errors are not collected.
+        """
+        if self.errors is None:
+            raise error
+        self.errors.append(error)
+        self.failures += 1
+
+
+class Watch(_Watch):
+    """Iterator of (timestamp, metrics) snapshots, polled at a fixed rate."""
+
+    def __iter__(self):
+        """Return the iterator itself.
+
+        Returns:
+            Watch: This iterator.
+        """
+        return self
+
+    def __next__(self) -> tuple:
+        """Wait for the next tick, and poll.
+
+        Returns:
+            tuple: (time.time() at the start of the poll, metrics).
+
+        Raises:
+            StopIteration: count polls have been made.
+        """
+        while not self._done():
+            delay = self._schedule.delay()
+            if delay:
+                sleep(delay)
+            self._schedule.tick += 1
+            self.polls += 1
+            timestamp = time()
+            try:
+                metrics = self.client.get_metrics(
+                    self.metrics, self.errors, budget=self.budget
+                )
+            except Exception as e:
+                self._failed(e)
+                continue
+            return timestamp, metrics
+        raise StopIteration
+
+
+class AsyncWatch(_Watch):
+    """Asynchronous iterator of (timestamp, metrics) snapshots.
+
+    Polls run in an executor, so that the event loop is never blocked.
+
+    Attributes:
+        executor: concurrent.futures.Executor running the polls, or None
+            for the event loop's default executor.
+    """
+
+    executor = None
+
+    def __aiter__(self):
+        """Return the iterator itself.
+
+        Returns:
+            AsyncWatch: This iterator.
+        """
+        return self
+
+    async def __anext__(self) -> tuple:
+        """Wait for the next tick, and poll.
+
+        Returns:
+            tuple: (time.time() at the start of the poll, metrics).
+
+        Raises:
+            StopAsyncIteration: count polls have been made.
+        """
+        import asyncio
+        from functools import partial
+
+        loop = asyncio.get_event_loop()
+        poll = partial(
+            self.client.get_metrics, self.metrics, self.errors, budget=self.budget
+        )
+        while not self._done():
+            delay = self._schedule.delay()
+            if delay:
+                await asyncio.sleep(delay)
+            self._schedule.tick += 1
+            self.polls += 1
+            timestamp = time()
+            try:
+                metrics = await loop.run_in_executor(self.executor, poll)
+            except Exception as e:
+                self._failed(e)
+                continue
+            return timestamp, metrics
+        raise StopAsyncIteration
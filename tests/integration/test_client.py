@@ -20,7 +20,7 @@ class TestClient:
     def setup(self):
         """Set-up for testing."""
         self.client = Client(SMBMC_SERVER, SMBMC_USER, SMBMC_PASS)
-        self.recorder = betamax.Betamax(self.client._session)
+        self.recorder = betamax.Betamax(self.client.transport.session)
 
     @staticmethod
     def generate_cassette_name(method_name):
@@ -41,8 +41,8 @@ class TestClient:
             self.client.login()
 
         assert self.client.initial_call is not None
-        assert "SID" in self.client._session.cookies.get_dict().keys()
-        assert self.client._session.cookies["SID"] is not None
+        assert "SID" in self.client.transport.session.cookies.get_dict().keys()
+        assert self.client.transport.session.cookies["SID"] is not None
 
     def test_get_sensor_metrics(self):
         """Test smbmc.Client.get_sensor_metrics()."""
@@ -85,7 +85,7 @@ class TestClient:
     def test_bad_auth(self):
         """Test invalid authentication."""
         self.client = Client(SMBMC_SERVER, "nonexistent_user", "nonexistent_password")
-        self.recorder = betamax.Betamax(self.client._session)
+        self.recorder = betamax.Betamax(self.client.transport.session)
 
         cassette_name = self.generate_cassette_name("bad_auth")
         with self.recorder.use_cassette(cassette_name):
@@ -0,0 +1,26 @@
+"""Integration tests for smbmc.fleet.Fleet class."""
+import os
+
+import betamax
+
+from smbmc.fleet import Fleet
+
+SMBMC_SERVER = os.environ.get("SMBMC_SERVER", "http://192.168.1.1")
+SMBMC_USER = os.environ.get("SMBMC_USER", "ipmi_user")
+SMBMC_PASS = os.environ.get("SMBMC_PASS", "ipmi_pass")
+
+
+def test_get_metrics():
+    """Test smbmc.fleet.LightClient.get_metrics()."""
+    fleet = Fleet(SMBMC_USER, SMBMC_PASS)
+    client = fleet.add(SMBMC_SERVER)
+    recorder = betamax.Betamax(fleet.session)
+
+    with recorder.use_cassette("Client_get_metrics"):
+        r = client.get_metrics()
+
+    assert client.sid is not None
+    assert len(r["pmbus"]) == 4
+    assert len(r["sensor"]) == 28
+    # the SID is held by the client, not the shared session
+    assert len(fleet.session.cookies) == 0
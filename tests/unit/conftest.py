@@ -0,0 +1,60 @@
+"""Unit test configuration."""
+import pytest
+
+from smbmc.ipmi_pmbus import process_pmbus_psu
+from smbmc.ipmi_pmbus import process_pmbus_response
+from smbmc.ipmi_sensor import process_sensor_response
+from smbmc.models import Sensor
+from smbmc.models import SensorStateEnum
+from smbmc.util import extract_xml_attr
+
+
+@pytest.fixture
+def metrics():
+    """Decoded snapshot built from the unit test XML responses.
+
+    Returns:
+        dict: Snapshot in the form returned by Client.get_metrics().
+    """
+    sensor_xml = open("tests/unit/ipmi_response_sensors.xml").read()
+    pmbus_xml = open("tests/unit/ipmi_response_pmbus.xml").read()
+    return {
+        "sensor": process_sensor_response(extract_xml_attr(sensor_xml, ".//SENSOR")),
+        "pmbus": process_pmbus_response(extract_xml_attr(pmbus_xml, ".//PSItem")),
+    }
+
+
+@pytest.fixture
+def partial_metrics():
+    """Snapshot of a power supply whose PSItem lacks most fields.
+
+    Returns:
+        dict: Snapshot holding power supply 1, with input_power and temp_1
+        only.
+    """
+    psu = process_pmbus_psu({"name": "PSU1", "acInPower": "54", "temp1": "28"})
+    psu.id = 1
+    return {"pmbus": [psu]}
+
+
+@pytest.fixture
+def make_sensor():
+    """Factory of threshold sensors with thresholds 10/20/30 - 70/80/90.
+
+    Returns:
+        callable: Taking (reading, name, state, flags), returning a Sensor.
+    """
+
+    def make_sensor(
+        reading, name="CPU Temp", state=SensorStateEnum.PRESENT, flags=None
+    ):
+        sensor = Sensor()
+        sensor.name = name
+        sensor.state = state
+        sensor.flags = flags
+        sensor.reading = reading
+        sensor.lnr, sensor.lc, sensor.lnc = 10, 20, 30
+        sensor.unc, sensor.uc, sensor.unr = 70, 80, 90
+        return sensor
+
+    return make_sensor
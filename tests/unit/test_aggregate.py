@@ -0,0 +1,110 @@
+"""Unit tests for the streaming aggregations."""
+import pytest
+
+from smbmc.aggregate import Ewma
+from smbmc.aggregate import Rate
+from smbmc.aggregate import RollingWindow
+from smbmc.aggregate import StreamAggregator
+
+
+def test_ewma():
+    """Ensure readings are weighted by the time elapsed."""
+    ewma = Ewma(halflife=10)
+    assert ewma.update(100, 0) == 100
+    assert ewma.update(0, 10) == pytest.approx(50)
+    assert ewma.update(0, 30) == pytest.approx(12.5)
+    assert ewma.update(1000, 30) == pytest.approx(12.5)
+
+
+def test_rate():
+    """Ensure the rate is per second since the previous reading."""
+    rate = Rate()
+    assert rate.update(1000, 0) is None
+    assert rate.update(1600, 60) == 10
+    assert rate.update(1600, 60) == 10
+    assert rate.update(1000, 120) == -10
+
+
+def test_rolling_window():
+    """Ensure readings leave the window once they are too old."""
+    window = RollingWindow(length=30)
+    assert window.min is window.max is window.mean is None
+
+    for timestamp, value in enumerate([5, 1, 4, 2, 8, 3]):
+        window.update(value, timestamp * 10)
+
+    # readings at t=30, 40 and 50 remain
+    assert len(window) == 3
+    assert window.min == 2
+    assert window.max == 8
+    assert window.mean == pytest.approx(13 / 3)
+
+    window.update(0, 100)
+    assert (len(window), window.min, window.max, window.mean) == (1, 0, 0, 0)
+
+
+def test_aggregator(metrics):
+    """Ensure sensors, power supplies and derived series are tracked."""
+    aggregator = StreamAggregator(halflife=60, window=600)
+    aggregator("a", metrics, 0)
+    aggregator.update("a", metrics, 30)
+
+    assert "System Temp" in aggregator.names("a")
+    assert "PS2 Status" not in aggregator.names("a")
+    assert aggregator.series("a", "System Temp").window.max == 25.0
+    assert aggregator.series("a", "System Temp").rate.rate == 0
+
+    psu = metrics["pmbus"][1]
+    efficiency = aggregator.series("a", "psu1.efficiency")
+    assert efficiency.last == psu.output_power / psu.input_power
+    assert aggregator.series("a", "psu0.efficiency") is None
+    total = sum(p.input_power for p in metrics["pmbus"])
+    assert aggregator.series("a", "power.input").last == total
+    assert aggregator.series("b", "power.input") is None
+
+
+def test_group_sums(metrics):
+    """Ensure group sums follow each host's latest readings."""
+    aggregator = StreamAggregator(groups={"a": "rack1", "b": "rack1", "c": "rack2"})
+    psu = metrics["pmbus"][1]
+    total = sum(p.input_power for p in metrics["pmbus"])
+
+    aggregator.update_many({"a": metrics, "b": metrics, "c": metrics}, 0)
+    assert aggregator.group_sum("rack1", "power.input") == 2 * total
+    assert aggregator.group_sum("rack2", "power.input") == total
+
+    psu.input_power += 100
+    aggregator.update("a", metrics, 10)
+    assert aggregator.group_sum("rack1", "power.input") == 2 * total + 100
+    assert aggregator.group_sum("rack3", "power.input") == 0
+
+    aggregator.update("d", {"pmbus": []}, 10)
+    assert aggregator.series("d", "power.input").last == 0
+
+
+def test_group_sums_missing_series(metrics):
+    """Ensure series missing from a snapshot leave the group sums."""
+    aggregator = StreamAggregator(groups={"a": "rack1", "b": "rack1"})
+    total = sum(p.input_power for p in metrics["pmbus"])
+    temp = metrics["sensor"].get("System Temp").reading
+
+    aggregator.update_many({"a": metrics, "b": metrics}, 0)
+    assert aggregator.group_sum("rack1", "System Temp") == 2 * temp
+
+    aggregator.update_many({"a": {"pmbus": metrics["pmbus"]}, "b": None}, 10)
+    assert aggregator.group_sum("rack1", "System Temp") == temp
+    assert aggregator.group_sum("rack1", "power.input") == 2 * total
+    assert aggregator.series("a", "System Temp").last == temp
+
+    aggregator.update("a", metrics, 20)
+    assert aggregator.group_sum("rack1", "System Temp") == 2 * temp
+
+
+def test_partial_power_supplies(partial_metrics):
+    """Ensure power supply fields missing from a PSItem are skipped."""
+    aggregator = StreamAggregator()
+    aggregator.update("a", partial_metrics, 10)
+
+    assert aggregator.series("a", "psu1.temp_1").last == 40
+    assert aggregator.series("a", "psu1.efficiency") is None
+    assert aggregator.series("a", "power.input").last == 0
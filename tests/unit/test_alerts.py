@@ -0,0 +1,200 @@
+"""Unit tests for the alert engine."""
+import pytest
+
+from smbmc.alerts import AlertEngine
+from smbmc.alerts import SeverityEnum
+from smbmc.ipmi_sensor import process_sensor
+from smbmc.models import PowerSupplyFlag
+from smbmc.models import Sensor
+from smbmc.models import SensorStateEnum
+from smbmc.models import SensorTypeEnum
+
+try:
+    import numpy  # noqa: F401
+except ImportError:  # pragma: no cover
+    numpy = None
+
+BACKENDS = [
+    pytest.param(
+        True, marks=pytest.mark.skipif(numpy is None, reason="requires numpy")
+    ),
+    False,
+]
+
+
+def transitions(alerts):
+    """Summarise alerts.
+
+    Args:
+        alerts: Alerts to summarise.
+
+    Returns:
+        list: (host, name, previous, severity) tuples.
+    """
+    return [(a.host, a.name, a.previous, a.severity) for a in alerts]
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+@pytest.mark.parametrize(
+    "reading,expected_severity",
+    [
+        (50, SeverityEnum.OK),
+        (75, SeverityEnum.NON_CRITICAL),
+        (25, SeverityEnum.NON_CRITICAL),
+        (85, SeverityEnum.CRITICAL),
+        (15, SeverityEnum.CRITICAL),
+        (95, SeverityEnum.NON_RECOVERABLE),
+        (5, SeverityEnum.NON_RECOVERABLE),
+    ],
+)
+def test_severity(use_numpy, make_sensor, reading, expected_severity):
+    """Ensure readings are graded against every threshold.
+
+    Args:
+        use_numpy: Whether to use the NumPy backend.
+        make_sensor: Sensor factory.
+        reading: Sensor reading.
+        expected_severity: Expected severity.
+    """
+    engine = AlertEngine(use_numpy=use_numpy)
+    alerts = engine.evaluate({"host": [make_sensor(reading)]}, 1)
+
+    assert engine.severity("host", "CPU Temp") is expected_severity
+    assert len(alerts) == (0 if expected_severity is SeverityEnum.OK else 1)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_only_transitions_reported(use_numpy, make_sensor):
+    """Ensure a persisting severity is reported once."""
+    engine = AlertEngine(use_numpy=use_numpy)
+    snapshot = {"a": [make_sensor(50, "ok"), make_sensor(85, "hot")]}
+
+    assert transitions(engine.evaluate(snapshot)) == [
+        ("a", "hot", SeverityEnum.OK, SeverityEnum.CRITICAL)
+    ]
+    assert engine.evaluate(snapshot) == []
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_hysteresis(use_numpy, make_sensor):
+    """Ensure recovery requires clearing the threshold by the margin."""
+    engine = AlertEngine(hysteresis=2, use_numpy=use_numpy)
+
+    engine.evaluate({"a": [make_sensor(72)]})
+    assert engine.severity("a", "CPU Temp") is SeverityEnum.NON_CRITICAL
+
+    assert engine.evaluate({"a": [make_sensor(69)]}) == []
+    assert engine.severity("a", "CPU Temp") is SeverityEnum.NON_CRITICAL
+
+    assert transitions(engine.evaluate({"a": [make_sensor(67)]})) == [
+        ("a", "CPU Temp", SeverityEnum.NON_CRITICAL, SeverityEnum.OK)
+    ]
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_debounce(use_numpy, make_sensor):
+    """Ensure a new severity must persist before being reported."""
+    engine = AlertEngine(debounce=3, use_numpy=use_numpy)
+
+    for reading in (85, 85, 50, 85, 85):
+        assert engine.evaluate({"a": [make_sensor(reading)]}) == []
+
+    alerts = engine.evaluate({"a": [make_sensor(86)]}, 42)
+    assert transitions(alerts) == [
+        ("a", "CPU Temp", SeverityEnum.OK, SeverityEnum.CRITICAL)
+    ]
+    assert alerts[0].reading == 86
+    assert alerts[0].timestamp == 42
+    assert "OK -> CRITICAL" in repr(alerts[0])
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_power_supply_flags(use_numpy, metrics):
+    """Ensure power supply failure bits raise alerts."""
+    engine = AlertEngine(use_numpy=use_numpy)
+    assert engine.evaluate({"a": metrics}) == []
+
+    psu = Sensor()
+    psu.name = "PS1 Status"
+    psu.type = SensorTypeEnum.POWER_SUPPLY
+    psu.state = SensorStateEnum.PRESENT
+    psu.flags = PowerSupplyFlag.PRESENCE_DETECTED | PowerSupplyFlag.SOURCE_INPUT_LOST
+
+    alerts = engine.evaluate({"a": [psu]})
+    assert transitions(alerts) == [
+        ("a", "PS1 Status", SeverityEnum.OK, SeverityEnum.CRITICAL)
+    ]
+    assert alerts[0].reading == psu.flags
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_power_supply_presence(use_numpy):
+    """Ensure generic power supply states are not graded as failures."""
+    engine = AlertEngine(use_numpy=use_numpy)
+    item = {
+        "NUMBER": "5",
+        "NAME": "PS1 Presence",
+        "STYPE": "08",
+        "ERTYPE": "08",
+        "READING": "000200",
+        "OPTION": "c0",
+    }
+    item.update(dict.fromkeys(("UNIT1", "UNIT", "M", "B", "RB"), "00"))
+    item.update(dict.fromkeys(("L_NR", "L_C", "L_NC", "H_NC", "H_C", "H_NR"), "00"))
+    presence = process_sensor(item)
+    assert presence.type == SensorTypeEnum.POWER_SUPPLY
+
+    assert engine.evaluate({"a": [presence]}) == []
+    assert engine.severity("a", "PS1 Presence") is SeverityEnum.OK
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+@pytest.mark.parametrize(
+    "thresholds,reading,expected_severity",
+    [
+        # fan with lower thresholds only
+        ((300, 500, 700, 0, 0, 0), 3000, SeverityEnum.OK),
+        ((300, 500, 700, 0, 0, 0), 400, SeverityEnum.CRITICAL),
+        # temperature with upper thresholds only
+        ((0, 0, 0, 70, 80, 90), 25, SeverityEnum.OK),
+        ((0, 0, 0, 70, 80, 90), 95, SeverityEnum.NON_RECOVERABLE),
+        # no thresholds at all
+        ((0, 0, 0, 0, 0, 0), 1000, SeverityEnum.OK),
+    ],
+)
+def test_one_sided_thresholds(
+    use_numpy, make_sensor, thresholds, reading, expected_severity
+):
+    """Ensure thresholds left at 0 are not compared.
+
+    Args:
+        use_numpy: Whether to use the NumPy backend.
+        make_sensor: Sensor factory.
+        thresholds: lnr, lc, lnc, unc, uc, unr.
+        reading: Sensor reading.
+        expected_severity: Expected severity.
+    """
+    engine = AlertEngine(hysteresis=1, use_numpy=use_numpy)
+    sensor = make_sensor(reading)
+    sensor.lnr, sensor.lc, sensor.lnc, sensor.unc, sensor.uc, sensor.unr = thresholds
+
+    engine.evaluate({"host": [sensor]})
+    assert engine.severity("host", "CPU Temp") is expected_severity
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_evaluate_arrays(use_numpy):
+    """Ensure columnar readings can be evaluated directly."""
+    engine = AlertEngine(use_numpy=use_numpy)
+    indexes = [engine.index(f"host{i}", "CPU Temp") for i in range(1000)]
+    readings = [50.0] * 1000
+    readings[500] = 95.0
+    thresholds = tuple([value] * 1000 for value in (10, 20, 30, 70, 80, 90))
+
+    alerts = engine.evaluate_arrays(indexes, readings, thresholds)
+
+    assert transitions(alerts) == [
+        ("host500", "CPU Temp", SeverityEnum.OK, SeverityEnum.NON_RECOVERABLE)
+    ]
+    assert engine.evaluate_arrays([], [], thresholds) == []
+    assert engine.severity("unknown", "CPU Temp") is SeverityEnum.OK
@@ -0,0 +1,162 @@
+"""Unit tests for the binary sensor log."""
+import json
+
+import pytest
+
+from smbmc import archive
+from smbmc.archive import KIND_POWER_SUPPLY
+from smbmc.archive import KIND_SENSOR
+from smbmc.archive import RECORD
+from smbmc.archive import SensorLogReader
+from smbmc.archive import SensorLogWriter
+
+
+def test_round_trip(tmp_path, metrics):
+    """Ensure records read back match what was written."""
+    path = tmp_path / "sensors.log"
+    with SensorLogWriter(path, batch_size=7) as writer:
+        writer.write_metrics("host-a", metrics, 1000.0)
+
+    with SensorLogReader(path) as reader:
+        records = list(reader)
+
+    assert len(records) == 28 + 4
+    first = records[0]
+    assert reader.name(first[1]) == "host-a"
+    assert reader.name(first[2]) == "System Temp"
+    assert first[3] == KIND_SENSOR
+    assert first[8] == metrics["sensor"][0].reading
+
+    psu = records[28 + 1]
+    assert psu[3] == KIND_POWER_SUPPLY
+    assert reader.name(psu[2]) == "PSU0SERIAL0NO00"
+    assert psu[5] == 1
+    assert psu[8:11] == (239.0, pytest.approx(0.359), 84.0)
+
+
+def test_range_scan(tmp_path, metrics, monkeypatch):
+    """Ensure range scans honour the requested window across appends."""
+    monkeypatch.setattr(archive, "CHUNK_RECORDS", 5)
+    path = tmp_path / "sensors.log"
+    for timestamp in range(10):
+        with SensorLogWriter(path, index_interval=16) as writer:
+            writer.write_sensors("host-a", metrics["sensor"], timestamp)
+
+    with SensorLogReader(path) as reader:
+        assert len(reader) == 280
+        timestamps = [record[0] for record in reader.range(3, 5)]
+
+    assert len(timestamps) == 3 * 28
+    assert set(timestamps) == {3.0, 4.0, 5.0}
+
+
+def test_truncated_record_discarded(tmp_path, metrics):
+    """Ensure a partial trailing record is dropped when reopening."""
+    path = tmp_path / "sensors.log"
+    with SensorLogWriter(path) as writer:
+        writer.write_sensors("host-a", metrics["sensor"], 1)
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 10)
+
+    with SensorLogWriter(path, fsync=True) as writer:
+        writer.write_sensors("host-a", metrics["sensor"], 2)
+
+    with SensorLogReader(path) as reader:
+        assert len(reader) == 56
+        assert list(reader)[-1][0] == 2.0
+
+
+def test_rejects_out_of_order(tmp_path, metrics):
+    """Ensure records must be appended in chronological order."""
+    with SensorLogWriter(tmp_path / "sensors.log") as writer:
+        writer.write_sensors("host-a", metrics["sensor"], 2)
+        with pytest.raises(ValueError, match="older"):
+            writer.write_sensors("host-a", metrics["sensor"], 1)
+
+    with SensorLogWriter(tmp_path / "sensors.log") as writer:
+        with pytest.raises(ValueError, match="older"):
+            writer.write_sensors("host-a", metrics["sensor"], 1)
+
+
+def test_close_while_iterating(tmp_path, metrics, monkeypatch):
+    """Ensure a reader closes while an iterator is suspended."""
+    monkeypatch.setattr(archive, "CHUNK_RECORDS", 16)
+    path = tmp_path / "sensors.log"
+    with SensorLogWriter(path) as writer:
+        writer.write_sensors("host-a", metrics["sensor"], 1)
+
+    reader = SensorLogReader(path)
+    records = iter(reader)
+    assert next(records)[0] == 1.0
+    reader.close()
+    with pytest.raises(ValueError):
+        list(records)
+
+
+def test_wide_ids(tmp_path, metrics):
+    """Ensure name ids beyond 16 bits are stored."""
+    path = tmp_path / "sensors.log"
+    with SensorLogWriter(path) as writer:
+        writer._names.update((f"name-{i}", i) for i in range(70000))
+        writer.write_sensors("host-a", metrics["sensor"][:1], 1)
+
+    with SensorLogReader(path) as reader:
+        (record,) = reader
+    assert record[1:3] == (70000, 70001)
+
+
+@pytest.mark.parametrize(
+    "content, message",
+    [
+        (b"definitely not a sensor log", "bad magic"),
+        (b"SMBMCLOG", "truncated header"),
+        (archive.HEADER.pack(archive.MAGIC, 1, RECORD.size), "version 1"),
+    ],
+)
+def test_rejects_foreign_file(tmp_path, content, message):
+    """Ensure files in other formats are not appended to."""
+    path = tmp_path / "sensors.log"
+    path.write_bytes(content)
+
+    with pytest.raises(ValueError, match=message):
+        SensorLogWriter(path)
+
+
+def test_partial_snapshots(tmp_path, metrics):
+    """Ensure snapshots holding a single metric are appended."""
+    path = tmp_path / "sensors.log"
+    writer = SensorLogWriter(path)
+    writer.write_metrics("host-a", {"sensor": metrics["sensor"]}, 1)
+    writer.write_metrics("host-a", {"pmbus": metrics["pmbus"]}, 2)
+    writer.close()
+    writer.close()
+
+    with SensorLogReader(path) as reader:
+        kinds = [record[3] for record in reader.range(2)]
+        assert len(reader) == 28 + 4
+    assert kinds == [KIND_POWER_SUPPLY] * 4
+
+
+def test_index_beyond_truncated_log(tmp_path, metrics):
+    """Ensure index entries past the last whole record are ignored."""
+    path = tmp_path / "sensors.log"
+    with SensorLogWriter(path, index_interval=1) as writer:
+        for timestamp in range(4):
+            writer.write_sensors("host-a", metrics["sensor"], timestamp)
+    with open(path, "r+b") as f:
+        f.truncate(archive.HEADER.size + 2 * 28 * RECORD.size)
+
+    with SensorLogReader(path) as reader:
+        assert len(reader) == 2 * 28
+        assert {record[0] for record in reader.range(1)} == {1.0}
+
+
+def test_smaller_than_json(tmp_path, metrics):
+    """Ensure the log is far smaller than the equivalent JSON."""
+    path = tmp_path / "sensors.log"
+    with SensorLogWriter(path) as writer:
+        writer.write_sensors("host-a", metrics["sensor"], 1)
+
+    as_json = json.dumps([vars(sensor) for sensor in metrics["sensor"]])
+    assert path.stat().st_size < len(as_json) / 2
+    assert RECORD.size == 64
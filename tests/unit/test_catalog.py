@@ -0,0 +1,139 @@
+"""Unit tests for the sensor catalog."""
+import pytest
+
+from smbmc.catalog import Catalog
+from smbmc.fleet import Fleet
+from smbmc.ipmi_sensor import process_sensor_response
+from smbmc.transport import FakeTransport
+from smbmc.util import extract_xml_attr
+
+SENSOR_XML = open("tests/unit/ipmi_response_sensors.xml").read()
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+
+
+@pytest.fixture
+def sensor_list():
+    """Sensors of the unit test response.
+
+    Returns:
+        list: Sensor attributes.
+    """
+    return extract_xml_attr(SENSOR_XML, ".//SENSOR")
+
+
+def test_matches_process_sensor_response(sensor_list):
+    """Ensure sensors decoded through the catalog are identical."""
+    catalog = Catalog()
+    expected = [vars(sensor) for sensor in process_sensor_response(sensor_list)]
+
+    for _ in range(2):
+        sensors = catalog.process_sensor_response(sensor_list)
+        assert [vars(sensor) for sensor in sensors] == expected
+    assert sensors.get("System Temp").reading == 25.0
+
+
+def test_shared_between_hosts(sensor_list):
+    """Ensure identical boards share specs, and only readings differ."""
+    catalog = Catalog()
+    other = [dict(item) for item in sensor_list]
+    other[0]["READING"] = "1ac000"
+    other[27]["OPTION"] = "00"
+
+    a = catalog.decode(sensor_list)
+    b = catalog.decode(other)
+
+    assert len(catalog) == 28
+    assert catalog.boards == 1
+    assert a.board is b.board
+    assert a.get("System Temp") == 25.0
+    assert b.get("System Temp") == 26.0
+    assert a.get("PS2 Status") == 1
+    assert b.get("PS2 Status", "absent") == "absent"
+    assert b.sensors().get("PS2 Status").flags is None
+
+    other[0]["UNR"] = "5b"
+    c = catalog.decode(other)
+    assert len(catalog) == 29
+    assert catalog.boards == 2
+    assert c.board.specs[1] is a.board.specs[1]
+    assert c.sensors()[0].unr == 91.0
+
+
+def test_tolerant(sensor_list):
+    """Ensure failures are reported as process_sensor_response() does."""
+    catalog = Catalog()
+    sensor_list[1] = dict(sensor_list[1], L="02")
+    sensor_list[2] = {"NAME": "Mangled"}
+    sensor_list[3] = dict(sensor_list[3], READING="zz")
+
+    expected_errors = []
+    expected = process_sensor_response(sensor_list, expected_errors)
+
+    for _ in range(2):
+        with pytest.raises(NotImplementedError):
+            catalog.decode(sensor_list)
+
+        errors = []
+        sensors = catalog.process_sensor_response(sensor_list, errors)
+        assert [vars(sensor) for sensor in sensors] == [
+            vars(sensor) for sensor in expected
+        ]
+        assert [(e.id, e.name, type(e.cause)) for e in errors] == [
+            (e.id, e.name, type(e.cause)) for e in expected_errors
+        ]
+
+
+@pytest.mark.parametrize("m", ["100", "000100"])
+def test_unusual_field_widths(sensor_list, m):
+    """Ensure odd or wide M/B/RB fields convert as process_sensor() does."""
+    sensor_list[0] = dict(sensor_list[0], M=m)
+    expected = [vars(sensor) for sensor in process_sensor_response(sensor_list)]
+
+    sensors = Catalog().process_sensor_response(sensor_list)
+
+    assert [vars(sensor) for sensor in sensors] == expected
+    assert sensors.get("System Temp").reading == 25.0
+
+
+def test_strict_reading(sensor_list):
+    """Ensure a mangled reading raises when no errors list is supplied."""
+    catalog = Catalog()
+    host = catalog.decode(sensor_list)
+    sensor_list[0] = dict(sensor_list[0], READING="zzc000")
+
+    with pytest.raises(ValueError):
+        catalog.decode(sensor_list)
+    assert len(host.board) == 28
+
+
+def test_save_load(sensor_list, tmp_path):
+    """Ensure a saved catalog loads warm."""
+    catalog = Catalog()
+    catalog.decode(sensor_list)
+    broken = sensor_list + [{"NAME": "Mangled"}]
+    catalog.decode(broken, [])
+    catalog.save(tmp_path / "catalog.json")
+
+    loaded = Catalog.load(tmp_path / "catalog.json")
+
+    assert len(loaded) == len(catalog) == 28
+    assert loaded.boards == 2
+    host = loaded.decode(sensor_list)
+    assert loaded.boards == 2
+    assert host.get("System Temp") == 25.0
+    assert len(loaded.decode(broken, []).sensors()) == 28
+
+
+def test_fleet():
+    """Ensure a fleet decodes through its catalog."""
+    catalog = Catalog()
+    session = FakeTransport.from_cassette(CASSETTE)
+    fleet = Fleet("user", "pass", session=session, catalog=catalog)
+    fleet.add("http://a")
+    fleet.add("http://b")
+
+    for client in fleet:
+        assert len(client.get_sensor_metrics()) == 28
+
+    assert len(catalog) == 28
+    assert catalog.boards == 1
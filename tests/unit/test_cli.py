@@ -0,0 +1,195 @@
+"""Unit tests for the command-line interface."""
+import json
+import subprocess  # nosec
+import sys
+
+import pytest
+
+from smbmc import AuthenticationError
+from smbmc import cli
+from smbmc import ProbeResult
+from smbmc.fleet import LightClient
+
+
+@pytest.fixture
+def fake_get_metrics(monkeypatch, metrics):
+    """Replace LightClient.get_metrics with one returning the test snapshot.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+        metrics: Decoded snapshot fixture.
+
+    Returns:
+        list: Servers polled, in call order.
+    """
+    polled = []
+
+    def get_metrics(self, metrics_list, errors=None, deadline=None):
+        polled.append(self.server)
+        if "fail" in self.server:
+            raise Exception("unreachable")
+        if "slow" in self.server and deadline is not None:
+            return {name: None for name in metrics_list}
+        return {name: metrics[name] for name in metrics_list}
+
+    monkeypatch.setattr(LightClient, "get_metrics", get_metrics)
+    return polled
+
+
+def test_parse_inventory():
+    """Ensure inventory lines fall back to the default credentials."""
+    lines = [
+        "# comment",
+        "",
+        "10.0.0.1",
+        "https://10.0.0.2 admin",
+        "10.0.0.3 admin secret",
+    ]
+    assert cli.parse_inventory(lines, "user", "pass") == [
+        ("http://10.0.0.1", "user", "pass"),
+        ("https://10.0.0.2", "admin", "pass"),
+        ("http://10.0.0.3", "admin", "secret"),
+    ]
+    with pytest.raises(ValueError):
+        cli.parse_inventory(["a b c d"])
+
+
+def test_dump_json(fake_get_metrics, capsys, tmp_path):
+    """Ensure one JSON document is written per host."""
+    inventory = tmp_path / "inventory"
+    inventory.write_text("b admin\nc\n")
+
+    assert cli.main(["dump", "a", "-i", str(inventory), "-m", "sensor"]) == 0
+
+    documents = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted(d["host"] for d in documents) == [
+        "http://a",
+        "http://b",
+        "http://c",
+    ]
+    assert list(documents[0]["metrics"]) == ["sensor"]
+    assert documents[0]["metrics"]["sensor"][0]["name"] == "System Temp"
+    assert documents[0]["metrics"]["sensor"][0]["reading"] == 25.0
+
+
+def test_dump_pmbus_json(fake_get_metrics, capsys):
+    """Ensure power supplies are written as serialized by smbmc.serialize."""
+    assert cli.main(["dump", "a", "-m", "pmbus"]) == 0
+
+    (document,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(document["metrics"]["pmbus"]) == 4
+    assert document["metrics"]["pmbus"][1]["input_power"] == 84
+
+
+def test_dump_errors(fake_get_metrics, capsys):
+    """Ensure failing hosts are reported without stopping the others."""
+    assert cli.main(["dump", "ok", "fail", "-f", "ndjson"]) == 1
+
+    captured = capsys.readouterr()
+    assert captured.err == "smbmc: http://fail: unreachable\n"
+    assert len(captured.out.splitlines()) == 28 + 4 * 10
+
+
+def test_dump_budget(fake_get_metrics, capsys):
+    """Ensure hosts fetching nothing within the budget are reported."""
+    assert cli.main(["dump", "ok", "slow", "-b", "0.5", "-m", "sensor"]) == 1
+
+    captured = capsys.readouterr()
+    assert captured.err == "smbmc: http://slow: no metrics within budget\n"
+    documents = [json.loads(line) for line in captured.out.splitlines()]
+    assert {d["host"]: d["metrics"]["sensor"] is None for d in documents} == {
+        "http://ok": False,
+        "http://slow": True,
+    }
+
+
+@pytest.mark.parametrize(
+    "error, status, message",
+    [
+        (AuthenticationError("Authentication Error"), 1, "Authentication Error"),
+        (FileNotFoundError("hosts.txt"), 2, "hosts.txt"),
+        (KeyboardInterrupt(), 130, None),
+    ],
+)
+def test_run_errors(monkeypatch, capsys, error, status, message):
+    """Ensure errors are reported with a non-zero status."""
+
+    def run(args):
+        raise error
+
+    monkeypatch.setattr(cli, "run", run)
+    assert cli.main(["dump", "a"]) == status
+    assert capsys.readouterr().err == (f"smbmc: {message}\n" if message else "")
+
+
+def test_main_module(monkeypatch, capsys):
+    """Ensure python -m smbmc exits with the status of main()."""
+    import runpy
+
+    monkeypatch.setattr(sys, "argv", ["smbmc", "dump"])
+    with pytest.raises(SystemExit) as exit_info:
+        runpy.run_module("smbmc", run_name="__main__")
+    assert exit_info.value.code == 2
+    assert "no hosts" in capsys.readouterr().err
+
+
+def test_dump_no_hosts(capsys):
+    """Ensure a missing host list is an error."""
+    assert cli.main(["dump"]) == 2
+    assert "no hosts" in capsys.readouterr().err
+
+
+def test_watch(fake_get_metrics, capsys):
+    """Ensure watch polls every host the requested number of times."""
+    args = ["watch", "a", "b", "-n", "0.01", "-c", "3", "-f", "influx"]
+    assert cli.main(args) == 0
+
+    assert sorted(fake_get_metrics) == ["http://a"] * 3 + ["http://b"] * 3
+    assert len(capsys.readouterr().out.splitlines()) == 6 * (28 + 4)
+
+
+def test_probe(monkeypatch, capsys):
+    """Ensure probe writes one document per host and fails if any is down."""
+
+    def probe(self, timeout=None, login=False):
+        result = ProbeResult(self.server)
+        result.reachable = "down" not in self.server
+        result.session_valid = login and result.reachable
+        result.rtt = 0.01 if result.reachable else None
+        if not result.reachable:
+            result.error = ConnectionError("refused")
+        return result
+
+    monkeypatch.setattr(LightClient, "probe", probe)
+
+    assert cli.main(["probe", "a", "down", "--login"]) == 1
+    documents = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert documents == [
+        {
+            "host": "http://a",
+            "reachable": True,
+            "session_valid": True,
+            "rtt": 0.01,
+            "info": None,
+            "error": None,
+        },
+        {
+            "host": "http://down",
+            "reachable": False,
+            "session_valid": False,
+            "rtt": None,
+            "info": None,
+            "error": "refused",
+        },
+    ]
+    assert cli.main(["probe", "a"]) == 0
+
+
+def test_help_is_lightweight():
+    """Ensure parsing arguments does not import the HTTP stack."""
+    code = (
+        "import sys; from smbmc import cli; cli.build_parser(); "
+        "print('requests' in sys.modules)"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code])  # nosec
+    assert output.strip() == b"False"
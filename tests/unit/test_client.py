@@ -1,7 +1,23 @@
 """Unit tests for smbmc.Client class."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import monotonic
+from time import sleep
+
 import pytest
+from requests.exceptions import ReadTimeout
+from urllib3.exceptions import ConnectTimeoutError
 
+from smbmc import AuthenticationError
 from smbmc import Client
+from smbmc import MissingMetric
+from smbmc.client import _is_late
+from smbmc.client import _probe_info
+from smbmc.fleet import Fleet
+from smbmc.transport import FakeTransport
+from smbmc.transport import Response
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
 
 # TODO stub out request call
 client = Client("", "", "")
@@ -17,3 +33,199 @@ def test_invalid_metrics():
     """Check for invalid metrics."""
     with pytest.raises(Exception, match="invalid metric"):
         assert client.get_metrics([None, 1, "magic_school_bus"])
+
+
+class StallingTransport(FakeTransport):
+    """Fake transport on which PMBus requests to some hosts stall."""
+
+    def __init__(self, stalled=("http://bmc",), **kwargs):
+        """Creates a transport answering from the test cassette.
+
+        Args:
+            stalled: Servers whose PMBus requests stall.
+            **kwargs: Passed to FakeTransport().
+        """
+        super().__init__(FakeTransport.from_cassette(CASSETTE).responses, **kwargs)
+        self.stalled = stalled
+        self.timeouts = []
+
+    def post(self, url, data=None, cookies=None, timeout=None):
+        """Answer a request, stalling until the timeout if stalled.
+
+        Args:
+            url: Request URL.
+            data: Form data.
+            cookies: Request cookies.
+            timeout: Request timeout.
+
+        Returns:
+            Response: Response body and cookies.
+
+        Raises:
+            TimeoutError: The request stalled.
+        """
+        self.timeouts.append(timeout)
+        if url.split("/cgi/")[0] in self.stalled and "Get_PSInfoReadings.XML" in (
+            data or {}
+        ):
+            sleep(timeout)
+            raise TimeoutError("read timed out")
+        return super().post(url, data, cookies, timeout)
+
+
+def test_budget():
+    """Ensure metrics not fetched within the budget are marked missing."""
+    transport = StallingTransport()
+    client = Client("http://bmc", "user", "pass", transport=transport)
+    errors = []
+
+    start = monotonic()
+    result = client.get_metrics(["sensor", "pmbus"], errors, budget=0.2)
+
+    assert monotonic() - start < 0.5
+    assert len(result["sensor"]) == 28
+    assert result["pmbus"] is None
+    assert [type(e) for e in errors] == [MissingMetric]
+    assert errors[0].metric == "pmbus"
+    assert isinstance(errors[0].cause, TimeoutError)
+    assert all(0 < timeout <= 0.2 for timeout in transport.timeouts)
+
+    result = client.get_metrics(["pmbus", "sensor"], budget=0.1)
+    assert result == {"pmbus": None, "sensor": None}
+
+
+def test_budget_errors():
+    """Ensure failures other than timeouts still raise."""
+    client = Client("http://bmc", "user", "pass", transport=FakeTransport())
+
+    with pytest.raises(Exception, match="no response"):
+        client.get_metrics(budget=10)
+
+
+@pytest.mark.parametrize("workers", [0, 4])
+def test_fleet_budget(workers):
+    """Ensure a fleet poll returns within its budget.
+
+    Args:
+        workers: Threads polling the hosts, or 0 to poll serially.
+    """
+    transport = StallingTransport(stalled=("http://b",))
+    fleet = Fleet("user", "pass", timeout=5, session=transport)
+    for server in ("http://a", "http://b", "http://c"):
+        fleet.add(server)
+    executor = ThreadPoolExecutor(workers) if workers else None
+    errors = {}
+
+    start = monotonic()
+    results = fleet.get_metrics(budget=0.3, executor=executor, errors=errors)
+
+    assert monotonic() - start < 0.6
+    assert len(results["http://a"]["pmbus"]) == 4
+    if workers:
+        # the stalled host finishes at the deadline, or is abandoned
+        assert results["http://b"] in (None, {"pmbus": None, "sensor": None})
+        assert errors["http://b"]
+        assert len(results["http://c"]["sensor"]) == 28
+        assert errors["http://c"] == []
+        executor.shutdown()
+    else:
+        assert results["http://b"] == {"pmbus": None, "sensor": None}
+        assert [e.metric for e in errors["http://b"]] == ["pmbus", "sensor"]
+        assert results["http://c"] == {"pmbus": None, "sensor": None}
+
+
+GENERIC_XML = (
+    '<?xml version="1.0"?><IPMI><GENERIC_INFO>'
+    '<GENERIC IPMIFW_TAG="BL_SUPERMICRO" IPMIFW_VERSION="0325"/>'
+    "</GENERIC_INFO></IPMI>"
+)
+
+
+class SessionTransport(FakeTransport):
+    """Fake transport answering with the login page without a valid SID."""
+
+    def post(self, url, data=None, cookies=None, timeout=None):
+        """Answer a request, as the BMC would without a valid session.
+
+        Args:
+            url: Request URL.
+            data: Form data.
+            cookies: Request cookies.
+            timeout: Request timeout.
+
+        Returns:
+            Response: Response body and cookies.
+        """
+        sid = dict(self.cookies, **(cookies or {})).get("SID")
+        if url.endswith("/cgi/ipmi.cgi") and sid != self.sid:
+            self.requests.append((url, data, sid))
+            return Response("<html><body>login</body></html>")
+        return super().post(url, data, cookies, timeout)
+
+
+def test_probe():
+    """Ensure probes check the session without logging in by default."""
+    transport = SessionTransport(username="user", password="pass")
+    transport.add({"GENERIC_INFO.XML": "(0,0)"}, GENERIC_XML)
+    client = Client("http://bmc", "user", "pass", transport=transport)
+
+    result = client.probe()
+    assert (result.reachable, result.session_valid) == (True, False)
+    assert client.firmware is None
+    assert result.rtt > 0
+    assert result.info is None and result.error is None
+    assert len(transport.requests) == 1
+
+    result = client.probe(login=True)
+    assert (result.reachable, result.session_valid) == (True, True)
+    assert result.info["IPMIFW_VERSION"] == "0325"
+    assert client.firmware == "0325"
+    assert [url.rsplit("/", 1)[1] for url, _, _ in transport.requests] == [
+        "ipmi.cgi",
+        "ipmi.cgi",
+        "login.cgi",
+        "ipmi.cgi",
+    ]
+    assert client.probe().session_valid
+
+    # the BMC expires the session
+    transport.sid = "renewed"
+    assert not client.probe().session_valid
+    assert client.initial_call == datetime(1970, 1, 1)
+
+    transport = SessionTransport(username="user", password="pass")
+    client = Client("http://bmc", "user", "wrong", transport=transport)
+    result = client.probe(login=True)
+    assert (result.reachable, result.session_valid) == (True, False)
+    assert isinstance(result.error, AuthenticationError)
+    assert str(result.error) == "Authentication Error"
+
+
+def test_probe_info():
+    """Ensure only IPMI documents yield attributes."""
+    assert _probe_info(GENERIC_XML)["IPMIFW_VERSION"] == "0325"
+    assert _probe_info('<?xml version="1.0"?> <IPMI><GENERIC/></IPMI>') == {}
+    assert _probe_info("<html><body>login</body></html>") is None
+    assert _probe_info("<html>") is None
+
+
+def test_probe_unreachable():
+    """Ensure failed requests are reported rather than raised."""
+    transport = StallingTransport(stalled=())
+    client = Client("http://bmc", "user", "pass", transport=transport)
+
+    result = client.probe(timeout=0.5)
+    assert (result.reachable, result.session_valid) == (False, False)
+    assert result.rtt is None
+    assert "no response" in str(result.error)
+    assert 0 < transport.timeouts[0] <= 0.5
+
+
+def test_late_errors():
+    """Ensure only timeouts count as late, even past the deadline."""
+    past = monotonic() - 1
+    assert _is_late(TimeoutError(), past)
+    assert _is_late(ReadTimeout(), past)
+    assert _is_late(ConnectTimeoutError(), monotonic() + 10)
+    assert not _is_late(Exception("Authentication Error"), past)
+    assert not _is_late(TimeoutError(), None)
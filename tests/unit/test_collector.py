@@ -0,0 +1,223 @@
+"""Unit tests for the multi-process collector."""
+import math
+import sys
+from queue import Queue
+
+import pytest
+
+from smbmc.archive import KIND_POWER_SUPPLY
+from smbmc.collector import _layout
+from smbmc.collector import _shared_memory
+from smbmc.collector import _Writer
+from smbmc.collector import Collector
+from smbmc.replay import CassetteSessionFactory
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+
+# multiprocessing.shared_memory, as Collector.start() requires
+requires_shared_memory = pytest.mark.skipif(
+    sys.version_info < (3, 8), reason="requires Python 3.8"
+)
+
+
+@requires_shared_memory
+def test_writer(metrics):
+    """Ensure snapshots are written as columns."""
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(create=True, size=2 * _layout(64)[None])
+    names = {}
+    new_names = []
+    writer = _Writer(shm.buf, 64, 1)
+    try:
+        writer.write(7, metrics, names, new_names)
+
+        assert writer.count == 64
+        assert writer.overflow == 28 + 40 - 64
+        assert new_names[0] == "System Temp"
+        assert list(names) == new_names
+        assert writer.value[0] == 25.0
+        assert writer.unr[0] == 90.0
+        assert writer.host[0] == 7
+        assert writer.flags[27] == 1
+        assert new_names[writer.name[38]] == "psu1.input_voltage"
+        assert writer.kind[38] == KIND_POWER_SUPPLY
+        assert writer.value[38] == 239
+    finally:
+        writer.release()
+        shm.close()
+        shm.unlink()
+
+
+@requires_shared_memory
+def test_writer_partial_power_supplies(partial_metrics):
+    """Ensure power supply fields missing from a PSItem have no row."""
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(create=True, size=2 * _layout(8)[None])
+    names = {}
+    writer = _Writer(shm.buf, 8, 0)
+    try:
+        writer.write(0, partial_metrics, names, [])
+        assert writer.count == 2
+        assert list(names) == ["psu1.input_power", "psu1.temp_1"]
+    finally:
+        writer.release()
+        shm.close()
+        shm.unlink()
+
+
+class Process:
+    """Stand-in for a worker process."""
+
+    def __init__(self, alive=True):
+        """Creates an instance of Process.
+
+        Args:
+            alive: Whether the process is alive. default: True.
+        """
+        self.alive = alive
+
+    def is_alive(self):
+        """Report whether the process is alive.
+
+        Returns:
+            bool: Whether the process is alive.
+        """
+        return self.alive
+
+
+def test_rebalance():
+    """Ensure slow hosts are spread across workers."""
+    collector = Collector([f"http://{i}" for i in range(6)], workers=2)
+    assert collector.shards == [[0, 2, 4], [1, 3, 5]]
+
+    collector._processes = [(Process(), None, Queue(), None) for _ in range(2)]
+    collector.costs = [1.0, 1.0, 1.0, 1.0, 1.0, 1.0]
+    assert not collector.rebalance()
+
+    collector.costs = [5.0, 1.0, 5.0, 1.0, 1.0, 1.0]
+    assert collector.rebalance()
+    assert collector.shards == [[0, 1, 4], [2, 3, 5]]
+    assert collector._processes[0][2].get_nowait() == ("shard", [0, 1, 4])
+
+
+def test_rebalance_unchanged_shard():
+    """Ensure only the workers whose shard changed are told."""
+    collector = Collector([f"http://{i}" for i in range(4)], workers=3)
+    collector._processes = [(Process(), None, Queue(), None) for _ in range(3)]
+    collector.shards = [[0], [1], [2, 3]]
+    collector.costs = [4.0, 1.0, 1.0, 1.0]
+
+    assert collector.rebalance()
+    assert collector.shards == [[0], [1, 3], [2]]
+    assert collector._processes[0][2].empty()
+    assert collector._processes[1][2].get_nowait() == ("shard", [1, 3])
+
+
+def test_rebalance_dead_workers():
+    """Ensure hosts of dead workers are reassigned to live ones."""
+    collector = Collector([f"http://{i}" for i in range(6)], workers=2)
+    collector._processes = [(Process(False), None, Queue(), None) for _ in range(2)]
+    assert not collector.rebalance()
+
+    collector._processes[0][0].alive = True
+    assert collector.rebalance()
+    assert collector.shards == [list(range(6)), []]
+    assert collector._processes[1][2].empty()
+
+
+@requires_shared_memory
+@pytest.mark.parametrize("interval, login_rate", [(0.01, 100), (0, None)])
+def test_worker(interval, login_rate):
+    """Ensure a worker polls its shard, follows commands and stops."""
+    import threading
+
+    from smbmc.collector import _worker
+
+    servers = [f"http://bmc-{i}" for i in range(3)]
+    # bmc-1 has no cassette, and fails
+    factory = CassetteSessionFactory({servers[0]: CASSETTE, servers[2]: CASSETTE})
+    collector = Collector(
+        servers,
+        workers=1,
+        interval=interval,
+        capacity=16,
+        rebalance_every=2,
+        session_factory=factory,
+        login_rate=login_rate,
+    )
+    collector.shards = [[0, 1]]
+    collector._layout = _layout(collector.capacity)
+    collector._results = Queue()
+    shm = _shared_memory()(create=True, size=2 * collector._layout[None])
+    commands = Queue()
+    slots = threading.Semaphore(2)
+    collector._processes = [(Process(), shm, commands, slots)]
+    worker = threading.Thread(
+        target=_worker,
+        args=(0, collector._config(0, shm.name), commands, collector._results, slots),
+    )
+    worker.start()
+    try:
+        batches = collector.collect(timeout=30)
+        first = next(batches)
+        commands.put(("shard", [2]))
+        while True:
+            batch = next(batches)
+            if not batch.failed:
+                break
+    finally:
+        commands.put(("stop",))
+        slots.release()
+        worker.join(timeout=30)
+        shm.close()
+        shm.unlink()
+
+    assert not worker.is_alive()
+    assert len(first) == 16 and first.overflow == 28 + 40 - 16
+    assert first.failed == [1]
+    assert first.errors[1].startswith("Exception: no response for /cgi/ipmi.cgi")
+    assert len(batch) == 16 and {batch.hosts[i][0] for i in batch.host} == {servers[2]}
+    assert batch.names[:1] == first.names[:1] == ["System Temp"]
+
+
+@requires_shared_memory
+def test_collect():
+    """Ensure workers publish every host's readings."""
+    servers = [f"http://bmc-{i}" for i in range(5)]
+    # bmc-4 has no cassette, and fails
+    factory = CassetteSessionFactory({server: CASSETTE for server in servers[:4]})
+
+    with Collector(
+        servers,
+        workers=2,
+        interval=0.05,
+        session_factory=factory,
+        login_rate=100,
+    ) as collector:
+        batches = []
+        for batch in collector.collect(timeout=30):
+            batches.append(batch)
+            if len(batches) == 4:
+                break
+
+    hosts = set()
+    for batch in batches:
+        assert len(batch) == len(batch.host) == len(batch.state)
+        assert len(batch) % (28 + 40) == 0
+        hosts.update(batch.hosts[i][0] for i in batch.host)
+        for _, name, value in batch.rows():
+            assert name in batch.names
+            if name == "System Temp":
+                assert value == 25.0
+            if name == "psu1.input_power":
+                assert not math.isnan(value)
+    assert hosts <= set(servers[:4])
+    assert any(batch.failed == [4] for batch in batches)
+    assert all(
+        batch.errors[4].startswith("Exception: no response for /cgi/ipmi.cgi")
+        for batch in batches
+        if batch.failed
+    )
+    assert collector.costs[4] == collector.timeout
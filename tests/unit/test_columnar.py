@@ -0,0 +1,157 @@
+"""Unit tests for the columnar exporter."""
+import copy
+import zipfile
+
+import pytest
+
+from smbmc.columnar import ColumnarWriter
+from smbmc.columnar import read_npz
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+requires_pyarrow = pytest.mark.skipif(pyarrow is None, reason="requires pyarrow")
+FORMATS = [
+    pytest.param("parquet", marks=requires_pyarrow),
+    pytest.param("arrow", marks=requires_pyarrow),
+    "npz",
+]
+
+
+def read(path, file_format):
+    """Read a table back as lists, with nulls as None.
+
+    Args:
+        path: Path of the table.
+        file_format: Format of the table.
+
+    Returns:
+        tuple: (dict of column lists, number of row groups).
+    """
+    if file_format == "npz":
+        columns = read_npz(path)
+        table = {name: values.tolist() for name, values in columns.items()}
+        table["timestamp"] = (columns["timestamp"].astype("int64") / 1e6).tolist()
+        if "flags" in table:
+            table["flags"] = [None if v == -1 else v for v in table["flags"]]
+        for name, values in table.items():
+            table[name] = [None if v != v else v for v in values]
+        with zipfile.ZipFile(path) as archive:
+            groups = len({m.split("/")[0] for m in archive.namelist()})
+        return table, groups
+
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        groups = pq.ParquetFile(path).num_row_groups
+        arrow_table = pq.read_table(path)
+    else:
+        with pyarrow.ipc.open_stream(path) as reader:
+            batches = list(reader)
+        groups = len(batches)
+        arrow_table = pyarrow.Table.from_batches(batches)
+    table = arrow_table.to_pydict()
+    table["timestamp"] = [t.timestamp() for t in table["timestamp"]]
+    return table, groups
+
+
+def write_sweeps(metrics, path, file_format):
+    """Write two sweeps; the second drops host b and adds host c.
+
+    Args:
+        metrics: Decoded snapshot fixture.
+        path: Base path.
+        file_format: Format of the tables.
+
+    Returns:
+        ColumnarWriter: The closed writer.
+    """
+    warmer = copy.deepcopy(metrics)
+    warmer["sensor"][0].reading = 30.0
+    with ColumnarWriter(path, file_format) as writer:
+        writer.write_sweep({"a": metrics, "b": metrics}, 1000.5)
+        writer.write_sweep({"a": warmer, "b": None, "c": {"sensor": []}}, 1010.5)
+    return writer
+
+
+@pytest.mark.parametrize("file_format", FORMATS)
+def test_round_trip(metrics, tmp_path, file_format):
+    """Ensure rows read back as written, one row group per sweep."""
+    writer = write_sweeps(metrics, tmp_path / "fleet", file_format)
+
+    sensors, groups = read(writer.paths["sensor"], file_format)
+    assert groups == 2
+    assert len(sensors["host"]) == 3 * 28
+    assert sensors["host"][::28] == ["a", "b", "a"]
+    assert sensors["timestamp"][::28] == [1000.5, 1000.5, 1010.5]
+    assert sensors["name"][:28] == [sensor.name for sensor in metrics["sensor"]]
+    assert sensors["reading"][::28] == [25.0, 25.0, 30.0]
+    assert (sensors["type"][0], sensors["unit"][0]) == (
+        "temperature",
+        "degrees_celsius",
+    )
+    assert sensors["unr"][0] == metrics["sensor"][0].unr
+    assert (sensors["flags"][27], sensors["reading"][27]) == (1, None)
+    assert sensors["flags"][0] is None
+
+    power_supplies, groups = read(writer.paths["pmbus"], file_format)
+    assert groups == 2
+    assert power_supplies["host"] == ["a"] * 4 + ["b"] * 4 + ["a"] * 4
+    assert power_supplies["slot"][:4] == [0, 1, 2, 3]
+    assert power_supplies["input_power"][1] == metrics["pmbus"][1].input_power
+    assert power_supplies["serial"][1] == metrics["pmbus"][1].name
+
+
+@requires_pyarrow
+def test_formats_agree(metrics, tmp_path):
+    """Ensure every format holds the same rows."""
+    tables = {}
+    for file_format in ("parquet", "arrow", "npz"):
+        writer = write_sweeps(metrics, tmp_path / file_format, file_format)
+        tables[file_format] = read(writer.paths["sensor"], file_format)[0]
+
+    assert tables["parquet"] == tables["arrow"] == tables["npz"]
+
+
+def test_incremental(metrics, tmp_path):
+    """Ensure npz tables are readable while being written."""
+    writer = ColumnarWriter(tmp_path / "fleet", "npz", max_rows=50)
+    writer.write("a", {"sensor": metrics["sensor"]}, 1.0)
+    assert writer.paths["sensor"] and not (tmp_path / "fleet.sensor.npz").exists()
+    writer.write("b", {"sensor": metrics["sensor"]}, 2.0)
+
+    table = read_npz(writer.paths["sensor"], ["host", "reading"], decode=False)
+    assert sorted(table) == ["host", "host.dictionary", "reading"]
+    assert table["host.dictionary"].tolist() == ["a", "b"]
+    assert len(table["reading"]) == 56
+
+    writer.write("c", {"sensor": metrics["sensor"]}, 3.0)
+    writer.close()
+    assert read_npz(writer.paths["sensor"], ["host"])["host"][-1] == "c"
+
+
+def test_errors(tmp_path):
+    """Ensure bad formats and existing files are rejected."""
+    with pytest.raises(ValueError, match="unknown format"):
+        ColumnarWriter(tmp_path / "fleet", "csv")
+
+    (tmp_path / "fleet.sensor.npz").write_bytes(b"")
+    with pytest.raises(FileExistsError):
+        ColumnarWriter(tmp_path / "fleet", "npz")
+
+
+@requires_pyarrow
+def test_default_format(tmp_path):
+    """Ensure Parquet is the default when pyarrow is installed."""
+    assert ColumnarWriter(tmp_path / "fleet").format == "parquet"
+
+
+def test_without_pyarrow(tmp_path, monkeypatch):
+    """Ensure npz is the default, and Arrow formats fail, without pyarrow."""
+    monkeypatch.setattr("smbmc.columnar._import_pyarrow", lambda: None)
+
+    with pytest.raises(ImportError, match="pyarrow is not installed"):
+        ColumnarWriter(tmp_path / "fleet", "arrow")
+    assert ColumnarWriter(tmp_path / "fleet").format == "npz"
@@ -0,0 +1,150 @@
+"""Unit tests for the streaming exporters."""
+import csv
+import io
+import json
+
+import pytest
+
+from smbmc.export import CsvExporter
+from smbmc.export import InfluxExporter
+from smbmc.export import NdjsonExporter
+from smbmc.export import StreamExporter
+from smbmc.models import POWER_SUPPLY_READINGS
+
+
+def test_influx_non_finite(metrics):
+    """Ensure NaN and infinite values are left out of Influx lines."""
+    sensor = metrics["sensor"][0]
+    sensor.unr = float("inf")
+    psus = metrics["pmbus"]
+    psus[0].input_power = float("nan")
+    for attr in POWER_SUPPLY_READINGS:
+        setattr(psus[1], attr, None)
+
+    stream = io.StringIO()
+    with InfluxExporter(stream) as exporter:
+        exporter.write("a", {"sensor": [sensor], "pmbus": psus[:2]}, 1.0)
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2
+    assert "reading=25.0" in lines[0] and "unr" not in lines[0]
+    assert "input_power" not in lines[1] and "input_voltage=" in lines[1]
+    assert "nan" not in stream.getvalue() and "inf" not in stream.getvalue()
+
+
+def test_influx(metrics):
+    """Ensure Influx line protocol is well formed."""
+    stream = io.StringIO()
+    with InfluxExporter(stream) as exporter:
+        exporter.write("host a", metrics, 1.5)
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 28 + 4
+    assert lines[0] == (
+        r"sensor,host=host\ a,name=System\ Temp,type=temperature,"
+        "unit=degrees_celsius state=1i,reading=25.0,lnr=-9.0,lc=-7.0,lnc=-5.0,"
+        "unc=80.0,uc=85.0,unr=90.0 1500000000"
+    )
+    assert lines[27].endswith("state=1i,flags=1i 1500000000")
+    assert lines[29].startswith(
+        r"pmbus,host=host\ a,slot=1,serial=PSU0SERIAL0NO00 input_voltage=239i,"
+    )
+    assert lines[28].startswith(r"pmbus,host=host\ a,slot=0 input_voltage=0i")
+
+
+def test_csv(metrics):
+    """Ensure CSV rows parse back with the expected columns."""
+    stream = io.StringIO()
+    with CsvExporter(stream, batch_size=3) as exporter:
+        exporter.write("host,a", metrics, 2)
+
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert len(rows) == 28 + 4 * 10
+    assert rows[0]["host"] == "host,a"
+    assert rows[0]["reading"] == "25.0"
+    assert rows[27]["flags"] == "1"
+    assert rows[27]["reading"] == ""
+    assert rows[28 + 10 + 2] == {
+        "timestamp": "2",
+        "host": "host,a",
+        "name": "psu1.input_power",
+        "type": "power_supply",
+        "unit": "watts",
+        "state": "",
+        "flags": "",
+        "reading": "84",
+        "lnr": "",
+        "lc": "",
+        "lnc": "",
+        "unc": "",
+        "uc": "",
+        "unr": "",
+    }
+
+
+def test_ndjson(metrics):
+    """Ensure every NDJSON line is a valid JSON object."""
+    stream = io.StringIO()
+    with NdjsonExporter(stream) as exporter:
+        exporter.write_many([("a", metrics, 1.0), ("b", metrics, 2.0)])
+
+    objects = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(objects) == 2 * (28 + 4 * 10)
+    assert objects[0]["name"] == "System Temp"
+    assert objects[0]["unit"] == "degrees_celsius"
+    assert objects[0]["unr"] == 90.0
+    assert objects[27]["flags"] == 1
+    assert objects[68]["host"] == "b"
+    assert objects[68]["timestamp"] == 2.0
+
+
+def test_non_finite(metrics):
+    """Ensure NaN and infinite values are null in NDJSON, empty in CSV."""
+    sensor = metrics["sensor"][0]
+    sensor.reading = float("nan")
+    sensor.unr = float("inf")
+    sensor.lnr = float("-inf")
+    psu = metrics["pmbus"][1]
+    psu.input_power = float("inf")
+
+    stream = io.StringIO()
+    with NdjsonExporter(stream) as exporter:
+        exporter.write("a", {"sensor": [sensor], "pmbus": [psu]}, 1.0)
+
+    objects = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert (objects[0]["reading"], objects[0]["lnr"], objects[0]["unr"]) == (
+        None,
+        None,
+        None,
+    )
+    assert objects[0]["uc"] == 85.0
+    assert [o["reading"] for o in objects if o["name"] == "psu1.input_power"] == [None]
+
+    stream = io.StringIO()
+    with CsvExporter(stream) as exporter:
+        exporter.write("a", {"sensor": [sensor], "pmbus": [psu]}, 1.0)
+
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert (rows[0]["reading"], rows[0]["lnr"], rows[0]["unr"]) == ("", "", "")
+    assert "inf" not in stream.getvalue() and "nan" not in stream.getvalue()
+
+
+@pytest.mark.parametrize("exporter_class", [CsvExporter, NdjsonExporter])
+def test_repeated_host(metrics, exporter_class):
+    """Ensure repeated snapshots of a host, partial or not, reuse prefixes."""
+    psus = {"pmbus": metrics["pmbus"]}
+    sensors = {"sensor": metrics["sensor"]}
+    stream = io.StringIO()
+    kwargs = {"header": False} if exporter_class is CsvExporter else {}
+    with exporter_class(stream, **kwargs) as exporter:
+        exporter.write_many([("a", psus, 1.0), ("a", psus, 2.0), ("a", sensors, 3.0)])
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2 * 4 * 10 + 28
+    assert lines[:40] == [line.replace("2.0", "1.0") for line in lines[40:80]]
+
+
+def test_base_exporter():
+    """Ensure the base class requires a format."""
+    with pytest.raises(TypeError):
+        StreamExporter(io.StringIO())
@@ -0,0 +1,204 @@
+"""Unit tests for the fleet manager."""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest
+
+from smbmc.fleet import Fleet
+from smbmc.models import AuthenticationError
+
+SENSOR_XML = open("tests/unit/ipmi_response_sensors.xml").read()
+
+
+class FakeResponse:
+    """Response holding text and cookies."""
+
+    def __init__(self, text="", cookies=None):
+        """Creates a response.
+
+        Args:
+            text: Response body.
+            cookies: Cookies set by the response.
+        """
+        self.text = text
+        self.cookies = cookies or {}
+
+
+class FakeSession:
+    """Session recording requests and answering with canned responses."""
+
+    def __init__(self):
+        """Creates a session."""
+        self.requests = []
+
+    def post(self, url, data=None, cookies=None, timeout=None):
+        """Record a request and answer it.
+
+        Args:
+            url: Request URL.
+            data: Form data.
+            cookies: Request cookies.
+            timeout: Request timeout.
+
+        Returns:
+            FakeResponse: Login or sensor response, or the login page
+            without a SID.
+
+        Raises:
+            ConnectionError: The host is down.
+        """
+        self.requests.append((url, cookies, timeout))
+        if url.startswith("http://down/"):
+            raise ConnectionError("connection refused")
+        if url.endswith("/cgi/login.cgi"):
+            if data["pwd"] != "pass":
+                return FakeResponse()
+            return FakeResponse(cookies={"SID": f"sid-{len(self.requests)}"})
+        if not cookies:
+            return FakeResponse("<html><body>login</body></html>")
+        return FakeResponse(SENSOR_XML)
+
+
+@pytest.fixture
+def fleet():
+    """Fleet using a fake session.
+
+    Returns:
+        Fleet: The fleet.
+    """
+    return Fleet("user", "pass", timeout=5, session=FakeSession())
+
+
+def test_add(fleet):
+    """Ensure hosts share the default credentials."""
+    a = fleet.add("http://a")
+    b = fleet.add("http://b")
+    c = fleet.add("http://c", password="other")
+
+    assert a.credentials is b.credentials
+    assert (c.username, c.password) == ("user", "other")
+    assert len(fleet) == 3
+    assert list(fleet) == [a, b, c]
+    assert fleet["http://b"] is b
+
+    fleet.remove("http://b")
+    assert list(fleet) == [a, c]
+
+
+def test_query(fleet, monkeypatch):
+    """Ensure the SID is sent explicitly and renewed on expiry."""
+    client = fleet.add("http://a")
+
+    assert len(client.get_sensor_metrics()) == 28
+    assert len(client.get_metrics(["sensor"])["sensor"]) == 28
+    assert fleet.session.requests == [
+        ("http://a/cgi/login.cgi", None, 5),
+        ("http://a/cgi/ipmi.cgi", {"SID": "sid-1"}, 5),
+        ("http://a/cgi/ipmi.cgi", {"SID": "sid-1"}, 5),
+    ]
+
+    client.sid_expires = 0.0
+    client.get_sensor_metrics()
+    assert fleet.session.requests[-1] == ("http://a/cgi/ipmi.cgi", {"SID": "sid-4"}, 5)
+
+    client.logout()
+    assert client.sid is None
+
+
+def test_bad_auth(fleet):
+    """Ensure a missing SID is an authentication error."""
+    client = fleet.add("http://a", password="wrong")
+    with pytest.raises(AuthenticationError, match="Authentication Error"):
+        client.get_sensor_metrics()
+
+
+def test_connection_pools():
+    """Ensure pools are kept for at most max_pools hosts."""
+    with Fleet(max_pools=2) as fleet:
+        assert fleet.session.get_adapter("http://a").poolmanager.pools._maxsize == 2
+
+
+def test_probe(fleet):
+    """Ensure every host is probed, without logging in by default."""
+    fleet.add("http://a")
+    fleet.add("http://b", password="wrong")
+    fleet.add("http://down")
+
+    results = fleet.probe(timeout=1)
+    assert {server: r.reachable for server, r in results.items()} == {
+        "http://a": True,
+        "http://b": True,
+        "http://down": False,
+    }
+    assert not any(r.session_valid for r in results.values())
+    assert all(cookies is None for _, cookies, _ in fleet.session.requests)
+
+    results = fleet.probe(timeout=1, concurrency=2, login=True)
+    assert results["http://a"].session_valid
+    assert results["http://a"].info["NAME"] == "System Temp"
+    assert str(results["http://b"].error) == "Authentication Error"
+    assert isinstance(results["http://down"].error, ConnectionError)
+    assert fleet.probe()["http://a"].session_valid
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_get_metrics_failures(fleet, workers):
+    """Ensure a failed host does not abort the others' polls.
+
+    Args:
+        fleet: Fleet using a fake session.
+        workers: Threads polling the hosts, or 0 to poll serially.
+    """
+    fleet.add("http://a")
+    fleet.add("http://down")
+    executor = ThreadPoolExecutor(workers) if workers else None
+    errors = {}
+
+    results = fleet.get_metrics(["sensor"], executor=executor, errors=errors)
+    assert len(results["http://a"]["sensor"]) == 28
+    assert results["http://down"] is None
+    assert errors["http://a"] == []
+    assert isinstance(errors["http://down"][0], ConnectionError)
+
+    assert fleet.get_metrics(["sensor"], executor=executor)["http://down"] is None
+    with pytest.raises(ConnectionError):
+        fleet.get_metrics(["sensor"], executor=executor, raise_errors=True)
+    if executor:
+        executor.shutdown()
+
+
+def test_abandoned_errors_detached(fleet, monkeypatch):
+    """Ensure polls abandoned at the deadline no longer touch errors."""
+    release = Event()
+
+    def stall(metrics, errors=None, deadline=None):
+        release.wait()
+        errors.append("late")
+
+    monkeypatch.setattr(fleet.add("http://a"), "get_metrics", stall)
+    errors = {}
+    with ThreadPoolExecutor(1) as executor:
+        results = fleet.get_metrics(budget=0.05, executor=executor, errors=errors)
+        release.set()
+
+    assert results == {"http://a": None}
+    assert [type(e) for e in errors["http://a"]] == [TimeoutError]
+
+
+def test_abandoned_without_errors(fleet, monkeypatch):
+    """Ensure polls abandoned at the deadline are None, and never raised."""
+    release = Event()
+
+    def stall(metrics, errors=None, deadline=None):
+        release.wait()
+
+    monkeypatch.setattr(fleet.add("http://a"), "get_metrics", stall)
+    with ThreadPoolExecutor(1) as executor:
+        try:
+            results = fleet.get_metrics(
+                budget=0.05, executor=executor, raise_errors=True
+            )
+        finally:
+            release.set()
+
+    assert results == {"http://a": None}
@@ -0,0 +1,111 @@
+"""Unit tests for the fleet index."""
+import copy
+
+import pytest
+
+from smbmc.fleet_index import FleetIndex
+
+
+def snapshot(metrics, temp, input_power=84):
+    """Copy the test snapshot with other readings.
+
+    Args:
+        metrics: Decoded snapshot fixture.
+        temp: System Temp reading.
+        input_power: Input power of psu1.
+
+    Returns:
+        dict: The snapshot.
+    """
+    metrics = copy.deepcopy(metrics)
+    metrics["sensor"][0].reading = temp
+    metrics["pmbus"][1].input_power = input_power
+    return metrics
+
+
+def naive_top(index, name, n):
+    """Top-N by scanning every host.
+
+    Args:
+        index: FleetIndex.
+        name: Series name.
+        n: Number of hosts.
+
+    Returns:
+        list: (host, value) tuples.
+    """
+    values = [(index.value(host, name), host) for host in index._values]
+    values = sorted((v for v in values if v[0] is not None), reverse=True)
+    return [(host, value) for value, host in values[:n]]
+
+
+def test_top_and_percentile(metrics):
+    """Ensure queries reflect the latest reading of every host."""
+    index = FleetIndex()
+    for i, temp in enumerate([30, 25, 40, 35, 20]):
+        index(f"h{i}", snapshot(metrics, temp), 0)
+
+    assert len(index) == 5
+    assert index.count("System Temp") == 5
+    assert index.top("System Temp", 2) == [("h2", 40), ("h3", 35)]
+    assert index.top("System Temp", 2, largest=False) == [("h4", 20), ("h1", 25)]
+    assert index.top("System Temp", 0) == []
+    assert index.percentile("System Temp", 50) == 30
+    assert index.percentile("System Temp", 100) == 40
+    assert index.percentile("missing", 50) is None
+    assert "PS2 Status" not in index.names()
+
+    index.update("h2", snapshot(metrics, 10), 1)
+    assert index.top("System Temp", 2) == [("h3", 35), ("h0", 30)]
+    assert index.top("System Temp", 5) == naive_top(index, "System Temp", 5)
+
+    index.update("h3", {"pmbus": metrics["pmbus"]}, 1)
+    assert index.count("System Temp") == 4
+    assert index.value("h3", "System Temp") is None
+
+
+def test_group_sums(metrics):
+    """Ensure group sums follow readings, labels and removals."""
+    index = FleetIndex(labels={"a": {"rack": "r1"}, "b": {"rack": "r1"}})
+    index.set_labels("c", {"rack": "r2"})
+    index.update_many(
+        {
+            "a": snapshot(metrics, 25, input_power=100),
+            "b": snapshot(metrics, 25, input_power=50),
+            "c": snapshot(metrics, 25, input_power=10),
+            "d": None,
+        },
+        0,
+    )
+    assert len(index) == 3
+    assert index.group_sums("psu1.input_power", "rack") == {"r1": 150, "r2": 10}
+    total = index.group_sums("power.input", "rack")["r1"]
+    assert total == 2 * index.value("a", "power.input") - 50
+
+    index.update("b", snapshot(metrics, 25, input_power=70), 1)
+    assert index.group_sums("psu1.input_power", "rack") == {"r1": 170, "r2": 10}
+    # an unchanged snapshot leaves the sums alone
+    index.update("b", snapshot(metrics, 25, input_power=70), 1)
+    assert index.group_sums("psu1.input_power", "rack") == {"r1": 170, "r2": 10}
+
+    index.set_labels("b", {"rack": "r2"})
+    assert index.group_sums("psu1.input_power", "rack") == {"r1": 100, "r2": 80}
+
+    index.remove("c")
+    assert index.group_sums("psu1.input_power", "rack") == {"r1": 100, "r2": 70}
+    assert index.group_sums("psu1.input_power", "row") == {}
+
+    assert index.expire(before=1) == ["a"]
+    assert index.group_sums("psu1.input_power", "rack") == pytest.approx(
+        {"r1": 0, "r2": 70}
+    )
+    assert index.top("psu1.input_power") == [("b", 70)]
+
+
+def test_partial_power_supplies(partial_metrics):
+    """Ensure power supply fields missing from a PSItem are skipped."""
+    index = FleetIndex()
+    index.update("a", partial_metrics, 10)
+
+    assert index.value("a", "psu1.input_power") == 84
+    assert index.value("a", "psu1.fan_1") is None
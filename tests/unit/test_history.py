@@ -0,0 +1,107 @@
+"""Unit tests for the sensor history store."""
+import pytest
+
+from smbmc.history import RingBuffer
+from smbmc.history import SensorHistory
+
+
+def test_ring_buffer_wraps():
+    """Ensure the oldest rows are overwritten once capacity is reached."""
+    ring = RingBuffer(3)
+    for timestamp in range(5):
+        ring.append(timestamp, timestamp * 1.5)
+
+    assert ring.size == 3
+    assert ring.last_timestamp() == 4
+    assert ring.range() == [(2, 3.0), (3, 4.5), (4, 6.0)]
+
+
+@pytest.mark.parametrize(
+    "start,end,expected_timestamps",
+    [
+        (0, None, [10, 20, 30, 40]),
+        (15, None, [20, 30, 40]),
+        (20, 30, [20, 30]),
+        (41, None, []),
+    ],
+)
+def test_ring_buffer_range(start, end, expected_timestamps):
+    """Ensure range queries return the requested window.
+
+    Args:
+        start: Earliest timestamp.
+        end: Latest timestamp.
+        expected_timestamps: Timestamps expected in the window.
+    """
+    ring = RingBuffer(4)
+    for timestamp in (0, 10, 20, 30, 40):
+        ring.append(timestamp, 1.0)
+
+    assert [row[0] for row in ring.range(start, end)] == expected_timestamps
+
+
+def test_history_downsampling():
+    """Ensure tiers track min/max/mean per bucket."""
+    history = SensorHistory(capacity=10, tiers=((60, 5),))
+    samples = ((0, 1.0), (20, 3.0), (40, 2.0), (60, 20.0), (90, 10.0))
+    for timestamp, value in samples:
+        history.add("host", "CPU Temp", value, timestamp)
+
+    assert history.query("host", "CPU Temp", resolution=60) == [
+        (0, 1.0, 3.0, 2.0),
+        (60, 10.0, 20.0, 15.0),
+    ]
+    assert history.query("host", "CPU Temp", 60, resolution=60) == [
+        (60, 10.0, 20.0, 15.0),
+    ]
+    assert history.query("host", "CPU Temp", 0, 59, resolution=60) == [
+        (0, 1.0, 3.0, 2.0),
+    ]
+    assert history.query("host", "CPU Temp", 20, 60) == [
+        (20, 3.0),
+        (40, 2.0),
+        (60, 20.0),
+    ]
+
+
+def test_history_rejects_old_samples():
+    """Ensure samples must arrive in chronological order."""
+    history = SensorHistory()
+    history.add("host", "FAN1", 3500, 100)
+
+    with pytest.raises(ValueError, match="older"):
+        history.add("host", "FAN1", 3500, 99)
+
+
+def test_history_unknown_series():
+    """Ensure unknown series and tiers are handled."""
+    history = SensorHistory()
+    history.add("host", "FAN1", 3500, 100)
+
+    assert history.query("host", "nonexistent") == []
+    with pytest.raises(KeyError):
+        history.query("host", "FAN1", resolution=1)
+
+
+def test_history_add_metrics(metrics):
+    """Ensure snapshots from get_metrics are recorded."""
+    history = SensorHistory()
+    history.add_metrics("host", metrics, 1000)
+
+    assert ("host", "System Temp") in history.keys()
+    assert ("host", "FAN2") not in history.keys()
+    assert ("host", "PS2 Status") not in history.keys()
+    assert history.query("host", "psu1.input_power") == [(1000, 84.0)]
+    assert len(history) == 17 + 4 * 10
+
+    history.add_metrics("other", {"sensor": metrics["sensor"]}, 1000)
+    assert len(history) == 2 * 17 + 4 * 10
+
+
+def test_partial_power_supplies(partial_metrics):
+    """Ensure power supply fields missing from a PSItem are skipped."""
+    history = SensorHistory()
+    history.add_metrics("a", partial_metrics, 10)
+
+    assert history.query("a", "psu1.input_power") == [(10, 84)]
+    assert history.query("a", "psu1.output_power") == []
@@ -0,0 +1,76 @@
+"""Unit tests for discrete sensor state decoding."""
+import pickle
+
+import pytest
+
+from smbmc.ipmi_discrete import decode_discrete_state
+from smbmc.ipmi_discrete import DigitalStateFlag
+from smbmc.ipmi_discrete import get_sensor_type
+from smbmc.ipmi_discrete import MemoryFlag
+from smbmc.ipmi_discrete import ProcessorFlag
+from smbmc.ipmi_discrete import SeverityFlag
+from smbmc.ipmi_discrete import Watchdog2Flag
+from smbmc.models import PowerSupplyFlag
+from smbmc.models import SensorTypeEnum
+
+
+@pytest.mark.parametrize(
+    "er_type,sensor_type,reading,expected_result",
+    [
+        (0x6F, 0x08, "010100", PowerSupplyFlag.PRESENCE_DETECTED),
+        (
+            0x6F,
+            0x08,
+            "000300",
+            PowerSupplyFlag.PRESENCE_DETECTED | PowerSupplyFlag.FAILURE,
+        ),
+        (0x6F, 0x07, "008000", ProcessorFlag.PRESENCE_DETECTED),
+        (0x6F, 0x07, "000004", ProcessorFlag.THROTTLED),
+        (0x6F, 0x0C, "000200", MemoryFlag.UNCORRECTABLE_ECC),
+        (0x6F, 0x23, "000001", Watchdog2Flag.TIMER_INTERRUPT),
+        (0x03, 0xC0, "000200", DigitalStateFlag.ASSERTED),
+        (0x07, 0x01, "000001", SeverityFlag.INFORMATIONAL),
+        (0x6F, 0x01, "000100", 1),
+        (0x70, 0x08, "00ff81", 0x1FF),
+        (0x6F, 0x08, "0000", PowerSupplyFlag.UNSPECIFIED),
+    ],
+)
+def test_decode_discrete_state(er_type, sensor_type, reading, expected_result):
+    """Ensure state bits are mapped to the appropriate flags.
+
+    Args:
+        er_type: Event/Reading Type code.
+        sensor_type: Sensor type code.
+        reading: Unmodified READING value.
+        expected_result: Expected flags.
+    """
+    result = decode_discrete_state(er_type, sensor_type, reading)
+
+    assert result == expected_result
+    assert type(result) is type(expected_result)
+
+
+def test_decoded_flags_pickle():
+    """Ensure generated flag classes can cross process boundaries."""
+    flags = decode_discrete_state(0x6F, 0x07, "000300")
+
+    assert pickle.loads(pickle.dumps(flags)) == flags
+
+
+@pytest.mark.parametrize(
+    "s_type,expected_result",
+    [
+        ("01", SensorTypeEnum.TEMPERATURE),
+        ("2c", SensorTypeEnum.FRU_STATE),
+        ("c0", SensorTypeEnum.OEM),
+        ("dc", SensorTypeEnum.OEM),
+    ],
+)
+def test_get_sensor_type(s_type, expected_result):
+    """Ensure raw sensor types map to SensorTypeEnum.
+
+    Args:
+        s_type: Unmodified STYPE value.
+        expected_result: Expected sensor type.
+    """
+    assert get_sensor_type(s_type) is expected_result
@@ -1,5 +1,10 @@
 """Unit tests for IPMI PMBus functions."""
+from smbmc import ipmi_pmbus
+from smbmc.ipmi_pmbus import PSITEM_FIELDS
+from smbmc.ipmi_pmbus import PSItemDecoder
+from smbmc.ipmi_pmbus import process_pmbus_psu
 from smbmc.ipmi_pmbus import process_pmbus_response
+from smbmc.ipmi_pmbus import psitem_variant
 from smbmc.util import extract_xml_attr
 
 
@@ -42,3 +47,55 @@ def test_process_power_supplies():
             assert psu.temp_2 == 0
             assert psu.fan_1 == 0
             assert psu.fan_2 == 0
+
+
+def test_missing_fields():
+    """Ensure fields missing from a PSItem are None."""
+    item = {"name": "PSU1", "acInPower": "54", "dc12OutVoltage": "79"}
+    psu = process_pmbus_psu(item)
+
+    assert (psu.name, psu.input_power, psu.output_voltage) == ("PSU1", 84, 12.1)
+    assert psu.status is None
+    assert psu.fan_2 is None
+
+
+def test_variant_aliases():
+    """Ensure a field table selects among candidate attribute names."""
+    fields = PSITEM_FIELDS + (("extra", ("inputPower", "acInPower"), 2),)
+    item = {"name": "PSU1", "inputPower": "54"}
+    variant = psitem_variant(item, fields)
+
+    assert psitem_variant(dict(item), fields) is variant
+    assert variant.missing[0] == "status"
+    assert variant.decode(item).extra == 42.0
+
+
+def test_decoder_per_host():
+    """Ensure a decoder keeps its variant, selecting again on change."""
+    decoder = PSItemDecoder()
+    old = {"name": "PSU1", "acInPower": "54"}
+    new = {"name": "PSU1", "dcOutPower": "45"}
+
+    assert decoder.process_response([old, old])[1].id == 1
+    variant = decoder.variant
+    assert decoder.decode(dict(old)).input_power == 84
+    assert decoder.variant is variant
+
+    psu = decoder.decode(new)
+    assert decoder.variant is not variant
+    assert (psu.input_power, psu.output_power) == (None, 69)
+
+    superset = dict(old, **new)
+    psu = decoder.decode(superset)
+    assert (psu.input_power, psu.output_power) == (84, 69)
+
+
+def test_variant_cache_bounded(monkeypatch):
+    """Ensure the oldest variants are evicted."""
+    monkeypatch.setattr(ipmi_pmbus, "_VARIANTS", {})
+    first = psitem_variant({"a0": ""})
+    for i in range(1, ipmi_pmbus._MAX_VARIANTS + 1):
+        psitem_variant({f"a{i}": ""})
+
+    assert len(ipmi_pmbus._VARIANTS) == ipmi_pmbus._MAX_VARIANTS
+    assert psitem_variant({"a0": ""}) is not first
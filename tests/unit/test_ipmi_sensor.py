@@ -1,15 +1,21 @@
 """Unit tests for IPMI sensor functions."""
+import random
+
 import pytest
 
+from smbmc.ipmi_discrete import PhysicalSecurityFlag
+from smbmc.ipmi_sensor import _process_threshold_sensor_fields
 from smbmc.ipmi_sensor import get_sensor_state
 from smbmc.ipmi_sensor import is_analog_data_format
 from smbmc.ipmi_sensor import is_threshold_sensor
 from smbmc.ipmi_sensor import perform_linearisation
 from smbmc.ipmi_sensor import process_discrete_sensor
 from smbmc.ipmi_sensor import process_sensor_response
+from smbmc.ipmi_sensor import process_threshold_sensor
 from smbmc.ipmi_sensor import reading_conversion
 from smbmc.models import Sensor
 from smbmc.models import SensorStateEnum
+from smbmc.models import SensorTypeEnum
 from smbmc.util import extract_xml_attr
 
 
@@ -139,22 +145,91 @@ def test_process_sensor_response():
         assert isinstance(sensor, Sensor)
 
 
-def test_process_threshold_sensor_error():
-    """Ensure unimplemented sensor raises an error."""
+def test_process_discrete_sensor():
+    """Ensure discrete sensor states are decoded."""
     item = {}
-    item["STYPE"] = "01"
-    item["READING"] = "010100"
+    item["NAME"] = "Chassis Intru"
+    item["STYPE"] = "05"
+    item["ERTYPE"] = "6f"
+    item["READING"] = "000100"
     item["OPTION"] = "c0"
 
-    with pytest.raises(NotImplementedError):
-        assert process_discrete_sensor(item)
+    sensor = process_discrete_sensor(item)
+
+    assert sensor.type is SensorTypeEnum.PHYSICAL_SECURITY
+    assert sensor.state is SensorStateEnum.PRESENT
+    assert sensor.flags == PhysicalSecurityFlag.GENERAL_CHASSIS_INTRUSION
 
 
 def test_process_threshold_sensor_not_present():
     """Test result if discrete sensor is not present."""
     item = {}
+    item["NAME"] = "Chassis Intru"
     item["STYPE"] = "01"
     item["READING"] = "010100"
     item["OPTION"] = "00"
 
-    assert process_discrete_sensor(item) is None
+    sensor = process_discrete_sensor(item)
+
+    assert sensor.name == "Chassis Intru"
+    assert sensor.state is SensorStateEnum.NOT_PRESENT
+    assert sensor.flags is None
+
+
+def test_process_sensor_response_tolerant():
+    """Ensure tolerant decoding isolates failures per sensor."""
+    xml_string = open("tests/unit/ipmi_response_sensors.xml").read()
+    sensor_list = extract_xml_attr(xml_string, ".//SENSOR")
+    sensor_list[1] = dict(sensor_list[1], L="02")
+    sensor_list[2] = {"NAME": "Mangled"}
+
+    with pytest.raises(NotImplementedError):
+        process_sensor_response(sensor_list)
+
+    errors = []
+    sensors = process_sensor_response(sensor_list, errors)
+
+    assert len(sensors) == 26
+    assert [sensor.id for sensor in sensors[:3]] == [0, 3, 4]
+    assert [(error.id, error.name) for error in errors] == [
+        (1, "12VCC"),
+        (2, "Mangled"),
+    ]
+    assert isinstance(errors[0].cause, NotImplementedError)
+    assert isinstance(errors[1].cause, KeyError)
+    assert errors[0].item is sensor_list[1]
+
+
+def test_process_threshold_sensor_matches_fields():
+    """Ensure the batched decode matches decoding each field separately."""
+    xml_string = open("tests/unit/ipmi_response_sensors.xml").read()
+    sensor_list = extract_xml_attr(xml_string, ".//SENSOR")
+    items = [item for item in sensor_list if is_threshold_sensor(item["ERTYPE"])]
+
+    rng = random.Random(0)
+    template = items[0]
+    for _ in range(500):
+        item = dict(template)
+        for key in ("UNR", "UC", "UNC", "LNC", "LC", "LNR", "RB"):
+            item[key] = f"{rng.randrange(0x100):02x}"
+        item["M"] = f"{rng.randrange(0x10000):04x}"
+        item["B"] = f"{rng.randrange(0x10000):04x}"
+        item["READING"] = f"{rng.randrange(0x100):02x}c000"
+        item["UNIT1"] = rng.choice(["00", "80"])
+        items.append(item)
+
+    for item in items:
+        assert vars(process_threshold_sensor(item)) == vars(
+            _process_threshold_sensor_fields(item)
+        )
+
+
+def test_process_threshold_sensor_fallback():
+    """Ensure fields of an odd length are still decoded."""
+    xml_string = open("tests/unit/ipmi_response_sensors.xml").read()
+    item = extract_xml_attr(xml_string, ".//SENSOR")[0]
+    expected = vars(process_threshold_sensor(item))
+
+    item = dict(item, M=item["M"][1:], UNIT="0" + item["UNIT"])
+
+    assert vars(process_threshold_sensor(item)) == expected
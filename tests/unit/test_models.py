@@ -0,0 +1,85 @@
+"""Unit tests for models."""
+import pytest
+
+from smbmc.models import is_breaching
+from smbmc.models import Sensor
+from smbmc.models import SensorSet
+from smbmc.models import SensorStateEnum
+from smbmc.models import SensorTypeEnum
+from smbmc.models import SensorUnitEnum
+
+
+def test_sensor_set(metrics):
+    """Ensure SensorSet indexes the decoded sensors."""
+    sensors = metrics["sensor"]
+
+    assert isinstance(sensors, SensorSet)
+    assert [sensor.id for sensor in sensors] == list(range(28))
+    assert sensors.get("FAN1") is sensors[9]
+    assert sensors.get("nonexistent") is None
+    assert sensors.names()[:2] == ["System Temp", "12VCC"]
+    assert len(sensors.by_type(SensorTypeEnum.FAN)) == 10
+    assert len(sensors.by_unit(SensorUnitEnum.VOLTS)) == 12
+    assert sensors.by_type(SensorTypeEnum.MEMORY) == []
+    assert sensors.breaches() == []
+
+
+@pytest.mark.parametrize(
+    "reading,state,flags,expected_result",
+    [
+        (50, SensorStateEnum.PRESENT, None, False),
+        (30, SensorStateEnum.PRESENT, None, False),
+        (29, SensorStateEnum.PRESENT, None, True),
+        (71, SensorStateEnum.PRESENT, None, True),
+        (0, SensorStateEnum.NOT_PRESENT, None, False),
+        (95, SensorStateEnum.PRESENT, 1, False),
+    ],
+)
+def test_is_breaching(make_sensor, reading, state, flags, expected_result):
+    """Ensure readings beyond non-critical thresholds are detected.
+
+    Args:
+        make_sensor: Sensor factory.
+        reading: Sensor reading.
+        state: Sensor state.
+        flags: Discrete sensor flags.
+        expected_result: Expected breach status.
+    """
+    sensor = make_sensor(reading, state=state, flags=flags)
+    assert is_breaching(sensor) is expected_result
+    assert SensorSet([sensor]).breaches() == ([sensor] if expected_result else [])
+
+
+def test_is_breaching_thresholds(make_sensor):
+    """Ensure each side is checked only against thresholds that are set."""
+    assert not is_breaching(Sensor())
+
+    sensor = make_sensor(95)
+    sensor.lnr = sensor.lc = sensor.lnc = sensor.unc = sensor.uc = 0
+    assert is_breaching(sensor)
+
+    # fan with lower thresholds only
+    fan = make_sensor(3000)
+    fan.lnr, fan.lc, fan.lnc = 300, 500, 700
+    fan.unc = fan.uc = fan.unr = 0
+    assert not is_breaching(fan)
+    assert SensorSet([fan]).breaches() == []
+    fan.reading = 600
+    assert is_breaching(fan)
+
+    # temperature with upper thresholds only
+    temp = make_sensor(25)
+    temp.lnr = temp.lc = temp.lnc = 0
+    assert not is_breaching(temp)
+    temp.reading = 71
+    assert is_breaching(temp)
+
+
+def test_sensor_set_copies(metrics):
+    """Ensure the lists returned by SensorSet can be modified safely."""
+    sensors = metrics["sensor"]
+
+    sensors.by_type(SensorTypeEnum.FAN).clear()
+    sensors.by_unit(SensorUnitEnum.VOLTS).append(None)
+    assert len(sensors.by_type(SensorTypeEnum.FAN)) == 10
+    assert len(sensors.by_unit(SensorUnitEnum.VOLTS)) == 12
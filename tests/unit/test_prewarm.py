@@ -0,0 +1,180 @@
+"""Unit tests for the login pre-warm."""
+import threading
+from time import monotonic
+from time import sleep
+
+import pytest
+
+from smbmc.fleet import Fleet
+from smbmc.models import AuthenticationError
+from smbmc.prewarm import _RateLimiter
+from smbmc.prewarm import _round_robin
+from smbmc.prewarm import prewarm
+from smbmc.prewarm import subnet_of
+from smbmc.transport import FakeTransport
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+
+
+class FakeClient:
+    """Client whose logins take a while, and fail as configured."""
+
+    in_flight = {}
+    peak = {}
+    starts = []
+    lock = threading.Lock()
+
+    def __init__(self, server, failures=0):
+        """Creates a client.
+
+        Args:
+            server: Address of the server.
+            failures: Logins failing before one succeeds; -1 to reject the
+                credentials.
+        """
+        self.server = server
+        self.failures = failures
+        self.logins = 0
+
+    def login(self, timeout=None):
+        """Log in, tracking logins in flight per subnet.
+
+        Args:
+            timeout: Request timeout.
+
+        Raises:
+            Exception: The login failed.
+        """
+        subnet = subnet_of(self.server)
+        with self.lock:
+            self.starts.append(monotonic())
+            self.in_flight[subnet] = self.in_flight.get(subnet, 0) + 1
+            self.peak[subnet] = max(self.peak.get(subnet, 0), self.in_flight[subnet])
+        sleep(0.02)
+        with self.lock:
+            self.in_flight[subnet] -= 1
+        self.logins += 1
+        if self.failures < 0:
+            raise AuthenticationError("Authentication Error")
+        if self.logins <= self.failures:
+            raise ConnectionError("connection reset")
+
+
+def test_subnet_of():
+    """Ensure servers are grouped by subnet, or by name."""
+    assert subnet_of("http://10.1.2.3") == "10.1.2.0/24"
+    assert subnet_of("https://10.1.2.3:8443", prefix=16) == "10.1.0.0/16"
+    assert subnet_of("http://[2001:db8::1]") == "2001:db8::/64"
+    assert subnet_of("http://bmc-1.example") == "bmc-1.example"
+
+
+def test_round_robin():
+    """Ensure consecutive clients come from different subnets."""
+    clients = [FakeClient(f"http://10.0.{i % 2}.{i}") for i in range(5)]
+    clients.append(FakeClient("http://10.0.5.1"))
+    order = [client.server for client, _ in _round_robin(clients, subnet_of)]
+    assert order == [
+        "http://10.0.0.0",
+        "http://10.0.1.1",
+        "http://10.0.5.1",
+        "http://10.0.0.2",
+        "http://10.0.1.3",
+        "http://10.0.0.4",
+    ]
+
+
+def test_rate_limiter():
+    """Ensure tokens are spaced by the rate, across threads."""
+    limiter = _RateLimiter(100)
+    times = []
+
+    def take():
+        limiter.acquire()
+        times.append(monotonic())
+
+    threads = [threading.Thread(target=take) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(times) - min(times) >= 0.085
+    with pytest.raises(ValueError):
+        _RateLimiter(0)
+
+
+def test_prewarm():
+    """Ensure limits are respected, failures retried and progress reported."""
+    FakeClient.starts.clear()
+    clients = [FakeClient(f"http://10.0.{i % 2}.{i}") for i in range(12)]
+    clients[0].failures = 1
+    clients[1].failures = 5
+    clients[2].failures = -1
+    updates = []
+
+    def progress(report, server, error):
+        updates.append((report.done, server, error))
+
+    report = prewarm(
+        clients,
+        rate=200,
+        per_subnet=2,
+        retries=2,
+        backoff=0.01,
+        concurrency=8,
+        progress=progress,
+    )
+
+    assert report.total == 12
+    assert report.succeeded == 10
+    assert set(report.failed) == {"http://10.0.1.1", "http://10.0.0.2"}
+    assert isinstance(report.failed["http://10.0.1.1"], ConnectionError)
+    assert (clients[0].logins, clients[1].logins, clients[2].logins) == (2, 3, 1)
+    assert report.attempts == 9 + 2 + 3 + 1
+    assert "10/12 logged in, 2 failed" in str(report)
+
+    assert FakeClient.peak == {"10.0.0.0/24": 2, "10.0.1.0/24": 2}
+    starts = sorted(FakeClient.starts)
+    assert starts[-1] - starts[0] >= (len(starts) - 1) / 200 - 0.005
+    assert [done for done, _, _ in updates] == list(range(1, 13))
+    assert sorted(server for _, server, _ in updates) == sorted(
+        client.server for client in clients
+    )
+
+
+def test_progress_errors():
+    """Ensure a failing progress callback does not abort the run."""
+    clients = [FakeClient(f"http://10.0.0.{i}") for i in range(3)]
+
+    def progress(report, server, error):
+        raise RuntimeError(server)
+
+    report = prewarm(clients, rate=1000, progress=progress)
+
+    assert report.succeeded == 3
+    assert sorted(str(e) for e in report.progress_errors) == sorted(
+        client.server for client in clients
+    )
+
+
+def test_fleet_prewarm():
+    """Ensure pre-warmed hosts poll without logging in again."""
+    session = FakeTransport.from_cassette(CASSETTE)
+    fleet = Fleet("user", "pass", session=session)
+    for i in range(3):
+        fleet.add(f"http://10.0.0.{i}")
+
+    report = fleet.prewarm(rate=1000)
+
+    assert report.succeeded == 3
+    assert all(client.sid == "fake" for client in fleet)
+    logins = len(session.requests)
+    for client in fleet:
+        client.get_sensor_metrics()
+    assert len(session.requests) == logins + 3
+
+
+def test_prewarm_nothing():
+    """Ensure an empty list of clients is reported as such."""
+    report = prewarm([])
+    assert (report.attempts, report.failed) == (0, {})
@@ -0,0 +1,120 @@
+"""Unit tests for the profiler."""
+import pstats
+
+import pytest
+
+from smbmc import ipmi_sensor
+from smbmc.catalog import Catalog
+from smbmc.client import Client
+from smbmc.profiling import install_from_env
+from smbmc.profiling import Profiler
+from smbmc.util import extract_xml_attr
+
+SENSOR_XML = open("tests/unit/ipmi_response_sensors.xml").read()
+
+
+class FakeResponse:
+    """Response holding the sensor XML."""
+
+    text = SENSOR_XML
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Client answering queries with the sensor XML.
+
+    Args:
+        monkeypatch: Pytest monkeypatch fixture.
+
+    Returns:
+        Client: The client.
+    """
+    monkeypatch.setattr(Client, "_query", lambda self, data, **kwargs: FakeResponse())
+    client = Client("http://10.0.0.1", "", "")
+    client.firmware = "3.48"
+    return client
+
+
+def test_profile_polls(client, tmp_path):
+    """Ensure a profile is written every N polls of a host."""
+    original = Client.get_metrics
+    with Profiler(str(tmp_path), every=2) as profiler:
+        assert Client.get_metrics is not original
+        for _ in range(3):
+            assert len(client.get_metrics(["sensor"])["sensor"]) == 28
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "10.0.0.1_3.48_0001.alloc.txt",
+            "10.0.0.1_3.48_0001.prof",
+        ]
+        with pytest.raises(Exception, match="already installed"):
+            Profiler(str(tmp_path)).install()
+    profiler.uninstall()
+
+    assert Client.get_metrics is original
+    assert (tmp_path / "10.0.0.1_3.48_0002.prof").exists()
+
+    stats = pstats.Stats(str(tmp_path / "10.0.0.1_3.48_0001.prof"))
+    functions = {name for _, _, name in stats.stats}
+    assert "process_sensor_response" in functions
+    assert "process_threshold_sensor" in functions
+    alloc = (tmp_path / "10.0.0.1_3.48_0001.alloc.txt").read_text()
+    assert alloc.startswith("# 2 polls of 10.0.0.1 (3.48)\n")
+
+
+def test_profile_decode(tmp_path):
+    """Ensure decoders called outside a poll are profiled on their own."""
+    sensors = extract_xml_attr(SENSOR_XML, ".//SENSOR")
+    with Profiler(str(tmp_path), every=10):
+        assert len(ipmi_sensor.process_sensor_response(sensors)) == 28
+
+    with Profiler(str(tmp_path), every=10):
+        assert len(Catalog().process_sensor_response(sensors)) == 28
+
+    assert (tmp_path / "decode_process_sensor_response_0001.prof").exists()
+    assert (tmp_path / "decode_Catalog.process_sensor_response_0001.prof").exists()
+
+
+def test_profile_firmware(client, tmp_path):
+    """Ensure polls are tagged by the firmware callable."""
+    with Profiler(str(tmp_path), every=1, firmware=lambda client: "X11 2.1"):
+        client.get_metrics(["sensor"])
+
+    assert (tmp_path / "10.0.0.1_X11_2.1_0001.prof").exists()
+
+
+def test_install_from_env(tmp_path):
+    """Ensure SMBMC_PROFILE installs a profiler."""
+    assert install_from_env({}) is None
+
+    profiler = install_from_env(
+        {"SMBMC_PROFILE": str(tmp_path), "SMBMC_PROFILE_EVERY": "5"}
+    )
+    try:
+        assert profiler.every == 5
+        assert Client.get_metrics.__smbmc_profiled__
+    finally:
+        profiler.uninstall()
+
+
+def test_tracemalloc_started_elsewhere(client, tmp_path):
+    """Ensure tracing started by the application is left running."""
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        with Profiler(str(tmp_path / "a"), every=10):
+            client.get_metrics(["sensor"])
+        assert tracemalloc.is_tracing()
+
+        with Profiler(str(tmp_path / "b"), every=10):
+            client.get_metrics(["sensor"])
+            # profiles are still written once tracing is stopped
+            tracemalloc.stop()
+    finally:
+        tracemalloc.stop()
+
+    assert sorted(p.name for p in (tmp_path / "a").iterdir()) == [
+        "10.0.0.1_3.48_0001.alloc.txt",
+        "10.0.0.1_3.48_0001.prof",
+    ]
+    assert [p.name for p in (tmp_path / "b").iterdir()] == ["10.0.0.1_3.48_0001.prof"]
@@ -0,0 +1,125 @@
+"""Unit tests for the replay load generator."""
+import json
+
+import pytest
+
+from smbmc import cli
+from smbmc.fleet import Fleet
+from smbmc.replay import _poll_all
+from smbmc.replay import CassetteSessionFactory
+from smbmc.transport import load_cassette
+from smbmc.replay import replay
+from smbmc.replay import ReplayReport
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+SENSORS_ONLY = "tests/integration/cassettes/Client_get_sensor_metrics.json"
+
+
+def test_load_cassette():
+    """Ensure responses are keyed by path and form data."""
+    responses = load_cassette(CASSETTE)
+
+    key = ("/cgi/ipmi.cgi", (("SENSOR_INFO.XML", "(1,ff)"),))
+    assert responses[key].lstrip().startswith('<?xml version="1.0"?>')
+    assert ("/cgi/ipmi.cgi", (("Get_PSInfoReadings.XML", "(0,0)"),)) in responses
+
+
+def test_load_base64_cassette(tmp_path):
+    """Ensure base64-encoded response bodies are decoded."""
+    from base64 import b64encode
+
+    with open(CASSETTE) as f:
+        cassette = json.load(f)
+    for interaction in cassette["http_interactions"]:
+        body = interaction["response"]["body"]
+        encoded = body.pop("string").encode(body["encoding"] or "utf-8")
+        body["base64_string"] = b64encode(encoded).decode()
+    path = tmp_path / "cassette.json"
+    path.write_text(json.dumps(cassette))
+
+    assert load_cassette(str(path)) == load_cassette(CASSETTE)
+
+
+def test_session_factory():
+    """Ensure each host is served its cassette, and others fail."""
+    session = CassetteSessionFactory({"http://a": CASSETTE})()
+
+    assert session.post("http://a/cgi/login.cgi").cookies == {"SID": "replay"}
+    assert (
+        "SENSOR"
+        in session.post(
+            "http://a/cgi/ipmi.cgi", data={"SENSOR_INFO.XML": "(1,ff)"}
+        ).text
+    )
+    with pytest.raises(Exception, match="no response"):
+        session.post("http://a/cgi/ipmi.cgi", data={"SEL_INFO.XML": "(1,ff)"})
+    with pytest.raises(Exception, match="no response"):
+        session.post("http://b/cgi/ipmi.cgi", data={"SENSOR_INFO.XML": "(1,ff)"})
+    assert session.requests == []
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_replay(concurrency):
+    """Ensure every poll is decoded and reported."""
+    report = replay(
+        [CASSETTE, SENSORS_ONLY],
+        polls=20,
+        concurrency=concurrency,
+        metrics=["sensor"],
+    )
+
+    assert report.polls == 20
+    assert report.errors == 0
+    assert report.polls_per_second > 0
+    assert 0 < report.percentile(50) <= report.percentile(99.9)
+    assert report.memory_peak > 0
+    assert "polls/s" in str(report)
+
+
+def test_replay_rate():
+    """Ensure polls are paced to the target rate."""
+    report = replay([CASSETTE], polls=5, rate=100, trace_memory=False)
+
+    assert report.duration >= 0.04
+    assert report.memory_growth is None
+    assert "memory" not in str(report)
+
+
+def test_replay_errors():
+    """Ensure missing cassettes and metrics are reported."""
+    with pytest.raises(ValueError):
+        replay([])
+    with pytest.raises(Exception, match="no response for"):
+        replay([SENSORS_ONLY], metrics=["pmbus"])
+
+
+def test_poll_errors():
+    """Ensure polls failing after the warm-up are counted, not raised."""
+    fleet = Fleet(session=CassetteSessionFactory({"http://a": CASSETTE})())
+    clients = [fleet.add("http://a"), fleet.add("http://b")]
+
+    latencies, errors, _ = _poll_all(clients, ["sensor"], 4, None, 1)
+
+    assert errors == 2
+    assert len(latencies) == 4
+
+
+def test_shared_cassette():
+    """Ensure a cassette replayed for several hosts is loaded once."""
+    report = replay([CASSETTE, CASSETTE], polls=4, trace_memory=False)
+    assert (report.polls, report.errors) == (4, 0)
+
+
+def test_percentile():
+    """Ensure percentiles use the nearest rank."""
+    report = ReplayReport(4, 0, 1.0, [0.4, 0.1, 0.3, 0.2], None, None)
+    assert report.percentile(50) == 0.2
+    assert report.percentile(75) == 0.3
+    assert report.percentile(99) == 0.4
+    assert ReplayReport(0, 0, 0, [], None, None).percentile(50) == 0.0
+
+
+def test_cli(capsys):
+    """Ensure the replay command prints a report."""
+    assert cli.main(["replay", CASSETTE, "-n", "3", "--no-trace-memory"]) == 0
+    assert capsys.readouterr().out.startswith("polls      3 (0 errors)")
@@ -0,0 +1,113 @@
+"""Unit tests for the serializers."""
+import json
+import pickle  # nosec
+
+import pytest
+
+from smbmc import serialize
+from smbmc.models import SensorSet
+from smbmc.models import SensorTypeEnum
+from smbmc.models import SensorUnitEnum
+
+try:
+    import msgpack  # noqa: F401
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+def assert_same_snapshot(actual, expected):
+    """Ensure two snapshots hold the same values.
+
+    Args:
+        actual: Deserialized snapshot.
+        expected: Original snapshot.
+    """
+    assert actual.keys() == expected.keys()
+    assert isinstance(actual["sensor"], SensorSet)
+    assert [vars(s) for s in actual["sensor"]] == [vars(s) for s in expected["sensor"]]
+    assert [vars(p) for p in actual["pmbus"]] == [vars(p) for p in expected["pmbus"]]
+
+
+def test_sensor_dict(metrics):
+    """Ensure sensors convert to plain dicts and back."""
+    sensor = metrics["sensor"][0]
+
+    data = serialize.sensor_to_dict(sensor)
+    assert data["name"] == "System Temp"
+    assert type(data["type"]) is int
+    assert data["type"] == SensorTypeEnum.TEMPERATURE
+    assert serialize.sensor_to_dict(sensor, enums="name")["unit"] == ("DEGREES_CELSIUS")
+
+    for enums in ("int", "name"):
+        rebuilt = serialize.sensor_from_dict(serialize.sensor_to_dict(sensor, enums))
+        assert vars(rebuilt) == vars(sensor)
+        assert rebuilt.unit is SensorUnitEnum.DEGREES_CELSIUS
+
+    with pytest.raises(ValueError):
+        serialize.sensor_to_dict(sensor, enums="str")
+
+
+def test_discrete_flags(metrics):
+    """Ensure discrete sensor flags serialize as ints."""
+    sensor = metrics["sensor"].get("PS2 Status")
+
+    row = serialize.sensor_to_row(sensor, enums="name")
+    assert row[5] == 1
+    assert type(row[5]) is int
+    assert serialize.sensor_from_row(row).flags == sensor.flags
+
+
+def test_power_supply_dict(metrics):
+    """Ensure power supplies convert to dicts and rows, and back."""
+    power_supply = metrics["pmbus"][1]
+
+    data = serialize.power_supply_to_dict(power_supply)
+    assert data == vars(power_supply)
+    assert vars(serialize.power_supply_from_dict(data)) == vars(power_supply)
+
+    row = serialize.power_supply_to_row(power_supply)
+    assert vars(serialize.power_supply_from_row(row)) == vars(power_supply)
+
+
+@pytest.mark.parametrize("enums", ["int", "name"])
+def test_snapshot_dict(metrics, enums):
+    """Ensure snapshots survive a JSON round trip as dicts."""
+    data = json.loads(json.dumps(serialize.snapshot_to_dict(metrics, enums)))
+    assert_same_snapshot(serialize.snapshot_from_dict(data), metrics)
+
+
+@pytest.mark.parametrize("enums", ["int", "name"])
+def test_json(metrics, enums):
+    """Ensure compact JSON round trips."""
+    data = serialize.dumps(metrics, enums)
+
+    assert '": ' not in data
+    assert len(data) < len(json.dumps(serialize.snapshot_to_dict(metrics))) / 2
+    assert_same_snapshot(serialize.loads(data), metrics)
+    assert_same_snapshot(pickle.loads(pickle.dumps(serialize.loads(data))), metrics)
+
+
+def test_partial_snapshot(metrics):
+    """Ensure snapshots holding a single metric round trip."""
+    sensors_only = {"sensor": metrics["sensor"]}
+    assert serialize.loads(serialize.dumps(sensors_only)).keys() == {"sensor"}
+    pmbus_only = {"pmbus": metrics["pmbus"]}
+    assert serialize.loads(serialize.dumps(pmbus_only)).keys() == {"pmbus"}
+    for partial in (sensors_only, pmbus_only, {}):
+        data = serialize.snapshot_to_dict(partial)
+        assert data.keys() == partial.keys()
+        assert serialize.snapshot_from_dict(data).keys() == partial.keys()
+
+
+def test_unsupported_version():
+    """Ensure documents from another format version are rejected."""
+    with pytest.raises(ValueError):
+        serialize.loads('{"v":2,"sensor":[]}')
+
+
+@pytest.mark.skipif(msgpack is None, reason="requires msgpack")
+def test_msgpack(metrics):
+    """Ensure msgpack round trips."""
+    data = serialize.packb(metrics, enums="name")
+    assert isinstance(data, bytes)
+    assert_same_snapshot(serialize.unpackb(data), metrics)
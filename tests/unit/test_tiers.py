@@ -0,0 +1,181 @@
+"""Unit tests for tiered polling."""
+import re
+
+import pytest
+
+from smbmc import Client
+from smbmc.catalog import Catalog
+from smbmc.tiers import TieredPoller
+from smbmc.transport import FakeTransport
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+SENSOR_XML = open("tests/unit/ipmi_response_sensors.xml").read()
+
+
+def sensor_xml(number: str, reading: str) -> str:
+    """Response holding a single sensor, with another reading.
+
+    Args:
+        number: NUMBER of the sensor.
+        reading: READING of the sensor.
+
+    Returns:
+        str: XML response.
+    """
+    item = re.search(f'<SENSOR [^>]*NUMBER="{number}"[^>]*/>', SENSOR_XML).group()
+    item = re.sub('READING="[^"]*"', f'READING="{reading}"', item)
+    return f"<IPMI><SENSOR_INFO>{item}</SENSOR_INFO></IPMI>"
+
+
+@pytest.fixture
+def transport():
+    """Fake transport answering full and single sensor requests.
+
+    Returns:
+        FakeTransport: The transport.
+    """
+    transport = FakeTransport.from_cassette(CASSETTE)
+    transport.add({"SENSOR_INFO.XML": "(1,ff)"}, SENSOR_XML)
+    transport.add({"SENSOR_INFO.XML": "(1,10)"}, sensor_xml("10", "1ec000"))
+    return transport
+
+
+def sensor_requests(transport) -> list:
+    """SENSOR_INFO arguments sent, in order.
+
+    Args:
+        transport: Fake transport.
+
+    Returns:
+        list: Arguments.
+    """
+    return [data.get("SENSOR_INFO.XML") for _, data, _ in transport.requests][1:]
+
+
+def test_tiers(transport):
+    """Ensure the fast tier is merged into the last full poll."""
+    client = Client("http://bmc", "user", "pass", transport=transport)
+    poller = TieredPoller(client, ["System Temp", "CPU Temp"])
+
+    full = poller.get_metrics(["sensor"])["sensor"]
+    assert poller.missing == ["CPU Temp"]
+    fast = poller.get_metrics(["sensor"])["sensor"]
+    assert sensor_requests(transport) == ["(1,ff)", "(1,10)"]
+    assert (poller.full_polls, poller.fast_polls) == (1, 1)
+
+    assert len(fast) == len(full) == 28
+    assert (fast[0].id, fast[0].reading) == (0, 30.0)
+    assert fast.get("System Temp") is fast[0]
+    assert full[0].reading == 25.0
+    assert fast[1:] == full[1:]
+
+    poller._full_due = 0.0
+    assert poller.get_metrics(["sensor"])["sensor"][0].reading == 25.0
+    assert sensor_requests(transport)[-1] == "(1,ff)"
+
+
+def test_catalog(transport):
+    """Ensure the fast tier is decoded as the client decodes sensors."""
+    client = Client(
+        "http://bmc", "user", "pass", transport=transport, catalog=Catalog()
+    )
+    poller = TieredPoller(client, ["System Temp"])
+
+    poller.get_metrics(["sensor"])
+    fast = poller.get_metrics(["sensor"])["sensor"]
+    assert (fast[0].id, fast[0].reading) == (0, 30.0)
+    assert client.catalog.boards == 2
+
+
+def test_ignored_selection(transport):
+    """Ensure firmware answering every sensor costs a single request."""
+    transport.add({"SENSOR_INFO.XML": "(1,41)"}, SENSOR_XML)
+    client = Client("http://bmc", "user", "pass", transport=transport)
+    poller = TieredPoller(client, ["FAN1", "System Temp"])
+
+    poller.get_metrics(["sensor"])
+    sensors = poller.get_metrics(["sensor"])["sensor"]
+    assert sensor_requests(transport) == ["(1,ff)", "(1,41)"]
+    assert sensors.get("System Temp").reading == 25.0
+
+
+def test_slow_metrics(transport):
+    """Ensure other metrics are fetched on full polls only."""
+    client = Client("http://bmc", "user", "pass", transport=transport)
+    poller = TieredPoller(client, ["System Temp"], slow_interval=60.0)
+
+    snapshots = [metrics for _, metrics in poller.watch(0.01, count=3)]
+    assert [len(metrics["pmbus"]) for metrics in snapshots] == [4] * 3
+    assert snapshots[2]["pmbus"] is snapshots[0]["pmbus"]
+    assert [data for _, data, _ in transport.requests[1:]] == [
+        {"Get_PSInfoReadings.XML": "(0,0)"},
+        {"SENSOR_INFO.XML": "(1,ff)"},
+        {"SENSOR_INFO.XML": "(1,10)"},
+        {"SENSOR_INFO.XML": "(1,10)"},
+    ]
+
+    with pytest.raises(ValueError):
+        TieredPoller(client, [], slow_interval=0)
+
+
+def test_invalid_metrics(transport):
+    """Ensure duplicate and unknown metrics are rejected."""
+    client = Client("http://bmc", "user", "pass", transport=transport)
+    poller = TieredPoller(client, ["System Temp"])
+
+    with pytest.raises(Exception, match="duplicates"):
+        poller.get_metrics(["sensor", "sensor"])
+    with pytest.raises(Exception, match="invalid"):
+        poller.get_metrics(["sel"])
+
+
+def test_empty_fast_tier(transport):
+    """Ensure a fast tier unknown to the BMC repeats the last full poll."""
+    client = Client("http://bmc", "user", "pass", transport=transport)
+    poller = TieredPoller(client, ["nonexistent"])
+
+    full = poller.get_metrics(["sensor"])["sensor"]
+    assert poller.missing == ["nonexistent"]
+    assert poller.get_metrics(["sensor"])["sensor"] is full
+    assert sensor_requests(transport) == ["(1,ff)"]
+
+
+class TimeoutTransport(FakeTransport):
+    """Fake transport timing out on sensor requests."""
+
+    def post(self, url, data=None, cookies=None, timeout=None):
+        """Answer a request, timing out on SENSOR_INFO.XML.
+
+        Args:
+            url: Request URL.
+            data: Form data.
+            cookies: Cookies sent in addition to those held.
+            timeout: Ignored.
+
+        Returns:
+            Response: Response body and cookies.
+
+        Raises:
+            TimeoutError: The request is for sensors.
+        """
+        if data and "SENSOR_INFO.XML" in data:
+            raise TimeoutError("timed out")
+        return super().post(url, data, cookies, timeout)
+
+
+def test_late_sensors():
+    """Ensure sensors not fetched within the budget are reported missing."""
+    transport = TimeoutTransport.from_cassette(CASSETTE)
+    client = Client("http://bmc", "user", "pass", transport=transport)
+    poller = TieredPoller(client, ["System Temp"])
+
+    errors = []
+    result = poller.get_metrics(["pmbus", "sensor"], errors, budget=5.0)
+    assert result["sensor"] is None
+    assert len(result["pmbus"]) == 4
+    assert [error.metric for error in errors] == ["sensor"]
+    assert isinstance(errors[0].cause, TimeoutError)
+
+    assert poller.get_metrics(["sensor"], budget=5.0) == {"sensor": None}
+    with pytest.raises(TimeoutError):
+        poller.get_metrics(["sensor"])
@@ -0,0 +1,164 @@
+"""Unit tests for the HTTP transports."""
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from urllib.parse import parse_qsl
+
+import pytest
+
+from smbmc import AuthenticationError
+from smbmc import Client
+from smbmc.transport import FakeTransport
+from smbmc.transport import RequestsTransport
+from smbmc.transport import Urllib3Transport
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+SENSOR_XML = open("tests/unit/ipmi_response_sensors.xml").read()
+
+
+def test_fake_transport():
+    """Ensure Client is driven by a fake transport, without a network."""
+    transport = FakeTransport.from_cassette(CASSETTE)
+    client = Client("http://bmc", "user", "pass", transport=transport)
+
+    metrics = client.get_metrics()
+    metrics = client.get_metrics()
+
+    assert len(metrics["pmbus"]) == 4
+    assert len(metrics["sensor"]) == 28
+    urls = [url for url, _, _ in transport.requests]
+    assert urls == ["http://bmc/cgi/login.cgi"] + ["http://bmc/cgi/ipmi.cgi"] * 4
+    assert transport.requests[-1][2] == {"SID": "fake"}
+
+
+def test_fake_transport_bad_auth():
+    """Ensure logins with other credentials fail."""
+    transport = FakeTransport(username="user", password="pass")
+    client = Client("http://bmc", "user", "wrong", transport=transport)
+
+    with pytest.raises(AuthenticationError, match="Authentication Error"):
+        client.login()
+
+
+def test_fake_transport_add():
+    """Ensure added responses are served, and others fail."""
+    transport = FakeTransport()
+    transport.add({"SENSOR_INFO.XML": "(1,ff)"}, SENSOR_XML)
+    client = Client("http://bmc", "user", "pass", transport=transport)
+
+    assert len(client.get_sensor_metrics()) == 28
+    with pytest.raises(Exception, match="no response"):
+        client.get_pmbus_metrics()
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Minimal BMC web interface."""
+
+    def do_POST(self):  # noqa: N802
+        """Answer logins with a SID, and queries made with it with sensors."""
+        length = int(self.headers["Content-Length"])
+        data = dict(parse_qsl(self.rfile.read(length).decode()))
+        self.server.requests.append((self.path, data, self.headers.get("Cookie")))
+        if self.path == "/cgi/login.cgi":
+            body = b""
+            self.send_response(200)
+            if data.get("pwd") == "pass":
+                self.send_header("Set-Cookie", "SID=abc123; path=/; HttpOnly")
+        elif self.headers.get("Cookie") == "SID=abc123":
+            body = SENSOR_XML.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/xml; charset=utf-8")
+        else:
+            body = b""
+            self.send_response(403)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Do not log requests.
+
+        Args:
+            *args: Ignored.
+        """
+
+
+@pytest.fixture
+def server():
+    """Local HTTP server.
+
+    Yields:
+        HTTPServer: The server, recording requests.
+    """
+    httpd = HTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    thread.join()
+
+
+@pytest.mark.parametrize("transport_class", [RequestsTransport, Urllib3Transport])
+def test_http_transports(server, transport_class):
+    """Ensure the HTTP transports hold the SID and decode responses.
+
+    Args:
+        server: Local HTTP server.
+        transport_class: Transport class.
+    """
+    transport = transport_class(timeout=5)
+    host = f"http://127.0.0.1:{server.server_port}"
+    client = Client(host, "user", "pass", transport=transport)
+
+    sensors = client.get_sensor_metrics()
+    transport.close()
+
+    assert len(sensors) == 28
+    assert transport.cookies.get("SID") == "abc123"
+    assert server.requests == [
+        ("/cgi/login.cgi", {"name": "user", "pwd": "pass"}, None),
+        ("/cgi/ipmi.cgi", {"SENSOR_INFO.XML": "(1,ff)"}, "SID=abc123"),
+    ]
+
+    with pytest.raises(AuthenticationError, match="Authentication Error"):
+        Client(host, "user", "wrong", transport=transport_class(timeout=5)).login()
+
+
+def test_http_transports_given_clients(server):
+    """Ensure a session or pool manager is used as-is when given."""
+    from requests import Session
+    from urllib3 import PoolManager
+
+    session = Session()
+    pool_manager = PoolManager(retries=False)
+    host = f"http://127.0.0.1:{server.server_port}"
+    for transport in (
+        RequestsTransport(session=session, timeout=5),
+        Urllib3Transport(pool_manager=pool_manager, timeout=5),
+    ):
+        Client(host, "user", "pass", transport=transport).login()
+        assert transport.cookies.get("SID") == "abc123"
+
+    assert session.cookies.get("SID") == "abc123"
+    assert pool_manager.pools
+    session.close()
+    pool_manager.clear()
+
+
+def test_urllib3_transport_shared(server):
+    """Ensure cookies can be sent per request rather than held."""
+    transport = Urllib3Transport(keep_cookies=False, timeout=5)
+    host = f"http://127.0.0.1:{server.server_port}"
+
+    r = transport.post(f"{host}/cgi/login.cgi", data={"name": "u", "pwd": "pass"})
+    assert r.cookies == {"SID": "abc123"}
+    assert transport.cookies == {}
+
+    r = transport.post(
+        f"{host}/cgi/ipmi.cgi",
+        data={"SENSOR_INFO.XML": "(1,ff)"},
+        cookies={"SID": "abc123"},
+    )
+    assert r.text == SENSOR_XML
@@ -1,9 +1,12 @@
 """Unit tests for utility functions."""
 import pytest
 
+from smbmc.util import byte_value
 from smbmc.util import contains_duplicates
 from smbmc.util import contains_valid_items
 from smbmc.util import extract_xml_attr
+from smbmc.util import hex_fields
+from smbmc.util import HexCache
 from smbmc.util import hex_signed_int
 from smbmc.util import signed_int
 from smbmc.util import ten_bit_str
@@ -116,6 +119,33 @@ def test_ten_bit_str(two_byte_string, ten_bit_int):
     assert ten_bit_str(two_byte_string) == ten_bit_int
 
 
+def test_hex_fields():
+    """Check fields are decoded into consecutive bytes."""
+    assert hex_fields(["1a", "FF", "0040"]) == b"\x1a\xff\x00\x40"
+
+    with pytest.raises(ValueError):
+        hex_fields(["1a", "F"])
+    with pytest.raises(ValueError):
+        hex_fields(["1a", "100", "0"])
+
+
+def test_hex_cache():
+    """Check values are parsed once, and the cache is cleared when full."""
+    cache = HexCache(maxsize=2)
+
+    assert cache["ff"] == 255
+    assert cache["0x10"] == 16
+    assert len(cache) == 2
+    assert cache["ff"] == 255
+    assert len(cache) == 2
+
+    assert cache["1"] == 1
+    assert list(cache) == ["1"]
+
+    with pytest.raises(ValueError):
+        cache["zz"]
+
+
 @pytest.mark.parametrize(
     "xml_file,selector,expected_length",
     [
@@ -159,3 +189,17 @@ def test_extract_xml(xml_file, selector, expected_length):
 
     assert extracted_list is not None
     assert len(extracted_list) == expected_length
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [("1", 1), ("a1", 0xA1), ("1ff", 0xFF), (3, 3), (None, 0xFF), ("", 0xFF)],
+)
+def test_byte_value(value, expected):
+    """Ensure attributes are squeezed into a byte.
+
+    Args:
+        value: Hex string, int or None.
+        expected: Byte value.
+    """
+    assert byte_value(value) == expected
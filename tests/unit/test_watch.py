@@ -0,0 +1,177 @@
+"""Unit tests for periodic polling."""
+import asyncio
+from collections import deque
+from time import monotonic
+from time import sleep
+
+import pytest
+
+from smbmc import Client
+from smbmc.transport import FakeTransport
+from smbmc.watch import Schedule
+
+CASSETTE = "tests/integration/cassettes/Client_get_metrics.json"
+
+
+@pytest.fixture
+def client():
+    """Client answered by a fake transport.
+
+    Returns:
+        Client: The client.
+    """
+    transport = FakeTransport.from_cassette(CASSETTE)
+    return Client("http://bmc", "user", "pass", transport=transport)
+
+
+def test_schedule(monkeypatch):
+    """Ensure ticks passed by a late caller are skipped and counted."""
+    now = iter([10.0, 10.02, 10.37, 10.41])
+    monkeypatch.setattr("smbmc.watch.monotonic", lambda: next(now))
+    schedule = Schedule(0.1)
+
+    assert schedule.delay() == 0.0
+    schedule.tick += 1
+    assert schedule.delay() == pytest.approx(0.08)
+    schedule.tick += 1
+    assert schedule.delay() == 0.0
+    assert (schedule.tick, schedule.skipped) == (3, 1)
+    # late, but within the tick
+    schedule.tick += 1
+    assert schedule.delay() == 0.0
+    assert (schedule.tick, schedule.skipped) == (4, 1)
+
+    with pytest.raises(ValueError, match="interval must be positive"):
+        Schedule(0)
+
+
+def test_watch_drift_free(client, monkeypatch):
+    """Ensure slow polls and consumers do not accumulate lag."""
+    get_metrics = client.get_metrics
+
+    def slow_get_metrics(*args, **kwargs):
+        sleep(0.01)
+        return get_metrics(*args, **kwargs)
+
+    monkeypatch.setattr(client, "get_metrics", slow_get_metrics)
+
+    start = monotonic()
+    snapshots = []
+    for timestamp, metrics in client.watch(0.05, ["sensor"], count=6):
+        snapshots.append((monotonic() - start, timestamp, metrics))
+        sleep(0.02)
+
+    assert [len(metrics["sensor"]) for _, _, metrics in snapshots] == [28] * 6
+    for i, (elapsed, _, _) in enumerate(snapshots):
+        assert i * 0.05 <= elapsed < i * 0.05 + 0.03
+    assert snapshots[-1][1] - snapshots[0][1] == pytest.approx(0.25, abs=0.02)
+    assert len(client.transport.requests) == 1 + 6
+
+
+def test_watch_skips_overrun_ticks(client, monkeypatch):
+    """Ensure ticks overrun by a poll are skipped, not queued."""
+    delays = iter([0.12, 0, 0])
+
+    def get_metrics(metrics, errors=None, budget=None):
+        sleep(next(delays))
+        return {}
+
+    monkeypatch.setattr(client, "get_metrics", get_metrics)
+
+    start = monotonic()
+    watch = client.watch(0.05, count=3)
+    elapsed = [monotonic() - start for _ in watch]
+
+    assert watch.polls == 3
+    assert watch.skipped == 1
+    # ticks 0, 2 (at 0.12, late) and 3
+    assert elapsed[1] == pytest.approx(0.12, abs=0.02)
+    assert elapsed[2] == pytest.approx(0.15, abs=0.02)
+
+
+def test_watch_errors(client, monkeypatch):
+    """Ensure failed polls are collected and skipped, or raised."""
+    results = iter([Exception("down"), {"sensor": []}])
+
+    def get_metrics(metrics, errors=None, budget=None):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(client, "get_metrics", get_metrics)
+    errors = []
+    watch = client.watch(0.01, count=2, errors=errors)
+
+    assert [metrics for _, metrics in watch] == [{"sensor": []}]
+    assert watch.failures == 1
+    assert str(errors[0]) == "down"
+
+    monkeypatch.setattr(client, "get_metrics", get_metrics)
+    results = iter([Exception("down")])
+    with pytest.raises(Exception, match="down"):
+        next(client.watch(0.01))
+
+    with pytest.raises(ValueError):
+        client.watch(0)
+
+
+def test_watch_bounded_errors(client, monkeypatch):
+    """Ensure a deque keeps only the latest failed polls."""
+    polls = iter(range(5))
+
+    def get_metrics(metrics, errors=None, budget=None):
+        raise Exception(f"down {next(polls)}")
+
+    monkeypatch.setattr(client, "get_metrics", get_metrics)
+    errors = deque(maxlen=2)
+    watch = client.watch(0.001, count=5, errors=errors)
+
+    assert list(watch) == []
+    assert watch.failures == 5
+    assert [str(error) for error in errors] == ["down 3", "down 4"]
+
+
+def test_awatch(client):
+    """Ensure the asynchronous variant polls at a fixed rate."""
+
+    async def consume():
+        snapshots = []
+        async for timestamp, metrics in client.awatch(0.03, ["pmbus"], count=4):
+            snapshots.append((timestamp, metrics))
+        return snapshots
+
+    loop = asyncio.new_event_loop()
+    try:
+        snapshots = loop.run_until_complete(consume())
+    finally:
+        loop.close()
+
+    assert [len(metrics["pmbus"]) for _, metrics in snapshots] == [4] * 4
+    assert snapshots[-1][0] - snapshots[0][0] == pytest.approx(0.09, abs=0.02)
+
+
+def test_awatch_errors(client, monkeypatch):
+    """Ensure failed asynchronous polls are collected and skipped."""
+    results = iter([Exception("down"), {"sensor": []}])
+
+    def get_metrics(metrics, errors=None, budget=None):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def consume(watch):
+        return [metrics async for _, metrics in watch]
+
+    monkeypatch.setattr(client, "get_metrics", get_metrics)
+    errors = []
+    watch = client.awatch(0.01, count=2, errors=errors)
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(consume(watch)) == [{"sensor": []}]
+    finally:
+        loop.close()
+
+    assert watch.failures == 1
+    assert str(errors[0]) == "down"